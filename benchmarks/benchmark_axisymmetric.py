@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import pdspy.modeling as modeling
+import pdspy.dust as dust
+import pdspy.gas as gas
+import time
+
+# Set up the dust and gas for a disk and envelope.
+
+d = dust.DustGenerator(dust.__path__[0]+"/data/diana_wice.hdf5")(1.0e-2, 3.5)
+
+g = gas.Gas()
+g.set_properties_from_lambda(gas.__path__[0]+"/data/co.dat")
+
+# Time setting up a model on a Hyperion-like grid, with and without the
+# axisymmetric fast path.
+
+for axisymmetric in [False, True]:
+    t1 = time.time()
+
+    m = modeling.YSOModel()
+    m.set_spherical_grid(0.1, 300., 100, 101, 201, code="hyperion", \
+            axisymmetric=axisymmetric)
+    m.add_star(mass=0.5, luminosity=1., temperature=4000.)
+    m.add_pringle_disk(mass=1.0e-3, rmin=0.1, rmax=50., plrho=1., h0=0.1, \
+            plh=1.1, dust=d, t0=100., plt=0.5, gas=[g], abundance=[1.0e-4], \
+            aturb=0.1)
+    m.add_ulrich_envelope(mass=1.0e-3, rmin=0.1, rmax=300., dust=d, \
+            t0=50., tpl=0.5, gas=[g], abundance=[1.0e-4])
+
+    t2 = time.time()
+
+    nbytes = sum([a.nbytes for a in m.grid.density + m.grid.temperature + \
+            m.grid.number_density + m.grid.velocity])
+
+    print("axisymmetric={0:5s}: {1:6.3f} s, {2:8.1f} MB".format(\
+            str(axisymmetric), t2-t1, nbytes/1e6))
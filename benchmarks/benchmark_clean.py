@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+from pdspy.constants.astronomy import arcsec
+import pdspy.interferometry as uv
+import numpy
+import time
+
+# Make a fake dataset of a clumpy, extended source with a few channels.
+
+nuv, nchannels = 200000, 4
+
+numpy.random.seed(0)
+
+u = numpy.random.normal(0., 2e5, nuv)
+v = numpy.random.normal(0., 2e5, nuv)
+freq = numpy.linspace(230e9, 230.1e9, nchannels)
+
+vis = numpy.zeros((nuv, nchannels), dtype=complex)
+for i in range(200):
+    x0, y0 = numpy.random.normal(0., 1., 2)
+    vis += (0.01 * numpy.exp(-2*numpy.pi*1j*(u*x0 + v*y0)*arcsec) * \
+            numpy.exp(-2*numpy.pi**2*(0.05*arcsec)**2*(u**2 + v**2))).\
+            reshape((nuv,1))
+
+real = vis.real + numpy.random.normal(0., 0.5, (nuv, nchannels))
+imag = vis.imag + numpy.random.normal(0., 0.5, (nuv, nchannels))
+weights = numpy.ones((nuv, nchannels))
+
+data = uv.Visibilities(u, v, freq, real, imag, weights)
+
+# Time the two CLEAN algorithms, with an increasing number of processes.
+
+for algorithm in ["hogbom", "clark"]:
+    for nprocs in [1, 2, 4]:
+        t1 = time.time()
+        clean_image, residuals, beam, model, mask = uv.clean(data, \
+                imsize=512, pixel_size=0.02, mode="spectralline", \
+                maxiter=1000, algorithm=algorithm, nprocs=nprocs)
+        t2 = time.time()
+
+        print("clean {0:6s} nprocs={1:d}: {2:7.3f} s, residual rms = "
+                "{3:8.2e}".format(algorithm, nprocs, t2-t1, \
+                residuals.image.std()))
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import pdspy.imaging as im
+import astropy.wcs
+import numpy
+import time
+
+# Make a fake image of a field full of point sources.
+
+npix, nsources = 2048, 2000
+
+numpy.random.seed(0)
+
+y, x = numpy.mgrid[0:npix,0:npix]
+image = numpy.random.normal(size=(npix, npix))
+
+for x0, y0, f in zip(numpy.random.uniform(10, npix-10, nsources), \
+        numpy.random.uniform(10, npix-10, nsources), \
+        numpy.random.uniform(5, 50, nsources)):
+    xmin, xmax = int(x0)-10, int(x0)+10
+    ymin, ymax = int(y0)-10, int(y0)+10
+
+    image[ymin:ymax,xmin:xmax] += f*numpy.exp(-((x[ymin:ymax,xmin:xmax]-x0)**2 \
+            + (y[ymin:ymax,xmin:xmax]-y0)**2) / (2*2.**2))
+
+wcs = astropy.wcs.WCS(naxis=2)
+wcs.wcs.ctype = ["RA---SIN","DEC--SIN"]
+wcs.wcs.cdelt = [-0.1/3600, 0.1/3600]
+wcs.wcs.crpix = [npix/2, npix/2]
+wcs.wcs.crval = [70., 25.]
+
+header = wcs.to_header()
+header["BMAJ"], header["BMIN"], header["BPA"] = 0.47/3600, 0.47/3600, 0.
+
+image = im.Image(image.reshape((npix,npix,1,1)), \
+        unc=numpy.ones((npix,npix,1,1)), header=header, wcs=wcs)
+
+# Time finding the sources, and fitting them with an increasing number of
+# processes.
+
+t1 = time.time()
+peaks = im.find(image, threshold=5, just_find=True)
+t2 = time.time()
+
+print("find just_find=True: {0:d} peaks, {1:7.3f} s".format(len(peaks), t2-t1))
+
+for nprocs in [1, 2, 4, 8]:
+    t1 = time.time()
+    sources = im.find(image, threshold=5, bootstrap_unc=False, nprocs=nprocs)
+    t2 = time.time()
+
+    print("find nprocs={0:d}: {1:d} sources, {2:7.3f} s".format(nprocs, \
+            len(sources), t2-t1))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+import pdspy.interferometry as uv
+import numpy
+import time
+
+# Make a fake dataset with a realistic number of visibilities and channels.
+
+nuv, nchannels = 1000000, 16
+
+numpy.random.seed(0)
+
+u = numpy.random.normal(0., 3e5, nuv)
+v = numpy.random.normal(0., 3e5, nuv)
+freq = numpy.linspace(230e9, 230.1e9, nchannels)
+real = numpy.random.normal(size=(nuv, nchannels))
+imag = numpy.random.normal(size=(nuv, nchannels))
+weights = numpy.ones((nuv, nchannels))
+
+data = uv.Visibilities(u, v, freq, real, imag, weights)
+
+# Time the gridding and averaging routines with an increasing number of 
+# threads.
+
+for nthreads in [1, 2, 4, 8]:
+    for mode in ["continuum", "spectralline"]:
+        for convolution in ["pillbox", "expsinc"]:
+            t1 = time.time()
+            uv.grid(data, gridsize=512, binsize=4000., \
+                    convolution=convolution, mode=mode, nthreads=nthreads)
+            t2 = time.time()
+
+            print("grid    {0:12s} {1:7s} nthreads={2:d}: {3:7.3f} s".\
+                    format(mode, convolution, nthreads, t2-t1))
+
+        t1 = time.time()
+        uv.average(data, gridsize=512, binsize=4000., mode=mode, \
+                nthreads=nthreads)
+        t2 = time.time()
+
+        print("average {0:12s}         nthreads={1:d}: {2:7.3f} s".\
+                format(mode, nthreads, t2-t1))
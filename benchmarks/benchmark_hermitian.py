@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import pdspy.interferometry as uv
+import numpy
+import time
+
+# Make a fake dataset that only stores one half of the uv-plane, and the same
+# dataset with the complex conjugates included explicitly.
+
+nuv, nchannels = 500000, 10
+
+numpy.random.seed(0)
+
+u = numpy.random.normal(0., 2e5, nuv)
+v = numpy.random.normal(0., 2e5, nuv)
+freq = numpy.linspace(230e9, 230.1e9, nchannels)
+
+real = numpy.random.normal(1., 0.5, (nuv, nchannels))
+imag = numpy.random.normal(0., 0.5, (nuv, nchannels))
+weights = numpy.ones((nuv, nchannels))
+
+half = uv.Visibilities(u, v, freq, real, imag, weights, hermitian=True)
+full = half.add_conjugate()
+
+model_half = uv.Visibilities(u, v, freq, real*0.9, imag*0.9, weights)
+model_full = uv.Visibilities(full.u, full.v, freq, full.real*0.9, \
+        full.imag*0.9, full.weights)
+
+# Time gridding, imaging and chi-squared with both.
+
+for label, data, model in [("doubled", full, model_full), \
+        ("hermitian", half, model_half)]:
+    nbytes = data.real.nbytes + data.imag.nbytes + data.weights.nbytes
+
+    t1 = time.time()
+    gridded = uv.grid(data, gridsize=256, binsize=2000., weighting="robust", \
+            robust=0.5)
+    t2 = time.time()
+    image = uv.invert(data, imsize=256, pixel_size=0.05, mode="spectralline")
+    t3 = time.time()
+    for i in range(20):
+        chisq = uv.chisq(data, model)
+    t4 = time.time()
+
+    print("{0:10s}: {1:6.1f} MB, grid {2:6.3f} s, invert {3:6.3f} s, "
+            "chisq {4:6.4f} s = {5:.6e}".format(label, nbytes/1e6, t2-t1, \
+            t3-t2, (t4-t3)/20, chisq))
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+import subprocess
+import sys
+
+# Time how long it takes to import each part of pdspy in a fresh interpreter,
+# and check which of the heavy dependencies get pulled in along the way.
+
+statements = ["import pdspy", "from pdspy import dust", \
+        "from pdspy import radmc3d", "import pdspy.interferometry as uv", \
+        "import pdspy.imaging as im", "import pdspy.modeling as modeling", \
+        "import pdspy.plotting as plotting", \
+        "from pdspy.interferometry import Visibilities", \
+        "from pdspy.modeling import run_disk_model"]
+
+heavy = ["matplotlib", "galario", "sklearn", "dynesty", "astropy", "h5py"]
+
+code = """
+import time, sys, warnings
+warnings.simplefilter("ignore")
+t1 = time.time()
+{0:s}
+t2 = time.time()
+print(t2 - t1, ",".join([m for m in {1:s} if m in sys.modules]))
+"""
+
+for statement in statements:
+    times = []
+    for i in range(5):
+        output = subprocess.run([sys.executable, "-c", code.format(statement, \
+                str(heavy))], stdout=subprocess.PIPE, \
+                universal_newlines=True).stdout.strip().split("\n")[-1].\
+                split()
+        times.append(float(output[0]))
+
+    loaded = output[1] if len(output) > 1 else ""
+
+    print("{0:48s} {1:6.3f} s   {2:s}".format(statement, min(times), loaded))
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+import pdspy.interferometry as uv
+import pdspy.imaging as im
+from pdspy.constants.astronomy import arcsec
+import numpy
+import time
+
+# Make a model image cube of a Gaussian source.
+
+npix, nchannels = 512, 32
+
+x = numpy.linspace(-(npix-1)/2, (npix-1)/2, npix) * 0.02
+y = x.copy()
+xx, yy = numpy.meshgrid(x, y)
+
+image = numpy.empty((npix, npix, nchannels, 1))
+for i in range(nchannels):
+    image[:,:,i,0] = numpy.exp(-((xx-0.3)**2 + (yy+0.1*i/nchannels)**2) / \
+            (2*0.2**2))
+
+model = im.Image(image, x=x, y=y, freq=numpy.linspace(230e9, 230.1e9, \
+        nchannels))
+
+# Some baselines to sample.
+
+numpy.random.seed(0)
+
+nuv = 100000
+
+u = numpy.random.uniform(-2e6, 2e6, nuv)
+v = numpy.random.uniform(-2e6, 2e6, nuv)
+
+# Calculate the exact visibilities for a subset of the baselines with a direct
+# Fourier transform, to check the accuracy.
+
+nexact = 200
+
+phase = numpy.exp(-2*numpy.pi*1j*(numpy.outer(u[0:nexact], xx.ravel()) + \
+        numpy.outer(v[0:nexact], yy.ravel()))*arcsec)
+exact = phase.dot(image[:,:,:,0].reshape((npix**2, nchannels)))
+
+# Time each of the codes and compare with the exact values. If galario is not
+# installed, code="galario" falls back on degridding the image instead.
+
+for code in ["galario", "native"]:
+    for nthreads in [1, 4]:
+        t1 = time.time()
+        vis = uv.interpolate_model(u, v, model.freq, model, code=code, \
+                nthreads=nthreads)
+        t2 = time.time()
+
+        error = numpy.abs(vis.real[0:nexact] + 1j*vis.imag[0:nexact] - \
+                exact).max() / numpy.abs(exact).max()
+
+        print("{0:8s} nthreads={1:d}: {2:7.3f} s, max. relative error = "
+                "{3:.2e}".format(code, nthreads, t2-t1, error))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import pdspy.interferometry as uv
+import pdspy.utils as utils
+import numpy
+import time
+
+# Make a fake dataset, and a model for it, with 10^7 visibilities.
+
+nuv = 10000000
+
+numpy.random.seed(0)
+
+u = numpy.random.normal(0., 3e5, nuv)
+v = numpy.random.normal(0., 3e5, nuv)
+freq = numpy.array([230e9])
+weights = numpy.random.uniform(0., 1., (nuv, 1))
+weights[0:nuv//10] = 0.
+
+data = uv.Visibilities(u, v, freq, numpy.random.normal(size=(nuv,1)), \
+        numpy.random.normal(size=(nuv,1)), weights)
+
+class Model:
+    visibilities = {"1.3mm":uv.Visibilities(u, v, freq, \
+            numpy.random.normal(size=(nuv,1)), \
+            numpy.random.normal(size=(nuv,1)), numpy.ones((nuv,1)))}
+
+m = Model()
+
+visibilities = {"file":["fake.hdf5"], "lam":["1.3mm"], "data":[data]}
+images = {"file":[]}
+spectra = {}
+
+# The original calculation of the log-likelihood.
+
+def lnlike_old(m):
+    j = 0
+
+    good = visibilities["data"][j].weights > 0
+
+    return -0.5*numpy.sum((visibilities["data"][j].real - \
+            m.visibilities[visibilities["lam"][j]].real)**2 * \
+            visibilities["data"][j].weights) - \
+            numpy.sum(numpy.log(visibilities["data"][j].weights[good]/ \
+            (2*numpy.pi))) + \
+            -0.5*numpy.sum((visibilities["data"][j].imag - \
+            m.visibilities[visibilities["lam"][j]].imag)**2 * \
+            visibilities["data"][j].weights) - \
+            numpy.sum(numpy.log(visibilities["data"][j].weights[good]/ \
+            (2*numpy.pi)))
+
+t1 = time.time()
+old = lnlike_old(m)
+t2 = time.time()
+
+print("original:            {0:7.3f} s, lnlike = {1:.10e}".format(t2-t1, old))
+
+for nthreads in [1, 2, 4]:
+    likelihood = utils.Likelihood(visibilities, images, spectra, \
+            nthreads=nthreads)
+
+    t1 = time.time()
+    new = likelihood(m)
+    t2 = time.time()
+
+    print("Likelihood nthreads={0:d}: {1:7.3f} s, lnlike = {2:.10e}".format(\
+            nthreads, t2-t1, new))
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+import pdspy.dust as dust
+import numpy
+import time
+
+# Set up a dust species on a realistic wavelength grid.
+
+d = dust.Dust()
+d.set_optical_constants_from_henn(dust.__path__[0]+\
+        "/data/optical_constants/amorphous_silicates_extrapolated.txt")
+d.set_density(3.3)
+
+# Time the calculation of the opacities of a grid of grain sizes with an
+# increasing number of threads.
+
+a = numpy.logspace(numpy.log10(0.05e-4), -1., 100)
+
+for nthreads in [1, 2, 4, 8]:
+    for with_dhs in [False, True]:
+        t1 = time.time()
+        d.calculate_size_opacities(a, with_dhs=with_dhs, nf=10, \
+                nthreads=nthreads)
+        t2 = time.time()
+
+        print("calculate_size_opacities with_dhs={0:5s} nthreads={1:d}: "
+                "{2:7.3f} s".format(str(with_dhs), nthreads, t2-t1))
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import pdspy.dust as dust
+import scipy.optimize
+import numpy
+import time
+
+# The original, one wavelength at a time, version of the Bruggeman rule.
+
+def bruggeman(meff, species, abundance, index, filling):
+    m_eff = meff[0]+1j*meff[1]
+    tot = 0+0j
+
+    for j in range(len(species)):
+        tot += filling * abundance[j]*(species[j].m[index]**2-m_eff**2)/ \
+                (species[j].m[index]**2+2*m_eff**2)
+
+    tot += (1 - filling) * (1. - m_eff**2) / (1. + 2*m_eff**2)
+
+    return numpy.array([tot.real,tot.imag])
+
+def mix_dust_fsolve(species, abundance, filling=1.):
+    meff = numpy.zeros(species[0].lam.size, dtype=complex)
+
+    for i in range(species[0].lam.size):
+        temp = scipy.optimize.fsolve(bruggeman, numpy.array([1.0,0.0]), \
+                args=(species, abundance, i, filling))
+        meff[i] = temp[0]+1j*temp[1]
+
+    return meff
+
+# Set up some species on a fine wavelength grid.
+
+lam = numpy.logspace(-4.99, -0.01, 2000)
+
+species = []
+for filename, form, rho in [("astronomical_silicates.txt", "draine", 3.3), \
+        ("amorphous_carbon_zubko1996_extrapolated.txt", "henn", 1.0), \
+        ("water_ice.txt", "henn", 0.92), ("troilite.txt", "henn", 4.83)]:
+    d = dust.Dust()
+    getattr(d, "set_optical_constants_from_"+form)(dust.__path__[0]+\
+            "/data/optical_constants/"+filename)
+    d.set_density(rho)
+    d.calculate_optical_constants_on_wavelength_grid(lam)
+    species.append(d)
+
+# Compare the two for a range of mixtures.
+
+for nspecies in [1, 2, 3, 4]:
+    for filling in [1., 0.75]:
+        abundance = numpy.ones(nspecies) / nspecies
+
+        t1 = time.time()
+        old = mix_dust_fsolve(species[0:nspecies], abundance, filling=filling)
+        t2 = time.time()
+        new = dust.mix_dust(species[0:nspecies], abundance, filling=filling).m
+        t3 = time.time()
+
+        print("nspecies={0:d} filling={1:4.2f}: fsolve {2:7.3f} s, "
+                "vectorized {3:7.4f} s, max. rel. difference {4:8.2e}".format(\
+                nspecies, filling, t2-t1, t3-t2, \
+                numpy.abs(new/old - 1).max()))
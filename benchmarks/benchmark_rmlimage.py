@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+from pdspy.constants.astronomy import arcsec
+import pdspy.interferometry as uv
+import numpy
+import time
+
+# Make a fake dataset of a clumpy, extended source.
+
+nuv, sigma = 100000, 0.1
+
+numpy.random.seed(0)
+
+u = numpy.random.normal(0., 2e5, nuv)
+v = numpy.random.normal(0., 2e5, nuv)
+freq = numpy.array([230e9])
+
+vis = numpy.zeros((nuv, 1), dtype=complex)
+for i in range(200):
+    x0, y0 = numpy.random.normal(0., 0.5, 2)
+    vis += (0.01 * numpy.exp(-2*numpy.pi*1j*(u*x0 + v*y0)*arcsec) * \
+            numpy.exp(-2*numpy.pi**2*(0.05*arcsec)**2*(u**2 + v**2))).\
+            reshape((nuv,1))
+
+real = vis.real + numpy.random.normal(0., sigma, (nuv, 1))
+imag = vis.imag + numpy.random.normal(0., sigma, (nuv, 1))
+weights = numpy.ones((nuv, 1)) / sigma**2
+
+data = uv.Visibilities(u, v, freq, real, imag, weights)
+
+# Time the imaging with a few different regularizers.
+
+def callback(niter, chisq, value, image):
+    if niter % 50 == 0:
+        print("    iteration {0:4d}: reduced chi^2 = {1:6.3f}".format(niter, \
+                chisq / (2*nuv)))
+
+for entropy, tsv, l1 in [(1., 0., 0.), (0., 1e3, 0.), (0., 0., 10.)]:
+    t1 = time.time()
+    image = uv.rmlimage(data, imsize=256, pixelsize=0.02, entropy=entropy, \
+            tsv=tsv, l1=l1, maxiter=200, callback=callback)
+    t2 = time.time()
+
+    print("rmlimage entropy={0:g} tsv={1:g} l1={2:g}: {3:7.3f} s, total "
+            "flux = {4:5.3f}".format(entropy, tsv, l1, t2-t1, \
+            image.image.sum()))
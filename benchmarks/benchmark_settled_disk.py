@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+
+import pdspy.modeling as modeling
+import pdspy.dust as dust
+import time
+
+# Set up the dust generator for a settled disk, including the grain density,
+# which the table doesn't store. Generate one Dust first so that any one-off
+# setup isn't included in the timing.
+
+dust_gen = dust.DustGenerator(dust.__path__[0]+"/data/diana_wice.hdf5")
+dust_gen.rho = 1.675
+dust_gen(1.0e-2, 3.5)
+
+# Time setting up a settled disk model with every grain size bin as its own
+# dust species, and with the bins grouped into a few species.
+
+for nspecies in [None, 10, 5]:
+    t1 = time.time()
+
+    m = modeling.YSOModel()
+    m.set_spherical_grid(0.1, 300., 100, 101, 2, code="radmc3d")
+    m.add_star(mass=0.5, luminosity=1., temperature=4000.)
+    m.add_settled_disk(mass=1.0e-3, rmin=0.1, rmax=50., plrho=1., h0=0.1, \
+            plh=1.1, dust=dust_gen, amin=1., amax=1000., pla=3.5, na=100, \
+            nspecies=nspecies)
+
+    t2 = time.time()
+
+    nbytes = sum([a.nbytes for a in m.grid.density])
+    mass = sum([a.sum() for a in m.grid.density])
+
+    print("nspecies={0:4s}: {1:3d} species, {2:6.3f} s, {3:7.1f} MB, "
+            "total density = {4:.6e}".format(str(nspecies), \
+            len(m.grid.density), t2-t1, nbytes/1e6, mass))
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+
+from pdspy.modeling import SurrogateModel
+import time
+import sys
+
+# The directory with the surrogate model can be given on the command line,
+# otherwise the one installed with pdspy is used.
+
+directory = sys.argv[1] if len(sys.argv) > 1 else None
+
+params = {"logM_disk":-4., "logR_disk":2., "h_0":0.1, "logR_in":-1., \
+        "gamma":1., "beta":1., "logM_env":-3., "logR_env":3., "f_cav":0.5, \
+        "ksi":1., "loga_max":0., "p":3.5, "logL_star":0., "T_star":4000., \
+        "logR_c":2., "i":45.}
+
+# Time loading the surrogate model, and then predicting the temperature for
+# one model at a time and for many at once, drawing new hyperparameters for
+# every prediction and with a few draws conditioned ahead of time.
+
+for nsamples in [None, 10]:
+    t1 = time.time()
+    surrogate = SurrogateModel(directory=directory, nsamples=nsamples)
+    t2 = time.time()
+    for i in range(20):
+        temperature = surrogate(params)
+    t3 = time.time()
+    temperature = surrogate.predict([params for i in range(20)])
+    t4 = time.time()
+
+    print("nsamples={0:4s}: load {1:6.3f} s, single {2:7.4f} s per model, "
+            "batch {3:7.4f} s per model".format(str(nsamples), t2-t1, \
+            (t3-t2)/20, (t4-t3)/20))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+from pdspy.modeling import ThermalCache, check_parameters
+import tempfile
+import numpy
+import time
+
+# Set up a fit with a few free parameters, and the parameter values that
+# run_disk_model would use for a proposed model.
+
+parameters = check_parameters({\
+        "logM_disk":{"fixed":False, "value":-4., "limits":[-10.,-2.5]}, \
+        "logR_disk":{"fixed":False, "value":2., "limits":[0.,4.]}, \
+        "h_0":{"fixed":False, "value":0.1, "limits":[0.01,0.5]}, \
+        "i":{"fixed":False, "value":45., "limits":[0.,180.]}, \
+        "pa":{"fixed":False, "value":0., "limits":[0.,360.]}})
+
+def get_p(params):
+    p = {}
+    for key in parameters:
+        if parameters[key]["fixed"]:
+            p[key] = parameters[key]["value"]
+        else:
+            p[key] = params[key]
+        if key[0:3] == "log" and type(p[key]) != str:
+            p[key[3:]] = 10.**p[key]
+
+    return p
+
+numpy.random.seed(0)
+
+proposals = [dict(zip(["logM_disk","logR_disk","h_0","i","pa"], \
+        [-4. + 0.1*numpy.random.randn(), 2. + 0.1*numpy.random.randn(), \
+        0.1 + 0.01*numpy.random.randn(), 45., 0.])) for j in range(50)]
+
+# Fill a cache with the temperatures of the proposed models, as a fit would.
+
+temperature = [numpy.random.uniform(10., 100., (100,100,2))]
+specific_energy = [numpy.random.uniform(0., 1., (101,201,2))]
+
+with tempfile.TemporaryDirectory() as temp_dir:
+    cache = ThermalCache(temp_dir+"/thermal_cache.hdf5", parameters=parameters)
+
+    t1 = time.time()
+    for params in proposals:
+        cache.add(get_p(params), temperature, \
+                specific_energy=specific_energy, code="hyperion")
+    t2 = time.time()
+
+    # Models that only differ in viewing geometry are exact hits, and new
+    # models get the nearest neighbour to start from.
+
+    hits = 0
+    for params in proposals:
+        params = dict(params, i=numpy.random.uniform(0., 90.))
+        if cache.get(get_p(params), code="hyperion") != None:
+            hits += 1
+    t3 = time.time()
+
+    for params in proposals:
+        params = dict(params, h_0=params["h_0"] * 1.01)
+        energy = cache.nearest(get_p(params), code="hyperion")
+    t4 = time.time()
+
+    print("add {0:7.4f} s, get {1:7.4f} s ({2:d}/{3:d} hits), nearest "
+            "{4:7.4f} s per model".format((t2-t1)/len(proposals), \
+            (t3-t2)/len(proposals), hits, len(proposals), \
+            (t4-t3)/len(proposals)))
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+from pdspy.modeling import UlrichEnvelope
+import numpy
+import time
+
+# Set up a typical envelope grid, and an envelope with a few gas species.
+
+r = numpy.logspace(-1., 3., 100)
+theta = numpy.linspace(0., numpy.pi/2, 101)[1:] - numpy.pi/400
+phi = numpy.array([0.])
+
+envelope = UlrichEnvelope(mass=1.0e-3, rmin=0.1, rmax=1000., rcent=30.)
+for i in range(3):
+    envelope.add_gas(None, 1.0e-4)
+
+# Time setting up everything that a model needs from the envelope, first with
+# a new centrifugal radius, and then again for the same one.
+
+for label in ["new rcent", "cached"]:
+    t1 = time.time()
+    rho = envelope.density(r, theta, phi)
+    for i in range(len(envelope.gas)):
+        n = envelope.number_density(r, theta, phi, gas=i)
+    v = envelope.velocity(r, theta, phi)
+    mdot = envelope.calculate_mdot(r, theta, phi)
+    t2 = time.time()
+
+    print("{0:10s}: {1:7.4f} s, mdot = {2:.6e}".format(label, t2-t1, mdot))
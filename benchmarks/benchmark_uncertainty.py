@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+import pdspy.imaging as im
+import numpy
+import time
+
+# Make a fake residual image, with a region of NaNs like a mosaic edge.
+
+for npix in [512, 1024, 4096]:
+    numpy.random.seed(0)
+
+    residuals = numpy.random.normal(size=(npix, npix, 1, 1))
+    residuals[0:npix//8,:,:,:] = numpy.nan
+
+    residuals = im.Image(residuals)
+    image = im.Image(numpy.zeros(residuals.image.shape))
+
+    # Time the calculation of the noise map.
+
+    for robust in [False, True]:
+        t1 = time.time()
+        image.set_uncertainty_from_image(residuals, box=128, robust=robust)
+        t2 = time.time()
+
+        print("set_uncertainty_from_image npix={0:4d} robust={1:5s}: "
+                "{2:7.3f} s, median noise = {3:5.3f}".format(npix, \
+                str(robust), t2-t1, numpy.nanmedian(image.unc)))
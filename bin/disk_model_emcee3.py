@@ -38,6 +38,8 @@ parser.add_argument('-l', '--nicelevel', type=int, default=19)
 parser.add_argument('-v', '--verbose', action='store_true')
 parser.add_argument('-f', '--ftcode', type=str, default="galario")
 parser.add_argument('--largedata', action='store_true')
+parser.add_argument('--thermalcache', type=str, default=None)
+parser.add_argument('--mmap', action='store_true')
 args = parser.parse_args()
 
 # Check whether we are using MPI.
@@ -129,6 +131,11 @@ if args.withexptaper:
 
 visibilities, images, spectra = utils.load_data(config)
 
+# Calculate the parts of the likelihood that only depend on the data once,
+# up front.
+
+likelihood = utils.Likelihood(visibilities, images, spectra)
+
 ################################################################################
 #
 # Fit the model to the data.
@@ -179,7 +186,9 @@ if args.action == "run":
             config.priors, False), kwargs={"model":"disk", "ncpus":ncpus, \
             "timelimit":args.timelimit, "ncpus_highmass":ncpus_highmass, \
             "with_hyperion":args.withhyperion, "source":source, "nice":nice, \
-            "verbose":args.verbose, "ftcode":args.ftcode}, \
+            "verbose":args.verbose, "ftcode":args.ftcode, \
+            "likelihood":likelihood, "thermal_cache":args.thermalcache, \
+            "mmap":args.mmap}, \
             pool=pool, backend=backend)
 else:
     sampler = backend
@@ -110,12 +110,8 @@ def lnlike(params, visibilities, images, spectra, parameters, plot):
     # Calculate the chisq for the visibilities.
 
     for j in range(len(visibilities["file"])):
-        chisq.append(-0.5*(numpy.sum((visibilities["data"][j].real - \
-                m.visibilities[visibilities["lam"][j]].real)**2 * \
-                visibilities["data"][j].weights)) + \
-                -0.5*(numpy.sum((visibilities["data"][j].imag - \
-                m.visibilities[visibilities["lam"][j]].imag)**2 * \
-                visibilities["data"][j].weights)))
+        chisq.append(-0.5*uv.chisq(visibilities["data"][j], \
+                m.visibilities[visibilities["lam"][j]]))
 
     # Calculate the chisq for all of the images.
 
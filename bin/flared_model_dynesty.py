@@ -40,6 +40,7 @@ parser.add_argument('-i', '--nice', action='store_true')
 parser.add_argument('-l', '--nicelevel', type=int, default=19)
 parser.add_argument('-f', '--ftcode', type=str, default="galario")
 parser.add_argument('--largedata', action='store_true')
+parser.add_argument('--mmap', action='store_true')
 args = parser.parse_args()
 
 # Check whether we are using MPI.
@@ -137,6 +138,11 @@ if args.withcontsub:
 
 visibilities, images, spectra = utils.load_data(config, model="flared")
 
+# Calculate the parts of the likelihood that only depend on the data once,
+# up front.
+
+likelihood = utils.Likelihood(visibilities, images, spectra)
+
 ################################################################################
 #
 # Fit the model to the data.
@@ -174,7 +180,8 @@ if args.resume:
     sampler.loglikelihood.args = [visibilities, images, spectra, \
             config.parameters, False]
     sampler.loglikelihood.kwargs = {"model":"flared", \
-            "ncpus":ncpus, "source":source, "nice":nice, "ftcode":args.ftcode}
+            "ncpus":ncpus, "source":source, "nice":nice, "ftcode":args.ftcode, \
+            "likelihood":likelihood, "mmap":args.mmap}
     sampler.prior_transform.kwargs = {"model":"flared"}
 
     res = sampler.results
@@ -183,9 +190,9 @@ else:
             utils.dynesty.ptform, ndim, logl_args=(visibilities, images, \
             spectra, config.parameters, False), logl_kwargs={"model":"flared", \
             "ncpus":ncpus, "source":source, "nice":nice,
-            "ftcode":args.ftcode}, ptform_args=(\
-            config.parameters, config.priors), ptform_kwargs={"model":\
-            "flared"}, periodic=periodic, pool=pool, sample="rwalk", \
+            "ftcode":args.ftcode, "likelihood":likelihood, "mmap":args.mmap}, \
+            ptform_args=(config.parameters, config.priors), ptform_kwargs={\
+            "model":"flared"}, periodic=periodic, pool=pool, sample="rwalk", \
             walks=config.walks)
 
 # Run a few burner steps.
@@ -36,6 +36,7 @@ parser.add_argument('-i', '--nice', action='store_true')
 parser.add_argument('-l', '--nicelevel', type=int, default=19)
 parser.add_argument('-f', '--ftcode', type=str, default="galario")
 parser.add_argument('--largedata', action='store_true')
+parser.add_argument('--mmap', action='store_true')
 args = parser.parse_args()
 
 # Check whether we are using MPI.
@@ -131,6 +132,11 @@ if args.withcontsub:
 
 visibilities, images, spectra = utils.load_data(config, model="flared")
 
+# Calculate the parts of the likelihood that only depend on the data once,
+# up front.
+
+likelihood = utils.Likelihood(visibilities, images, spectra)
+
 ################################################################################
 #
 # Fit the model to the data.
@@ -183,7 +189,9 @@ if args.action == "run":
             config.priors, False), kwargs={"model":"flared", "ncpus":ncpus, \
             "timelimit":3600, "ncpus_highmass":ncpus, \
             "with_hyperion":False, "source":source, "nice":nice, \
-            "verbose":False, "ftcode":args.ftcode}, pool=pool, backend=backend)
+            "verbose":False, "ftcode":args.ftcode, "likelihood":likelihood, \
+            "mmap":args.mmap}, \
+            pool=pool, backend=backend)
 else:
     sampler = backend
 
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import pdspy.dust as dust
+import argparse
+import runpy
+import os
+
+################################################################################
+#
+# Parse command line arguments.
+#
+################################################################################
+
+parser = argparse.ArgumentParser(description="Build an opacity table from a "
+        "composition file. If the build is interrupted, running the same "
+        "command again resumes it.")
+parser.add_argument('spec', help="A python file describing the composition, "
+        "see pdspy.dust.build_opacity_table")
+parser.add_argument('-o', '--output', type=str, default=None)
+parser.add_argument('-n', '--ncpus', type=int, default=1)
+parser.add_argument('-t', '--nthreads', type=int, default=1)
+parser.add_argument('-c', '--chunksize', type=int, default=10)
+parser.add_argument('-a', '--amax', type=float, default=None, help="Calculate "
+        "the opacities of a size distribution with this maximum grain size, "
+        "in cm, instead of a DustGenerator table.")
+parser.add_argument('-s', '--singlesize', action='store_true')
+args = parser.parse_args()
+
+################################################################################
+#
+# Read in the composition and build the table.
+#
+################################################################################
+
+spec = dict([(key, value) for key, value in runpy.run_path(args.spec).items() \
+        if not key.startswith("_")])
+
+if args.amax != None:
+    spec["amax"] = args.amax
+if args.singlesize:
+    spec["singlesize"] = True
+
+if args.output == None:
+    args.output = os.path.splitext(os.path.basename(args.spec))[0]+".hdf5"
+
+dust.build_opacity_table(spec, args.output, nprocs=args.ncpus, \
+        nthreads=args.nthreads, chunksize=args.chunksize)
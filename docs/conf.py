@@ -20,6 +20,7 @@ sys.path.insert(0, os.path.abspath("../"))
 autodoc_mock_imports = ["numpy","hyperion","scipy","scikit-learn","h5py",
         "matplotlib","emcee","corner","mpi4py","astropy","schwimmbad","dynesty",
         "pdspy.dust.bhmie","pdspy.dust.bhcoat","pdspy.dust.dmilay",
+        "pdspy.dust.libmie",
         "pdspy.interferometry.libinterferometry","pdspy.imaging.libimaging",
         "pdspy.radmc3d.read","galario","mpl_toolkits","sklearn","casatools"]
 
@@ -1,11 +1,11 @@
 import numpy
 import scipy
 import h5py
+import hashlib
+import multiprocessing
 from ..constants.physics import c
 from ..constants.math import pi
-#from .bhmie import bhmie
-#from .bhcoat import bhcoat
-#from .dmilay import dmilay
+from .libmie import bhmie, bhcoat, dmilay
 
 class Dust:
 
@@ -33,95 +33,139 @@ class Dust:
 
     def calculate_size_distribution_opacity(self, amin, amax, p, \
             coat_volume_fraction=0.0, nang=1000, with_dhs=False, fmax=0.8, \
-            nf=50):
+            nf=50, nthreads=1, nprocs=1, checkpoint=None, chunksize=10):
         na = int(round(numpy.log10(amax) - numpy.log10(amin))*100+1)
         a = numpy.logspace(numpy.log10(amin),numpy.log10(amax),na)
-        kabsgrid = numpy.zeros((self.lam.size,na))
-        kscagrid = numpy.zeros((self.lam.size,na))
         
         normfunc = a**(3-p)
 
-        for i in range(na):
-            if with_dhs:
-                self.calculate_dhs_opacity(a[i], fmax=fmax, nf=nf, nang=nang)
-            else:
-                self.calculate_opacity(a[i], \
-                        coat_volume_fraction=coat_volume_fraction, nang=nang)
-            
-            kabsgrid[:,i] = self.kabs*normfunc[i]
-            kscagrid[:,i] = self.ksca*normfunc[i]
+        kabsgrid, kscagrid = self.calculate_size_opacities(a, \
+                coat_volume_fraction=coat_volume_fraction, \
+                with_dhs=with_dhs, fmax=fmax, nf=nf, nthreads=nthreads, \
+                nprocs=nprocs, checkpoint=checkpoint, chunksize=chunksize)
         
         norm = scipy.integrate.trapz(normfunc,x=a)
         
-        self.kabs = scipy.integrate.trapz(kabsgrid,x=a)/norm
-        self.ksca = scipy.integrate.trapz(kscagrid,x=a)/norm
+        self.kabs = scipy.integrate.trapz(kabsgrid.T*normfunc,x=a)/norm
+        self.ksca = scipy.integrate.trapz(kscagrid.T*normfunc,x=a)/norm
         self.kext = self.kabs + self.ksca
         self.albedo = self.ksca / self.kext
 
-    def calculate_opacity(self, a, coat_volume_fraction=0.0, nang=1000):
-        self.kabs = numpy.zeros(self.lam.size)
-        self.ksca = numpy.zeros(self.lam.size)
-        
-        if not hasattr(self, 'coat'):
-            mdust = 4*pi*a**3/3*self.rho
-            
-            for i in range(self.lam.size):
-                x = 2*pi*a/self.lam[i]
-                
-                S1,S2,Qext,Qsca,Qback,gsca=bhmie(x,self.m[i],nang)
-                
-                Qabs = Qext - Qsca
-                
-                self.kabs[i] = pi*a**2*Qabs/mdust
-                self.ksca[i] = pi*a**2*Qsca/mdust
-        
-        else:
-            a_coat = a*(1+coat_volume_fraction)**(1./3)
-
-            mdust = 4*pi*a**3/3*self.rho+ \
-                    4*pi/3*(a_coat**3-a**3)*self.coat.rho
-            
-            for i in range(self.lam.size):
-                x = 2*pi*a/self.lam[i]
-                y = 2*pi*a_coat/self.lam[i]
-                
-                Qext,Qsca,Qback=bhcoat(x,y,self.m[i],self.coat.m[i])
-                
-                Qabs = Qext - Qsca
-                
-                self.kabs[i] = pi*a_coat**2*Qabs/mdust
-                self.ksca[i] = pi*a_coat**2*Qsca/mdust
+    def calculate_opacity(self, a, coat_volume_fraction=0.0, nang=1000, \
+            nthreads=1):
+        kabs, ksca = self.calculate_size_opacities(a, \
+                coat_volume_fraction=coat_volume_fraction, nthreads=nthreads)
 
+        self.kabs = kabs[0]
+        self.ksca = ksca[0]
         self.kext = self.kabs + self.ksca
         self.albedo = self.ksca / self.kext
 
-    def calculate_dhs_opacity(self, a, fmax=0.8, nf=50, nang=1000):
+    def calculate_dhs_opacity(self, a, fmax=0.8, nf=50, nang=1000, \
+            nthreads=1):
+        kabs, ksca = self.calculate_size_opacities(a, with_dhs=True, \
+                fmax=fmax, nf=nf, nthreads=nthreads)
 
-        self.kabs = numpy.zeros(self.lam.size)
-        self.ksca = numpy.zeros(self.lam.size)
-        
-        for i in range(self.lam.size):
-            for j, f in enumerate(numpy.linspace(0., fmax, nf)):
-                x = 2*pi*a*f**(1./3)/self.lam[i]
-                y = 2*pi*a/self.lam[i]
-
-                if f == 0:
-                    S1,S2,Qext,Qsca,Qback,gsca=bhmie(y,self.m[i],nang)
-                else:
-                    Qext, Qsca, Qback, g, M1, M2, S21, D21 = dmilay(\
-                            a*f**(1./3), a, 2*pi/self.lam[i], self.m[i].real - \
-                            1j*self.m[i].imag, 1.0+1j*0.0, [0.], 1., 1)
-                
-                Qabs = Qext - Qsca
-                
-                mdust = 4*pi*a**3*(1.-f)/3*self.rho
-
-                self.kabs[i] += pi*a**2*Qabs/mdust * 1./fmax * fmax/nf
-                self.ksca[i] += pi*a**2*Qsca/mdust * 1./fmax * fmax/nf
-    
+        self.kabs = kabs[0]
+        self.ksca = ksca[0]
         self.kext = self.kabs + self.ksca
         self.albedo = self.ksca / self.kext
 
+    def calculate_size_opacities(self, a, coat_volume_fraction=0.0, \
+            with_dhs=False, fmax=0.8, nf=50, nthreads=1, nprocs=1, \
+            checkpoint=None, chunksize=10):
+        r"""
+        Calculate the absorption and scattering opacities of single grain 
+        sizes, for all of the grain sizes and wavelengths at once.
+
+        Args:
+            :attr:`a` (`float` or `numpy.ndarray`):
+                The grain sizes, in cm.
+            :attr:`coat_volume_fraction` (`float`, optional):
+                If the dust has a coat, the volume of the coat relative to
+                the volume of the core. Default: `0.0`
+            :attr:`with_dhs` (`bool`, optional):
+                Use a distribution of hollow spheres, with vacuum fractions
+                uniformly distributed between 0 and fmax. Default: `False`
+            :attr:`fmax` (`float`, optional):
+                The maximum vacuum fraction for the DHS. Default: `0.8`
+            :attr:`nf` (`int`, optional):
+                The number of vacuum fractions for the DHS. Default: `50`
+            :attr:`nthreads` (`int`, optional):
+                The number of threads to use for the Mie calculations.
+                Default: `1`
+            :attr:`nprocs` (`int`, optional):
+                The number of processes over which to distribute chunks of 
+                grain sizes. Default: `1`
+            :attr:`checkpoint` (`str`, optional):
+                An HDF5 file to save the opacities of each chunk of grain 
+                sizes to as soon as it is done. If the file already contains
+                opacities from an interrupted calculation with the same 
+                settings, only the missing grain sizes are calculated.
+                Default: `None`
+            :attr:`chunksize` (`int`, optional):
+                The number of grain sizes in each chunk, if nprocs > 1 or a
+                checkpoint file is used. Default: `10`
+
+        Returns:
+            :attr:`kabs` (`numpy.ndarray`), :attr:`ksca` (`numpy.ndarray`),
+            with shape (a.size, lam.size).
+        """
+
+        a = numpy.atleast_1d(numpy.array(a, dtype=float)).ravel()
+
+        options = (coat_volume_fraction, with_dhs, fmax, nf, nthreads)
+
+        if nprocs == 1 and checkpoint == None:
+            return calculate_mie_opacities(self, a, *options)
+
+        kabs = numpy.zeros((a.size, self.lam.size))
+        ksca = numpy.zeros((a.size, self.lam.size))
+        done = numpy.zeros(a.size, dtype=bool)
+
+        # Pick up whatever was finished by a previous run.
+
+        if checkpoint != None:
+            f = h5py.File(checkpoint, "a")
+            group = open_checkpoint(f, a, self.lam, options[0:-1], \
+                    composition_hash(self))
+
+            done[:] = group["done"][...]
+            kabs[done] = group["kabs"][...][done]
+            ksca[done] = group["ksca"][...][done]
+
+        # Split the remaining grain sizes up into chunks, and farm them out.
+
+        remaining = numpy.where(numpy.logical_not(done))[0]
+
+        tasks = [(self, remaining[i:i+chunksize], a[remaining[i:i+chunksize]],\
+                options) for i in range(0, remaining.size, chunksize)]
+
+        if nprocs > 1:
+            pool = multiprocessing.Pool(nprocs)
+            results = pool.imap_unordered(size_opacities_task, tasks)
+        else:
+            pool = None
+            results = map(size_opacities_task, tasks)
+
+        try:
+            for index, kabs_chunk, ksca_chunk in results:
+                kabs[index] = kabs_chunk
+                ksca[index] = ksca_chunk
+
+                if checkpoint != None:
+                    group["kabs"][index,:] = kabs_chunk
+                    group["ksca"][index,:] = ksca_chunk
+                    group["done"][index] = True
+                    f.flush()
+        finally:
+            if pool != None:
+                pool.terminate()
+            if checkpoint != None:
+                f.close()
+
+        return kabs, ksca
+
     def set_density(self, rho):
         self.rho = rho
 
@@ -258,3 +302,112 @@ class Dust:
 
         if (usefile == None):
             f.close()
+
+def calculate_mie_opacities(dust, a, coat_volume_fraction=0.0, \
+        with_dhs=False, fmax=0.8, nf=50, nthreads=1):
+    # Calculate the opacities of an array of grain sizes, with the sizes 
+    # along the first axis and the wavelengths along the second.
+
+    a = numpy.array(a, dtype=float).reshape((-1,1))
+    lam = dust.lam.reshape((1,-1))
+    m = dust.m.reshape((1,-1))
+
+    if with_dhs:
+        kabs = numpy.zeros((a.size, lam.size))
+        ksca = numpy.zeros((a.size, lam.size))
+
+        for f in numpy.linspace(0., fmax, nf):
+            if f == 0:
+                Qext, Qsca, gsca = bhmie(2*pi*a/lam, m, nthreads=nthreads)
+            else:
+                Qext, Qsca, gQsc = dmilay(a*f**(1./3), a, 2*pi/lam, \
+                        m.real - 1j*m.imag, 1.0+1j*0.0, nthreads=nthreads)
+
+            Qabs = Qext - Qsca
+
+            mdust = 4*pi*a**3*(1.-f)/3*dust.rho
+
+            kabs += pi*a**2*Qabs/mdust * 1./fmax * fmax/nf
+            ksca += pi*a**2*Qsca/mdust * 1./fmax * fmax/nf
+    elif not hasattr(dust, 'coat'):
+        mdust = 4*pi*a**3/3*dust.rho
+
+        Qext, Qsca, gsca = bhmie(2*pi*a/lam, m, nthreads=nthreads)
+
+        Qabs = Qext - Qsca
+
+        kabs = pi*a**2*Qabs/mdust
+        ksca = pi*a**2*Qsca/mdust
+    else:
+        a_coat = a*(1+coat_volume_fraction)**(1./3)
+
+        mdust = 4*pi*a**3/3*dust.rho+ \
+                4*pi/3*(a_coat**3-a**3)*dust.coat.rho
+
+        Qext, Qsca, Qback = bhcoat(2*pi*a/lam, 2*pi*a_coat/lam, m, \
+                dust.coat.m.reshape((1,-1)), nthreads=nthreads)
+
+        Qabs = Qext - Qsca
+
+        kabs = pi*a_coat**2*Qabs/mdust
+        ksca = pi*a_coat**2*Qsca/mdust
+
+    return kabs, ksca
+
+def size_opacities_task(args):
+    dust, index, a, options = args
+
+    return (index,) + calculate_mie_opacities(dust, a, *options)
+
+def composition_hash(dust):
+    # A hash of everything about the dust that its opacities depend on,
+    # i.e. the optical constants and density of the (mixed) dust and of its
+    # coat, if it has one. These capture the species, abundances, mixing
+    # rule and filling factor that the dust was made with.
+
+    h = hashlib.sha1()
+
+    species = [dust]
+    if hasattr(dust, "coat"):
+        species.append(dust.coat)
+
+    for d in species:
+        for value in [d.lam, d.m, getattr(d, "rho", numpy.nan)]:
+            h.update(numpy.ascontiguousarray(value).tobytes())
+
+    return h.hexdigest()
+
+def open_checkpoint(f, a, lam, options, composition):
+    # Set up the group that the opacities are saved to as they are 
+    # calculated, or check that an existing one is for the same calculation.
+
+    names = ["coat_volume_fraction", "with_dhs", "fmax", "nf"]
+
+    if "size_opacities" in f:
+        group = f["size_opacities"]
+
+        same = group["a"].shape == a.shape and \
+                group["lam"].shape == lam.shape and \
+                numpy.allclose(group["a"][...], a) and \
+                numpy.allclose(group["lam"][...], lam) and \
+                all([group.attrs[name] == value for name, value in \
+                zip(names, options)]) and \
+                group.attrs.get("composition", None) == composition
+
+        if not same:
+            raise ValueError("The checkpoint in {0:s} is for a different "
+                    "calculation.".format(f.filename))
+    else:
+        group = f.create_group("size_opacities")
+
+        group.create_dataset("a", data=a)
+        group.create_dataset("lam", data=lam)
+        group.create_dataset("kabs", (a.size, lam.size), dtype=float)
+        group.create_dataset("ksca", (a.size, lam.size), dtype=float)
+        group.create_dataset("done", data=numpy.zeros(a.size, dtype=bool))
+
+        for name, value in zip(names, options):
+            group.attrs[name] = value
+        group.attrs["composition"] = composition
+
+    return group
@@ -1,102 +1,168 @@
+import itertools
+import copy
 import numpy
-import scipy
 import h5py
+from collections import OrderedDict
 from .Dust import Dust
 
 class DustGenerator:
-    def __init__(self, dust, with_dhs=False, fmax=0.8, nf=50, singlesize=False):
+    def __init__(self, dust, with_dhs=False, fmax=0.8, nf=50, singlesize=False,\
+            cache_size=128, mmap=False, coat_volume_fraction=0.0, \
+            nthreads=1, nprocs=1, checkpoint=None, chunksize=10):
+        # The most recently generated Dust objects are kept around so that
+        # repeated calls with the same parameters are cheap.
+
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+
         if type(dust) == str:
-            self.read(dust)
+            self.read(dust, mmap=mmap)
         else:
+            self.old = False
             self.rho = dust.rho
 
             self.amax = numpy.logspace(-4.,1.,60)
             self.p = numpy.linspace(2.5,4.5,11)
             self.lam = dust.lam
 
-            self.kabs = []
-            self.ksca = []
-            self.kext = []
-            self.albedo = []
-
             a = numpy.logspace(numpy.log10(0.05e-4),1.,500)
             if singlesize:
                 self.amax = a
-            kabsgrid = numpy.zeros((self.lam.size, a.size))
-            kscagrid = numpy.zeros((self.lam.size, a.size))
 
-            for i in range(a.size):
-                if with_dhs:
-                    dust.calculate_dhs_opacity(a[i], fmax=fmax, nf=nf, nang=1)
+            # Calculate the opacities of each individual grain size once, 
+            # and then integrate that cube over the size distribution for
+            # every (p, amax) at once, with the trapezoidal rule written as
+            # a matrix product.
+
+            kabsgrid, kscagrid = dust.calculate_size_opacities(a, \
+                    coat_volume_fraction=coat_volume_fraction, \
+                    with_dhs=with_dhs, fmax=fmax, nf=nf, nthreads=nthreads, \
+                    nprocs=nprocs, checkpoint=checkpoint, chunksize=chunksize)
+
+            weights = numpy.zeros(a.size)
+            weights[0:-1] += numpy.diff(a)/2
+            weights[1:] += numpy.diff(a)/2
+
+            self.kabs = numpy.zeros((self.p.size, self.amax.size, \
+                    self.lam.size))
+            self.ksca = numpy.zeros((self.p.size, self.amax.size, \
+                    self.lam.size))
+
+            for i, p in enumerate(self.p):
+                if singlesize:
+                    normfunc = (a == self.amax[:,None]) * weights
                 else:
-                    dust.calculate_opacity(a[i], coat_volume_fraction=0.0, \
-                            nang=1)
-
-                kabsgrid[:,i] = dust.kabs
-                kscagrid[:,i] = dust.ksca
-
-            for p in self.p:
-                kabs_temp = []
-                ksca_temp = []
-                kext_temp = []
-                albedo_temp = []
-
-                for amax in self.amax:
-                    if singlesize:
-                        normfunc = numpy.zeros(a.size)
-                        normfunc[a == amax] = 1.
-                    else:
-                        normfunc = a**(3-p)
-                        normfunc[a > amax] = 0.
-
-                    norm = scipy.integrate.trapz(normfunc, x=a)
-
-                    kabs_temp.append(scipy.integrate.trapz(kabsgrid*normfunc,\
-                            x=a, axis=1)/norm)
-                    ksca_temp.append(scipy.integrate.trapz(kscagrid*normfunc,\
-                            x=a, axis=1)/norm)
-                    kext_temp.append(kabs_temp[-1] + ksca_temp[-1])
-                    albedo_temp.append( ksca_temp[-1] / kext_temp[-1])
-
-                self.kabs.append(kabs_temp)
-                self.ksca.append(ksca_temp)
-                self.kext.append(kext_temp)
-                self.albedo.append(albedo_temp)
-
-            self.kabs = numpy.array(self.kabs)
-            self.ksca = numpy.array(self.ksca)
-            self.kext = numpy.array(self.kext)
-            self.albedo = numpy.array(self.albedo)
+                    normfunc = a**(3-p) * (a <= self.amax[:,None]) * weights
+
+                norm = normfunc.sum(axis=1)[:,None]
+
+                self.kabs[i] = numpy.dot(normfunc, kabsgrid) / norm
+                self.ksca[i] = numpy.dot(normfunc, kscagrid) / norm
+
+    # The extinction and albedo are only calculated when asked for, so that a
+    # memory-mapped table isn't copied into every process.
+
+    @property
+    def kext(self):
+        return self.kabs + self.ksca
+
+    @property
+    def albedo(self):
+        return self.ksca / self.kext
 
     def __call__(self, amax, p=None):
-        if self.old:
-            f_kabs = scipy.interpolate.interp2d(self.lam, self.amax, \
-                    numpy.log10(self.kabs))
-            f_ksca = scipy.interpolate.interp2d(self.lam, self.amax, \
-                    numpy.log10(self.ksca))
+        key = (float(amax), None if p is None else float(p))
+
+        # The cached Dust objects are copied on the way out, so that changing
+        # the one that is returned doesn't change later calls.
 
-            kabs = 10.**f_kabs(self.lam, amax)
-            ksca = 10.**f_ksca(self.lam, amax)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return copy.deepcopy(self.cache[key])
 
-            d = Dust()
-            d.set_properties(self.lam, kabs, ksca)
+        kabs, ksca = self.opacities(amax, p)
+
+        d = Dust()
+        d.set_properties(self.lam, kabs[0], ksca[0])
+
+        if self.cache_size > 0:
+            self.cache[key] = d
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+            return copy.deepcopy(d)
+
+        return d
+
+    def opacities(self, amax, p=None):
+        # Calculate the absorption and scattering opacities for an array of
+        # (amax, p) pairs at once, returned as arrays with shape 
+        # (npairs, nlam). The opacities are only ever needed on the
+        # wavelength grid of the table, so the log of the table is linearly
+        # interpolated in (p, amax) only, and only the corners of the cells
+        # that the pairs fall in are read, so that a memory-mapped table is
+        # never read in or copied as a whole.
+
+        if self.old:
+            grids = (self.amax,)
+            pts = (numpy.atleast_1d(numpy.array(amax, dtype=float)).ravel(),)
         else:
-            f_kabs = scipy.interpolate.RegularGridInterpolator(\
-                    (self.p, self.amax, self.lam), numpy.log10(self.kabs))
-            f_ksca = scipy.interpolate.RegularGridInterpolator(\
-                    (self.p, self.amax, self.lam), numpy.log10(self.ksca))
+            p, amax = numpy.broadcast_arrays(numpy.array(p, dtype=float), \
+                    numpy.array(amax, dtype=float))
+            grids = (self.p, self.amax)
+            pts = (p.ravel(), amax.ravel())
+
+        # Find the cell that each pair is in, and how far along it the pair
+        # is in each dimension. Old tables extrapolate in amax, new tables
+        # don't.
+
+        index, t = [], []
+        for i, (grid, x) in enumerate(zip(grids, pts)):
+            if not self.old and numpy.any(numpy.logical_or(x < grid[0], \
+                    x > grid[-1])):
+                raise ValueError("One of the requested xi is out of bounds "
+                        "in dimension {0:d}".format(i))
+
+            j = numpy.clip(numpy.searchsorted(grid, x, side="right") - 1, \
+                    0, grid.size - 2)
+
+            index.append(j)
+            t.append(((x - grid[j]) / (grid[j+1] - grid[j])).reshape((-1,1)))
+
+        # Add up the contributions from the corners of each cell.
+
+        log_kabs, log_ksca = 0., 0.
+        for corner in itertools.product([0,1], repeat=len(grids)):
+            weight = 1.
+            for c, tc in zip(corner, t):
+                weight = weight * (tc if c else 1 - tc)
+
+            k = tuple(j + c for j, c in zip(index, corner))
 
-            pts = numpy.array([[p, amax, lam] for lam in self.lam])
+            log_kabs = log_kabs + weight * numpy.log10(self.kabs[k])
+            log_ksca = log_ksca + weight * numpy.log10(self.ksca[k])
 
-            kabs = 10.**f_kabs(pts)
-            ksca = 10.**f_ksca(pts)
+        return 10.**log_kabs, 10.**log_ksca
 
-            d = Dust()
-            d.set_properties(self.lam, kabs, ksca)
+    def average(self, amax, p=None, weights=None):
+        # Make a single Dust whose opacities are the mass-weighted average of
+        # the opacities of several (amax, p) pairs, e.g. to stand in for a
+        # group of grain sizes that are distributed similarly in a model.
+
+        kabs, ksca = self.opacities(amax, p)
+
+        if type(weights) == type(None):
+            weights = numpy.ones(kabs.shape[0])
+
+        weights = numpy.array(weights, dtype=float).reshape((-1,1))
+
+        d = Dust()
+        d.set_properties(self.lam, (weights*kabs).sum(axis=0) / \
+                weights.sum(), (weights*ksca).sum(axis=0) / weights.sum())
 
         return d
 
-    def read(self, filename=None, usefile=None):
+    def read(self, filename=None, usefile=None, mmap=False):
         if (usefile == None):
             f = h5py.File(filename, "r")
         else:
@@ -112,12 +178,9 @@ class DustGenerator:
             self.old = True
 
         if ('kabs' in f):
-            self.kabs = f['kabs'][...]
+            self.kabs = read_table(f['kabs'], mmap)
         if ('ksca' in f):
-            self.ksca = f['ksca'][...]
-        if (hasattr(self, 'kabs') and hasattr(self, 'ksca')):
-            self.kext = self.kabs + self.ksca
-            self.albedo = self.ksca / self.kext
+            self.ksca = read_table(f['ksca'], mmap)
 
         if ('rho' in f):
             self.rho = f['rho'][...][0]
@@ -125,6 +188,8 @@ class DustGenerator:
         if (usefile == None):
             f.close()
 
+        self.cache = OrderedDict()
+
     def write(self, filename=None, usefile=None):
         if (usefile == None):
             f = h5py.File(filename, "w")
@@ -157,3 +222,17 @@ class DustGenerator:
 
         if (usefile == None):
             f.close()
+
+def read_table(dset, mmap=False):
+    # If requested, and the dataset is stored contiguously and uncompressed,
+    # memory-map it rather than reading it in, so that separate processes
+    # using the same table share the pages.
+
+    if mmap and dset.chunks == None and dset.compression == None:
+        offset = dset.id.get_offset()
+
+        if offset != None:
+            return numpy.memmap(dset.file.filename, dtype=dset.dtype, \
+                    mode="r", offset=offset, shape=dset.shape)
+
+    return dset[...]
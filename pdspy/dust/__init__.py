@@ -1,5 +1,7 @@
 from .Dust import Dust
 from .DustGenerator import DustGenerator
+from .build_opacity_table import build_opacity_table
+from .get_dust_generator import get_dust_generator
 from .PAH import PAH
 from .mix_dust import mix_dust
 from .redden import redden
@@ -0,0 +1,109 @@
+import numpy
+import os
+from .Dust import Dust
+from .DustGenerator import DustGenerator
+from .mix_dust import mix_dust
+
+def build_opacity_table(spec, filename, nprocs=1, nthreads=1, chunksize=10):
+    r"""
+    Build an opacity table for a mixture of dust species and write it to an
+    HDF5 file. The Mie calculations for the individual grain sizes are
+    distributed over nprocs processes, and the results are saved to filename
+    as each chunk of grain sizes finishes, so that an interrupted build
+    picks up where it left off when it is run again.
+
+    Args:
+        :attr:`spec` (`dict`):
+            The composition of the dust. Should contain :code:`species`, a
+            list of dictionaries with the :code:`file` containing the
+            optical constants (either a path or the name of a file in
+            pdspy/dust/data/optical_constants), its :code:`format` ("henn",
+            "draine", "jena" or "oss"), and the density :code:`rho` of the
+            species, and :code:`abundances`. May also contain
+            :code:`abundance_type` ("volume" or "mass"), the mixing
+            :code:`rule` and :code:`filling` factor for :code:`mix_dust`,
+            :code:`wavelengths`, a species whose wavelength grid should be
+            used, a :code:`coat` species and :code:`coat_volume_fraction`,
+            :code:`with_dhs`, :code:`fmax` and :code:`nf` for a distribution
+            of hollow spheres, :code:`singlesize`, and :code:`amin`,
+            :code:`amax` and :code:`p`. If :code:`amax` is given, the
+            opacities of a single size distribution are calculated,
+            otherwise a DustGenerator table is made.
+        :attr:`filename` (`str`):
+            The HDF5 file to write the table to.
+        :attr:`nprocs` (`int`, optional):
+            The number of processes to use. Default: `1`
+        :attr:`nthreads` (`int`, optional):
+            The number of threads each process should use for the Mie
+            calculations. Default: `1`
+        :attr:`chunksize` (`int`, optional):
+            The number of grain sizes that are calculated, and checkpointed,
+            at a time. Default: `10`
+
+    Returns:
+        :attr:`table` (`Dust` or `DustGenerator`):
+            The opacities that were written to filename.
+    """
+
+    # Read in the optical constants of each of the species, on a common
+    # wavelength grid.
+
+    if "wavelengths" in spec:
+        lam = read_species(spec["wavelengths"]).lam
+    else:
+        lam = read_species(spec["species"][0]).lam
+
+    species = [read_species(s, lam) for s in spec["species"]]
+
+    abundances = numpy.array(spec["abundances"], dtype=float)
+    if spec.get("abundance_type", "volume") == "mass":
+        rho = numpy.array([s.rho for s in species])
+        abundances = abundances / rho
+    abundances = abundances / abundances.sum()
+
+    dust = mix_dust(species, abundances, rule=spec.get("rule", "Bruggeman"), \
+            filling=spec.get("filling", 1.))
+
+    if "coat" in spec:
+        dust.add_coat(read_species(spec["coat"], lam))
+
+    # Now calculate the opacities.
+
+    options = {"coat_volume_fraction":spec.get("coat_volume_fraction", 0.), \
+            "with_dhs":spec.get("with_dhs", False), \
+            "fmax":spec.get("fmax", 0.8), "nf":spec.get("nf", 50), \
+            "nthreads":nthreads, "nprocs":nprocs, "checkpoint":filename, \
+            "chunksize":chunksize}
+
+    if "amax" in spec:
+        dust.calculate_size_distribution_opacity(spec.get("amin", 0.05e-4), \
+                spec["amax"], spec.get("p", 3.5), **options)
+
+        table = dust
+    else:
+        table = DustGenerator(dust, singlesize=spec.get("singlesize", False),\
+                **options)
+
+    # Writing the table replaces the checkpoint.
+
+    table.write(filename)
+
+    return table
+
+def read_species(spec, lam=None):
+    filename = spec["file"]
+    if not os.path.exists(filename):
+        filename = os.path.join(os.path.dirname(__file__), "data", \
+                "optical_constants", filename)
+
+    d = Dust()
+    getattr(d, "set_optical_constants_from_"+spec.get("format", "henn"))(\
+            filename)
+
+    if "rho" in spec:
+        d.set_density(spec["rho"])
+
+    if lam is not None:
+        d.calculate_optical_constants_on_wavelength_grid(lam)
+
+    return d
@@ -0,0 +1,17 @@
+# Amorphous silicates and amorphous carbon, mixed with 25% porosity, as a
+# distribution of hollow spheres, similar to the DIANA opacities.
+
+wavelengths = {"file":"water_ice.txt", "format":"henn"}
+
+species = [\
+        {"file":"amorphous_silicates_extrapolated.txt", "format":"henn", \
+        "rho":3.3}, \
+        {"file":"amorphous_carbon_zubko1996_extrapolated.txt", \
+        "format":"henn", "rho":1.0}]
+abundances = [0.8, 0.2]
+
+filling = 0.75
+
+with_dhs = True
+
+amin = 0.05e-4
@@ -0,0 +1,17 @@
+# The DIANA-like opacities, but with astronomical silicates and water ice
+# included.
+
+wavelengths = {"file":"water_ice.txt", "format":"henn"}
+
+species = [\
+        {"file":"astronomical_silicates.txt", "format":"draine", "rho":3.3}, \
+        {"file":"amorphous_carbon_zubko1996_extrapolated.txt", \
+        "format":"henn", "rho":1.0}, \
+        {"file":"water_ice.txt", "format":"henn", "rho":0.92}]
+abundances = [0.8, 0.2, 0.5]
+
+filling = 0.75
+
+with_dhs = True
+
+amin = 0.05e-4
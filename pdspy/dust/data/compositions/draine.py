@@ -0,0 +1,14 @@
+# Astronomical silicates and graphite, with 1/3 of the graphite in the
+# parallel orientation and 2/3 in the perpendicular orientation.
+
+wavelengths = {"file":"water_ice.txt", "format":"henn"}
+
+species = [\
+        {"file":"astronomical_silicates.txt", "format":"draine", "rho":3.3}, \
+        {"file":"graphite_parallel_0.01.txt", "format":"draine", \
+        "rho":2.24}, \
+        {"file":"graphite_perpendicular_0.01.txt", "format":"draine", \
+        "rho":2.24}]
+abundances = [0.65, 0.35*1./3, 0.35*2./3]
+
+amin = 0.005e-4
@@ -0,0 +1,11 @@
+# Silicates, troilite, organics and water ice, with the volume fractions of
+# the DSHARP opacities (Birnstiel et al. 2018).
+
+wavelengths = {"file":"water_ice.txt", "format":"henn"}
+
+species = [\
+        {"file":"astronomical_silicates.txt", "format":"draine", "rho":3.3}, \
+        {"file":"troilite.txt", "format":"henn", "rho":4.83}, \
+        {"file":"organics.txt", "format":"henn", "rho":1.5}, \
+        {"file":"water_ice.txt", "format":"henn", "rho":0.92}]
+abundances = [0.1670, 0.0258, 0.4430, 0.3642]
@@ -0,0 +1,14 @@
+# Silicates, troilite, organics and water ice, with mass fractions following
+# Pollack et al. (1994).
+
+wavelengths = {"file":"water_ice.txt", "format":"henn"}
+
+species = [\
+        {"file":"astronomical_silicates.txt", "format":"draine", "rho":3.3}, \
+        {"file":"troilite.txt", "format":"henn", "rho":4.83}, \
+        {"file":"organics.txt", "format":"henn", "rho":1.5}, \
+        {"file":"water_ice.txt", "format":"henn", "rho":0.92}]
+abundances = [3.41e-3, 7.68e-4, 4.13e-3, 5.55e-3]
+abundance_type = "mass"
+
+amin = 0.005e-4
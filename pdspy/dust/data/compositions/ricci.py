@@ -0,0 +1,17 @@
+# Silicates, carbonaceous material and water ice, with 40% porosity.
+
+wavelengths = {"file":"water_ice.txt", "format":"henn"}
+
+species = [\
+        {"file":"astronomical_silicates.txt", "format":"draine", "rho":3.3}, \
+        {"file":"amorphous_carbon_zubko1996_extrapolated.txt", \
+        "format":"henn", "rho":2.24}, \
+        {"file":"water_ice.txt", "format":"henn", "rho":0.92}]
+abundances = [2.64e-3, 3.53e-3, 5.55e-3]
+abundance_type = "mass"
+
+filling = 0.6
+
+with_dhs = True
+
+amin = 0.1e-4
@@ -0,0 +1,37 @@
+#!/bin/sh
+
+# Regenerate the opacity tables that come with pdspy from the compositions in
+# compositions/. Set NCPUS to spread the work over more processes. If this is
+# interrupted, running it again picks up where it left off.
+
+NCPUS=${NCPUS:-1}
+
+build() {
+    make_opacity_table.py -n $NCPUS "$@"
+}
+
+for name in diana diana_wice draine dsharp pollack; do
+    build compositions/$name.py -o $name.hdf5
+done
+
+build compositions/pollack.py -o pollack_new.hdf5
+build compositions/diana_wice.py -o diana_wice_singlesize.hdf5 --singlesize
+
+for name in diana diana_wice pollack; do
+    build compositions/$name.py -o ${name}_1um.hdf5 -a 1.0e-4
+    build compositions/$name.py -o ${name}_10um.hdf5 -a 1.0e-3
+    build compositions/$name.py -o ${name}_100um.hdf5 -a 1.0e-2
+    build compositions/$name.py -o ${name}_1mm.hdf5 -a 1.0e-1
+    build compositions/$name.py -o ${name}_1cm.hdf5 -a 1.0e0
+    build compositions/$name.py -o ${name}_10cm.hdf5 -a 1.0e1
+done
+
+build compositions/draine.py -o draine_1um.hdf5 -a 1.0e-4
+build compositions/draine.py -o draine_10um.hdf5 -a 1.0e-3
+build compositions/draine.py -o draine_100um.hdf5 -a 1.0e-2
+build compositions/draine.py -o draine_1mm.hdf5 -a 1.0e-1
+build compositions/draine.py -o draine_2mm.hdf5 -a 2.0e-1
+build compositions/draine.py -o draine_3mm.hdf5 -a 3.0e-1
+build compositions/draine.py -o draine_1cm.hdf5 -a 1.0e0
+
+build compositions/ricci.py -o ricci_1um.hdf5 -a 1.0e-4
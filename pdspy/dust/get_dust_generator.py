@@ -0,0 +1,36 @@
+from .DustGenerator import DustGenerator
+import os
+
+# The DustGenerator tables that have already been loaded by this process.
+
+generators = {}
+
+def get_dust_generator(filename, mmap=False):
+    r"""
+    Get the DustGenerator for an opacity table, reading the table in only the
+    first time it is asked for in this process. Later calls, e.g. from 
+    successive model evaluations, return the same DustGenerator.
+
+    Args:
+        :attr:`filename` (`str`):
+            The table to load. Either a path to the file, or the name of one
+            of the tables in pdspy/dust/data, e.g. "diana_wice.hdf5".
+        :attr:`mmap` (`bool`, optional):
+            Memory-map the kabs and ksca tables instead of reading them in,
+            so that worker processes share the pages. A table that is
+            memory-mapped and one that isn't are loaded separately.
+            Default: `False`
+
+    Returns:
+        :class:`pdspy.dust.DustGenerator`
+    """
+
+    if not os.path.exists(filename):
+        filename = os.path.join(os.path.dirname(__file__), "data", filename)
+
+    key = (os.path.realpath(filename), mmap)
+
+    if not key in generators:
+        generators[key] = DustGenerator(filename, mmap=mmap)
+
+    return generators[key]
@@ -1,19 +1,24 @@
 import numpy
-import scipy
 from .Dust import Dust
 from ..constants.math import pi
 
 def mix_dust(dust, abundance, medium=None, rule="Bruggeman", filling=1.):
 
     if rule == "Bruggeman":
-        meff = numpy.zeros(dust[0].lam.size,dtype=complex)
+        # Solve for the effective dielectric function at all wavelengths at
+        # once, with the vacuum included as an extra component.
+
+        eps = numpy.array([d.m**2 for d in dust])
+        fraction = filling * numpy.array(abundance, dtype=float)
+
+        if filling < 1:
+            eps = numpy.vstack((eps, numpy.ones(dust[0].lam.size)))
+            fraction = numpy.concatenate((fraction, [1. - filling]))
+
+        meff = numpy.sqrt(bruggeman_solve(eps, fraction))
+
         rho = 0.0
         
-        for i in range(dust[0].lam.size):
-            temp = scipy.optimize.fsolve(bruggeman,numpy.array([1.0,0.0]),\
-                    args=(dust,abundance,i, filling))
-            meff[i] = temp[0]+1j*temp[1]
-        
         for i in range(len(dust)):
             rho += dust[i].rho*abundance[i]
 
@@ -46,17 +51,67 @@ def mix_dust(dust, abundance, medium=None, rule="Bruggeman", filling=1.):
     
     return new
 
-def bruggeman(meff, dust, abundance, index, filling):
-    
-    m_eff = meff[0]+1j*meff[1]
-    tot = 0+0j
-    
-    for j in range(len(dust)):
-        tot += filling * abundance[j]*(dust[j].m[index]**2-m_eff**2)/ \
-                (dust[j].m[index]**2+2*m_eff**2)
+def bruggeman_solve(eps, fraction, tol=1.0e-12, maxiter=100):
+    # Find the effective dielectric function that satisfies the Bruggeman
+    # condition, sum_j f_j (eps_j - eps) / (eps_j + 2 eps) = 0, for an array
+    # of dielectric functions with shape (ncomponents, nlam).
 
-    # Add in the void.
+    fraction = fraction.reshape((-1,1))
 
-    tot += (1 - filling) * (1. - m_eff**2) / (1. + 2*m_eff**2)
-    
-    return numpy.array([tot.real,tot.imag])
+    if eps.shape[0] == 1:
+        return eps[0]
+    elif eps.shape[0] == 2:
+        # With two components the condition is a quadratic in eps, and the
+        # physical root is the one with a positive imaginary part or, if the
+        # components are (nearly) lossless and the roots are real, the one
+        # with a positive real part.
+
+        a = -2.*fraction.sum()
+        b = (fraction[0]*(2*eps[0] - eps[1]) + fraction[1]*(2*eps[1] - \
+                eps[0]))
+        c = fraction.sum()*eps[0]*eps[1]
+
+        sqrt_disc = numpy.sqrt(b**2 - 4*a*c)
+
+        root1 = (-b + sqrt_disc) / (2*a)
+        root2 = (-b - sqrt_disc) / (2*a)
+
+        lossless = numpy.abs(root1.imag) <= tol*numpy.abs(root1)
+        physical = numpy.where(lossless, root1.real > 0, root1.imag > 0)
+
+        return numpy.where(physical, root1, root2)
+
+    # Otherwise use Newton's method on the refractive index, starting from
+    # m = 1 as scipy.optimize.fsolve was previously used to, and halving
+    # the step wherever it would not reduce the residual.
+
+    m = numpy.ones(eps.shape[1], dtype=complex)
+    residual = bruggeman_residual(m, eps, fraction)
+
+    for i in range(maxiter):
+        derivative = (-6*fraction*eps*m / (eps + 2*m**2)**2).sum(axis=0)
+        step = residual / derivative
+
+        scale = numpy.ones(m.size)
+        for j in range(50):
+            m_new = m - scale*step
+            residual_new = bruggeman_residual(m_new, eps, fraction)
+
+            worse = numpy.logical_and(numpy.abs(residual_new) >= \
+                    numpy.abs(residual), numpy.abs(residual) > 0)
+            if not worse.any():
+                break
+
+            scale[worse] /= 2
+
+        m, residual = m_new, residual_new
+
+        if numpy.all(numpy.abs(scale*step) <= tol*numpy.abs(m)):
+            break
+
+    return m**2
+
+def bruggeman_residual(m, eps, fraction):
+    eps_eff = m**2
+
+    return (fraction*(eps - eps_eff) / (eps + 2*eps_eff)).sum(axis=0)
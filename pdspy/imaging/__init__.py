@@ -1,9 +1,12 @@
-from .libimaging import Image
-from .libimaging import UnstructuredImage
-from .imtovis import imtovis
-from .readimfits import readimfits
-from .readpvfits import readpvfits
-from .find import find
-from .match_source_lists import match_source_lists
-from .update_catalog import update_catalog
-from .extract_pv_diagram import extract_pv_diagram
+from ..lazy_import import lazy_import
+
+lazy_import(__name__, {
+        "Image":"libimaging",
+        "UnstructuredImage":"libimaging",
+        "imtovis":"imtovis",
+        "readimfits":"readimfits",
+        "readpvfits":"readpvfits",
+        "find":"find",
+        "match_source_lists":"match_source_lists",
+        "update_catalog":"update_catalog",
+        "extract_pv_diagram":"extract_pv_diagram"})
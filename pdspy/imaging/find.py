@@ -5,6 +5,8 @@ import scipy.ndimage.filters
 import scipy.ndimage.morphology
 import scipy.optimize
 import scipy.signal
+import scipy.spatial
+import multiprocessing
 import matplotlib.pyplot as plt
 import os
 import astropy
@@ -14,7 +16,7 @@ def find(image, threshold=5, include_radius=20, window_size=40, \
         source_list=None, list_search_radius=1.0, list_threshold=5, \
         beam=[1.0,1.0,0.0], user_aperture=False, aperture=15, \
         fit_aperture=15, include_flux_unc=False, flux_unc=0.1, \
-        bootstrap_unc=True, output_plots=None, just_find=False):
+        bootstrap_unc=True, output_plots=None, just_find=False, nprocs=1):
 
     # If plots of the fits have been requested, make the directory if it 
     # doesn't already exist.
@@ -37,32 +39,33 @@ def find(image, threshold=5, include_radius=20, window_size=40, \
     eroded_background = scipy.ndimage.morphology.binary_erosion(background, \
             structure=neighborhood, border_value=1)
 
-    detected_peaks = local_max - eroded_background
+    detected_peaks = numpy.logical_xor(local_max, eroded_background)
 
     potential_sources = numpy.column_stack(numpy.nonzero(detected_peaks))
+
+    flux = image.image[potential_sources[:,0], potential_sources[:,1], 0, 0]
+    unc = image.unc[potential_sources[:,0], potential_sources[:,1], 0, 0]
     
     # If we are providing a source list, the threshold should be lower than
     # for a blind search. Throw away for good any sources that don't meet
     # this threshold.
 
     if type(source_list) != type(None):
-        for coords in potential_sources:
-            if image.image[coords[0], coords[1], 0, 0] < list_threshold * \
-                    image.unc[coords[0], coords[1], 0, 0]:
-                detected_peaks[coords[0], coords[1]] = 0.
+        bad = flux < list_threshold * unc
+        detected_peaks[potential_sources[bad,0], potential_sources[bad,1]] = 0.
 
-        potential_sources = numpy.column_stack(numpy.nonzero(detected_peaks))
+        potential_sources = potential_sources[numpy.logical_not(bad)]
+        flux = flux[numpy.logical_not(bad)]
+        unc = unc[numpy.logical_not(bad)]
 
     # First, throw away any potential source that does not meet the
     # threshold cut requirement.
 
-    for coords in potential_sources:
-        if image.image[coords[0], coords[1], 0, 0] < threshold * \
-                image.unc[coords[0], coords[1], 0, 0]:
-            detected_peaks[coords[0], coords[1]] = 0.
+    bad = flux < threshold * unc
+    detected_peaks[potential_sources[bad,0], potential_sources[bad,1]] = 0.
 
-    # Next, if a source list was provided for searching purposes, throw away
-    # any objects not within the requisite radius from a listed source.
+    # Next, if a source list was provided for searching purposes, add back in
+    # any objects within the requisite radius from a listed source.
 
     if type(source_list) != type(None):
         coords = astropy.coordinates.SkyCoord(source_list["ra"].tolist(), \
@@ -73,28 +76,28 @@ def find(image, threshold=5, include_radius=20, window_size=40, \
 
         arcsec_in_pixels = arcsec / (abs(image.wcs.wcs.cdelt[0]) * numpy.pi/180)
 
-        for peak_coords in potential_sources:
-            for count, pixcoord in enumerate(zip(pixcoords[0], pixcoords[1])):
-                if (numpy.sqrt((pixcoord[0] - peak_coords[1])**2 + \
-                               (pixcoord[1] - peak_coords[0])**2) <\
-                               0.5 * list_search_radius * arcsec_in_pixels):
-                    #detected_peaks[peak_coords[0], peak_coords[1]] = 1.
-                    if image.image[peak_coords[0], peak_coords[1], 0, 0] > \
-                            list_threshold * image.unc[peak_coords[0], \
-                            peak_coords[1], 0, 0]:
-                        detected_peaks[peak_coords[0], peak_coords[1]] = 1.
-                        break
-                #elif (count == len(pixcoords[0])-1):
-                #    detected_peaks[peak_coords[0], peak_coords[1]] = 0.
+        tree = scipy.spatial.cKDTree(numpy.column_stack(pixcoords))
+
+        d, index = tree.query(potential_sources[:,::-1].astype(float))
+
+        near = numpy.logical_and(d < 0.5 * list_search_radius * \
+                arcsec_in_pixels, flux > list_threshold * unc)
+
+        detected_peaks[potential_sources[near,0], \
+                potential_sources[near,1]] = 1.
 
     potential_sources = numpy.column_stack(numpy.nonzero(detected_peaks))
 
     # Search for potential sources that are probably the same source and
-    # make sure we're only finding it once.
+    # make sure we're only finding it once. Only pairs closer than 
+    # include_radius need to be checked, and those come from a KD-tree.
+
+    tree = scipy.spatial.cKDTree(potential_sources)
+    neighbors = tree.query_ball_point(potential_sources, include_radius)
 
     good = numpy.repeat(True, len(potential_sources))
     for i in range(len(potential_sources)):
-        for j in range(len(potential_sources)):
+        for j in sorted(neighbors[i]):
             if (j != i) and good[i] and good[j]:
                 coords = potential_sources[i]
                 coords2 = potential_sources[j]
@@ -103,22 +106,19 @@ def find(image, threshold=5, include_radius=20, window_size=40, \
                         (coords[1] - coords2[1])**2 )
 
                 if (d < include_radius) and (d > 0):
-                    inbetween = bresenham_line(coords[0],coords[1],coords2[0], \
-                            coords2[1])
-
-                    for k, coords3 in enumerate(inbetween):
-                        if image.image[coords3[0],coords3[1], 0, 0] < 2.0 * \
-                                image.unc[coords3[0], coords3[1], 0 ,0]:
-                            break
-
-                        if k == len(inbetween)-1:
-                            if image.image[coords[0], coords[1]] > \
-                                    image.image[coords2[0], coords2[1]]:
-                                detected_peaks[coords2[0], coords2[1]] = 0.
-                                good[j] = False
-                            else:
-                                detected_peaks[coords[0], coords[1]] = 0.
-                                good[i] = False
+                    inbetween = numpy.array(bresenham_line(coords[0], \
+                            coords[1], coords2[0], coords2[1]))
+
+                    if not numpy.any(image.image[inbetween[:,0], \
+                            inbetween[:,1], 0, 0] < 2.0 * \
+                            image.unc[inbetween[:,0], inbetween[:,1], 0, 0]):
+                        if image.image[coords[0], coords[1], 0, 0] > \
+                                image.image[coords2[0], coords2[1], 0, 0]:
+                            detected_peaks[coords2[0], coords2[1]] = 0.
+                            good[j] = False
+                        else:
+                            detected_peaks[coords[0], coords[1]] = 0.
+                            good[i] = False
 
     potential_sources = numpy.column_stack(numpy.nonzero(detected_peaks))
 
@@ -126,101 +126,52 @@ def find(image, threshold=5, include_radius=20, window_size=40, \
         return potential_sources
 
     # Now we have a good list of detected sources. Fit all of them with a
-    # Gaussian to measure positions and fluxes.
+    # Gaussian to measure positions and fluxes, spread out over nprocs
+    # processes if requested.
 
-    sources = []
-
-    for coords in potential_sources:
-        # Set up the parameter guesses for fitting.
+    tree = scipy.spatial.cKDTree(potential_sources)
+    neighbors = tree.query_ball_point(potential_sources, include_radius)
 
-        half_window = window_size / 2
+    tasks = []
+    for i, coords in enumerate(potential_sources):
+        d = numpy.sqrt(((potential_sources[neighbors[i]] - coords)**2).\
+                sum(axis=1))
 
-        xmin = max(0,coords[1]-half_window)
-        xmax = min(coords[1]+half_window,image.image.shape[1])
-        ymin = max(0,coords[0]-half_window)
-        ymax = min(coords[0]+half_window,image.image.shape[1])
+        tasks.append((coords, potential_sources[numpy.sort(numpy.array(\
+                neighbors[i], dtype=int)[numpy.logical_and(d < \
+                include_radius, d > 0)])]))
 
-        x, y = numpy.meshgrid(numpy.linspace(xmin, xmax-1, xmax - xmin), \
-                numpy.linspace(ymin, ymax-1, ymax - ymin))
+    options = {"window_size":window_size, "beam":beam, \
+            "user_aperture":user_aperture, "aperture":aperture, \
+            "bootstrap_unc":bootstrap_unc}
 
-        z = image.image[int(ymin):int(ymax),int(xmin):int(xmax),0,0]
-        sigma_z = image.unc[int(ymin):int(ymax),int(xmin):int(xmax),0,0]
+    if nprocs > 1:
+        # Give each source its own random seed for the bootstrapping, as 
+        # otherwise every process would draw the same random numbers.
 
-        beam_to_sigma = arcsec / (abs(image.wcs.wcs.cdelt[0]) * numpy.pi/180) /\
-                2.355
+        seeds = numpy.random.randint(0, 2**31, len(tasks))
 
-        xc, yc = coords[1], coords[0]
-        params = numpy.array([xc, yc, beam[0]*beam_to_sigma, \
-                beam[1]*beam_to_sigma, beam[2], image.image[yc,xc,0,0]])
-
-        bm = [image.header["BMAJ"]/abs(image.wcs.wcs.cdelt[0])/2.355,\
-                image.header["BMIN"]/abs(image.wcs.wcs.cdelt[0])/2.355,\
-                image.header["BPA"]*numpy.pi/180.]
+        pool = multiprocessing.Pool(nprocs, initializer=set_worker_image, \
+                initargs=(image,))
+        results = pool.map(measure_source_task, [task + (options, seed) for \
+                task, seed in zip(tasks, seeds)])
+        pool.close()
+        pool.join()
+    else:
+        results = [measure_source(image, coords, nearby, **options) for \
+                coords, nearby in tasks]
 
-        # Fit the source with a Gaussian.
+    sources = []
 
-        try:
-            p, sigma_p = fit_source(coords, x, y, z, sigma_z, params, \
-                    bootstrap_unc=bootstrap_unc, beam=bm)
-        except ValueError:
+    for (coords, nearby), result in zip(tasks, results):
+        if result == None:
             continue
 
-        # Create a new source to add.
-
-        new_source = numpy.empty((16,), dtype=p.dtype)
-        new_source[0:12][0::2] = p[0:6]
-        new_source[0:12][1::2] = sigma_p[0:6]
-
-        # Before doing aperture photometry, find any sources within a provided 
-        # radius and fit them so they can be subtracted out of the sky
-        # subtraction window.
-
-        nsources = 1
+        new_source, sky_failed, fit = result
 
-        for coords2 in potential_sources:
-            d = numpy.sqrt( (coords[0] - coords2[0])**2 + \
-                    (coords[1] - coords2[1])**2 )
-
-            if (d < include_radius) and (d > 0):
-                xc, yc = coords2[1], coords2[0]
-                params = numpy.array([xc, yc, beam[0]*beam_to_sigma, \
-                        beam[1]*beam_to_sigma, beam[2], image.image[yc,xc,0,0]])
-
-                try:
-                    new_p, sigma_new_p = fit_source(coords2, x, y, z, sigma_z, \
-                            params, bootstrap_unc=False)
-                except ValueError:
-                    continue
-
-                p = numpy.hstack([p, new_p])
-                nsources += 1
-
-        # Do some aperture photometry for the source.
-
-        if nsources > 1:
-            new_z = z.copy() - gaussian2d(x, y, p[6:], nsources-1)
-        else:
-            new_z = z.copy()
-
-        if not user_aperture:
-            aperture = 3 * numpy.sqrt(new_source[4]*new_source[6])
-
-        try:
-            sky = numpy.median(new_z[numpy.logical_and(\
-                    numpy.sqrt((coords[1]-x)**2 + (coords[0]-y)**2) > aperture,\
-                    numpy.sqrt((coords[1]-x)**2 + (coords[0]-y)**2) <= \
-                    4*aperture)])
-        except IndexError:
-            sky = -1.0e-5
+        if sky_failed:
             print("Error in source:", len(sources))
 
-        new_source[12] = image.image[coords[0], coords[1], 0, 0] - sky
-        new_source[13] = image.unc[coords[0], coords[1], 0, 0]
-        new_source[14] = (new_z[numpy.sqrt((new_source[0]-x)**2 + \
-                (new_source[2]-y)**2) < aperture] - sky).sum()
-        new_source[15] = numpy.sqrt((sigma_z[numpy.sqrt((new_source[0]-x)**2+ \
-                (new_source[2]-y)**2) < aperture]**2).sum())
-
         # Add the newly found source to the list of sources.
 
         sources.append(new_source)
@@ -228,6 +179,10 @@ def find(image, threshold=5, include_radius=20, window_size=40, \
         # Plot the image slice.
 
         if output_plots != None:
+            x, y, z, sigma_z, p, nsources, ap = fit
+
+            half_window = window_size / 2
+
             fig, ax = plt.subplots(nrows=2, ncols=2)
 
             ax[0,0].set_title("Data")
@@ -246,12 +201,12 @@ def find(image, threshold=5, include_radius=20, window_size=40, \
                     vmax=z.max())
 
             circle1 = plt.Circle((new_source[0] - coords[1] + half_window, \
-                    new_source[2] - coords[0] + half_window), aperture, \
+                    new_source[2] - coords[0] + half_window), ap, \
                     edgecolor='r', facecolor="none")
             ax[0,0].add_artist(circle1)
             circle2 = plt.Circle((new_source[0] - coords[1] + half_window, \
                     new_source[2] - coords[0] + half_window), \
-                    4*aperture, edgecolor='r', facecolor="none")
+                    4*ap, edgecolor='r', facecolor="none")
             ax[0,0].add_artist(circle2)
 
             fig.savefig(output_plots+"/source_{0:d}.pdf".format(len(sources)-1))
@@ -314,6 +269,117 @@ def find(image, threshold=5, include_radius=20, window_size=40, \
 
     return sources
 
+def measure_source(image, coords, nearby, window_size=40, \
+        beam=[1.0,1.0,0.0], user_aperture=False, aperture=15, \
+        bootstrap_unc=True):
+    # Fit a single source, along with any nearby sources so that they can be
+    # subtracted out, and do aperture photometry on it. Returns None if the
+    # fit fails.
+
+    # Set up the parameter guesses for fitting.
+
+    half_window = window_size / 2
+
+    xmin = max(0,coords[1]-half_window)
+    xmax = min(coords[1]+half_window,image.image.shape[1])
+    ymin = max(0,coords[0]-half_window)
+    ymax = min(coords[0]+half_window,image.image.shape[0])
+
+    x, y = numpy.meshgrid(numpy.linspace(xmin, xmax-1, int(xmax - xmin)), \
+            numpy.linspace(ymin, ymax-1, int(ymax - ymin)))
+
+    z = image.image[int(ymin):int(ymax),int(xmin):int(xmax),0,0]
+    sigma_z = image.unc[int(ymin):int(ymax),int(xmin):int(xmax),0,0]
+
+    beam_to_sigma = arcsec / (abs(image.wcs.wcs.cdelt[0]) * numpy.pi/180) /\
+            2.355
+
+    xc, yc = coords[1], coords[0]
+    params = numpy.array([xc, yc, beam[0]*beam_to_sigma, \
+            beam[1]*beam_to_sigma, beam[2], image.image[yc,xc,0,0]])
+
+    bm = [image.header["BMAJ"]/abs(image.wcs.wcs.cdelt[0])/2.355,\
+            image.header["BMIN"]/abs(image.wcs.wcs.cdelt[0])/2.355,\
+            image.header["BPA"]*numpy.pi/180.]
+
+    # Fit the source with a Gaussian.
+
+    try:
+        p, sigma_p = fit_source(coords, x, y, z, sigma_z, params, \
+                bootstrap_unc=bootstrap_unc, beam=bm)
+    except ValueError:
+        return None
+
+    # Create a new source to add.
+
+    new_source = numpy.empty((16,), dtype=p.dtype)
+    new_source[0:12][0::2] = p[0:6]
+    new_source[0:12][1::2] = sigma_p[0:6]
+
+    # Before doing aperture photometry, fit any sources within the provided
+    # radius so they can be subtracted out of the sky subtraction window.
+
+    nsources = 1
+
+    for coords2 in nearby:
+        xc, yc = coords2[1], coords2[0]
+        params = numpy.array([xc, yc, beam[0]*beam_to_sigma, \
+                beam[1]*beam_to_sigma, beam[2], image.image[yc,xc,0,0]])
+
+        try:
+            new_p, sigma_new_p = fit_source(coords2, x, y, z, sigma_z, \
+                    params, bootstrap_unc=False)
+        except ValueError:
+            continue
+
+        p = numpy.hstack([p, new_p])
+        nsources += 1
+
+    # Do some aperture photometry for the source.
+
+    if nsources > 1:
+        new_z = z.copy() - gaussian2d(x, y, p[6:], nsources-1)
+    else:
+        new_z = z.copy()
+
+    if not user_aperture:
+        aperture = 3 * numpy.sqrt(new_source[4]*new_source[6])
+
+    sky_failed = False
+    try:
+        sky = numpy.median(new_z[numpy.logical_and(\
+                numpy.sqrt((coords[1]-x)**2 + (coords[0]-y)**2) > aperture,\
+                numpy.sqrt((coords[1]-x)**2 + (coords[0]-y)**2) <= \
+                4*aperture)])
+    except IndexError:
+        sky = -1.0e-5
+        sky_failed = True
+
+    new_source[12] = image.image[coords[0], coords[1], 0, 0] - sky
+    new_source[13] = image.unc[coords[0], coords[1], 0, 0]
+    new_source[14] = (new_z[numpy.sqrt((new_source[0]-x)**2 + \
+            (new_source[2]-y)**2) < aperture] - sky).sum()
+    new_source[15] = numpy.sqrt((sigma_z[numpy.sqrt((new_source[0]-x)**2+ \
+            (new_source[2]-y)**2) < aperture]**2).sum())
+
+    return new_source, sky_failed, (x, y, z, sigma_z, p, nsources, aperture)
+
+# The image is handed to each worker process once, when the pool starts,
+# rather than with every source.
+
+worker_image = None
+
+def set_worker_image(image):
+    global worker_image
+    worker_image = image
+
+def measure_source_task(args):
+    coords, nearby, options, seed = args
+
+    numpy.random.seed(seed)
+
+    return measure_source(worker_image, coords, nearby, **options)
+
 def fit_source(coords, x, y, z, sigma_z, params, bootstrap_unc=True, \
         beam=None):
     # Try a least squares fit.
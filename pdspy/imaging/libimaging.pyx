@@ -1,6 +1,7 @@
 import numpy
 cimport numpy
 import astropy
+import warnings
 import h5py
 from ..constants.physics import c
 
@@ -70,32 +71,48 @@ class Image(ImageObject):
 
         return hdulist
 
-    def set_uncertainty_from_image(self, image, box=128):
-        cdef unsigned int ny, nx, nfreq, npol
-        cdef unsigned int xmin, xmax, ymin, ymax
-        cdef unsigned int i, j
-        cdef unsigned int halfbox
-        cdef numpy.ndarray[double, ndim=2] subimage
-        cdef numpy.ndarray[double, ndim=4] unc
+    def set_uncertainty_from_image(self, image, box=128, robust=False, \
+            step=None):
+        r"""
+        Set the uncertainty of each pixel to the standard deviation of the
+        pixels of another image (e.g. a residual image) within a box 
+        centered on that pixel, ignoring NaNs. Every channel and 
+        polarization is done separately.
+
+        Args:
+            :attr:`image` (`Image`):
+                The image to estimate the noise from, with the same shape as
+                this one.
+            :attr:`box` (`int`, optional):
+                The size of the box, in pixels. Default: `128`
+            :attr:`robust` (`bool`, optional):
+                Use the median absolute deviation, scaled to a standard
+                deviation, rather than the standard deviation. This is 
+                calculated on a grid of every step pixels and interpolated
+                to the rest of the image. Default: `False`
+            :attr:`step` (`int`, optional):
+                The spacing of the grid for the robust estimate, in pixels.
+                Default: `box // 4`
+        """
+
+        cdef unsigned int ny, nx, nfreq, npol, halfbox
+        cdef unsigned int k, l
 
         ny, nx, nfreq, npol = self.image.shape
 
-        halfbox = box / 2
+        halfbox = box // 2
+        if step == None:
+            step = max(1, box // 4)
 
         unc = numpy.empty(self.image.shape)
-        for i in range(ny):
-            for j in range(nx):
-                xmin = max(0,<int>j-64)
-                xmax = min(<int>j+64,nx)
-                ymin = max(0,<int>i-64)
-                ymax = min(<int>i+64,ny)
 
-                subimage = image.image[ymin:ymax,xmin:xmax,0,0]
-
-                if (numpy.isnan(subimage).prod() == True):
-                    unc[i,j,0,0] = subimage[0,0]
+        for k in range(nfreq):
+            for l in range(npol):
+                if robust:
+                    unc[:,:,k,l] = window_mad(image.image[:,:,k,l], halfbox, \
+                            step)
                 else:
-                    unc[i,j,0,0] = numpy.nanstd(subimage)
+                    unc[:,:,k,l] = window_std(image.image[:,:,k,l], halfbox)
 
         self.unc = unc
 
@@ -176,6 +193,84 @@ class Image(ImageObject):
         if (usefile == None):
             f.close()
 
+def window_std(plane, halfbox):
+    # The standard deviation of the non-NaN pixels within [i-halfbox, 
+    # i+halfbox) x [j-halfbox, j+halfbox) of each pixel, calculated from
+    # cumulative sums of the pixel counts and first and second moments, so 
+    # that the cost doesn't depend on the size of the box.
+
+    ny, nx = plane.shape
+
+    good = numpy.isfinite(plane)
+    if not good.any():
+        return numpy.full(plane.shape, numpy.nan)
+
+    # Subtract off the mean first to avoid losing precision when the sums
+    # of squares are differenced.
+
+    values = numpy.where(good, plane - plane[good].mean(), 0.)
+
+    ymin = numpy.clip(numpy.arange(ny) - halfbox, 0, ny)
+    ymax = numpy.clip(numpy.arange(ny) + halfbox, 0, ny)
+    xmin = numpy.clip(numpy.arange(nx) - halfbox, 0, nx)
+    xmax = numpy.clip(numpy.arange(nx) + halfbox, 0, nx)
+
+    def window_sum(array):
+        table = numpy.zeros((ny+1, nx+1))
+        table[1:,1:] = array.cumsum(axis=0).cumsum(axis=1)
+
+        return table[ymax,:][:,xmax] - table[ymin,:][:,xmax] - \
+                table[ymax,:][:,xmin] + table[ymin,:][:,xmin]
+
+    n = window_sum(good.astype(float))
+    total = window_sum(values)
+    total2 = window_sum(values**2)
+
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        variance = total2 / n - (total / n)**2
+
+    return numpy.sqrt(numpy.where(n > 0, numpy.maximum(variance, 0.), \
+            numpy.nan))
+
+def window_mad(plane, halfbox, step):
+    # A robust estimate of the standard deviation within the same boxes as
+    # window_std, 1.4826 times the median absolute deviation, calculated on
+    # a grid of every step pixels and bilinearly interpolated in between.
+
+    ny, nx = plane.shape
+
+    # Pad the image with NaNs so that the boxes near the edges are just 
+    # truncated.
+
+    padded = numpy.full((ny+2*halfbox, nx+2*halfbox), numpy.nan)
+    padded[halfbox:halfbox+ny,halfbox:halfbox+nx] = plane
+
+    yc = numpy.unique(numpy.append(numpy.arange(0, ny, step), ny-1))
+    xc = numpy.unique(numpy.append(numpy.arange(0, nx, step), nx-1))
+
+    mad = numpy.empty((yc.size, xc.size))
+
+    for i, y in enumerate(yc):
+        windows = numpy.lib.stride_tricks.sliding_window_view(\
+                padded[y:y+2*halfbox,:], (2*halfbox, 2*halfbox), \
+                axis=(0,1))[0,xc]
+        windows = windows.reshape((xc.size, -1))
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+
+            median = numpy.nanmedian(windows, axis=1)
+            mad[i] = 1.4826 * numpy.nanmedian(numpy.abs(windows - \
+                    median[:,None]), axis=1)
+
+    # Interpolate along x and then along y, which is bilinear interpolation.
+
+    mad = numpy.array([numpy.interp(numpy.arange(nx), xc, row) for row in \
+            mad])
+
+    return numpy.array([numpy.interp(numpy.arange(ny), yc, column) for \
+            column in mad.T]).T
+
 ################################################################################
 #
 # Unstructured images.
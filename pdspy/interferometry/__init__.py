@@ -1,18 +1,20 @@
-from .libinterferometry import Visibilities, average, grid, freqcorrect, chisq
-from .readuvfits import readuvfits
-from .readvis import readvis
-from .center import center
-from .clean import clean
-from .concatenate import concatenate
-from .fit_model import fit_model
-from .invert import invert
-from .model import model
-from .rotate import rotate
-from .interpolate_model import interpolate_model
+from ..lazy_import import lazy_import
 
-try:
-    from .readms import readms
-except:
-    pass
-
-from .rmlimage import rmlimage
+lazy_import(__name__, {
+        "Visibilities":"libinterferometry",
+        "average":"libinterferometry",
+        "grid":"libinterferometry",
+        "freqcorrect":"libinterferometry",
+        "chisq":"libinterferometry",
+        "readuvfits":"readuvfits",
+        "readvis":"readvis",
+        "center":"center",
+        "clean":"clean",
+        "concatenate":"concatenate",
+        "fit_model":"fit_model",
+        "invert":"invert",
+        "model":"model",
+        "rotate":"rotate",
+        "interpolate_model":"interpolate_model",
+        "readms":"readms",
+        "rmlimage":"rmlimage"})
@@ -22,4 +22,5 @@ def center(data, params):
     centered_data = data_complex * model_complex.conj()
     
     return Visibilities(data.u.copy(), data.v.copy(), data.freq.copy(), \
-            centered_data.real, centered_data.imag, data.weights.copy())
+            centered_data.real, centered_data.imag, data.weights.copy(), \
+            hermitian=data.hermitian)
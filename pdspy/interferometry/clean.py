@@ -3,12 +3,23 @@ from scipy.signal import fftconvolve
 from scipy.optimize import leastsq
 from ..imaging import Image
 from .invert import invert
+import multiprocessing
+import scipy.fft
+import hashlib
 import numpy
 
+# The clean beams that have already been fit in this process, keyed by a hash
+# of the dirty beam, so that re-cleaning the same data doesn't re-fit them.
+# Only a few are kept, as each channel of each dataset has its own.
+
+clean_beams = {}
+max_clean_beams = 64
+
 def clean(data, imsize=256, pixel_size=0.25, convolution="pillbox", mfs=False,\
         weighting="natural", robust=2, npixels=0, centering=None, \
         mode='continuum', gain=0.1, maxiter=1000, threshold=0.001, \
-        uvtaper=None, nsigma=5.):
+        uvtaper=None, nsigma=5., algorithm="hogbom", cycle_niter=100, \
+        beam_patch=None, nprocs=1):
 
     # First make the image.
 
@@ -22,16 +33,12 @@ def clean(data, imsize=256, pixel_size=0.25, convolution="pillbox", mfs=False,\
     beam = invert(data, imsize=2*imsize, pixel_size=pixel_size, \
             convolution=convolution, mfs=mfs, weighting=weighting, \
             robust=robust, npixels=npixels, centering=centering, mode=mode, \
-            beam=True)
+            beam=True, uvtaper=uvtaper)
 
     # Now start the clean-ing by defining some variables.
 
     dirty = image.image[:,:,:,0]
     dirty_beam = beam.image[:,:,:,0]
-    wherezero = dirty == 0
-    nonzero = dirty != 0
-    
-    model = numpy.zeros(dirty.shape)
 
     # Calculate the size of the beam.
 
@@ -41,87 +48,240 @@ def clean(data, imsize=256, pixel_size=0.25, convolution="pillbox", mfs=False,\
     x, y = numpy.meshgrid(numpy.arange(nx) - nx/2 + 1, numpy.arange(ny) - ny/2)
 
     for i in range(nfreq):
-        fitfunc = lambda p, x, y: numpy.exp(-(x * numpy.cos(p[2]) - \
-                y * numpy.sin(p[2]))**2 / (2*p[0]**2) - (x * numpy.sin(p[2]) + \
-                y * numpy.cos(p[2]))**2 / (2*p[1]**2))
-        errfunc = lambda p, x, y, z, w: numpy.ravel((fitfunc(p, x, y) - z) * w)
+        clean_beam[:,:,i] = fitfunc(fit_clean_beam(dirty_beam[:,:,i], x, y), \
+                x, y)
+
+    # Clean each of the channels independently, in parallel if requested.
+
+    tasks = [(dirty[:,:,i], dirty_beam[:,:,i], clean_beam[:,:,i], gain, \
+            maxiter, nsigma, algorithm, cycle_niter, beam_patch) for i in \
+            range(nfreq)]
+
+    if nprocs > 1 and nfreq > 1:
+        pool = multiprocessing.Pool(min(nprocs, nfreq))
+        results = pool.map(clean_channel_task, tasks)
+        pool.close()
+        pool.join()
+    else:
+        results = [clean_channel_task(task) for task in tasks]
+
+    model = numpy.stack([result[0] for result in results], axis=2)
+    dirty = numpy.stack([result[1] for result in results], axis=2)
+    mask = numpy.stack([result[2] for result in results], axis=2)
+
+    # Generate a clean beam and convolve with the model to make a cleaned image.
+
+    clean_image = numpy.zeros(dirty.shape)
+    for i in range(nfreq):
+        clean_image[:,:,i] = fftconvolve(model[:,:,i], \
+                centered_kernel(clean_beam[:,:,i]), mode='same')+dirty[:,:,i]
+
+    model = Image(model.reshape((model.shape[0],model.shape[1],\
+            model.shape[2],1)), freq=data.freq)
+    residuals = Image(dirty.reshape((dirty.shape[0],dirty.shape[1],\
+            dirty.shape[2],1)), freq=data.freq)
+    clean_beam = Image(clean_beam.reshape((dirty_beam.shape[0],\
+            dirty_beam.shape[1],dirty_beam.shape[2],1)), freq=data.freq)
+    clean_image = Image(clean_image.reshape(model.image.shape), \
+            freq=data.freq)
+    mask = Image(mask.astype(float).reshape(model.image.shape), \
+            freq=data.freq)
+
+    return clean_image, residuals, beam, model, mask
+
+def fitfunc(p, x, y):
+    return numpy.exp(-(x * numpy.cos(p[2]) - y * numpy.sin(p[2]))**2 / \
+            (2*p[0]**2) - (x * numpy.sin(p[2]) + y * numpy.cos(p[2]))**2 / \
+            (2*p[1]**2))
+
+def fit_clean_beam(dirty_beam, x, y):
+    # Fit a Gaussian to the main lobe of the dirty beam. Only the pixels
+    # above 0.4 have any weight in the fit, so only those are passed to
+    # leastsq.
+
+    key = hashlib.sha1(numpy.ascontiguousarray(dirty_beam)).hexdigest()
+
+    if not key in clean_beams:
+        good = dirty_beam > 0.4
+
+        errfunc = lambda p, x, y, z, w: (fitfunc(p, x, y) - z) * w
         p0 = [0.5,0.5,0.]
 
-        weights = numpy.abs(dirty_beam[:,:,i])*(dirty_beam[:,:,i] > 0.4)
+        p, success = leastsq(errfunc, p0, args=(x[good], y[good], \
+                dirty_beam[good], numpy.abs(dirty_beam[good])))
+
+        if len(clean_beams) >= max_clean_beams:
+            clean_beams.pop(next(iter(clean_beams)))
+
+        clean_beams[key] = p
 
-        p, success = leastsq(errfunc, p0, args=(x,y,dirty_beam[:,:,i],weights))
-        #print(p[0]*pixel_size, p[1]*pixel_size, p[2]*180./numpy.pi)
+    return clean_beams[key]
 
-        clean_beam[:,:,i] = fitfunc(p, x, y)
+def beam_center(beam):
+    # The pixel that invert puts the phase center at.
+
+    return beam.shape[0]//2, beam.shape[1] - 1 - beam.shape[1]//2
+
+def centered_kernel(beam):
+    # Trim the beam so that it has an odd size and is centered on its central
+    # pixel, so that fftconvolve with mode='same' doesn't shift the result.
+
+    cy, cx = beam_center(beam)
+    h = min(cy, beam.shape[0] - 1 - cy, cx, beam.shape[1] - 1 - cx)
+
+    return beam[cy-h:cy+h+1,cx-h:cx+h+1]
+
+def clean_channel_task(args):
+    return clean_channel(*args)
+
+def clean_channel(dirty, dirty_beam, clean_beam, gain=0.1, maxiter=1000, \
+        nsigma=5., algorithm="hogbom", cycle_niter=100, beam_patch=None):
+    # Clean a single channel. With algorithm="hogbom" the beam is subtracted
+    # from the full residual image, in place, at each iteration, and the
+    # noise is re-estimated every cycle_niter iterations, and again before
+    # stopping, so cycle_niter=1 reproduces the original loop. With
+    # algorithm="clark" the minor cycles, of up to cycle_niter iterations,
+    # only work on the brightest residual pixels, and only subtract a patch
+    # of the beam from them, and the residual image is recalculated from the
+    # model with an FFT, and the noise re-estimated, in each major cycle.
+
+    dirty = dirty.copy()
+    wherezero = dirty == 0
+
+    model = numpy.zeros(dirty.shape)
+
+    ny, nx = dirty.shape
+    cy, cx = beam_center(dirty_beam)
 
     # Generate a mask.
 
-    threshold = max((dirty_beam - clean_beam).max() * dirty.max(), \
-            5.*mad_std(dirty))
-    mask = numpy.zeros(dirty.shape)
-    mask[dirty > threshold] = 1.0
+    sidelobe = (dirty_beam - clean_beam).max()
+
+    noise = mad_std(dirty)
+    threshold = max(sidelobe * dirty.max(), 5.*noise)
+    mask = dirty > threshold
     print("Cleaning to a threshold of ", threshold)
 
+    # The size of the beam patch used in the minor cycles, and the largest
+    # sidelobe outside of it, which sets how deep each minor cycle can go.
+
+    if algorithm == "clark":
+        if beam_patch == None:
+            beam_patch = max(ny, nx) // 4
+        beam_patch = min(beam_patch, cy, cx)
+
+        patch = dirty_beam[cy-beam_patch:cy+beam_patch+1,\
+                cx-beam_patch:cx+beam_patch+1]
+
+        outside = numpy.abs(dirty_beam).copy()
+        outside[cy-beam_patch:cy+beam_patch+1,cx-beam_patch:cx+beam_patch+1]=0.
+        outside = outside.max()
+
+        # The Fourier transform of the beam, for the major cycles, only needs
+        # to be done once. Padding by half of the beam is enough to keep the
+        # wrap-around of the circular convolution out of the image.
+
+        kernel = centered_kernel(dirty_beam)
+        h = kernel.shape[0] // 2
+
+        shape = [scipy.fft.next_fast_len(ny + h, real=True), \
+                scipy.fft.next_fast_len(nx + h, real=True)]
+        kernel = scipy.fft.rfft2(kernel, shape)
+
+        original = dirty.copy()
+
     # Now loop through and subtract off the beam.
 
     n = 0
     stop = False
+    masked = dirty*mask
     while n < maxiter and not stop:
+        # Re-estimate the noise at the start of each major cycle.
+
+        if algorithm == "clark":
+            noise = mad_std(dirty)
+
         # Update the mask if needed.
 
-        if (dirty*mask).max() < threshold:
-            threshold = max((dirty_beam - clean_beam).max() * dirty.max(), \
-                    5.*mad_std(dirty))
-            new_mask = numpy.zeros(dirty.shape)
-            new_mask[dirty > threshold] = 1.0
+        if masked.max() < threshold:
+            threshold = max(sidelobe * dirty.max(), 5.*noise)
 
-            mask = numpy.logical_or(mask, new_mask)
+            mask = numpy.logical_or(mask, dirty > threshold)
+            masked = dirty*mask
             print(n, "Updating mask with threshold ", threshold)
 
-        # Determine the location of the maximum value inside the mask.
+        if algorithm == "hogbom":
+            # Determine the location of the maximum value inside the mask.
 
-        maxval = numpy.where(dirty*mask == (dirty*mask).max())
+            y0, x0 = numpy.unravel_index(masked.argmax(), masked.shape)
 
-        # Add that value to the model (with some gain).
-        
-        model[maxval] = model[maxval] + dirty[maxval]*gain
+            # Add that value to the model (with some gain), and subtract the
+            # shifted beam off of the image.
 
-        # Also subtract off that value from the image.
-        
-        #for i in range(nfreq):
-        for i in maxval[2]:
-            subtract = numpy.zeros(dirty[:,:,i].shape)
-            subtract[maxval[0:2]] = dirty[maxval]*gain
-        
-            dirty[:,:,i] = dirty[:,:,i] - fftconvolve(subtract[:,:], \
-                    dirty_beam[:,:,i], mode='same')
-        dirty[wherezero] = 0.
-        
-        # Do we stop here?
+            flux = dirty[y0,x0]*gain
+            model[y0,x0] += flux
 
-        stop = (dirty*mask).max() < nsigma * mad_std(dirty)
+            dirty -= flux*dirty_beam[cy-y0:cy-y0+ny,cx-x0:cx-x0+nx]
+            dirty[wherezero] = 0.
 
-        if stop:
-            print(n, "Reached a stopping threshold of ", nsigma, " at ", nsigma * mad_std(dirty))
+            masked = dirty*mask
 
-        n = n + 1
+            n = n + 1
 
-    # Generate a clean beam and convolve with the model to make a cleaned image.
+            # Do we stop here? Make sure that the noise is up to date first.
 
-    clean_image = numpy.zeros(dirty.shape)
-    for i in range(nfreq):
-        clean_image[:,:,i] = fftconvolve(model[:,:,i],clean_beam[:,:,i], \
-                mode='same')+dirty[:,:,i]
-    
-    model = Image(model.reshape((model.shape[0],model.shape[1],\
-            model.shape[2],1)), freq=data.freq)
-    residuals = Image(dirty.reshape((dirty.shape[0],dirty.shape[1],\
-            dirty.shape[2],1)), freq=data.freq)
-    clean_beam = Image(clean_beam.reshape((dirty_beam.shape[0],\
-            dirty_beam.shape[1],dirty_beam.shape[2],1)), freq=data.freq)
-    clean_image = Image(clean_image.reshape(model.image.shape), \
-            freq=data.freq)
-    mask = Image(mask.astype(float).reshape(model.image.shape), \
-            freq=data.freq)
-    
-    return clean_image, residuals, beam, model, mask
+            fresh = n % cycle_niter == 0
+            if fresh:
+                noise = mad_std(dirty)
+
+            stop = masked.max() < nsigma * noise
+            if stop and not fresh:
+                noise = mad_std(dirty)
+                stop = masked.max() < nsigma * noise
+        else:
+            peak = masked.max()
+
+            stop = peak < nsigma * noise
+            if stop:
+                break
+
+            # Pick out the pixels that could be cleaned in this minor cycle.
+
+            limit = max(outside * peak, nsigma * noise)
+
+            ys, xs = numpy.nonzero(masked >= limit)
+            values = masked[ys, xs]
+
+            # Run the minor cycle, subtracting the beam patch from only those
+            # pixels.
+
+            for j in range(min(cycle_niter, maxiter - n)):
+                k = values.argmax()
+                if j > 0 and values[k] < limit:
+                    break
+
+                flux = values[k]*gain
+                model[ys[k],xs[k]] += flux
+
+                dy, dx = ys - ys[k], xs - xs[k]
+                near = numpy.logical_and(numpy.abs(dy) <= beam_patch, \
+                        numpy.abs(dx) <= beam_patch)
+
+                values[near] -= flux*patch[beam_patch+dy[near],\
+                        beam_patch+dx[near]]
+
+                n = n + 1
+
+            # Major cycle: recalculate the residuals from the model.
+
+            dirty = original - scipy.fft.irfft2(scipy.fft.rfft2(model, \
+                    shape) * kernel, shape)[h:h+ny,h:h+nx]
+            dirty[wherezero] = 0.
+
+            masked = dirty*mask
+
+    if stop:
+        print(n, "Reached a stopping threshold of ", nsigma, " at ", \
+                nsigma * noise)
+
+    return model, dirty, mask
@@ -3,7 +3,15 @@ import numpy
 
 def concatenate(visibilities):
 
+    # The result only stores half of the uv-plane if all of the inputs do,
+    # otherwise the conjugates of the ones that do are included explicitly.
+
+    hermitian = all([vis.hermitian for vis in visibilities])
+
     for i, vis in enumerate(visibilities):
+        if vis.hermitian and not hermitian:
+            vis = vis.add_conjugate()
+
         if i == 0:
             u = vis.u.copy()
             v = vis.v.copy()
@@ -31,6 +39,8 @@ def concatenate(visibilities):
                     incl_baselines = False
 
     if incl_baselines:
-        return Visibilities(u, v, freq, real, imag, weights, baseline=baseline)
+        return Visibilities(u, v, freq, real, imag, weights, baseline=baseline,\
+                hermitian=hermitian)
     else:
-        return Visibilities(u, v, freq, real, imag, weights)
+        return Visibilities(u, v, freq, real, imag, weights, \
+                hermitian=hermitian)
@@ -18,6 +18,12 @@ def fit_model(data, funct='point', nsteps=1e3, niter=3, max_size=numpy.inf, \
     elif type(funct) == numpy.ndarray:
         pass
 
+    # If only one half of the uv-plane is stored, fit to both halves so that
+    # the weights and the data match the full set of visibilities.
+
+    if data.hermitian:
+        data = data.add_conjugate()
+
     # Check if we need to adjust the data weights based on a supplied 
     # image_rms.
 
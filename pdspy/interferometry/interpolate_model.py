@@ -1,35 +1,59 @@
 import numpy
 import scipy.interpolate
+import scipy.special
+import scipy.fft
 from ..constants.astronomy import arcsec
 from .libinterferometry import Visibilities
-from galario import double
+try:
+    from galario import double
+except:
+    double = None
 try:
     import trift
 except:
     pass
 
 def interpolate_model(u, v, freq, model, nthreads=1, dRA=0., dDec=0., \
-        code="galario", nxy=1024, dxy=0.01):
+        code="galario", nxy=1024, dxy=0.01, hermitian=False):
 
     if code == "galario":
-        real = []
-        imag = []
+        real = numpy.empty((u.size, len(model.freq)))
+        imag = numpy.empty((u.size, len(model.freq)))
 
-        double.threads(nthreads)
+        if double != None:
+            double.threads(nthreads)
 
-        dxy = (model.x[1] - model.x[0])*arcsec
+            dxy = (model.x[1] - model.x[0])*arcsec
 
-        for i in range(len(model.freq)):
-            vis = double.sampleImage(model.image[::-1,:,i,0].copy(order='C'), \
-                    dxy, u, v, dRA=dRA*arcsec, dDec=dDec*arcsec)
+            # Make one copy of the whole cube, with the channels first, so 
+            # that each channel is already a C-contiguous image.
 
-            real.append(vis.real.reshape((u.size,1)))
-            imag.append(-vis.imag.reshape((u.size,1)))
+            images = numpy.ascontiguousarray(model.image[::-1,:,:,0].\
+                    transpose((2,0,1)))
 
-        real = numpy.concatenate(real, axis=1)
-        imag = numpy.concatenate(imag, axis=1)
+            for i in range(images.shape[0]):
+                vis = double.sampleImage(images[i], dxy, u, v, \
+                        dRA=dRA*arcsec, dDec=dDec*arcsec)
+
+                real[:,i] = vis.real
+                imag[:,i] = -vis.imag
+        else:
+            # Without galario, fall back on degridding, which is accurate to
+            # a few parts in a million.
+
+            vis = degrid(model, u, v, dRA=dRA, dDec=dDec, nthreads=nthreads)
+
+            real[:,:] = vis.real
+            imag[:,:] = vis.imag
 
     elif code == "galario-unstructured":
+        # There is no fallback for unstructured images, so galario is needed.
+
+        if double == None:
+            raise ImportError("galario is needed to use "
+                    "code=\"galario-unstructured\", but it could not be "
+                    "imported.")
+
         real = []
         imag = []
 
@@ -47,6 +71,12 @@ def interpolate_model(u, v, freq, model, nthreads=1, dRA=0., dDec=0., \
         real = numpy.concatenate(real, axis=1)
         imag = numpy.concatenate(imag, axis=1)
 
+    elif code == "native":
+        vis = degrid(model, u, v, dRA=dRA, dDec=dDec, nthreads=nthreads)
+
+        real, imag = numpy.ascontiguousarray(vis.real), \
+                numpy.ascontiguousarray(vis.imag)
+
     elif code == "trift":
         vis = trift.cpu.trift(model.x*arcsec, model.y*arcsec, \
                 model.image, u, v, dRA*arcsec, dDec*arcsec, \
@@ -54,4 +84,142 @@ def interpolate_model(u, v, freq, model, nthreads=1, dRA=0., dDec=0., \
 
         real, imag = vis.real, vis.imag
 
-    return Visibilities(u, v, freq, real, imag, numpy.ones(real.shape))
+    return Visibilities(u, v, freq, real, imag, numpy.ones(real.shape), \
+            hermitian=hermitian)
+
+def degrid(model, u, v, dRA=0., dDec=0., nthreads=1, oversample=2, width=6):
+    # Calculate the visibilities of every channel of an image at (u, v) by
+    # padding the image by a factor of oversample, taking its FFT, and then
+    # interpolating from the FFT grid with a Kaiser-Bessel kernel that is 
+    # width cells wide. The image is divided by the Fourier transform of the
+    # kernel first to correct for the taper that the interpolation applies.
+
+    plan = degrid_plan(model.x, model.y, u, v, dRA=dRA, dDec=dDec, \
+            oversample=oversample, width=width)
+
+    return degrid_image(model.image[:,:,:,0], plan, nthreads=nthreads)
+
+def degrid_plan(x, y, u, v, dRA=0., dDec=0., oversample=2, width=6):
+    # Calculate everything that degrid needs that depends only on the image
+    # coordinates and the (u, v) positions, so that images on the same grid
+    # can be degridded repeatedly, e.g. when fitting, without redoing it.
+
+    nx, ny = x.size, y.size
+
+    Nx = scipy.fft.next_fast_len(int(oversample*nx))
+    Ny = scipy.fft.next_fast_len(int(oversample*ny))
+
+    dx = (x[1] - x[0])*arcsec
+    dy = (y[1] - y[0])*arcsec
+
+    # The kernel shape parameter from Beatty et al. (2005).
+
+    beta = numpy.pi * numpy.sqrt((width/oversample)**2 * \
+            (oversample - 0.5)**2 - 0.8)
+
+    def kernel(s):
+        s = numpy.clip(2*s/width, -1., 1.)
+        return scipy.special.i0(beta*numpy.sqrt(1 - s**2)) / width
+
+    # Calculate the Fourier transform of the kernel numerically at the 
+    # positions of the pixels, and use it to correct the image.
+
+    s = numpy.linspace(-width/2, width/2, 50*width+1)
+    ks = kernel(s)
+
+    def correction(n, N):
+        t = (numpy.arange(n) - n//2) / N
+        return numpy.trapz(ks * numpy.cos(2*numpy.pi*numpy.outer(t, s)), \
+                x=s, axis=1)
+
+    cx = correction(nx, Nx)
+    cy = correction(ny, Ny)
+
+    # Get the positions of the baselines on the grid, and the grid cells and
+    # kernel weights to use for each.
+
+    su = u * Nx * dx + Nx//2
+    sv = v * Ny * dy + Ny//2
+
+    if su.min() < width/2 or su.max() >= Nx-width/2 or \
+            sv.min() < width/2 or sv.max() >= Ny-width/2:
+        raise ValueError("The pixel size of the model image is too large to "
+                "sample the longest baselines. Use a smaller pixel size.")
+
+    offsets = numpy.arange(width) - (width - 1)//2
+
+    iu = numpy.floor(su).astype(int).reshape((u.size,1)) + offsets
+    iv = numpy.floor(sv).astype(int).reshape((v.size,1)) + offsets
+
+    wu = kernel(su.reshape((u.size,1)) - iu)
+    wv = kernel(sv.reshape((v.size,1)) - iv)
+
+    x0 = x[nx//2] + dRA
+    y0 = y[ny//2] + dDec
+
+    phase = numpy.exp(-2*numpy.pi*1j*(u*x0 + v*y0)*arcsec).reshape((u.size,1))
+
+    return {"shape":(ny, nx), "padded_shape":(Ny, Nx), \
+            "correction":numpy.outer(cy, cx), "iu":iu, "iv":iv, "wu":wu, \
+            "wv":wv, "phase":phase}
+
+def degrid_image(image, plan, nthreads=1):
+    # Degrid an image, with shape (ny, nx, nfreq), with a plan from 
+    # degrid_plan.
+
+    ny, nx = plan["shape"]
+    Ny, Nx = plan["padded_shape"]
+    iu, iv, wu, wv = plan["iu"], plan["iv"], plan["wu"], plan["wv"]
+    nfreq = image.shape[2]
+
+    padded = numpy.zeros((Ny, Nx, nfreq))
+    padded[Ny//2-ny//2:Ny//2-ny//2+ny,Nx//2-nx//2:Nx//2-nx//2+nx,:] = \
+            image / plan["correction"][:,:,numpy.newaxis]
+
+    vis_grid = scipy.fft.fftshift(scipy.fft.fft2(scipy.fft.ifftshift(padded, \
+            axes=(0,1)), axes=(0,1), workers=nthreads, overwrite_x=True), \
+            axes=(0,1))
+
+    vis = numpy.zeros((iu.shape[0], nfreq), dtype=complex)
+
+    for a in range(iu.shape[1]):
+        row = numpy.zeros((iu.shape[0], nfreq), dtype=complex)
+        for b in range(iu.shape[1]):
+            row += vis_grid[iv[:,a],iu[:,b],:] * wu[:,b:b+1]
+        vis += row * wv[:,a:a+1]
+
+    vis *= plan["phase"]
+
+    return vis
+
+def degrid_adjoint(vis, plan, nthreads=1):
+    # The adjoint of degrid_image, for real images: spread the visibilities
+    # onto the padded grid with the same kernel weights, inverse FFT, and
+    # apply the same correction. This is the gradient of 
+    # Re(sum(conj(vis) * degrid_image(image))) with respect to the image.
+
+    ny, nx = plan["shape"]
+    Ny, Nx = plan["padded_shape"]
+    iu, iv, wu, wv = plan["iu"], plan["iv"], plan["wu"], plan["wv"]
+    nfreq = vis.shape[1]
+
+    vis = vis * plan["phase"].conj()
+
+    vis_grid = numpy.zeros((Ny*Nx, nfreq), dtype=complex)
+
+    for a in range(iu.shape[1]):
+        index = (iv[:,a:a+1]*Nx + iu).ravel()
+        weights = wv[:,a:a+1] * wu
+
+        for i in range(nfreq):
+            vis_grid[:,i].real += numpy.bincount(index, weights=(weights * \
+                    vis[:,i:i+1].real).ravel(), minlength=Ny*Nx)
+            vis_grid[:,i].imag += numpy.bincount(index, weights=(weights * \
+                    vis[:,i:i+1].imag).ravel(), minlength=Ny*Nx)
+
+    padded = scipy.fft.fftshift(scipy.fft.ifft2(scipy.fft.ifftshift(\
+            vis_grid.reshape((Ny, Nx, nfreq)), axes=(0,1)), axes=(0,1), \
+            workers=nthreads, overwrite_x=True), axes=(0,1)).real * Nx*Ny
+
+    return padded[Ny//2-ny//2:Ny//2-ny//2+ny,Nx//2-nx//2:Nx//2-nx//2+nx,:] / \
+            plan["correction"][:,:,numpy.newaxis]
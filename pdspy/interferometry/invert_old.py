@@ -19,7 +19,9 @@ def invert(data, imsize=256, pixel_size=0.25, weights="natural", \
     if (data.freq.size > 1) and (mfs == False) and (spectral == False):
         averaged_data = average(data,only_freq=True)
     else:
-        averaged_data = data.copy()
+        # Make sure that both halves of the uv-plane are included.
+
+        averaged_data = data.add_conjugate()
 
     if beam:
         averaged_data.real[:,:] = 1.
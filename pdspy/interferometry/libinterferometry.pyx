@@ -3,6 +3,7 @@ cimport numpy
 import h5py
 import astropy
 cimport cython
+from cython.parallel cimport prange
 import time
 from libc.math cimport pi
 
@@ -12,6 +13,7 @@ cdef class VisibilitiesObject:
             uvdist, amp, phase
     cdef public numpy.ndarray baseline
     cdef public str array_name
+    cdef public bint hermitian
 
     def __init__(self, numpy.ndarray[double, ndim=1] u=None, \
             numpy.ndarray[double, ndim=1] v=None, \
@@ -19,7 +21,10 @@ cdef class VisibilitiesObject:
             numpy.ndarray[double, ndim=2] real=None, \
             numpy.ndarray[double, ndim=2] imag=None, \
             numpy.ndarray[double, ndim=2] weights=None, \
-            baseline=None, array_name="CARMA"):
+            baseline=None, array_name="CARMA", hermitian=False):
+
+        # If hermitian is True, only one half of the uv-plane is stored, and
+        # each visibility also stands for its complex conjugate at (-u, -v).
 
         if (type(u) != type(None)) and (type(v) != type(None)):
             self.u = u
@@ -42,14 +47,16 @@ cdef class VisibilitiesObject:
 
         self.baseline = baseline
         self.array_name = array_name
+        self.hermitian = hermitian
 
     def __reduce__(self):
         return (rebuild, (self.u, self.v, self.freq, self.real, self.imag, \
-                self.weights, self.baseline, self.array_name))
+                self.weights, self.baseline, self.array_name, self.hermitian))
 
-def rebuild(u, v, freq, real, imag, weights, baseline, array_name):
+def rebuild(u, v, freq, real, imag, weights, baseline, array_name, \
+        hermitian=False):
     return VisibilitiesObject(u, v, freq, real, imag, weights, baseline, \
-            array_name)
+            array_name, hermitian)
 
 class Visibilities(VisibilitiesObject):
 
@@ -58,7 +65,29 @@ class Visibilities(VisibilitiesObject):
 
         return Visibilities(self.u[incl], self.v[incl], self.freq, \
                 self.real[incl,:], self.imag[incl,:], \
-                self.weights[incl,:], baseline=self.baseline[incl])
+                self.weights[incl,:], baseline=self.baseline[incl], \
+                hermitian=self.hermitian)
+
+    def add_conjugate(self):
+        # Return a copy with the complex conjugates of the visibilities
+        # explicitly included, if only one half of the uv-plane is stored.
+
+        if not self.hermitian:
+            return Visibilities(self.u.copy(), self.v.copy(), \
+                    self.freq.copy(), self.real.copy(), self.imag.copy(), \
+                    self.weights.copy(), baseline=self.baseline)
+
+        if type(self.baseline) != type(None):
+            baseline = numpy.concatenate((self.baseline, self.baseline))
+        else:
+            baseline = None
+
+        return Visibilities(numpy.concatenate((self.u, -self.u)), \
+                numpy.concatenate((self.v, -self.v)), self.freq.copy(), \
+                numpy.concatenate((self.real, self.real)), \
+                numpy.concatenate((self.imag, -self.imag)), \
+                numpy.concatenate((self.weights, self.weights)), \
+                baseline=baseline)
 
     def set_header(self, header):
         self.header = header
@@ -110,7 +139,8 @@ class Visibilities(VisibilitiesObject):
             else:
                 weights = numpy.ones(real.shape)
 
-        self.__init__(u, v, freq, real, imag, weights)
+        self.__init__(u, v, freq, real, imag, weights, \
+                hermitian=f.attrs.get("hermitian", False))
 
         if (usefile == None):
             f.close()
@@ -145,19 +175,23 @@ class Visibilities(VisibilitiesObject):
                             self.weights.shape, dtype='float64')
                     weights_dset[...] = self.weights
 
+        if self.hermitian:
+            f.attrs["hermitian"] = True
+
         if (usefile == None):
             f.close()
 
 @cython.boundscheck(False)
 def average(data, gridsize=256, binsize=None, radial=False, log=False, \
-        logmin=None, logmax=None, mfs=False, mode="continuum"):
+        logmin=None, logmax=None, mfs=False, mode="continuum", nthreads=1):
 
     cdef numpy.ndarray[double, ndim=1] u, v, freq, uvdist
     cdef numpy.ndarray[double, ndim=2] real, imag, weights
     cdef numpy.ndarray[double, ndim=3] new_real, new_imag, new_weights
-    cdef numpy.ndarray[unsigned int, ndim=1] i, j
+    cdef numpy.ndarray[unsigned int, ndim=1] i, j, ci, cj
     cdef unsigned int k, n
-    
+    cdef int hermitian = data.hermitian
+
     if mfs:
         vis = freqcorrect(data)
         u = vis.u
@@ -200,6 +234,14 @@ def average(data, gridsize=256, binsize=None, radial=False, log=False, \
     elif mode == "spectralline":
         nchannels = freq.size
 
+    # If only half of the uv-plane is stored, each visibility also stands for
+    # its complex conjugate. Radially, the conjugate falls in the same bin, so
+    # count each visibility twice and let the imaginary parts cancel.
+
+    if hermitian and radial:
+        weights *= 2
+        imag[:,:] = 0.
+
     # Average over the U-V plane by creating bins to average over.
     
     if radial:
@@ -211,9 +253,7 @@ def average(data, gridsize=256, binsize=None, radial=False, log=False, \
             new_u = numpy.linspace(binsize/2,(gridsize-0.5)*binsize,gridsize)
         new_u = new_u.reshape((1,gridsize))
         new_v = numpy.zeros((1,gridsize))
-        new_real = numpy.zeros((1,gridsize,nchannels))
-        new_imag = numpy.zeros((1,gridsize,nchannels))
-        new_weights = numpy.zeros((1,gridsize,nchannels))
+        ny = 1
 
         if log:
             dtemp = temp[1] - temp[0]
@@ -236,11 +276,7 @@ def average(data, gridsize=256, binsize=None, radial=False, log=False, \
                     (gridsize-1)*binsize/2, gridsize)
 
         #new_u, new_v = numpy.meshgrid(uu, vv)
-        new_u = numpy.zeros((gridsize,gridsize,nchannels))
-        new_v = numpy.zeros((gridsize,gridsize,nchannels))
-        new_real = numpy.zeros((gridsize,gridsize,nchannels))
-        new_imag = numpy.zeros((gridsize,gridsize,nchannels))
-        new_weights = numpy.zeros((gridsize,gridsize,nchannels))
+        ny = gridsize
 
         if gridsize%2 == 0:
             i = numpy.round(u/binsize+gridsize/2.).astype(numpy.uint32)
@@ -249,10 +285,30 @@ def average(data, gridsize=256, binsize=None, radial=False, log=False, \
             i = numpy.round(u/binsize+(gridsize-1)/2.).astype(numpy.uint32)
             j = numpy.round(v/binsize+(gridsize-1)/2.).astype(numpy.uint32)
 
+    # In the uv-plane, the complex conjugate of each visibility goes into the
+    # mirrored (-u, -v) cell.
+
+    if hermitian and not radial:
+        if gridsize%2 == 0:
+            ci = numpy.round(-u/binsize+gridsize/2.).astype(numpy.uint32)
+            cj = numpy.round(-v/binsize+gridsize/2.).astype(numpy.uint32)
+        else:
+            ci = numpy.round(-u/binsize+(gridsize-1)/2.).astype(numpy.uint32)
+            cj = numpy.round(-v/binsize+(gridsize-1)/2.).astype(numpy.uint32)
+    else:
+        hermitian = False
+        ci = i
+        cj = j
+
     good_i = numpy.logical_and(i >= 0, i < gridsize)
     good_j = numpy.logical_and(j >= 0, j < gridsize)
     good = numpy.logical_and(good_i, good_j)
-    if good.sum() < good.size:
+    if hermitian:
+        good_conj = numpy.logical_and(ci < gridsize, cj < gridsize)
+        if good.sum() < good.size or good_conj.sum() < good_conj.size:
+            print("WARNING: uv.grid was supplied with a gridsize and binsize that do not cover the full range of the input data in the uv-plane and is cutting baselines that are outside of this grid. Make sure to check your results carefully.")
+        good = numpy.logical_or(good, good_conj)
+    elif good.sum() < good.size:
         print("WARNING: uv.grid was supplied with a gridsize and binsize that do not cover the full range of the input data in the uv-plane and is cutting baselines that are outside of this grid. Make sure to check your results carefully.")
 
     u = u[good]
@@ -263,25 +319,62 @@ def average(data, gridsize=256, binsize=None, radial=False, log=False, \
 
     i = i[good]
     j = j[good]
+    ci = ci[good]
+    cj = cj[good]
 
     nuv = u.size
 
-    for k in range(nuv):
-        for n in range(nfreq):
-            if mode == "continuum":
-                if not radial:
-                    new_u[j[k],i[k],0] += u[k]*weights[k,n]
-                    new_v[j[k],i[k],0] += v[k]*weights[k,n]
-                new_real[j[k],i[k],0] += real[k,n]*weights[k,n]
-                new_imag[j[k],i[k],0] += imag[k,n]*weights[k,n]
-                new_weights[j[k],i[k],0] += weights[k,n]
-            elif mode == "spectralline":
-                if not radial:
-                    new_u[j[k],i[k],n] += u[k]*weights[k,n]
-                    new_v[j[k],i[k],n] += v[k]*weights[k,n]
-                new_real[j[k],i[k],n] += real[k,n]*weights[k,n]
-                new_imag[j[k],i[k],n] += imag[k,n]*weights[k,n]
-                new_weights[j[k],i[k],n] += weights[k,n]
+    # Accumulate the visibilities onto the grid. Each task gets its own 
+    # layer of the accumulation arrays, so tasks can run in parallel: in 
+    # spectral line mode each channel is a task, and in continuum mode each 
+    # task takes a chunk of the visibilities, and the layers are summed 
+    # afterwards.
+
+    cdef int t, ntasks, spectralline = mode == "spectralline"
+    cdef int nthreads_c = max(nthreads, 1)
+
+    if spectralline:
+        ntasks = nchannels
+    else:
+        ntasks = max(min(nthreads_c, nuv), 1)
+
+    cdef double[:,:,::1] sum_u = numpy.zeros((ntasks,ny,gridsize))
+    cdef double[:,:,::1] sum_v = numpy.zeros((ntasks,ny,gridsize))
+    cdef double[:,:,::1] sum_real = numpy.zeros((ntasks,ny,gridsize))
+    cdef double[:,:,::1] sum_imag = numpy.zeros((ntasks,ny,gridsize))
+    cdef double[:,:,::1] sum_weights = numpy.zeros((ntasks,ny,gridsize))
+
+    cdef double[::1] u_view = numpy.ascontiguousarray(u)
+    cdef double[::1] v_view = numpy.ascontiguousarray(v)
+    cdef double[:,::1] real_view = numpy.ascontiguousarray(real)
+    cdef double[:,::1] imag_view = numpy.ascontiguousarray(imag)
+    cdef double[:,::1] weights_view = numpy.ascontiguousarray(weights)
+    cdef unsigned int[::1] i_view = numpy.ascontiguousarray(i)
+    cdef unsigned int[::1] j_view = numpy.ascontiguousarray(j)
+    cdef unsigned int[::1] ci_view = numpy.ascontiguousarray(ci)
+    cdef unsigned int[::1] cj_view = numpy.ascontiguousarray(cj)
+    cdef int[::1] chunks = (numpy.arange(ntasks+1)*nuv//ntasks).\
+            astype(numpy.int32)
+
+    for t in prange(ntasks, nogil=True, num_threads=nthreads_c, \
+            schedule="dynamic"):
+        if spectralline:
+            average_task(u_view, v_view, real_view, imag_view, weights_view, \
+                    i_view, j_view, ci_view, cj_view, sum_u, sum_v, \
+                    sum_real, sum_imag, sum_weights, t, 0, nuv, t, t+1, \
+                    hermitian)
+        else:
+            average_task(u_view, v_view, real_view, imag_view, weights_view, \
+                    i_view, j_view, ci_view, cj_view, sum_u, sum_v, \
+                    sum_real, sum_imag, sum_weights, t, chunks[t], \
+                    chunks[t+1], 0, nfreq, hermitian)
+
+    new_real = layers_to_channels(sum_real, spectralline)
+    new_imag = layers_to_channels(sum_imag, spectralline)
+    new_weights = layers_to_channels(sum_weights, spectralline)
+    if not radial:
+        new_u = layers_to_channels(sum_u, spectralline)
+        new_v = layers_to_channels(sum_v, spectralline)
 
     good_data = new_weights != 0.0
     new_real[good_data] = new_real[good_data] / new_weights[good_data]
@@ -313,16 +406,14 @@ def average(data, gridsize=256, binsize=None, radial=False, log=False, \
 @cython.boundscheck(False)
 def grid(data, gridsize=256, binsize=2000.0, convolution="pillbox", \
         mfs=False, channel=None, imaging=False, weighting="natural", \
-        robust=2, npixels=0, mode="continuum"):
+        robust=2, npixels=0, mode="continuum", nthreads=1):
     
     cdef numpy.ndarray[double, ndim=1] u, v, freq
     cdef numpy.ndarray[double, ndim=2] real, imag, weights, new_u, new_v
     cdef numpy.ndarray[double, ndim=3] new_real, new_imag, new_weights
-    cdef numpy.ndarray[double, ndim=3] binned_weights
-    cdef numpy.ndarray[unsigned int, ndim=2] i, j
-    cdef unsigned int k, l, m, n, ninclude_min, ninclude_max, lmin, lmax, \
-            mmin, mmax, ll, mm, ninclude, npix
-    cdef double mean_freq, inv_freq
+    cdef double[:,:,::1] binned_weights
+    cdef int ninclude_min, ninclude_max, ninclude, npix, kernel
+    cdef double mean_freq, inv_freq, offset
 
     if mfs:
         vis = freqcorrect(data)
@@ -354,7 +445,6 @@ def grid(data, gridsize=256, binsize=2000.0, convolution="pillbox", \
 
     # Set some parameter numbers for future use.
     
-    cdef double convolve
     cdef double inv_binsize = 1. / binsize
     cdef int nuv = u.size
     cdef int nfreq = freq.size
@@ -379,34 +469,16 @@ def grid(data, gridsize=256, binsize=2000.0, convolution="pillbox", \
                 gridsize)
 
     new_u, new_v = numpy.meshgrid(uu, vv)
-    new_real = numpy.zeros((gridsize,gridsize,nchannels))
-    new_imag = numpy.zeros((gridsize,gridsize,nchannels))
-    new_weights = numpy.zeros((gridsize,gridsize,nchannels))
 
-    # Get the indices for binning.
+    # The convolution kernels are separable, so for each visibility the 
+    # kernel is evaluated once along each axis and the 2D kernel is the 
+    # outer product.
 
-    i = numpy.zeros((nuv, nfreq), dtype=numpy.uint32)
-    j = numpy.zeros((nuv, nfreq), dtype=numpy.uint32)
-
-    mean_freq = numpy.mean(freq)
-    inv_freq = 1./mean_freq
-
-    if gridsize%2 == 0:
-        i = numpy.array(u.reshape((u.size,1))*freq*inv_freq/binsize+\
-                gridsize/2., dtype=numpy.uint32)
-        j = numpy.array(v.reshape((v.size,1))*freq*inv_freq/binsize+\
-                gridsize/2., dtype=numpy.uint32)
-    else:
-        i = numpy.array(u.reshape((u.size,1))*freq*inv_freq/binsize+ \
-                    (gridsize-1)/2., dtype=numpy.uint32)
-        j = numpy.array(v.reshape((v.size,1))*freq*inv_freq/binsize+ \
-                    (gridsize-1)/2., dtype=numpy.uint32)
-    
     if convolution == "pillbox":
-        convolve_func = ones
+        kernel = PILLBOX
         ninclude = 3
     elif convolution == "expsinc":
-        convolve_func = exp_sinc
+        kernel = EXPSINC
         ninclude = 6
 
     if ninclude%2 == 0:
@@ -416,109 +488,114 @@ def grid(data, gridsize=256, binsize=2000.0, convolution="pillbox", \
         ninclude_min = numpy.uint32((ninclude-1)*0.5)
         ninclude_max = numpy.uint32((ninclude-1)*0.5)
 
-    # Check whether any data falls outside of the grid, and exclude.
+    # The grid position of a visibility is u*freq/mean_freq/binsize + offset.
 
-    good_i = numpy.logical_and(i >= 0, i < gridsize)
-    good_j = numpy.logical_and(j >= 0, j < gridsize)
-    good = numpy.logical_and(good_i, good_j)
-    if good.sum() < good.size:
-        print("WARNING: uv.grid was supplied with a gridsize and binsize that do not cover the full range of the input data in the uv-plane and is cutting baselines that are outside of this grid. Make sure to check your results carefully.")
+    mean_freq = numpy.mean(freq)
+    inv_freq = 1./mean_freq
+
+    if gridsize%2 == 0:
+        offset = gridsize/2.
+    else:
+        offset = (gridsize-1)/2.
+
+    cdef double[::1] u_view = numpy.ascontiguousarray(u)
+    cdef double[::1] v_view = numpy.ascontiguousarray(v)
+    cdef double[::1] scale = numpy.ascontiguousarray(freq * inv_freq * \
+            inv_binsize)
+    cdef double[:,::1] real_view = numpy.ascontiguousarray(real)
+    cdef double[:,::1] imag_view = numpy.ascontiguousarray(imag)
+    cdef double[:,::1] weights_view = numpy.ascontiguousarray(weights, \
+            dtype=numpy.float64)
+    cdef int spectralline = mode == "spectralline"
+    cdef int hermitian = data.hermitian
+    cdef int nthreads_c = max(nthreads, 1)
+    cdef int t, ntasks
+    cdef long nbad = 0
+
+    # If only half of the uv-plane is stored, each visibility is also gridded
+    # at (-u, -v) as its complex conjugate. The conjugates start out with the
+    # same weights, but are reweighted by the density at their own position.
+
+    cdef double[:,::1] conj_weights_view = weights_view
 
     # If we are using a non-uniform weighting scheme, adjust the data weights.
 
     if weighting in ["uniform","superuniform","robust"]:
-        binned_weights = numpy.ones((gridsize,gridsize,nchannels))
+        binned_weights = numpy.ones((nchannels,gridsize,gridsize))
+
+        if hermitian:
+            conj_weights_view = numpy.array(weights_view)
 
         npix = npixels
 
         if weighting == "superuniform":
             npix = 3
 
-        for k in range(nuv):
-            for n in range(nfreq):
-                if not good[k,n]:
-                    continue
-
-                if npix > j[k,n]:
-                    lmin = 0
-                else:
-                    lmin = j[k,n] - npix
-
-                lmax = int_min(j[k,n]+npix+1, gridsize)
-
-                if npix > i[k,n]:
-                    mmin = 0
-                else:
-                    mmin = i[k,n] - npix
-
-                mmax = int_min(i[k,n]+npix+1, gridsize)
-
-                for l in range(lmin, lmax):
-                    for m in range(mmin, mmax):
-                        if mode == "continuum":
-                            binned_weights[l,m,0] += weights[k,n]
-                        elif mode == "spectralline":
-                            binned_weights[l,m,n] += weights[k,n]
+        bin_weights(u_view, v_view, scale, weights_view, binned_weights, \
+                offset, npix, spectralline, 1.)
+        if hermitian:
+            bin_weights(u_view, v_view, scale, conj_weights_view, \
+                    binned_weights, offset, npix, spectralline, -1.)
 
         if weighting in ["uniform","superuniform"]:
-            for k in range(nuv):
-                for n in range(nfreq):
-                    if not good[k,n]:
-                        continue
-
-                    l = j[k,n]
-                    m = i[k,n]
-
-                    weights[k,n] /= binned_weights[l,m,n]
+            f2 = numpy.zeros(nchannels)
         elif weighting == "robust":
-            f2 = (5*10**(-robust))**2 / \
-                    ((binned_weights**2).sum(axis=(0,1)) / weights.sum(axis=0))
-
-            for k in range(nuv):
-                for n in range(nfreq):
-                    if not good[k,n]:
-                        continue
-
-                    l = j[k,n]
-                    m = i[k,n]
+            if spectralline:
+                weights_sum = numpy.asarray(weights_view).sum(axis=0)
+            else:
+                weights_sum = numpy.asarray(weights_view).sum()
 
-                    weights[k,n] /= (1 + f2[n] * binned_weights[l,m,n])
+            if hermitian:
+                weights_sum = 2*weights_sum
 
-    # Now actually go through and calculate the new visibilities.
+            f2 = (5*10**(-robust))**2 / \
+                    ((numpy.asarray(binned_weights)**2).sum(axis=(1,2)) / \
+                    weights_sum)
 
-    for k in range(nuv):
-        for n in range(nfreq):
-            if not good[k,n]:
-                continue
+        f2 = numpy.ascontiguousarray(f2, dtype=numpy.float64)
+        uniform = weighting in ["uniform","superuniform"]
 
-            if ninclude_min > j[k,n]:
-                lmin = 0
-            else:
-                lmin = j[k,n] - ninclude_min
+        reweight(u_view, v_view, scale, weights_view, binned_weights, \
+                offset, f2, uniform, spectralline, 1.)
+        if hermitian:
+            reweight(u_view, v_view, scale, conj_weights_view, \
+                    binned_weights, offset, f2, uniform, spectralline, -1.)
 
-            lmax = int_min(j[k,n]+ninclude_max+1, gridsize)
+    # Now actually go through and calculate the new visibilities. As in 
+    # average, each task accumulates onto its own layer: one per channel in
+    # spectral line mode, and one per chunk of visibilities in continuum 
+    # mode.
 
-            if ninclude_min > i[k,n]:
-                mmin = 0
-            else:
-                mmin = i[k,n] - ninclude_min
+    if spectralline:
+        ntasks = nchannels
+    else:
+        ntasks = max(min(nthreads_c, nuv), 1)
+
+    cdef double[:,:,::1] sum_real = numpy.zeros((ntasks,gridsize,gridsize))
+    cdef double[:,:,::1] sum_imag = numpy.zeros((ntasks,gridsize,gridsize))
+    cdef double[:,:,::1] sum_weights = numpy.zeros((ntasks,gridsize,gridsize))
+    cdef int[::1] chunks = (numpy.arange(ntasks+1)*nuv//ntasks).\
+            astype(numpy.int32)
+
+    for t in prange(ntasks, nogil=True, num_threads=nthreads_c, \
+            schedule="dynamic"):
+        if spectralline:
+            nbad += grid_task(u_view, v_view, scale, real_view, imag_view, \
+                    weights_view, conj_weights_view, sum_real, sum_imag, \
+                    sum_weights, t, 0, nuv, t, t+1, offset, kernel, \
+                    ninclude_min, ninclude_max, hermitian)
+        else:
+            nbad += grid_task(u_view, v_view, scale, real_view, imag_view, \
+                    weights_view, conj_weights_view, sum_real, sum_imag, \
+                    sum_weights, t, chunks[t], chunks[t+1], 0, nfreq, \
+                    offset, kernel, ninclude_min, ninclude_max, hermitian)
 
-            mmax = int_min(i[k,n]+ninclude_max+1, gridsize)
+    if nbad > 0:
+        print("WARNING: uv.grid was supplied with a gridsize and binsize that do not cover the full range of the input data in the uv-plane and is cutting baselines that are outside of this grid. Make sure to check your results carefully.")
 
-            for l in range(lmin, lmax):
-                for m in range(mmin, mmax):
-                    convolve = convolve_func( (u[k]*freq[n]*inv_freq-\
-                            new_u[l,m])*inv_binsize, \
-                            (v[k]*freq[n]*inv_freq - new_v[l,m]) * inv_binsize)
-
-                    if mode == "continuum":
-                        new_real[l,m,0] += real[k,n]*weights[k,n]*convolve
-                        new_imag[l,m,0] += imag[k,n]*weights[k,n]*convolve
-                        new_weights[l,m,0] += weights[k,n]*convolve
-                    elif mode == "spectralline":
-                        new_real[l,m,n] += real[k,n]*weights[k,n]*convolve
-                        new_imag[l,m,n] += imag[k,n]*weights[k,n]*convolve
-                        new_weights[l,m,n] += weights[k,n]*convolve
+    new_real = layers_to_channels(sum_real, spectralline)
+    new_imag = layers_to_channels(sum_imag, spectralline)
+    new_weights = layers_to_channels(sum_weights, spectralline)
 
     # If we are making an image, normalize the weights.
 
@@ -540,11 +617,14 @@ def grid(data, gridsize=256, binsize=2000.0, convolution="pillbox", \
             new_imag.reshape((gridsize**2,nchannels)), \
             new_weights.reshape((gridsize**2,nchannels)))
 
-cdef inline int int_max(int a, int b): return a if a >= b else b
-cdef inline int int_min(int a, int b): return a if a <= b else b
-cdef inline double int_abs(double a): return -a if a < 0 else a
+cdef inline int int_max(int a, int b) noexcept nogil: 
+    return a if a >= b else b
+cdef inline int int_min(int a, int b) noexcept nogil: 
+    return a if a <= b else b
+cdef inline double int_abs(double a) noexcept nogil: 
+    return -a if a < 0 else a
 
-cdef double sinc(double x):
+cdef double sinc(double x) noexcept nogil:
 
     cdef double xp = x * pi
 
@@ -552,37 +632,223 @@ cdef double sinc(double x):
             xp**10/39916800. + xp**12/6227020800. - xp**14/1307674368000. + \
             xp**16/355687428096000.
 
-cdef double exp(double x):
+cdef double exp(double x) noexcept nogil:
 
     return 1 + x + x**2/2. + x**3/6. + x**4/24. + x**5/120.
 
-cdef double exp_sinc(double u, double v):
+# The convolution kernels are separable, so they are written as functions of
+# one coordinate and the 2D kernel is the product along the u and v axes. The
+# normalization of the exponential sinc kernel is applied once per pair.
+
+cdef enum:
+    PILLBOX = 0
+    EXPSINC = 1
+
+cdef double EXPSINC_NORM = 2.350016262343186
+
+cdef double exp_sinc(double u) noexcept nogil:
     
     cdef double inv_alpha1 = 1. / 1.55
     cdef double inv_alpha2 = 1. / 2.52
-    cdef double norm = 2.350016262343186
     cdef int m = 6
     
-    if (int_abs(u) >= m * 0.5) or (int_abs(v) >= m * 0.5):
+    if int_abs(u) >= m * 0.5:
         return 0.
 
-    cdef double arr = sinc(u * inv_alpha1) * \
-            sinc(v * inv_alpha1) * \
-            exp(-1 * (u * inv_alpha2)**2) * \
-            exp(-1 * (v * inv_alpha2)**2) / norm
+    return sinc(u * inv_alpha1) * exp(-1 * (u * inv_alpha2)**2)
 
-    return arr
-
-cdef double ones(double u, double v):
+cdef double ones(double u) noexcept nogil:
     
     cdef int m = 1
 
-    if (int_abs(u) >= m * 0.5) or (int_abs(v) >= m * 0.5):
+    if int_abs(u) >= m * 0.5:
         return 0.
 
-    cdef double arr = 1.0
+    return 1.0
+
+cdef inline double convolve_func(int kernel, double u) noexcept nogil:
+    if kernel == EXPSINC:
+        return exp_sinc(u)
+    else:
+        return ones(u)
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef long grid_task(double[::1] u, double[::1] v, double[::1] scale, \
+        double[:,::1] real, double[:,::1] imag, double[:,::1] weights, \
+        double[:,::1] conj_weights, double[:,:,::1] new_real, \
+        double[:,:,::1] new_imag, double[:,:,::1] new_weights, int layer, \
+        int kmin, int kmax, int nmin, int nmax, double offset, int kernel, \
+        int ninclude_min, int ninclude_max, int hermitian) noexcept nogil:
+
+    # Convolve visibilities kmin..kmax, channels nmin..nmax onto one layer of
+    # the grid, and return the number of points that fall off of the grid.
+    # If hermitian, also convolve the complex conjugate of each visibility
+    # onto the grid at (-u, -v).
+
+    cdef int gridsize = new_real.shape[1]
+    cdef int k, n, s, i, j, l, m, lmin, lmax, mmin, mmax
+    cdef double x, y, w, wreal, wimag, ky, convolve, sign
+    cdef double kx[8]
+    cdef long nbad = 0
+    cdef double norm = 1. / EXPSINC_NORM if kernel == EXPSINC else 1.
+
+    for k in range(kmin, kmax):
+        for n in range(nmin, nmax):
+            for s in range(1 + hermitian):
+                sign = 1. - 2.*s
+
+                x = sign*u[k]*scale[n] + offset
+                y = sign*v[k]*scale[n] + offset
+
+                if not (x > -1 and x < gridsize and y > -1 and y < gridsize):
+                    nbad += 1
+                    continue
+
+                if s == 0:
+                    w = weights[k,n]
+                else:
+                    w = conj_weights[k,n]
+                if w == 0:
+                    continue
+
+                wreal = real[k,n]*w*norm
+                wimag = sign*imag[k,n]*w*norm
+                w = w*norm
 
-    return arr
+                i = <int>x
+                j = <int>y
+
+                lmin = int_max(j - ninclude_min, 0)
+                lmax = int_min(j + ninclude_max + 1, gridsize)
+                mmin = int_max(i - ninclude_min, 0)
+                mmax = int_min(i + ninclude_max + 1, gridsize)
+
+                for m in range(mmin, mmax):
+                    kx[m-mmin] = convolve_func(kernel, x - m)
+
+                for l in range(lmin, lmax):
+                    ky = convolve_func(kernel, y - l)
+                    if ky == 0:
+                        continue
+
+                    for m in range(mmin, mmax):
+                        convolve = ky * kx[m-mmin]
+
+                        new_real[layer,l,m] += wreal*convolve
+                        new_imag[layer,l,m] += wimag*convolve
+                        new_weights[layer,l,m] += w*convolve
+
+    return nbad
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void bin_weights(double[::1] u, double[::1] v, double[::1] scale, \
+        double[:,::1] weights, double[:,:,::1] binned_weights, \
+        double offset, int npix, int spectralline, double sign) \
+        noexcept nogil:
+
+    # Sum up the weights within npix cells of each grid point. The
+    # visibilities are placed at sign*(u, v).
+
+    cdef int gridsize = binned_weights.shape[1]
+    cdef int k, n, c, i, j, l, m
+    cdef double x, y
+
+    for k in range(u.shape[0]):
+        for n in range(scale.shape[0]):
+            x = sign*u[k]*scale[n] + offset
+            y = sign*v[k]*scale[n] + offset
+
+            if not (x > -1 and x < gridsize and y > -1 and y < gridsize):
+                continue
+
+            i = <int>x
+            j = <int>y
+            c = n if spectralline else 0
+
+            for l in range(int_max(j - npix, 0), int_min(j+npix+1, gridsize)):
+                for m in range(int_max(i - npix, 0), \
+                        int_min(i+npix+1, gridsize)):
+                    binned_weights[c,l,m] += weights[k,n]
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void reweight(double[::1] u, double[::1] v, double[::1] scale, \
+        double[:,::1] weights, double[:,:,::1] binned_weights, \
+        double offset, double[::1] f2, int uniform, int spectralline, \
+        double sign) noexcept nogil:
+
+    # Divide the weights by the binned weights at their grid point (uniform)
+    # or by 1 + f^2 times the binned weights (robust), with the visibilities
+    # placed at sign*(u, v).
+
+    cdef int gridsize = binned_weights.shape[1]
+    cdef int k, n, c, i, j
+    cdef double x, y
+
+    for k in range(u.shape[0]):
+        for n in range(scale.shape[0]):
+            x = sign*u[k]*scale[n] + offset
+            y = sign*v[k]*scale[n] + offset
+
+            if not (x > -1 and x < gridsize and y > -1 and y < gridsize):
+                continue
+
+            i = <int>x
+            j = <int>y
+            c = n if spectralline else 0
+
+            if uniform:
+                weights[k,n] /= binned_weights[c,j,i]
+            else:
+                weights[k,n] /= 1 + f2[c] * binned_weights[c,j,i]
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void average_task(double[::1] u, double[::1] v, double[:,::1] real, \
+        double[:,::1] imag, double[:,::1] weights, unsigned int[::1] i, \
+        unsigned int[::1] j, unsigned int[::1] ci, unsigned int[::1] cj, \
+        double[:,:,::1] new_u, double[:,:,::1] new_v, \
+        double[:,:,::1] new_real, double[:,:,::1] new_imag, \
+        double[:,:,::1] new_weights, int layer, int kmin, int kmax, \
+        int nmin, int nmax, int hermitian) noexcept nogil:
+
+    # Add visibilities kmin..kmax, channels nmin..nmax to one layer of the 
+    # binned averages. If hermitian, also add the complex conjugate of each
+    # visibility to the (ci, cj) cell, and skip whichever of the two cells
+    # falls off of the grid.
+
+    cdef unsigned int ny = new_u.shape[1], nx = new_u.shape[2]
+    cdef int k, n
+
+    for k in range(kmin, kmax):
+        for n in range(nmin, nmax):
+            if i[k] < nx and j[k] < ny:
+                new_u[layer,j[k],i[k]] += u[k]*weights[k,n]
+                new_v[layer,j[k],i[k]] += v[k]*weights[k,n]
+                new_real[layer,j[k],i[k]] += real[k,n]*weights[k,n]
+                new_imag[layer,j[k],i[k]] += imag[k,n]*weights[k,n]
+                new_weights[layer,j[k],i[k]] += weights[k,n]
+
+            if hermitian and ci[k] < nx and cj[k] < ny:
+                new_u[layer,cj[k],ci[k]] -= u[k]*weights[k,n]
+                new_v[layer,cj[k],ci[k]] -= v[k]*weights[k,n]
+                new_real[layer,cj[k],ci[k]] += real[k,n]*weights[k,n]
+                new_imag[layer,cj[k],ci[k]] -= imag[k,n]*weights[k,n]
+                new_weights[layer,cj[k],ci[k]] += weights[k,n]
+
+cdef layers_to_channels(double[:,:,::1] layers, int spectralline):
+
+    # Layers are channels in spectral line mode, and partial sums to be added
+    # together in continuum mode. Either way, return an (ny, nx, nchannels)
+    # array.
+
+    if spectralline:
+        return numpy.ascontiguousarray(numpy.asarray(layers).\
+                transpose((1,2,0)))
+    else:
+        return numpy.asarray(layers).sum(axis=0)[:,:,numpy.newaxis]
 
 @cython.boundscheck(False)
 def freqcorrect(data, freq=None):
@@ -605,29 +871,38 @@ def freqcorrect(data, freq=None):
     new_weights = data.weights.reshape((data.weights.size,1))
 
     return Visibilities(new_u, new_v, new_freq, new_real, new_imag, \
-            new_weights)
-
-def chisq(data, model):
-    chi_squared = chisq_calc(data.real, data.imag, data.weights, model.real, \
-            model.imag, data.real.size)
-
-    return chi_squared
+            new_weights, hermitian=data.hermitian)
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
-@cython.nonecheck(False)
-cdef float chisq_calc(numpy.ndarray[double, ndim=2] data_real, \
-        numpy.ndarray[double, ndim=2] data_imag, \
-        numpy.ndarray[double, ndim=2] data_weights, \
-        numpy.ndarray[double, ndim=2] model_real, \
-        numpy.ndarray[double, ndim=2] model_imag, int nuv):
-    cdef double chisq = 0
-    cdef double diff1, diff2
-    cdef unsigned int i
-
-    for i in range(nuv):
-        diff1 = data_real[<unsigned int>i,0] - model_real[<unsigned int>i,0]
-        diff2 = data_imag[<unsigned int>i,0] - model_imag[<unsigned int>i,0]
-        chisq += (diff1*diff1 + diff2*diff2) * data_weights[<unsigned int>i,0]
-
-    return chisq
+def chisq(data, model, nthreads=1):
+    # Calculate chi-squared between two sets of visibilities, over all of the
+    # baselines and channels, in a single pass without any temporary arrays.
+    # If only half of the uv-plane is stored, the complex conjugates
+    # contribute equally, so the sum is doubled.
+
+    if data.real.shape != model.real.shape:
+        raise ValueError("The data and model visibilities must have the same "
+                "shape.")
+
+    cdef const double[:,:] data_real = data.real
+    cdef const double[:,:] data_imag = data.imag
+    cdef const double[:,:] data_weights = data.weights
+    cdef const double[:,:] model_real = model.real
+    cdef const double[:,:] model_imag = model.imag
+
+    cdef Py_ssize_t i, j, nuv = data.real.shape[0], nfreq = data.real.shape[1]
+    cdef double chi_squared = 0, diff1, diff2
+    cdef int nthreads_c = max(nthreads, 1)
+
+    for i in prange(nuv, nogil=True, num_threads=nthreads_c, \
+            schedule="static"):
+        for j in range(nfreq):
+            diff1 = data_real[i,j] - model_real[i,j]
+            diff2 = data_imag[i,j] - model_imag[i,j]
+            chi_squared += (diff1*diff1 + diff2*diff2) * data_weights[i,j]
+
+    if data.hermitian:
+        chi_squared = 2*chi_squared
+
+    return chi_squared
@@ -1,23 +1,37 @@
 from ..constants.physics import c
 from .libinterferometry import Visibilities
-import astropy.table
 import casatools
+import h5py
 import numpy
 
 def readms(filename, spw='all', tolerance=0.01, time_tolerance=0., \
-        datacolumn="corrected", corr=["I"]):
-    """Testing
+        datacolumn="corrected", corr=["I"], chunksize=1000000, \
+        nchan_average=1, time_average=0., conjugate=False, output=None):
+    """Read in the visibilities from a Measurement Set. The rows are read in
+    blocks, and written straight into the output arrays, so only a block of
+    the raw data is in memory at any time.
 
     :param filename: The name of the MS file that you would like to read in.
     :param spw: The list of spectral windows to read in.
+    :param tolerance: Spectral windows whose channel frequencies differ by
+            less than this fraction of the channel width are treated as the
+            same spectral window.
+    :param time_tolerance: Integrations in different spectral windows whose
+            times differ by less than this, in seconds, are merged.
+    :param chunksize: The number of rows of the MS to read in at a time.
+    :param nchan_average: Average together this many channels.
+    :param time_average: Average together the integrations on each baseline
+            within bins of this many seconds.
+    :param conjugate: Also include the complex conjugate of each visibility
+            explicitly. Otherwise only one half of the uv-plane is stored,
+            and the Visibilities are marked as hermitian, so that the
+            conjugates are accounted for implicitly.
+    :param output: If given, the name of an HDF5 file to write the
+            visibilities to, in the format of Visibilities.write, instead of
+            returning them. Only one spectral window is held in memory at a
+            time.
     """
 
-    # Load the MS file.
-
-    ms = casatools.ms()
-
-    ms.open(filename)
-
     # If we want all of the spw, then get them all.
 
     if spw == 'all':
@@ -29,51 +43,36 @@ def readms(filename, spw='all', tolerance=0.01, time_tolerance=0., \
 
         spw = list(numpy.unique(spw))
 
-    # Loop through all of the DATA_DESC_ID values and collect the relevant data.
-
-    if datacolumn == "corrected":
-        prefix = "corrected_"
-    else:
-        prefix = ""
+    # Get the channel frequencies of each DATA_DESC_ID from the subtables.
 
-    i = 0                                                               
-    ms.reset()                                                          
-    data = []
-    for i in spw:
-        ms.selectinit(datadescid=i)
-        ms.selectpolarization(corr)
-        data.append(ms.getdata(items=["u","v",prefix+"real",prefix+\
-                "imaginary","weight","flag","axis_info","uvdist",\
-                "antenna1","antenna2","time"]))
-        ms.reset()
+    tb = casatools.table()
 
-    # We are done with the data now, so close it.
+    tb.open(filename+"/DATA_DESCRIPTION")
+    spw_id = tb.getcol("SPECTRAL_WINDOW_ID")
+    tb.close()
 
-    ms.close()
+    tb.open(filename+"/SPECTRAL_WINDOW")
+    chan_freq = [tb.getcell("CHAN_FREQ", spw_id[i]) for i in spw]
+    resolution = [tb.getcell("RESOLUTION", spw_id[i]) for i in spw]
+    tb.close()
 
     # Test how many of the spectral windows are identical to each other.
 
     matching_spw = [0]
 
-    for i in range(1,len(data)):
+    for i in range(1,len(spw)):
         matched = False
 
         for j in range(i):
-            if i == j:
-                continue
-
             # If they don't have the same number of frequencies, they can't be
             # the same spectral window.
 
-            if data[i]["axis_info"]["freq_axis"]["chan_freq"].shape != \
-                    data[j]["axis_info"]['freq_axis']['chan_freq'].shape:
+            if chan_freq[i].shape != chan_freq[j].shape:
                 continue
 
             # Test how different they are and compare with some threshold.
 
-            diff = (data[i]["axis_info"]['freq_axis']['chan_freq'] - \
-                    data[j]["axis_info"]['freq_axis']['chan_freq']) / \
-                    data[j]["axis_info"]["freq_axis"]['resolution']
+            diff = (chan_freq[i] - chan_freq[j]) / resolution[j]
 
             if numpy.abs(diff).max() < tolerance:
                 matching_spw.append(j)
@@ -85,163 +84,246 @@ def readms(filename, spw='all', tolerance=0.01, time_tolerance=0., \
         if not matched:
             matching_spw.append(i)
 
-    # Loop through all of the unique spectral windows that we found.
-
-    for i in numpy.unique(matching_spw):
-        new_freq = data[i]["axis_info"]["freq_axis"]["chan_freq"]
-
-        # Collect all of the DATA_DESC_ID's that match that spectral window.
-
-        new_u, new_v, new_real, new_imag, new_weights, new_flags, \
-                new_uvdist, new_antenna1, new_antenna2, new_time = [], [], [], \
-                [], [], [], [], [], [], []
-
-        for j in range(len(data)):
-            if matching_spw[j] == i:
-                new_u.append(data[j]["u"])
-                new_v.append(data[j]["v"])
-                new_uvdist.append(data[j]["uvdist"])
-                new_real.append(data[j][prefix+"real"])
-                new_imag.append(data[j][prefix+"imaginary"])
-                new_weights.append(data[j]["weight"])
-                new_flags.append(data[j]["flag"])
-                new_antenna1.append(data[j]["antenna1"])
-                new_antenna2.append(data[j]["antenna2"])
-                new_time.append(data[j]["time"])
-
-        # Concatenate them all along the uvdist axis.
-
-        new_u = numpy.concatenate(new_u)
-        new_v = numpy.concatenate(new_v)
-        new_uvdist = numpy.concatenate(new_uvdist)
-        new_real = numpy.concatenate(new_real, axis=2)
-        new_imag = numpy.concatenate(new_imag, axis=2)
-        new_weights = numpy.concatenate(new_weights, axis=1)
-        new_flags = numpy.concatenate(new_flags, axis=2)
-        new_antenna1 = numpy.concatenate(new_antenna1)
-        new_antenna2 = numpy.concatenate(new_antenna2)
-        new_time = numpy.concatenate(new_time)
-
-        # Adjust the weights for flags and make the right shape.
-        
-        new_weights = ((new_flags == False) * new_weights.reshape((\
-                new_weights.shape[0],1,new_weights.shape[1])))
-
-        # Average out the two different polarizations.
-
-        new_real = (new_real * new_weights).sum(axis=0)
-        new_imag = (new_imag * new_weights).sum(axis=0)
-        new_weights = new_weights.sum(axis=0)
-
-        new_real[new_weights != 0] /= new_weights[new_weights != 0]
-        new_imag[new_weights != 0] /= new_weights[new_weights != 0]
-
-        # Transpose to make the right shape.
-
-        new_real = numpy.transpose(new_real)
-        new_imag = numpy.transpose(new_imag)
-        new_weights = numpy.transpose(new_weights)
-
-        # Trim the autocorrelation data.
-
-        good = new_uvdist != 0
-
-        new_u = new_u[good]
-        new_v = new_v[good]
-        new_uvdist = new_uvdist[good]
-        new_real = new_real[good,:]
-        new_imag = new_imag[good,:]
-        new_weights = new_weights[good,:]
-        new_antenna1 = new_antenna1[good]
-        new_antenna2 = new_antenna2[good]
-        new_time = new_time[good]
-
-        # Now do some fancy stuff to merge the multiple spectral windows. Since 
-        # it is possible that even for the same observation, there'll be a 
-        # different number of UV points because of flagging, we need to match 
-        # the uv points that exist for both, but add zeros when that point 
-        # doesn't exist for one or the other.
-
-        if i == 0:
-            freq = new_freq
-
-            # Make the first column uvdist.
-
-            table = astropy.table.Table([new_antenna1, \
-                    new_antenna2, new_time, new_u, new_v, new_real, new_imag, \
-                    new_weights, new_uvdist], names=["antenna1","antenna2",\
-                    "time"]+[string+"_"+str(i) for string in ['u','v','real',\
-                    'imag','weights','uvdist']])
+    matching_spw = numpy.array(matching_spw)
+    unique_spw = numpy.unique(matching_spw)
+
+    # Load the MS file, and read in which baseline and integration each row
+    # belongs to.
+
+    ms = casatools.ms()
+
+    ms.open(filename)
+
+    rows = []
+    for i in spw:
+        columns = {"antenna1":[], "antenna2":[], "time":[], "u":[], "v":[], \
+                "uvdist":[]}
+
+        for chunk in iterate_rows(ms, i, list(columns.keys()), chunksize):
+            for key in columns:
+                columns[key].append(chunk[key])
+
+        rows.append(dict([(key, numpy.concatenate(columns[key])) for key in \
+                columns]))
+
+    # Merge the rows from the different spectral windows. Since it is possible
+    # that even for the same observation, there'll be a different number of
+    # UV points because of flagging, we need to match the uv points that exist
+    # for all of them, and leave zeros when that point doesn't exist for one
+    # or the other. Each row is labeled with a single integer key for its
+    # baseline and time, so that the matching can be done by sorting.
+
+    times = numpy.concatenate([row["time"] for row in rows])
+
+    if time_average > 0:
+        time_id = [numpy.floor((row["time"] - times.min()) / \
+                time_average).astype(numpy.int64) for row in rows]
+    else:
+        unique_times = numpy.unique(times)
+
+        if time_tolerance > 0:
+            cluster = numpy.concatenate(([0], numpy.cumsum(numpy.diff(\
+                    unique_times) > time_tolerance)))
         else:
-            freq = numpy.concatenate((freq, new_freq))
+            cluster = numpy.arange(unique_times.size)
 
-            # Make the first column uvdist.
+        time_id = [cluster[numpy.searchsorted(unique_times, row["time"])] for \
+                row in rows]
 
-            new_table = astropy.table.Table([new_antenna1, \
-                    new_antenna2, new_time, new_u, new_v, new_real, new_imag, \
-                    new_weights, new_uvdist], names=["antenna1","antenna2",\
-                    "time"]+[string+"_"+str(i) for string in ['u','v','real',\
-                    'imag','weights','uvdist']])
+    nant = max([max(row["antenna1"].max(), row["antenna2"].max()) for row in \
+            rows if row["time"].size > 0]) + 1
+    ntime = max([t.max() for t in time_id if t.size > 0]) + 1
 
-            # Do the fancy merging.
+    keys = [(row["antenna1"].astype(numpy.int64) * nant + \
+            row["antenna2"]) * ntime + t for row, t in zip(rows, time_id)]
 
-            if time_tolerance == 0:
-                table = astropy.table.join(table, new_table, join_type='outer',\
-                        keys=["antenna1","antenna2","time"])
-            else:
-                table = astropy.table.join(table, new_table, join_type='outer',\
-                        keys=["antenna1","antenna2","time"], \
-                        join_funcs={'time':astropy.table.\
-                        join_distance(time_tolerance)})
+    # Trim the autocorrelation data.
 
-                for key in ["time"]:
-                    table[key] = numpy.concatenate([\
-                            table[key+'_1'].data[:,numpy.newaxis], \
-                            table[key+'_2'].data[:,numpy.newaxis]], axis=1)
+    good = [row["uvdist"] != 0 for row in rows]
 
-                    wt = numpy.where(table[key].data == 0, 0, 1)
+    unique_keys, index = numpy.unique(numpy.concatenate([key[g] for key, g in \
+            zip(keys, good)]), return_inverse=True)
 
-                    table[key] = (table[key].data*wt).sum(axis=1)/\
-                            wt.sum(axis=1)
-                
-                    table.remove_columns([key+'_1',key+'_2',key+'_id'])
+    nuv = unique_keys.size
 
-    # Make sure masked colums are filled appropriately.
+    row_index = []
+    start = 0
+    for g in good:
+        row_index.append(numpy.repeat(-1, g.size))
+        row_index[-1][g] = index[start:start+g.sum()]
+        start += g.sum()
 
-    for colname in table.colnames:
-        table[colname].fill_value = 0.
-    table = table.filled()
+    # The (u, v) of each row is the average over all of the spectral windows,
+    # and integrations, that went into it.
 
-    # Get the info out of the table.
+    count = numpy.bincount(index, minlength=nuv)
 
-    u = numpy.concatenate([table['u_{0:d}'.format(i)].data[:,numpy.newaxis] \
-            for i in numpy.unique(matching_spw)], axis=1)
-    v = numpy.concatenate([table['v_{0:d}'.format(i)].data[:,numpy.newaxis] \
-            for i in numpy.unique(matching_spw)], axis=1)
+    u = numpy.bincount(index, weights=numpy.concatenate([row["u"][g] for row, \
+            g in zip(rows, good)]), minlength=nuv) / count
+    v = numpy.bincount(index, weights=numpy.concatenate([row["v"][g] for row, \
+            g in zip(rows, good)]), minlength=nuv) / count
 
-    freq = freq[:,0]
+    del rows, keys, good, index, times, time_id
 
-    real = numpy.concatenate([table['real_{0:d}'.format(i)].data for i in \
-            numpy.unique(matching_spw)], axis=1)
-    imag = numpy.concatenate([table['imag_{0:d}'.format(i)].data for i in \
-            numpy.unique(matching_spw)], axis=1)
-    weights = numpy.concatenate([table['weights_{0:d}'.format(i)].data for i \
-            in numpy.unique(matching_spw)], axis=1)
+    # Get the frequencies, after averaging channels, of each of the unique
+    # spectral windows.
 
-    # Trim down u and v.
+    freq = []
+    for i in unique_spw:
+        starts = numpy.arange(0, chan_freq[i].size, nchan_average)
 
-    uwt = numpy.where(numpy.logical_and(u == 0, v == 0), 0, 1)
-    u = (u*uwt).sum(axis=1) / uwt.sum(axis=1)
-    v = (v*uwt).sum(axis=1) / uwt.sum(axis=1)
+        freq.append(numpy.add.reduceat(chan_freq[i], starts) / \
+                numpy.diff(numpy.append(starts, chan_freq[i].size)))
 
-    # Include the complex conjugate.
+    channels = numpy.cumsum([0] + [f.size for f in freq])
+    freq = numpy.concatenate(freq)
 
     scale = 100 * freq.mean() / c
 
-    u = numpy.concatenate((u, -u))*scale
-    v = numpy.concatenate((v, -v))*scale
-    real = numpy.concatenate((real, real))
-    imag = -1*numpy.concatenate((imag, -imag))
-    weights = numpy.concatenate((weights, weights))
-    
-    return Visibilities(u, v, freq, real, imag, weights)
+    # Set up the place to put the visibilities.
+
+    if conjugate:
+        nrows = 2*nuv
+    else:
+        nrows = nuv
+
+    if output == None:
+        real = numpy.zeros((nrows, freq.size))
+        imag = numpy.zeros((nrows, freq.size))
+        weights = numpy.zeros((nrows, freq.size))
+    else:
+        f = h5py.File(output, "w")
+
+        for key, value in [("u", u*scale), ("v", v*scale)]:
+            dset = f.create_dataset(key, (nrows,), dtype='float64')
+            dset[0:nuv] = value
+            if conjugate:
+                dset[nuv:] = -value
+
+        f.create_dataset("freq", freq.shape, dtype='float64')[...] = freq
+
+        if not conjugate:
+            f.attrs["hermitian"] = True
+
+        for key in ["real", "imag", "weights"]:
+            f.create_dataset(key, (nrows, freq.size), dtype='float64')
+
+    # Loop through all of the unique spectral windows that we found, and
+    # read in the data of all of the DATA_DESC_ID's that match it, a block of
+    # rows at a time.
+
+    if datacolumn == "corrected":
+        prefix = "corrected_"
+    else:
+        prefix = ""
+
+    for k, i in enumerate(unique_spw):
+        if output == None:
+            new_real = real[0:nuv,channels[k]:channels[k+1]]
+            new_imag = imag[0:nuv,channels[k]:channels[k+1]]
+            new_weights = weights[0:nuv,channels[k]:channels[k+1]]
+        else:
+            new_real = numpy.zeros((nuv, channels[k+1] - channels[k]))
+            new_imag = numpy.zeros((nuv, channels[k+1] - channels[k]))
+            new_weights = numpy.zeros((nuv, channels[k+1] - channels[k]))
+
+        starts = numpy.arange(0, chan_freq[i].size, nchan_average)
+
+        for j in numpy.where(matching_spw == i)[0]:
+            start = 0
+
+            for chunk in iterate_rows(ms, spw[j], [prefix+"real", \
+                    prefix+"imaginary", "weight", "flag"], chunksize, \
+                    corr=corr):
+                index = row_index[j][start:start+chunk["weight"].shape[-1]]
+                start += index.size
+
+                good = index >= 0
+
+                # Adjust the weights for flags and make the right shape, and
+                # sum the two different polarizations, and any channels that
+                # are being averaged together.
+
+                chunk_weights = (chunk["flag"][:,:,good] == False) * \
+                        chunk["weight"][:,numpy.newaxis,good]
+
+                chunk_real = numpy.add.reduceat((chunk[prefix+"real"][:,:,\
+                        good] * chunk_weights).sum(axis=0), starts, axis=0).T
+                chunk_imag = numpy.add.reduceat((chunk[prefix+"imaginary"][\
+                        :,:,good] * chunk_weights).sum(axis=0), starts, \
+                        axis=0).T
+                chunk_weights = numpy.add.reduceat(chunk_weights.sum(axis=0), \
+                        starts, axis=0).T
+
+                # Add to the rows that they belong to. If averaging in time,
+                # several rows in a block can go to the same place.
+
+                if time_average > 0:
+                    numpy.add.at(new_real, index[good], chunk_real)
+                    numpy.add.at(new_imag, index[good], chunk_imag)
+                    numpy.add.at(new_weights, index[good], chunk_weights)
+                else:
+                    new_real[index[good]] += chunk_real
+                    new_imag[index[good]] += chunk_imag
+                    new_weights[index[good]] += chunk_weights
+
+        # Finish the weighted average, and take the complex conjugate to get
+        # the orientation correct.
+
+        nonzero = new_weights != 0
+
+        new_real[nonzero] /= new_weights[nonzero]
+        new_imag[nonzero] /= -new_weights[nonzero]
+
+        # Write out the data, if requested.
+
+        if output != None:
+            f["real"][0:nuv,channels[k]:channels[k+1]] = new_real
+            f["imag"][0:nuv,channels[k]:channels[k+1]] = new_imag
+            f["weights"][0:nuv,channels[k]:channels[k+1]] = new_weights
+
+            if conjugate:
+                f["real"][nuv:,channels[k]:channels[k+1]] = new_real
+                f["imag"][nuv:,channels[k]:channels[k+1]] = -new_imag
+                f["weights"][nuv:,channels[k]:channels[k+1]] = new_weights
+
+    # We are done with the data now, so close it.
+
+    ms.close()
+
+    if output != None:
+        f.close()
+
+        return
+
+    # Include the complex conjugate.
+
+    if conjugate:
+        u = numpy.concatenate((u, -u))
+        v = numpy.concatenate((v, -v))
+
+        real[nuv:] = real[0:nuv]
+        imag[nuv:] = -imag[0:nuv]
+        weights[nuv:] = weights[0:nuv]
+
+    return Visibilities(u*scale, v*scale, freq, real, imag, weights, \
+            hermitian=not conjugate)
+
+def iterate_rows(ms, datadescid, items, chunksize, corr=None):
+    # Read in a set of columns for one DATA_DESC_ID, chunksize rows at a time.
+
+    ms.selectinit(datadescid=datadescid)
+    if corr != None:
+        ms.selectpolarization(corr)
+
+    ms.iterinit(maxrows=chunksize)
+    ms.iterorigin()
+
+    more = True
+    while more:
+        yield ms.getdata(items=items)
+
+        more = ms.iternext()
+
+    ms.iterend()
+    ms.reset()
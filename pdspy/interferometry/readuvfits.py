@@ -3,7 +3,7 @@ from ..constants.physics import c
 from .libinterferometry import Visibilities
 import numpy
 
-def readuvfits(filename, fmt="casa", fast=False):
+def readuvfits(filename, fmt="casa", fast=False, conjugate=False):
     
     data = open(filename)
     
@@ -64,13 +64,17 @@ def readuvfits(filename, fmt="casa", fast=False):
     baseline[((ant1 < 7) & (ant2 >= 7)) ^ ((ant1 >= 7) & (ant2 < 7))] = \
             " 6.1-10.4"
     baseline[(ant1 < 7) & (ant2 < 7)] = "10.4-10.4"
+
+    # Only include the complex conjugates explicitly if requested, otherwise
+    # the Visibilities are marked as only storing half of the uv-plane.
     
-    u = numpy.concatenate((u, -u))
-    v = numpy.concatenate((v, -v))
-    real = numpy.concatenate((real, real))
-    imag = numpy.concatenate((imag, -imag))
-    weights = numpy.concatenate((weights, weights))
-    baseline = numpy.concatenate((baseline, baseline))
+    if conjugate:
+        u = numpy.concatenate((u, -u))
+        v = numpy.concatenate((v, -v))
+        real = numpy.concatenate((real, real))
+        imag = numpy.concatenate((imag, -imag))
+        weights = numpy.concatenate((weights, weights))
+        baseline = numpy.concatenate((baseline, baseline))
     
     if fmt == "casa":
         IF = data[1].data.field('if freq')[0]
@@ -99,7 +103,8 @@ def readuvfits(filename, fmt="casa", fast=False):
     
     data.close()
 
-    uvdata = Visibilities(u, v, freq, real, -imag, weights, baseline=baseline)
+    uvdata = Visibilities(u, v, freq, real, -imag, weights, baseline=baseline,\
+            hermitian=not conjugate)
     
     uvdata.set_header(header)
     
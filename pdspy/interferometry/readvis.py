@@ -32,4 +32,4 @@ def readvis(filename, fmt="casa"):
     vis.v *= vis.freq.mean()
 
     return Visibilities(vis.u, vis.v, vis.freq, vis.real, vis.imag, \
-            vis.weights, baseline=vis.baseline)
+            vis.weights, baseline=vis.baseline, hermitian=vis.hermitian)
@@ -1,26 +1,122 @@
-from scipy.optimize import minimize
+from scipy.optimize import minimize, Bounds
 from ..imaging import Image
-from . import interpolate_model
+from .interpolate_model import degrid_plan, degrid_image, degrid_adjoint
 import numpy
 
-def rmlimage(data, imsize=512, pixelsize=0.01):
+def rmlimage(data, imsize=512, pixelsize=0.01, entropy=1., tsv=0., l1=0., \
+        prior=None, x0=None, maxiter=1000, nthreads=1, callback=None, \
+        oversample=2, width=6):
 
-    def neg_ln_like(p):
-        if numpy.any(p <= 0):
-            return numpy.inf
-        else:
-            model = Image(numpy.array(p).reshape((imsize,imsize,1,1)), \
-                    x=numpy.arange(imsize)*pixelsize, y=numpy.arange(imsize)*\
-                    pixelsize, freq=data.freq)
+    # Set up the image grid, centered on the phase center, and everything
+    # needed to calculate the model visibilities on it.
 
-            model_vis = interpolate_model(data.u, data.v, data.freq, model)
+    x = (numpy.arange(imsize) - imsize//2) * pixelsize
+    y = (numpy.arange(imsize) - imsize//2) * pixelsize
 
-            return ((data.real - model_vis.real)**2 * data.weights + \
-                    (data.imag - model_vis.imag)**2 * data.weights).sum() + \
-                    (model.image * numpy.log(model.image)).sum()
+    plan = degrid_plan(x, y, data.u, data.v, oversample=oversample, \
+            width=width)
 
-    result = minimize(neg_ln_like, numpy.ones(imsize**2))
+    nfreq = data.freq.size
+    shape = (imsize, imsize, nfreq)
 
-    return Image(numpy.array(result.x).reshape((imsize,imsize,1,1)), \
-            x=numpy.arange(imsize)*pixelsize, y=numpy.arange(imsize)*\
-            pixelsize, freq=data.freq)
+    vis = data.real + 1j*data.imag
+    weights = data.weights
+
+    # The model image is real, so its visibilities are hermitian, and if only
+    # half of the uv-plane is stored the conjugates count the same as the
+    # visibilities themselves.
+
+    if data.hermitian:
+        weights = 2*weights
+
+    # If no prior image is given, use a flat image with the total flux
+    # measured on the shortest baselines, but no less than the uncertainty on
+    # that flux, so that the prior is never zero.
+
+    if type(prior) == type(None):
+        short = data.uvdist <= numpy.percentile(data.uvdist, 5)
+
+        flux = (data.real[short,:] * weights[short,:]).sum(axis=0) / \
+                weights[short,:].sum(axis=0)
+        flux_unc = 1. / numpy.sqrt(weights[short,:].sum(axis=0))
+
+        prior = numpy.ones(shape) * numpy.maximum(numpy.abs(flux), \
+                flux_unc) / imsize**2
+    elif isinstance(prior, Image):
+        prior = prior.image[:,:,:,0]
+
+    prior = numpy.maximum(prior, numpy.finfo(float).tiny)
+
+    if type(x0) == type(None):
+        x0 = prior
+    elif isinstance(x0, Image):
+        x0 = x0.image[:,:,:,0]
+
+    # The function to minimize.
+
+    last = {}
+
+    def objective(p):
+        value, grad, last["chisq"] = neg_ln_like(p.reshape(shape), vis, \
+                weights, plan, prior, entropy=entropy, tsv=tsv, l1=l1, \
+                nthreads=nthreads)
+        last["value"] = value
+
+        return value, grad.ravel()
+
+    # Report on the progress, if requested.
+
+    niter = [0]
+
+    def progress(p):
+        niter[0] += 1
+
+        if callback != None:
+            callback(niter[0], last["chisq"], last["value"], p.reshape(shape))
+
+    # Now do the minimization, keeping the image positive.
+
+    result = minimize(objective, numpy.array(x0, dtype=float).ravel(), \
+            jac=True, method="L-BFGS-B", bounds=Bounds(0., numpy.inf), \
+            callback=progress, options={"maxiter":maxiter})
+
+    return Image(result.x.reshape((imsize,imsize,nfreq,1)), x=x, y=y, \
+            freq=data.freq)
+
+def neg_ln_like(image, vis, weights, plan, prior, entropy=1., tsv=0., l1=0., \
+        nthreads=1):
+    # Chi-squared plus the regularization terms, and its gradient with respect
+    # to the image, which has shape (ny, nx, nfreq). Chi-squared is returned
+    # separately too.
+
+    tiny = numpy.finfo(float).tiny
+
+    residuals = vis - degrid_image(image, plan, nthreads=nthreads)
+
+    chisq = (numpy.abs(residuals)**2 * weights).sum()
+    grad = -2 * degrid_adjoint(residuals * weights, plan, nthreads=nthreads)
+
+    value = chisq
+
+    if entropy > 0:
+        log = numpy.log(numpy.maximum(image, tiny) / prior)
+
+        value += entropy * (image * log - image + prior).sum()
+        grad += entropy * log
+
+    if tsv > 0:
+        dx = image[:,1:,:] - image[:,0:-1,:]
+        dy = image[1:,:,:] - image[0:-1,:,:]
+
+        value += tsv * ((dx**2).sum() + (dy**2).sum())
+
+        grad[:,1:,:] += 2*tsv*dx
+        grad[:,0:-1,:] -= 2*tsv*dx
+        grad[1:,:,:] += 2*tsv*dy
+        grad[0:-1,:,:] -= 2*tsv*dy
+
+    if l1 > 0:
+        value += l1 * numpy.abs(image).sum()
+        grad += l1 * numpy.sign(image)
+
+    return value, grad, chisq
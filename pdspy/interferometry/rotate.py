@@ -7,4 +7,4 @@ def rotate(data, pa=0):
     newv = -data.u * numpy.sin(pa) + data.v * numpy.cos(pa)
 
     return Visibilities(newu, newv, data.freq.copy(), data.real.copy(), \
-            data.imag.copy(), data.weights.copy())
+            data.imag.copy(), data.weights.copy(), hermitian=data.hermitian)
@@ -0,0 +1,83 @@
+import importlib
+import types
+import sys
+
+class LazyModule(types.ModuleType):
+    r"""
+    A package whose attributes are only imported from its submodules the
+    first time that they are accessed.
+    """
+
+    def __getattr__(self, name):
+        attributes = self.__dict__["lazy_attributes"]
+        submodules = self.__dict__["lazy_submodules"]
+
+        if name == "__all__":
+            # So that "from package import *" gets everything that can be
+            # imported, as it did when it was all imported up front, and not
+            # the machinery for importing it.
+
+            value = []
+            for key in list(attributes) + submodules:
+                try:
+                    getattr(self, key)
+                    value.append(key)
+                except AttributeError:
+                    pass
+        elif name in attributes:
+            try:
+                module = importlib.import_module("."+attributes[name], \
+                        self.__name__)
+            except ImportError as error:
+                raise AttributeError("{0:s}.{1:s} could not be imported: "
+                        "{2:s}".format(self.__name__, name, str(error))) \
+                        from error
+
+            value = getattr(module, name)
+        elif name in submodules:
+            value = importlib.import_module("."+name, self.__name__)
+        else:
+            raise AttributeError("module {0:s} has no attribute {1:s}".\
+                    format(self.__name__, name))
+
+        self.__dict__[name] = value
+
+        return value
+
+    def __setattr__(self, name, value):
+        # Importing a submodule sets it as an attribute of the package, which
+        # would otherwise hide a function or class of the same name.
+
+        if name in self.__dict__.get("lazy_attributes", {}) and \
+                isinstance(value, types.ModuleType):
+            return
+
+        super().__setattr__(name, value)
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | \
+                set(self.__dict__["lazy_attributes"]) | \
+                set(self.__dict__["lazy_submodules"]))
+
+def lazy_import(name, attributes={}, submodules=[]):
+    r"""
+    Make a package import its contents lazily. Call this from the package's
+    __init__.py as, e.g. :code:`lazy_import(__name__, {"Image":"libimaging"})`
+    instead of :code:`from .libimaging import Image`.
+
+    Args:
+        :attr:`name` (`str`):
+            The name of the package.
+        :attr:`attributes` (`dict`, optional):
+            The attributes of the package, mapped to the name of the submodule
+            that each should be imported from. Default: `{}`
+        :attr:`submodules` (`list`, optional):
+            Submodules that should themselves be attributes of the package.
+            Default: `[]`
+    """
+
+    module = sys.modules[name]
+
+    module.__dict__["lazy_attributes"] = dict(attributes)
+    module.__dict__["lazy_submodules"] = list(submodules)
+    module.__class__ = LazyModule
@@ -3,6 +3,7 @@ import numpy
 from ..constants.physics import G, m_p, k, m_p
 from ..constants.astronomy import AU, M_sun
 from .Disk import Disk
+from .Grid import spherical_coordinates
 
 class DartoisDisk(Disk):
     def log_gas_density_high(self, mstar=0.5):
@@ -112,7 +113,7 @@ class DartoisDisk(Disk):
         ##### Set up the coordinates
 
         if coordsys == "spherical":
-            rt, tt, pp = numpy.meshgrid(x1*AU, x2, x3, indexing='ij')
+            rt, tt, pp = spherical_coordinates(x1, x2, x3)
 
             rr = rt*numpy.sin(tt)
             zz = rt*numpy.cos(tt)
@@ -179,7 +180,7 @@ class DartoisDisk(Disk):
         ##### Set up the coordinates
 
         if coordsys == "spherical":
-            rt, tt, pp = numpy.meshgrid(x1*AU, x2, x3, indexing='ij')
+            rt, tt, pp = spherical_coordinates(x1, x2, x3)
 
             rr = rt*numpy.sin(tt)
             zz = rt*numpy.cos(tt)
@@ -220,7 +221,7 @@ class DartoisDisk(Disk):
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -239,7 +240,7 @@ class DartoisDisk(Disk):
         return aturb
 
     def velocity(self, r, theta, phi, mstar=0.5):
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -6,6 +6,7 @@ from ..constants.astronomy import AU, M_sun
 from ..constants.math import pi
 from ..dust import Dust
 from ..gas import Gas
+from .Grid import spherical_coordinates
 
 class Disk:
     def __init__(self, mass=1.0e-3, rmin=0.1, rmax=300, plrho=2.37, h0=0.1, \
@@ -49,7 +50,7 @@ class Disk:
         ##### Set up the coordinates
 
         if coordsys == "spherical":
-            rt, tt, pp = numpy.meshgrid(x1*AU, x2, x3, indexing='ij')
+            rt, tt, pp = spherical_coordinates(x1, x2, x3)
 
             rr = rt*numpy.sin(tt)
             zz = rt*numpy.cos(tt)
@@ -144,7 +145,7 @@ class Disk:
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -184,7 +185,7 @@ class Disk:
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -198,7 +199,7 @@ class Disk:
     def velocity(self, r, theta, phi, mstar=0.5):
         mstar *= M_sun
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
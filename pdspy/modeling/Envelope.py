@@ -6,6 +6,7 @@ from ..constants.math import pi
 from ..constants.physics import G, m_p
 from ..dust import Dust
 from ..gas import Gas
+from .Grid import spherical_coordinates
 
 class Envelope:
 
@@ -46,7 +47,7 @@ class Envelope:
 
         # Set up the coordinates.
         
-        rr, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rr, tt, pp = spherical_coordinates(r, theta, phi)
 
         mu = numpy.cos(tt)
 
@@ -87,7 +88,7 @@ class Envelope:
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -117,7 +118,7 @@ class Envelope:
 
         # Set up the coordinates.
         
-        rr, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rr, tt, pp = spherical_coordinates(r, theta, phi)
 
         mu = numpy.cos(tt)
 
@@ -1,15 +1,49 @@
 import numpy
+import hashlib
 import h5py
+from ..constants.astronomy import AU
 from ..dust import Dust
 from ..gas import Gas
 from .Star import Star
 
+# The spherical coordinate arrays that have already been made in this process,
+# keyed by a hash of the grid, so that all of the components of a model, and
+# each of their methods, share one copy rather than each making their own.
+
+coordinates = {}
+max_coordinates = 8
+
+def spherical_coordinates(r, theta, phi):
+    # Return the same arrays as numpy.meshgrid(r*AU, theta, phi, indexing='ij'),
+    # with r in AU. The arrays are shared between calls, so they are
+    # read-only.
+
+    r = numpy.asarray(r, dtype=float)
+    theta = numpy.asarray(theta, dtype=float)
+    phi = numpy.asarray(phi, dtype=float)
+
+    key = hashlib.sha1(numpy.array([r.size, theta.size, phi.size]).tobytes() + \
+            r.tobytes() + theta.tobytes() + phi.tobytes()).hexdigest()
+
+    if not key in coordinates:
+        rr, tt, pp = numpy.meshgrid(r*AU, theta, phi, indexing='ij')
+        for array in (rr, tt, pp):
+            array.flags.writeable = False
+
+        if len(coordinates) >= max_coordinates:
+            coordinates.pop(next(iter(coordinates)))
+
+        coordinates[key] = (rr, tt, pp)
+
+    return coordinates[key]
+
 class Grid:
 
     def __init__(self):
         self.density = []
         self.dust = []
         self.temperature = []
+        self.specific_energy = []
         self.stars = []
         self.number_density = []
         self.gas_temperature = []
@@ -18,6 +52,7 @@ class Grid:
         self.microturbulence = []
         self.scattering_phase_freq = []
         self.scattering_phase = []
+        self.axisymmetric = False
 
     def add_density(self, density, dust):
         self.density.append(density)
@@ -53,6 +88,8 @@ class Grid:
         self.y = 0.5*(w2[0:w2.size-1] + w2[1:w2.size])
         self.z = 0.5*(w3[0:w3.size-1] + w3[1:w3.size])
 
+        self.axisymmetric = False
+
         self.w1 = w1
         self.w2 = w2
         self.w3 = w3
@@ -64,21 +101,48 @@ class Grid:
         self.phi = 0.5*(w2[0:w2.size-1] + w2[1:w2.size])
         self.z = 0.5*(w3[0:w3.size-1] + w3[1:w3.size])
 
+        self.axisymmetric = False
+        self.field_phi = self.phi
+
         self.w1 = w1
         self.w2 = w2
         self.w3 = w3
 
-    def set_spherical_grid(self, w1, w2, w3):
+    def set_spherical_grid(self, w1, w2, w3, axisymmetric=False):
         self.coordsystem = "spherical"
 
         self.r = 0.5*(w1[0:w1.size-1] + w1[1:w1.size])
         self.theta = 0.5*(w2[0:w2.size-1] + w2[1:w2.size])
         self.phi = 0.5*(w3[0:w3.size-1] + w3[1:w3.size])
 
+        # If the model is axisymmetric, the fields only need to be calculated
+        # at one phi, and are broadcast to the rest of the grid when they are
+        # written out.
+
+        self.axisymmetric = axisymmetric
+        if axisymmetric:
+            self.field_phi = self.phi[0:1]
+        else:
+            self.field_phi = self.phi
+
         self.w1 = w1
         self.w2 = w2
         self.w3 = w3
 
+    def expand(self, field):
+        # Broadcast a field that may only have been calculated at one phi to
+        # the full grid, without making a copy. Velocities have an extra
+        # leading axis for the components.
+
+        if (self.coordsystem == "cartesian"):
+            shape = (self.x.size, self.y.size, self.z.size)
+        elif (self.coordsystem == "cylindrical"):
+            shape = (self.rho.size, self.phi.size, self.z.size)
+        elif (self.coordsystem == "spherical"):
+            shape = (self.r.size, self.theta.size, self.phi.size)
+
+        return numpy.broadcast_to(field, field.shape[0:field.ndim-3] + shape)
+
     def set_wavelength_grid(self, lmin, lmax, nlam, log=False):
         if log:
             self.lam = numpy.logspace(numpy.log10(lmin), numpy.log10(lmax), \
@@ -180,9 +244,10 @@ class Grid:
         density = f.create_group("Density")
         density_dsets = []
         for i in range(len(self.density)):
+            density_i = self.expand(self.density[i])
             density_dsets.append(density.create_dataset( \
-                    "Density{0:d}".format(i), self.density[i].shape, dtype='f'))
-            density_dsets[i][...] = self.density[i]
+                    "Density{0:d}".format(i), density_i.shape, dtype='f'))
+            density_dsets[i][...] = density_i
 
         dust = f.create_group("Dust")
         dust_groups = []
@@ -193,10 +258,11 @@ class Grid:
         temperature = f.create_group("Temperature")
         temperature_dsets = []
         for i in range(len(self.temperature)):
+            temperature_i = self.expand(self.temperature[i])
             temperature_dsets.append(temperature.create_dataset( \
-                    "Temperature{0:d}".format(i), self.temperature[i].shape, \
+                    "Temperature{0:d}".format(i), temperature_i.shape, \
                     dtype='f'))
-            temperature_dsets[i][...] = self.temperature[i]
+            temperature_dsets[i][...] = temperature_i
 
         stars = f.create_group("Stars")
         stars_groups = []
@@ -207,26 +273,29 @@ class Grid:
         number_density = f.create_group("NumberDensity")
         number_density_dsets = []
         for i in range(len(self.number_density)):
+            number_density_i = self.expand(self.number_density[i])
             number_density_dsets.append(number_density.create_dataset( \
                     "NumberDensity{0:d}".format(i), \
-                    self.number_density[i].shape, dtype='f'))
-            number_density_dsets[i][...] = self.number_density[i]
+                    number_density_i.shape, dtype='f'))
+            number_density_dsets[i][...] = number_density_i
 
         gas_temperature = f.create_group("GasTemperature")
         gas_temperature_dsets = []
         for i in range(len(self.gas_temperature)):
+            gas_temperature_i = self.expand(self.gas_temperature[i])
             gas_temperature_dsets.append(gas_temperature.create_dataset( \
                     "GasTemperature{0:d}".format(i), \
-                    self.gas_temperature[i].shape, dtype='f'))
-            gas_temperature_dsets[i][...] = self.gas_temperature[i]
+                    gas_temperature_i.shape, dtype='f'))
+            gas_temperature_dsets[i][...] = gas_temperature_i
 
         microturbulence = f.create_group("Microturbulence")
         microturbulence_dsets = []
         for i in range(len(self.microturbulence)):
+            microturbulence_i = self.expand(self.microturbulence[i])
             microturbulence_dsets.append(microturbulence.create_dataset( \
                     "Microturbulence{0:d}".format(i), \
-                    self.microturbulence[i].shape, dtype='f'))
-            microturbulence_dsets[i][...] = self.microturbulence[i]
+                    microturbulence_i.shape, dtype='f'))
+            microturbulence_dsets[i][...] = microturbulence_i
 
         if len(self.scattering_phase) > 0:
             scattering_phase = f.create_group("ScatteringPhase")
@@ -248,9 +317,10 @@ class Grid:
         velocity = f.create_group("Velocity")
         velocity_dsets = []
         for i in range(len(self.velocity)):
+            velocity_i = self.expand(self.velocity[i])
             velocity_dsets.append(velocity.create_dataset("Velocity{0:d}". \
-                    format(i), self.velocity[i].shape, dtype='f'))
-            velocity_dsets[i][...] = self.velocity[i]
+                    format(i), velocity_i.shape, dtype='f'))
+            velocity_dsets[i][...] = velocity_i
 
         if hasattr(self, 'lam'):
             lam_dset = f.create_dataset("lam", self.lam.shape, dtype='f')
@@ -1,4 +1,5 @@
 import numpy
+import hashlib
 import h5py
 import os
 try:
@@ -32,6 +33,8 @@ class Model:
             A dictionary containing the radiative transfer model spectra that have been generated for the model.
         :attr:`visibilities` (dict):
             A dictionary containing the radiative transfer model visibilities that have been generated for the model.
+        :attr:`radmc3d_keep_inputs` (bool):
+            If `True`, the RADMC-3D input files are left in the working directory after each RADMC-3D run, and on the next run only the files whose contents have changed are re-written. Default: `False`
     """
 
 
@@ -40,6 +43,9 @@ class Model:
         self.images = {}
         self.spectra = {}
         self.visibilities = {}
+        self.radmc3d_session = None
+        self.radmc3d_keep_inputs = False
+        self.radmc3d_hashes = {}
 
     def set_camera_wavelength(self, lam):
         r"""
@@ -75,11 +81,12 @@ class Model:
             niterations=20, percentile=99., absolute=2.0, relative=1.02, \
             max_interactions=1e8, mpi=False, nprocesses=None, \
             sublimation_temperature=None, verbose=True, timeout=3600, \
-            increase_photons_until_convergence=False):
+            increase_photons_until_convergence=False, specific_energy=None):
         """
         Run the radiative equilibrium calculation using the Hyperion radiative
         transfer code. As a result, the `Model.grid.temperature` list will be
-        populated with the temperatures calculated.
+        populated with the temperatures calculated, and the 
+        `Model.grid.specific_energy` list with the specific energies.
 
         Args:
             :attr:`nphot` (int, optional):
@@ -116,6 +123,10 @@ class Model:
             :attr:`verbose` (`bool`, False):
                 Should output be printed to the screen, or hidden. 
                 Default: `False`
+            :attr:`specific_energy` (`list`, optional):
+                The specific energy of each density to start the iterations
+                from, e.g. the `Model.grid.specific_energy` of a similar model
+                that has already been run. Default: `None`
         """
 
         d = []
@@ -140,16 +151,20 @@ class Model:
             m.set_spherical_polar_grid(self.grid.w1*AU, self.grid.w2, \
                     self.grid.w3)
 
+        if (self.grid.coordsystem == "cylindrical"):
+            axes = (1,2,0)
+        else:
+            axes = (2,1,0)
+
         for i in range(len(self.grid.density)):
-            if (self.grid.coordsystem == "cartesian"):
-                m.add_density_grid(numpy.transpose(self.grid.density[i], \
-                        axes=(2,1,0)), d[i])
-            if (self.grid.coordsystem == "cylindrical"):
-                m.add_density_grid(numpy.transpose(self.grid.density[i], \
-                        axes=(1,2,0)), d[i])
-            if (self.grid.coordsystem == "spherical"):
-                m.add_density_grid(numpy.transpose(self.grid.density[i], \
-                        axes=(2,1,0)), d[i])
+            if specific_energy != None:
+                energy = numpy.transpose(specific_energy[i], axes=axes)
+            else:
+                energy = None
+
+            m.add_density_grid(numpy.transpose(self.grid.expand(\
+                    self.grid.density[i]), axes=axes), d[i], \
+                    specific_energy=energy)
 
         sources = []
         for i in range(len(self.grid.stars)):
@@ -197,24 +212,32 @@ class Model:
         grid = n.get_quantities()
 
         self.grid.temperature = []
+        self.grid.specific_energy = []
         temperature = grid.quantities['temperature']
         density = grid.quantities['density']
+        specific_energy = grid.quantities['specific_energy']
         for i in range(len(temperature)):
             if (self.grid.coordsystem == "cartesian"):
                 self.grid.temperature.append(numpy.transpose(temperature[i], \
                         axes=(2,1,0)))
                 self.grid.density[i] = numpy.transpose(density[i], \
                         axes=(2,1,0))
+                self.grid.specific_energy.append(numpy.transpose(\
+                        specific_energy[i], axes=(2,1,0)))
             if (self.grid.coordsystem == "cylindrical"):
                 self.grid.temperature.append(numpy.transpose(temperature[i], \
                         axes=(2,0,1)))
                 self.grid.density[i] = numpy.transpose(density[i], \
                         axes=(2,0,1))
+                self.grid.specific_energy.append(numpy.transpose(\
+                        specific_energy[i], axes=(2,0,1)))
             if (self.grid.coordsystem == "spherical"):
                 self.grid.temperature.append(numpy.transpose(temperature[i], \
                         axes=(2,1,0)))
                 self.grid.density[i] = numpy.transpose(density[i], \
                         axes=(2,1,0))
+                self.grid.specific_energy.append(numpy.transpose(\
+                        specific_energy[i], axes=(2,1,0)))
 
         os.system("rm temp.rtin temp.rtout temp.log")
 
@@ -248,12 +271,18 @@ class Model:
 
         self.grid.temperature = radmc3d.read.dust_temperature()
         for i in range(len(self.grid.temperature)):
-            n1, n2, n3 = self.grid.density[i].shape
+            n1, n2, n3 = self.grid.expand(self.grid.density[i]).shape
             self.grid.temperature[i] = numpy.transpose( \
                     self.grid.temperature[i].reshape((n3,n2,n1)), \
                     axes=(2,1,0))
 
-        os.system("rm *.out *.inp *.dat")
+        # RADMC-3D overwrites any dust temperature file we gave it, so it will
+        # need to be written again.
+
+        os.system("rm -f dust_temperature.dat dust_temperature.bdat")
+        self.radmc3d_hashes.pop("dust_temperature", None)
+
+        self.clean_radmc3d()
 
     def run_scattering(self, nphot=1e6, code="radmc3d", **keywords):
         r"""
@@ -312,14 +341,63 @@ class Model:
         self.grid.scattering_phase_freq, self.grid.scattering_phase = \
                 radmc3d.read.scattering_phase()
         for i in range(len(self.grid.scattering_phase)):
-            n1, n2, n3 = self.grid.density[0].shape
+            n1, n2, n3 = self.grid.expand(self.grid.density[0]).shape
             self.grid.scattering_phase[i] = numpy.transpose( \
                     self.grid.scattering_phase[i].reshape((n3,n2,n1)), \
                     axes=(2,1,0))
 
         self.grid.scattering_phase = numpy.array(self.grid.scattering_phase)
 
-        os.system("rm *.out *.inp *.dat")
+        self.clean_radmc3d()
+
+    def start_radmc3d_session(self, nphot=1e6, nice=None, verbose=True, \
+            **keywords):
+        r"""
+        Write out the model and start a RADMC-3D process in child mode that
+        keeps it loaded, so that subsequent calls to 
+        :code:`Model.run_image_radmc3d`, :code:`Model.run_sed_radmc3d` and 
+        :code:`Model.run_visibilities_radmc3d` are served by that one process
+        instead of each re-reading the model from disk. The RADMC-3D options
+        are fixed when the session starts, so options passed through 
+        :code:`**keywords` to those methods are ignored while it is running.
+
+        Args:
+            :attr:`nphot` (int, optional):
+                The number of photons to use for scattering in images and 
+                spectra. Default: `1e6`
+            :attr:`nice` (`int`, optional):
+                If not `None`, run RADMC-3D with this niceness. Default: `None`
+            :attr:`verbose` (`bool`, optional):
+                Should output be printed to the screen, or hidden. 
+                Default: `True`
+            :attr:`**keywords` (optional):
+                This can be used to pass any options to RADMC-3D, e.g. 
+                `setthreads` or `mc_scat_maxtauabs`.
+        """
+
+        if self.radmc3d_session != None:
+            self.stop_radmc3d_session()
+
+        if not "nphot_spec" in keywords:
+            keywords["nphot_spec"] = nphot
+
+        self.write_radmc3d(nphot_scat=nphot, **keywords)
+
+        self.radmc3d_session = radmc3d.Session(nice=nice, verbose=verbose)
+
+    def stop_radmc3d_session(self):
+        r"""
+        Shut down the RADMC-3D process started by 
+        :code:`Model.start_radmc3d_session` and clean up its input files.
+        """
+
+        if self.radmc3d_session == None:
+            return
+
+        self.radmc3d_session.close()
+        self.radmc3d_session = None
+
+        self.clean_radmc3d()
 
     def run_image(self, name=None, nphot=1e6, code="radmc3d", **keywords):
         r"""
@@ -438,13 +516,16 @@ class Model:
 
         for i in range(len(self.grid.density)):
             if (self.grid.coordsystem == "cartesian"):
-                m.add_density_grid(numpy.transpose(self.grid.density[i], \
+                m.add_density_grid(numpy.transpose(self.grid.expand(\
+                        self.grid.density[i]), \
                         axes=(2,1,0)), d[i])
             if (self.grid.coordsystem == "cylindrical"):
-                m.add_density_grid(numpy.transpose(self.grid.density[i], \
+                m.add_density_grid(numpy.transpose(self.grid.expand(\
+                        self.grid.density[i]), \
                         axes=(1,2,0)), d[i])
             if (self.grid.coordsystem == "spherical"):
-                m.add_density_grid(numpy.transpose(self.grid.density[i], \
+                m.add_density_grid(numpy.transpose(self.grid.expand(\
+                        self.grid.density[i]), \
                         axes=(2,1,0)), d[i])
 
         sources = []
@@ -517,7 +598,20 @@ class Model:
             widthkms=None, vkms=None, linenlam=None, doppcatch=False, \
             incl=0, pa=0, phi=0, dpc=1, verbose=True, nice=None, \
             unstructured=False, nostar=False, **keywords):
-        self.write_radmc3d(nphot_scat=nphot, **keywords)
+        # Circular images can't be read back from a RADMC-3D child process, 
+        # so for those run RADMC-3D from the files on disk, leaving any
+        # session running for the next call.
+
+        if unstructured:
+            session = None
+        else:
+            session = self.radmc3d_session
+
+        if session != None:
+            if loadlambda:
+                radmc3d.write.camera_wavelength_micron(self.camera_wavelength)
+        else:
+            self.write_radmc3d(nphot_scat=nphot, **keywords)
 
         if npix%2 == 0:
             zoomau = [-pixelsize*dpc * (npix+1)/2, pixelsize*dpc * (npix-1)/2, \
@@ -531,7 +625,20 @@ class Model:
                 widthkms=widthkms, vkms=vkms, linenlam=linenlam, \
                 doppcatch=doppcatch, incl=incl, posang=pa, phi=phi, \
                 verbose=verbose, nice=nice, circ=unstructured, \
-                nostar=nostar)
+                nostar=nostar, session=session)
+
+        if session != None:
+            image, x, y, lam = session.image()
+
+            image = image / Jy * ((x[1] - x[0]) / (dpc * pc)) * \
+                    ((y[1] - y[0]) / (dpc * pc))
+
+            x = (x - x[int(npix/2)]) * pixelsize / (x[1] - x[0])
+            y = (y - y[int(npix/2)]) * pixelsize / (y[1] - y[0])
+
+            self.images[name] = Image(image, x=x, y=y, wave=lam*1.0e-4)
+
+            return
 
         if unstructured:
             if 'writeimage_unformatted' in keywords:
@@ -571,7 +678,13 @@ class Model:
 
             self.images[name] = Image(image, x=x, y=y, wave=lam*1.0e-4)
 
-        os.system("rm *.out *.inp *.dat")
+        # A running session cleans up its own input files when it is stopped.
+
+        if self.radmc3d_session != None:
+            self.clean_radmc3d(inputs=False)
+        else:
+            self.clean_radmc3d()
+
         if 'writeimage_unformatted' in keywords:
             if keywords['writeimage_unformatted']:
                 os.system("rm *.bout")
@@ -636,18 +749,29 @@ class Model:
                 all possibilities for spectra, check the RADMC-3D documentation.
         """
 
-        self.write_radmc3d(nphot_spec=nphot, **keywords)
+        session = self.radmc3d_session
+
+        if session != None:
+            if loadlambda:
+                radmc3d.write.camera_wavelength_micron(self.camera_wavelength)
+        else:
+            self.write_radmc3d(nphot_spec=nphot, **keywords)
 
         radmc3d.run.sed(incl=incl, posang=pa, phi=phi, noline=True, \
-                loadlambda=loadlambda, verbose=verbose, nice=nice)
+                loadlambda=loadlambda, verbose=verbose, nice=nice, \
+                session=session)
 
-        flux, lam = radmc3d.read.spectrum()
+        if session != None:
+            flux, lam = session.spectrum()
+        else:
+            flux, lam = radmc3d.read.spectrum()
 
         flux = flux / Jy * (1. / dpc)**2
 
         self.spectra[name] = Spectrum(wave=lam, flux=flux)
 
-        os.system("rm *.out *.inp *.dat")
+        if session == None:
+            self.clean_radmc3d()
 
     def run_visibilities(self, name=None, nphot=1e6, code="radmc3d", \
             **keywords):
@@ -684,7 +808,13 @@ class Model:
             iline=None,  widthkms=None, vkms=None, linenlam=None, \
             doppcatch=False, incl=0, pa=0, phi=0, dpc=1, verbose=True, \
             nice=None, nostar=False, **keywords):
-        self.write_radmc3d(nphot_scat=nphot, **keywords)
+        session = self.radmc3d_session
+
+        if session != None:
+            if loadlambda:
+                radmc3d.write.camera_wavelength_micron(self.camera_wavelength)
+        else:
+            self.write_radmc3d(nphot_scat=nphot, **keywords)
 
         if npix%2 == 0:
             zoomau = [-pixelsize*dpc * (npix+1)/2, pixelsize*dpc * (npix-1)/2, \
@@ -697,9 +827,11 @@ class Model:
                 loadlambda=loadlambda, imolspec=imolspec, iline=iline, \
                 widthkms=widthkms, vkms=vkms, linenlam=linenlam, \
                 doppcatch=doppcatch, incl=incl, posang=pa, phi=phi, \
-                verbose=verbose, nostar=nostar, nice=nice)
+                verbose=verbose, nostar=nostar, nice=nice, session=session)
 
-        if 'writeimage_unformatted' in keywords:
+        if session != None:
+            image, x, y, lam = session.image()
+        elif 'writeimage_unformatted' in keywords:
             image, x, y, lam = radmc3d.read.image(\
                     binary=keywords["writeimage_unformatted"])
         else:
@@ -715,12 +847,27 @@ class Model:
 
         self.visibilities[name] = imtovis(im)
 
-        os.system("rm *.out *.inp *.dat")
+        if session != None:
+            return
+
+        self.clean_radmc3d()
         if 'writeimage_unformatted' in keywords:
             if keywords['writeimage_unformatted']:
                 os.system("rm *.bout")
 
-    def write_radmc3d(self, **keywords):
+    def write_radmc3d(self, binary=False, **keywords):
+        r"""
+        Write out the input files needed to run RADMC-3D on the model.
+
+        Args:
+            :attr:`binary` (`bool`, optional):
+                If `True`, write the grid based quantities (densities, 
+                temperatures, velocities, etc.) in RADMC-3D's binary format 
+                (.binp/.bdat) instead of as text, which is much faster for
+                large grids. Default: `False`
+            :attr:`**keywords` (optional):
+                Any options to be written to the radmc3d.inp control file.
+        """
         radmc3d.write.control(**keywords)
 
         mstar = []
@@ -738,27 +885,49 @@ class Model:
             zstar.append(self.grid.stars[i].z*AU)
             tstar.append(self.grid.stars[i].temperature)
 
-        radmc3d.write.stars(rstar, mstar, self.grid.lam, xstar, ystar, zstar, \
-                tstar=tstar)
+        if self._radmc3d_input_changed("stars", "stars.inp", rstar, mstar, \
+                self.grid.lam, xstar, ystar, zstar, tstar):
+            radmc3d.write.stars(rstar, mstar, self.grid.lam, xstar, ystar, \
+                    zstar, tstar=tstar)
 
-        radmc3d.write.wavelength_micron(self.grid.lam)
+        if self._radmc3d_input_changed("wavelength_micron", \
+                "wavelength_micron.inp", self.grid.lam):
+            radmc3d.write.wavelength_micron(self.grid.lam)
         if hasattr(self, "camera_wavelength"):
             radmc3d.write.camera_wavelength_micron(self.camera_wavelength)
 
-        if (self.grid.coordsystem == "cartesian"):
-            radmc3d.write.amr_grid(self.grid.w1*AU, self.grid.w2*AU, \
-                    self.grid.w3*AU, coordsystem=self.grid.coordsystem)
-        elif(self.grid.coordsystem == "cylindrical"):
-            radmc3d.write.amr_grid(self.grid.w1*AU, self.grid.w2, \
-                    self.grid.w3*AU, coordsystem=self.grid.coordsystem)
-        elif(self.grid.coordsystem == "spherical"):
-            radmc3d.write.amr_grid(self.grid.w1*AU, self.grid.w2, \
-                    self.grid.w3, coordsystem=self.grid.coordsystem)
-
-        radmc3d.write.dust_density(self.grid.density)
-        if len(self.grid.temperature) > 0:
-            density = numpy.array(self.grid.density)
-            temperature = numpy.array(self.grid.temperature)
+        if self._radmc3d_input_changed("amr_grid", "amr_grid.inp", \
+                self.grid.w1, self.grid.w2, self.grid.w3, \
+                ["cartesian","cylindrical","spherical"].index(\
+                self.grid.coordsystem)):
+            if (self.grid.coordsystem == "cartesian"):
+                radmc3d.write.amr_grid(self.grid.w1*AU, self.grid.w2*AU, \
+                        self.grid.w3*AU, coordsystem=self.grid.coordsystem)
+            elif(self.grid.coordsystem == "cylindrical"):
+                radmc3d.write.amr_grid(self.grid.w1*AU, self.grid.w2, \
+                        self.grid.w3*AU, coordsystem=self.grid.coordsystem)
+            elif(self.grid.coordsystem == "spherical"):
+                radmc3d.write.amr_grid(self.grid.w1*AU, self.grid.w2, \
+                        self.grid.w3, coordsystem=self.grid.coordsystem)
+
+        # Fields that were only calculated at one phi, for an axisymmetric
+        # grid, are broadcast to the full grid as they are written.
+
+        expand = self.grid.expand
+
+        if self._radmc3d_input_changed("dust_density", "dust_density." + \
+                ("binp" if binary else "inp"), self.grid.density):
+            radmc3d.write.dust_density([expand(density) for density in \
+                    self.grid.density], binary=binary)
+
+        if len(self.grid.temperature) > 0 and self._radmc3d_input_changed(\
+                "dust_temperature", "dust_temperature." + \
+                ("bdat" if binary else "dat"), self.grid.density, \
+                self.grid.temperature):
+            density = numpy.array([expand(density) for density in \
+                    self.grid.density])
+            temperature = numpy.array([expand(temperature) for temperature \
+                    in self.grid.temperature])
 
             density[density == 0] = 1.0e-30
 
@@ -766,14 +935,17 @@ class Model:
                     density.sum(axis=0)
             temperature = [temperature for i in range(len(self.grid.density))]
 
-            radmc3d.write.dust_temperature(temperature)
+            radmc3d.write.dust_temperature(temperature, binary=binary)
 
         dustopac = []
         for i in range(len(self.grid.dust)):
             dustopac.append("dustkappa_{0:d}.inp".format(i))
-            radmc3d.write.dustkappa("{0:d}".format(i), \
-                    self.grid.dust[i].lam*1.0e4, self.grid.dust[i].kabs, \
-                    ksca=self.grid.dust[i].ksca)
+            if self._radmc3d_input_changed(dustopac[i], dustopac[i], \
+                    self.grid.dust[i].lam, self.grid.dust[i].kabs, \
+                    self.grid.dust[i].ksca):
+                radmc3d.write.dustkappa("{0:d}".format(i), \
+                        self.grid.dust[i].lam*1.0e4, self.grid.dust[i].kabs, \
+                        ksca=self.grid.dust[i].ksca)
 
         radmc3d.write.dustopac(dustopac)
 
@@ -786,43 +958,115 @@ class Model:
                 inpstyle.append("leiden")
                 colpartners.append([])
                 radmc3d.write.molecule(self.grid.gas[i], gas[i])
-                radmc3d.write.numberdens(self.grid.number_density[i], gas[i])
+                if self._radmc3d_input_changed("numberdens_"+gas[i], \
+                        "numberdens_" + gas[i] + ("." + "binp" if binary \
+                        else ".inp"), self.grid.number_density[i]):
+                    radmc3d.write.numberdens(expand(\
+                            self.grid.number_density[i]), gas[i], \
+                            binary=binary)
 
             radmc3d.write.line(gas, inpstyle, colpartners)
 
-            number_density = numpy.array(self.grid.number_density)
-            velocity = numpy.array(self.grid.velocity)
-            vx = velocity[:,0,:,:,:]
-            vy = velocity[:,1,:,:,:]
-            vz = velocity[:,2,:,:,:]
-            velocity = numpy.zeros(self.grid.velocity[0].shape)
-
-            nx, ny, nz = self.grid.number_density[0].shape
+            extension = ".binp" if binary else ".inp"
 
+            number_density = numpy.array([expand(number_density) for \
+                    number_density in self.grid.number_density])
             number_density[number_density == 0] = 1.0e-50
 
-            velocity[0,:,:,:] = (number_density * vx).sum(axis=0) / \
-                    number_density.sum(axis=0)
-            velocity[1,:,:,:] = (number_density * vy).sum(axis=0) / \
-                    number_density.sum(axis=0)
-            velocity[2,:,:,:] = (number_density * vz).sum(axis=0) / \
-                    number_density.sum(axis=0)
-
-            radmc3d.write.gas_velocity(velocity)
-
-            if len(self.grid.gas_temperature) > 0:
-                gas_temperature = numpy.array(self.grid.gas_temperature)
+            if self._radmc3d_input_changed("gas_velocity", "gas_velocity" + \
+                    extension, self.grid.number_density, self.grid.velocity):
+                velocity = numpy.array([expand(velocity) for velocity in \
+                        self.grid.velocity])
+                vx = velocity[:,0,:,:,:]
+                vy = velocity[:,1,:,:,:]
+                vz = velocity[:,2,:,:,:]
+                velocity = numpy.zeros(velocity.shape[1:])
+
+                velocity[0,:,:,:] = (number_density * vx).sum(axis=0) / \
+                        number_density.sum(axis=0)
+                velocity[1,:,:,:] = (number_density * vy).sum(axis=0) / \
+                        number_density.sum(axis=0)
+                velocity[2,:,:,:] = (number_density * vz).sum(axis=0) / \
+                        number_density.sum(axis=0)
+
+                radmc3d.write.gas_velocity(velocity, binary=binary)
+
+            if len(self.grid.gas_temperature) > 0 and \
+                    self._radmc3d_input_changed("gas_temperature", \
+                    "gas_temperature" + extension, self.grid.number_density, \
+                    self.grid.gas_temperature):
+                gas_temperature = numpy.array([expand(gas_temperature) for \
+                        gas_temperature in self.grid.gas_temperature])
                 gas_temperature = (number_density * gas_temperature).\
                         sum(axis=0) / number_density.sum(axis=0)
 
-                radmc3d.write.gas_temperature(gas_temperature)
+                radmc3d.write.gas_temperature(gas_temperature, binary=binary)
 
-            if len(self.grid.microturbulence) > 0:
-                microturbulence = numpy.array(self.grid.microturbulence)
+            if len(self.grid.microturbulence) > 0 and \
+                    self._radmc3d_input_changed("microturbulence", \
+                    "microturbulence" + extension, self.grid.number_density, \
+                    self.grid.microturbulence):
+                microturbulence = numpy.array([expand(microturbulence) for \
+                        microturbulence in self.grid.microturbulence])
                 microturbulence = (number_density * microturbulence).\
                         sum(axis=0) / number_density.sum(axis=0)
 
-                radmc3d.write.microturbulence(microturbulence)
+                radmc3d.write.microturbulence(microturbulence, binary=binary)
+
+    def clean_radmc3d(self, inputs=None):
+        r"""
+        Remove the files left behind by RADMC-3D in the current directory.
+
+        Args:
+            :attr:`inputs` (`bool`, optional):
+                Whether to remove the RADMC-3D input files as well as the 
+                output files. If `None`, the input files are removed unless 
+                :code:`Model.radmc3d_keep_inputs` is `True`. Default: `None`
+        """
+
+        if inputs == None:
+            inputs = not self.radmc3d_keep_inputs
+
+        if inputs:
+            os.system("rm -f *.out *.inp *.dat *.binp *.bdat")
+            self.radmc3d_hashes = {}
+        else:
+            os.system("rm -f *.out")
+
+    def _radmc3d_input_changed(self, name, filename, *data):
+        # Hash the data that goes into an input file, and compare with the
+        # hash from when the file was last written, to decide whether the 
+        # file needs to be written again.
+
+        digest = hashlib.sha1()
+
+        data = list(data)
+        while len(data) > 0:
+            d = data.pop(0)
+            if isinstance(d, (list, tuple)) and len(d) > 0 and \
+                    isinstance(d[0], numpy.ndarray):
+                data = list(d) + data
+            else:
+                d = numpy.ascontiguousarray(d, dtype=numpy.float64)
+                digest.update(str(d.shape).encode())
+                digest.update(d.tobytes())
+
+        if name in self.radmc3d_hashes:
+            old_filename, old_digest = self.radmc3d_hashes[name]
+
+            if old_filename == filename and old_digest == digest.digest() \
+                    and os.path.exists(filename):
+                return False
+
+            # Make sure RADMC-3D doesn't pick up a file written in the other
+            # (text/binary) format.
+
+            if old_filename != filename and os.path.exists(old_filename):
+                os.remove(old_filename)
+
+        self.radmc3d_hashes[name] = (filename, digest.digest())
+
+        return True
 
     def read(self, filename=None, usefile=None):
         r"""
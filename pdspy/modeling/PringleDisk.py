@@ -7,6 +7,7 @@ from ..constants.math import pi
 from ..dust import Dust
 from ..gas import Gas
 from .Disk import Disk
+from .Grid import spherical_coordinates
 
 class PringleDisk(Disk):
     def surface_density(self, r, normalize=True):
@@ -76,7 +77,7 @@ class PringleDisk(Disk):
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -6,6 +6,7 @@ from ..constants.astronomy import AU, M_sun
 from ..constants.math import pi
 from ..dust import Dust
 from ..gas import Gas
+from .Grid import spherical_coordinates
 
 class SettledDisk:
     def __init__(self, mass=1.0e-3, rmin=0.1, rmax=300, plrho=2.37, h0=0.1, \
@@ -52,14 +53,60 @@ class SettledDisk:
         self.gas.append(gas)
         self.abundance.append(abundance)
 
-    def density(self, r, theta, phi, na=100, normalize=True):
+    def density(self, r, theta, phi, na=100, normalize=True, nspecies=None):
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
 
+        ##### Get the grain size bins, and which species each one goes into.
+
+        a, mass_frac = self.size_bins(na)
+
+        species = self.species(na, nspecies=nspecies)
+
+        ##### Make the gas density model for a protoplanetary disk.
+
+        Sigma = self.surface_density(rr/AU, normalize=normalize)
+        h_g = self.scale_height(rr/AU)
+
+        gamma0 = 2.
+        rho_mid = 100 * Sigma / (numpy.sqrt(2*numpy.pi)*h_g)
+
+        # Calculate the part of the settling parameter that doesn't depend on
+        # grain size only once.
+
+        s = (1 + gamma0)**-0.5 * self.alpha_settle * rho_mid * h_g
+
+        # Add the density of each bin directly to the species that it belongs
+        # to, so that the densities of all of the bins are never in memory at
+        # the same time.
+
+        rho = numpy.zeros(Sigma.shape + (len(species),))
+
+        for j, bins in enumerate(species):
+            for i in bins:
+                b = s / (self.dust.rho * a[i] * 1.0e-4)
+                y = numpy.sqrt(b / (1. + b))
+                h = y * h_g
+
+                rho[:,:,:,j] += mass_frac[i] * Sigma / (numpy.sqrt(2*numpy.pi)*\
+                        h) * numpy.exp(-0.5*(zz / h)**2)
+
+        rho[numpy.isnan(rho)] = 0.
+
+        # The grain size of each species is the mass-weighted average of its
+        # bins.
+
+        if len(species) < a.size:
+            a = numpy.array([(mass_frac[bins]*a[bins]).sum() / \
+                    mass_frac[bins].sum() for bins in species])
+
+        return a, rho
+
+    def size_bins(self, na=100):
         ##### Calculate the fraction of the mass in each grain size bin.
 
         aa = numpy.logspace(numpy.log10(self.amin), numpy.log10(self.amax),na+1)
@@ -76,33 +123,39 @@ class SettledDisk:
 
         a = (aa[1:] + aa[0:-1]) / 2.
 
-        ##### Make the gas density model for a protoplanetary disk.
+        return a, mass_frac
 
-        Sigma = self.surface_density(rr/AU, normalize=normalize)
-        h_g = self.scale_height(rr/AU)
+    def species(self, na=100, nspecies=None):
+        # Group the grain size bins into nspecies dust species. Both the
+        # settled scale height and the opacity change smoothly with grain
+        # size, so neighboring bins are grouped together, evenly in log(a).
+        # By default every bin is its own species.
 
-        rho = numpy.zeros(Sigma.shape + (100,))
+        if nspecies == None or nspecies >= na:
+            return [numpy.array([i]) for i in range(na)]
 
-        for i in range(na):
-            gamma0 = 2.
-            rho_mid = 100 * Sigma / (numpy.sqrt(2*numpy.pi)*h_g)
+        return [bins for bins in numpy.array_split(numpy.arange(na), \
+                nspecies) if bins.size > 0]
 
-            b = (1 + gamma0)**-0.5 * self.alpha_settle * rho_mid * h_g / \
-                    (self.dust.rho * a[i] * 1.0e-4)
-            y = numpy.sqrt(b / (1. + b))
-            h = y * h_g
+    def dust_species(self, na=100, nspecies=None):
+        # Get the Dust for each of the species returned by density, with the
+        # opacities of the bins that make up a species averaged together, 
+        # weighted by their mass.
 
-            rho[:,:,:,i] = mass_frac[i] * Sigma / (numpy.sqrt(2*numpy.pi)*h) * \
-                    numpy.exp(-0.5*(zz / h)**2)
+        a, mass_frac = self.size_bins(na)
 
-        rho[numpy.isnan(rho)] = 0.
+        species = self.species(na, nspecies=nspecies)
 
-        return a, rho
+        if len(species) == na:
+            return [self.dust(a[i]/1e4, self.pla) for i in range(na)]
+
+        return [self.dust.average(a[bins]/1e4, self.pla, \
+                weights=mass_frac[bins]) for bins in species]
 
     def number_density(self, r, theta, phi, gas=0):
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -188,7 +241,7 @@ class SettledDisk:
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -231,7 +284,7 @@ class SettledDisk:
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -260,7 +313,7 @@ class SettledDisk:
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -274,7 +327,7 @@ class SettledDisk:
     def velocity(self, r, theta, phi, mstar=0.5):
         mstar *= M_sun
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -6,6 +6,7 @@ from ..constants.math import pi
 from ..dust import Dust
 from ..gas import Gas
 from .SettledDisk import SettledDisk
+from .Grid import spherical_coordinates
 
 class SettledPringleDisk(SettledDisk):
     def surface_density(self, r, normalize=True):
@@ -75,7 +76,7 @@ class SettledPringleDisk(SettledDisk):
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -118,7 +119,7 @@ class SettledPringleDisk(SettledDisk):
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
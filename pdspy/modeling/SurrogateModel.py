@@ -0,0 +1,178 @@
+from concurrent.futures import ThreadPoolExecutor
+import pickle
+import numpy
+import copy
+import os
+
+class SurrogateModel:
+    r"""
+    A surrogate model of a quantity, e.g. the temperature, of a radiative
+    transfer model, made from a PCA of a grid of models and a Gaussian process
+    fit to each of the principal components. Everything is loaded once.
+
+    By default, each prediction draws the hyperparameters of each Gaussian
+    process afresh from their posterior samples, and conditions the Gaussian
+    process on the training grid for that draw, so predictions marginalize
+    over the uncertainty in the hyperparameters. With nsamples set, the
+    Gaussian processes are instead conditioned ahead of time for that many
+    draws, keeping the factorization of each training covariance, so that
+    each prediction only needs solves with the covariance between the new
+    models and the training grid. That is much faster, but predictions only
+    marginalize over those nsamples draws, and each draw keeps its own copy
+    of the factorization in memory.
+
+    Args:
+        :attr:`model` (str, optional):
+            The name of the surrogate model. Default: `"pringle+ulrich+diana"`
+        :attr:`quantity` (str, optional):
+            The quantity that the surrogate model predicts.
+            Default: `"temperature"`
+        :attr:`nthreads` (int, optional):
+            The number of threads to predict the principal components with.
+            The threads are kept for the lifetime of the object. Default: `1`
+        :attr:`nsamples` (int, optional):
+            The number of draws of the hyperparameters of each Gaussian process
+            to condition ahead of time, which predictions are then randomly
+            drawn from. If `None`, the hyperparameters are drawn from all of
+            the samples, and the Gaussian process conditioned, for every
+            prediction. Default: `None`
+        :attr:`directory` (str, optional):
+            The directory that the surrogate model is stored in. By default
+            it is looked for in the surrogate_models directory of pdspy.
+    """
+
+    def __init__(self, model="pringle+ulrich+diana", quantity="temperature", \
+            nthreads=1, nsamples=None, directory=None):
+        if directory == None:
+            directory = os.path.dirname(os.path.abspath(__file__))+\
+                    "/surrogate_models/{0:s}/{1:s}/".format(model, quantity)
+
+        # Load the keys for the parameters of the surrogate model.
+
+        self.keys = list(numpy.loadtxt(directory+"/keys.txt", dtype=str))
+
+        # Load in the PCA that was found, and the transformed data.
+
+        self.pca = pickle.load(open(directory+"/pca.pkl", "rb"))
+
+        self.y_grid = numpy.load(directory+"/transformed_data.npy")
+
+        # Also load in the Gaussian process fits, of which only the first
+        # ncomponents are used.
+
+        self.gps = pickle.load(open(directory+"/gps.pkl", "rb"))
+
+        self.ncomponents = 9
+        self.shape = (99,100,1)
+
+        # And the posterior samples of the hyperparameters of each Gaussian
+        # process.
+
+        self.samples = [numpy.load(directory+"/gp_samples_component{0:d}."
+                "pkl.npy".format(i)) for i in range(self.ncomponents)]
+
+        # If requested, condition a copy of each Gaussian process on the
+        # training grid for each of a random set of the hyperparameter
+        # samples, so that the factorization of the training covariance is
+        # done only once.
+
+        self.conditioned = None
+        if nsamples != None:
+            self.conditioned = []
+            for i in range(self.ncomponents):
+                draws = numpy.random.choice(self.samples[i].shape[0], \
+                        min(nsamples, self.samples[i].shape[0]), \
+                        replace=False)
+
+                self.conditioned.append([self.condition(copy.deepcopy(\
+                        self.gps[i]), i, w) for w in draws])
+
+        # Keep a pool of threads around for the predictions.
+
+        self.nthreads = nthreads
+        if nthreads > 1:
+            self.pool = ThreadPoolExecutor(max_workers=nthreads)
+        else:
+            self.pool = None
+
+    def __call__(self, params):
+        r"""
+        Predict the quantity for a single set of parameters.
+
+        Args:
+            :attr:`params` (dict):
+                The values of the parameters of the model.
+
+        Returns:
+            :attr:`quantity` (numpy.ndarray):
+                The predicted quantity, with shape `(99,100,1)`.
+        """
+
+        return self.predict([params])[0]
+
+    def predict(self, params):
+        r"""
+        Predict the quantity for many sets of parameters at once. Each one is
+        drawn independently from the surrogate model, but with the same draw
+        of the hyperparameters.
+
+        Args:
+            :attr:`params` (list):
+                A list of dictionaries with the values of the parameters of
+                each model.
+
+        Returns:
+            :attr:`quantity` (numpy.ndarray):
+                The predicted quantities, with shape `(len(params),99,100,1)`.
+        """
+
+        x = numpy.array([[(p[k] - -9.)**3 if k == "logM_env" else p[k] for \
+                k in self.keys] for p in params])
+
+        # Draw each principal component from its Gaussian process, with
+        # hyperparameters randomly drawn from the posterior, and leave the
+        # rest at zero.
+
+        if self.pool != None:
+            components = list(self.pool.map(lambda i: self.sample(i, x), \
+                    range(self.ncomponents)))
+        else:
+            components = [self.sample(i, x) for i in range(self.ncomponents)]
+
+        components = numpy.vstack(components + [numpy.zeros(x.shape[0]) for \
+                i in range(self.ncomponents, self.pca.n_components_)]).T
+
+        # Reconstruct the quantity from the PCA.
+
+        projected = self.pca.inverse_transform(components)
+
+        return 10.**projected.reshape((x.shape[0],)+self.shape)
+
+    def condition(self, gp, i, w):
+        # Condition Gaussian process gp, for component i, on the training grid
+        # with hyperparameter sample w. gp keeps the factorization of the
+        # training covariance, and caches K^-1 y on its first prediction.
+
+        gp.set_parameter_vector(self.samples[i][w])
+        gp.recompute()
+
+        return gp
+
+    def sample(self, i, x):
+        # Draw component i at each of the points x from the conditional
+        # distribution of its Gaussian process, with a random draw of the
+        # hyperparameters.
+
+        if self.conditioned != None:
+            gp = self.conditioned[i][numpy.random.randint(\
+                    len(self.conditioned[i]))]
+        else:
+            gp = self.gps[i]
+            gp.set_parameter_vector(self.samples[i][numpy.random.randint(\
+                    self.samples[i].shape[0])])
+            gp.recompute()
+
+        mu, var = gp.predict(self.y_grid[:,i], x, return_var=True)
+
+        return mu + numpy.sqrt(numpy.maximum(var, 0.)) * \
+                numpy.random.normal(size=x.shape[0])
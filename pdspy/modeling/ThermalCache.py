@@ -0,0 +1,246 @@
+import contextlib
+import numpy
+import hashlib
+import fcntl
+import h5py
+import time
+import os
+
+# The parameters that only change the gas, the viewing geometry, or the
+# calibration of the data, and so don't change the thermal structure of a
+# model. Parameters that are fit in log space are matched without the "log",
+# and numbered parameters (e.g. flux_unc1) without the number.
+
+non_thermal_parameters = ["i", "pa", "x0", "y0", "dpc", "Ak", "v_sys", \
+        "docontsub", "tau0", "v_ext", "sigma_vext", "F_nu_ff", "nu_turn", \
+        "pl_turn", "flux_unc", "gas_file", "abundance", "freezeout", "mu", \
+        "a_turb", "a_turb_env", "T0", "q", "T0_env", "q_env", "Tmid0", "Tatm0",\
+        "zq0", "pltgas", "delta"]
+
+class ThermalCache:
+    r"""
+    An HDF5 file of the temperatures calculated for models, keyed on the
+    parameters that affect the thermal structure, so that a fit can re-use the
+    radiative equilibrium calculation of a model that it has already run, or
+    start Hyperion from the specific energy of the most similar model that it
+    has run.
+
+    Args:
+        :attr:`filename` (str):
+            The HDF5 file to keep the cache in. It is created if it doesn't
+            exist yet.
+        :attr:`parameters` (dict, optional):
+            The parameters dictionary of the fit. If given, the distance
+            between models is measured only in the parameters that are free,
+            in units of the width of their limits. Default: `None`
+        :attr:`maxsize` (int, optional):
+            The maximum number of models to keep. When the cache is full, the
+            oldest model is removed. Each model keeps the temperature of every
+            dust species on the full grid, so for models with many species
+            each one can take up tens of MB. Default: `100`
+
+    Processes that share a cache, e.g. the ranks of an MPI fit, take turns
+    with it through a lock on the file `filename + ".lock"`, so that writes
+    wait rather than being lost, and don't depend on HDF5's own file locking,
+    which is often turned off on cluster filesystems.
+    """
+
+    def __init__(self, filename, parameters=None, maxsize=100):
+        self.filename = filename
+        self.parameters = parameters
+        self.maxsize = maxsize
+
+    def get(self, p, code="radmc3d"):
+        r"""
+        Get the temperatures of a model with exactly the same thermal
+        parameters, if one is in the cache.
+
+        Args:
+            :attr:`p` (dict):
+                The values of the parameters of the model.
+            :attr:`code` (str, optional):
+                The radiative transfer code that the temperatures were
+                calculated with. Default: `"radmc3d"`
+
+        Returns:
+            :attr:`temperature` (list):
+                The list of temperatures, one for each density, or `None` if
+                the model isn't in the cache.
+        """
+
+        name, label, names, values = self.key(p, code=code)
+
+        with self.open("r") as f:
+            if f == None or not name in f:
+                return None
+
+            return list(f[name]["temperature"][...])
+
+    def nearest(self, p, code="hyperion"):
+        r"""
+        Get the specific energies of the model in the cache that is most
+        similar to this one, for use as a starting point with Hyperion. Only
+        models that differ from this one just in the values of numerical
+        parameters are considered.
+
+        Args:
+            :attr:`p` (dict):
+                The values of the parameters of the model.
+            :attr:`code` (str, optional):
+                The radiative transfer code that the specific energies were
+                calculated with. Default: `"hyperion"`
+
+        Returns:
+            :attr:`specific_energy` (list):
+                The list of specific energies, one for each density, or `None`
+                if there are no similar models in the cache.
+        """
+
+        name, label, names, values = self.key(p, code=code)
+
+        with self.open("r") as f:
+            if f == None:
+                return None
+
+            best, best_distance = None, numpy.inf
+            for key in f:
+                if f[key].attrs["label"] != label or \
+                        not "specific_energy" in f[key]:
+                    continue
+
+                cached = dict(zip(f[key].attrs["names"], \
+                        f[key].attrs["values"]))
+
+                distance = sum([((values[i] - cached[n]) / \
+                        self.scale(n))**2 for i, n in enumerate(names) if \
+                        n in cached])
+
+                if distance < best_distance:
+                    best, best_distance = key, distance
+
+            if best != None:
+                specific_energy = list(f[best]["specific_energy"][...])
+            else:
+                specific_energy = None
+
+        return specific_energy
+
+    def add(self, p, temperature, specific_energy=None, code="radmc3d"):
+        r"""
+        Add the temperatures, and optionally the specific energies, of a
+        model to the cache.
+
+        Args:
+            :attr:`p` (dict):
+                The values of the parameters of the model.
+            :attr:`temperature` (list):
+                The list of temperatures, one for each density.
+            :attr:`specific_energy` (list, optional):
+                The list of specific energies, one for each density.
+                Default: `None`
+            :attr:`code` (str, optional):
+                The radiative transfer code that the temperatures were
+                calculated with. Default: `"radmc3d"`
+        """
+
+        name, label, names, values = self.key(p, code=code)
+
+        with self.open("a") as f:
+            if f == None:
+                return
+
+            if not name in f:
+                # Make room for the new model by removing the oldest ones.
+
+                keys = sorted(f.keys(), key=lambda k: f[k].attrs["time"])
+                for key in keys[0:max(len(keys) - self.maxsize + 1, 0)]:
+                    del f[key]
+
+                group = f.create_group(name)
+                group.attrs["label"] = label
+                group.attrs["names"] = numpy.array(names, \
+                        dtype=h5py.string_dtype())
+                group.attrs["values"] = values
+                group.attrs["time"] = time.time()
+
+                group.create_dataset("temperature", \
+                        data=numpy.array(temperature))
+                if specific_energy != None and len(specific_energy) > 0:
+                    group.create_dataset("specific_energy", \
+                            data=numpy.array(specific_energy))
+
+    def key(self, p, code="radmc3d"):
+        # Split the thermal parameters into the numerical ones, which models
+        # can be compared on, and the rest, which have to match exactly. The
+        # name of a model is a hash of all of them.
+
+        thermal = []
+        for k in sorted(p):
+            base = k[3:] if k[0:3] == "log" else k
+            if not (base in non_thermal_parameters or \
+                    base.rstrip("0123456789") in non_thermal_parameters):
+                thermal.append(k)
+
+        names, values, labels = [], [], [("code", code)]
+        for k in thermal:
+            if isinstance(p[k], (int, float, numpy.number)) and \
+                    not isinstance(p[k], bool):
+                names.append(k)
+                values.append(float(p[k]))
+            else:
+                labels.append((k, repr(p[k])))
+
+        label = hashlib.sha1(repr(labels).encode()).hexdigest()
+        name = hashlib.sha1(repr((label, names, values)).encode()).hexdigest()
+
+        # Only the free parameters are used to measure the distance between
+        # models.
+
+        if self.parameters != None:
+            free = [i for i, k in enumerate(names) if k in self.parameters \
+                    and not self.parameters[k]["fixed"]]
+
+            names = [names[i] for i in free]
+            values = [values[i] for i in free]
+
+        return name, label, names, numpy.array(values)
+
+    def scale(self, name):
+        # The scale over which a parameter changes, for measuring the distance
+        # between models.
+
+        if self.parameters != None and name in self.parameters:
+            limits = self.parameters[name]["limits"]
+            if limits[1] > limits[0]:
+                return limits[1] - limits[0]
+
+        return 1.
+
+    @contextlib.contextmanager
+    def open(self, mode):
+        # Open the cache file while holding a lock on the lock file, shared
+        # for reading and exclusive for writing, and close it and release the
+        # lock afterwards. If the file can't be opened, e.g. because it
+        # doesn't exist yet, give None, in which case the model is just run
+        # as if it weren't cached.
+
+        if mode == "r" and not os.path.exists(self.filename):
+            yield None
+            return
+
+        with open(self.filename+".lock", "a+") as lock:
+            fcntl.lockf(lock, fcntl.LOCK_SH if mode == "r" else \
+                    fcntl.LOCK_EX)
+
+            try:
+                f = h5py.File(self.filename, mode)
+            except OSError:
+                f = None
+
+            try:
+                yield f
+            finally:
+                if f != None:
+                    f.close()
+
+                fcntl.lockf(lock, fcntl.LOCK_UN)
@@ -6,6 +6,7 @@ from ..constants.astronomy import AU, M_sun
 from ..constants.math import pi
 from ..dust import Dust
 from ..gas import Gas
+from .Grid import spherical_coordinates
 
 class TwoLayerDisk:
     def __init__(self, mass=1.0e-3, rmin=0.1, rmax=300, plrho=2.37, h0=0.1, \
@@ -55,7 +56,7 @@ class TwoLayerDisk:
     def density(self, r, theta, phi):
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -73,9 +74,9 @@ class TwoLayerDisk:
         Sigma = self.surface_density(rr/AU)
         h_g = self.scale_height(rr/AU)
 
-        rho = numpy.zeros(Sigma.shape + (100,))
+        rho = numpy.zeros(Sigma.shape + (a.size,))
 
-        for i in range(na):
+        for i in range(a.size):
             gamma0 = 2.
             rho_mid = 100 * Sigma / (numpy.sqrt(2*numpy.pi)*h_g)
 
@@ -94,7 +95,7 @@ class TwoLayerDisk:
     def number_density(self, r, theta, phi, gas=0):
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -180,7 +181,7 @@ class TwoLayerDisk:
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -223,7 +224,7 @@ class TwoLayerDisk:
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -252,7 +253,7 @@ class TwoLayerDisk:
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -266,7 +267,7 @@ class TwoLayerDisk:
     def velocity(self, r, theta, phi, mstar=0.5):
         mstar *= M_sun
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -6,6 +6,7 @@ from ..constants.math import pi
 from ..dust import Dust
 from ..gas import Gas
 from .TwoLayerDisk import TwoLayerDisk
+from .Grid import spherical_coordinates
 
 class TwoLayerPringleDisk(TwoLayerDisk):
     def surface_density(self, r, normalize=True):
@@ -75,7 +76,7 @@ class TwoLayerPringleDisk(TwoLayerDisk):
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -118,7 +119,7 @@ class TwoLayerPringleDisk(TwoLayerDisk):
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -1,5 +1,4 @@
 import numpy
-from scipy.optimize import brenth
 from scipy.integrate import trapz
 from ..constants.astronomy import AU, M_sun
 from ..constants.math import pi
@@ -7,6 +6,8 @@ from ..constants.physics import G, m_p
 from ..constants.time import year
 from ..dust import Dust
 from ..gas import Gas
+from .ulrich_streamlines import streamline_mu0
+from .Grid import spherical_coordinates
 
 class UlrichEnvelopeExtended:
 
@@ -56,7 +57,7 @@ class UlrichEnvelopeExtended:
 
         # Set up the coordinates.
         
-        rr, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rr, tt, pp = spherical_coordinates(r, theta, phi)
 
         mu = numpy.cos(tt)
 
@@ -65,14 +66,7 @@ class UlrichEnvelopeExtended:
 
         # Calculate mu0 at each r, theta combination.
 
-        def func(mu0,r,mu,R_c):
-            return mu0**3-mu0*(1-r/R_c)-mu*(r/R_c)
-
-        mu0 = mu*0.
-        for ir in range(rr.shape[0]):
-            for it in range(rr.shape[1]):
-                mu0[ir,it,0] = brenth(func,-1.0,1.0,args=(rr[ir,it,0], \
-                        mu[ir,it,0],rcent))
+        mu0 = streamline_mu0(r, theta, self.rcent)
 
         ##### Make the dust density model for an Ulrich envelope.
 
@@ -119,7 +113,7 @@ class UlrichEnvelopeExtended:
 
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -148,7 +142,7 @@ class UlrichEnvelopeExtended:
     def microturbulence(self, r, theta, phi):
         ##### Set up the coordinates
 
-        rt, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rt, tt, pp = spherical_coordinates(r, theta, phi)
 
         rr = rt*numpy.sin(tt)
         zz = rt*numpy.cos(tt)
@@ -161,24 +155,16 @@ class UlrichEnvelopeExtended:
 
     def velocity(self, r, theta, phi, mstar=0.5):
         mstar *= M_sun
-        rcent = self.rcent * AU
 
         # Set up the coordinates.
         
-        rr, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rr, tt, pp = spherical_coordinates(r, theta, phi)
 
         mu = numpy.cos(tt)
 
         # Calculate mu0 at each r, theta combination.
 
-        def func(mu0,r,mu,R_c):
-            return mu0**3-mu0*(1-r/R_c)-mu*(r/R_c)
-
-        mu0 = mu*0.
-        for ir in range(rr.shape[0]):
-            for it in range(rr.shape[1]):
-                mu0[ir,it,0] = brenth(func,-1.0,1.0,args=(rr[ir,it,0], \
-                        mu[ir,it,0],rcent))
+        mu0 = streamline_mu0(r, theta, self.rcent)
 
         v_r = -numpy.sqrt(G*mstar/rr)*numpy.sqrt(1 + mu/mu0)
         v_theta = numpy.sqrt(G*mstar/rr) * (mu0 - mu) * \
@@ -206,7 +192,7 @@ class UlrichEnvelopeExtended:
 
         # Set up the coordinates.
         
-        rr, tt, pp = numpy.meshgrid(r*AU, theta, phi,indexing='ij')
+        rr, tt, pp = spherical_coordinates(r, theta, phi)
 
         mu = numpy.cos(tt)
 
@@ -215,14 +201,7 @@ class UlrichEnvelopeExtended:
 
         # Calculate mu0 at each r, theta combination.
 
-        def func(mu0,r,mu,R_c):
-            return mu0**3-mu0*(1-r/R_c)-mu*(r/R_c)
-
-        mu0 = mu*0.
-        for ir in range(rr.shape[0]):
-            for it in range(rr.shape[1]):
-                mu0[ir,it,0] = brenth(func,-1.0,1.0,args=(rr[ir,it,0], \
-                        mu[ir,it,0],rcent))
+        mu0 = streamline_mu0(r, theta, self.rcent)
 
         ##### Make the dust density model for an Ulrich envelope.
 
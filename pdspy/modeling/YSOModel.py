@@ -45,7 +45,7 @@ class YSOModel(Model):
         self.grid.set_cylindrical_grid(r, phi, z)
 
     def set_spherical_grid(self, rmin, rmax, nr, ntheta, nphi, log=True, \
-            code="radmc3d"):
+            code="radmc3d", axisymmetric=False):
         if log:
             r = numpy.logspace(numpy.log10(rmin), numpy.log10(rmax), nr)
         else:
@@ -60,7 +60,7 @@ class YSOModel(Model):
 
         phi = numpy.linspace(0.0, 2*numpy.pi, nphi)
 
-        self.grid.set_spherical_grid(r, theta, phi)
+        self.grid.set_spherical_grid(r, theta, phi, axisymmetric=axisymmetric)
 
     def add_ambient_medium(self, dens=1.0e-24):
         for i in range(len(self.grid.density)):
@@ -79,40 +79,40 @@ class YSOModel(Model):
 
         if (dust != None):
             self.grid.add_density(self.disk.density(self.grid.r, \
-                    self.grid.theta, self.grid.phi),dust)
+                    self.grid.theta, self.grid.field_phi),dust)
 
         if (gas != None):
             if (type(gas) == list):
                 for i in range(len(gas)):
                     self.disk.add_gas(gas[i], abundance[i])
                     self.grid.add_number_density(self.disk.number_density(\
-                            self.grid.r, self.grid.theta, self.grid.phi, \
+                            self.grid.r, self.grid.theta, self.grid.field_phi, \
                             gas=i), gas[i])
                     self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                            self.grid.theta, self.grid.phi, \
+                            self.grid.theta, self.grid.field_phi, \
                             mstar=self.grid.stars[0].mass))
                     if aturb != None:
                         self.grid.add_microturbulence(self.disk.\
                                 microturbulence(self.grid.r, self.grid.theta, \
-                                self.grid.phi))
+                                self.grid.field_phi))
             else:
                 self.disk.add_gas(gas, abundance)
                 self.grid.add_number_density(self.disk.number_density( \
-                        self.grid.r, self.grid.theta, self.grid.phi, \
+                        self.grid.r, self.grid.theta, self.grid.field_phi, \
                         gas=0), gas)
                 self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                        self.grid.theta, self.grid.phi, \
+                        self.grid.theta, self.grid.field_phi, \
                         mstar=self.grid.stars[0].mass))
                 if aturb != None:
                     self.grid.add_microturbulence(self.disk.microturbulence(\
-                            self.grid.r, self.grid.theta, self.grid.phi))
+                            self.grid.r, self.grid.theta, self.grid.field_phi))
 
         if t0 != None:
             self.grid.add_temperature(self.disk.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
         if tmid0 != None:
             self.grid.add_gas_temperature(self.disk.gas_temperature( \
-                    self.grid.r, self.grid.theta, self.grid.phi))
+                    self.grid.r, self.grid.theta, self.grid.field_phi))
 
     def add_dartois_disk(self, mass=1.0e-3, rmin=0.1, rmax=300, plrho=2.37, \
             h0=0.1, plh=58./45., dust=None,  t0=None, plt=None, gas=None, \
@@ -127,7 +127,7 @@ class YSOModel(Model):
 
         if (dust != None):
             self.grid.add_density(self.disk.density(self.grid.r, \
-                    self.grid.theta, self.grid.phi),dust)
+                    self.grid.theta, self.grid.field_phi),dust)
 
         if (gas != None):
             if (type(gas) == list):
@@ -137,30 +137,30 @@ class YSOModel(Model):
                             self.grid.w1, self.grid.w2, self.grid.w3, \
                             gas=i, mstar=self.grid.stars[0].mass), gas[i])
                     self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                            self.grid.theta, self.grid.phi, \
+                            self.grid.theta, self.grid.field_phi, \
                             mstar=self.grid.stars[0].mass))
                     if aturb != None:
                         self.grid.add_microturbulence(self.disk.\
                                 microturbulence(self.grid.r, self.grid.theta, \
-                                self.grid.phi))
+                                self.grid.field_phi))
             else:
                 self.disk.add_gas(gas, abundance, freezeout)
                 self.grid.add_number_density(self.disk.number_density( \
                         self.grid.w1, self.grid.w2, self.grid.w3, \
                         gas=0, mstar=self.grid.stars[0].mass), gas)
                 self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                        self.grid.theta, self.grid.phi, \
+                        self.grid.theta, self.grid.field_phi, \
                         mstar=self.grid.stars[0].mass))
                 if aturb != None:
                     self.grid.add_microturbulence(self.disk.microturbulence(\
-                            self.grid.r, self.grid.theta, self.grid.phi))
+                            self.grid.r, self.grid.theta, self.grid.field_phi))
 
         if t0 != None:
             self.grid.add_temperature(self.disk.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
         if tmid0 != None:
             self.grid.add_temperature(self.disk.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
 
     def add_twolayer_disk(self, mass=1.0e-3, rmin=0.1, rmax=300, plrho=2.37, \
             h0=0.1, plh=58./45., dust=None,  t0=None, plt=None, gas=None, \
@@ -177,7 +177,7 @@ class YSOModel(Model):
 
         if (dust != None):
             a, rho = self.disk.density(self.grid.r, self.grid.theta, \
-                    self.grid.phi)
+                    self.grid.field_phi)
 
             for i in range(len(a)):
                 self.grid.add_density(rho[:,:,:,i], self.disk.dust(a[i]/1e4, \
@@ -188,40 +188,40 @@ class YSOModel(Model):
                 for i in range(len(gas)):
                     self.disk.add_gas(gas[i], abundance[i])
                     self.grid.add_number_density(self.disk.number_density(\
-                            self.grid.r, self.grid.theta, self.grid.phi, \
+                            self.grid.r, self.grid.theta, self.grid.field_phi, \
                             gas=i), gas[i])
                     self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                            self.grid.theta, self.grid.phi, \
+                            self.grid.theta, self.grid.field_phi, \
                             mstar=self.grid.stars[0].mass))
                     if aturb != None:
                         self.grid.add_microturbulence(self.disk.\
                                 microturbulence(self.grid.r, self.grid.theta, \
-                                self.grid.phi))
+                                self.grid.field_phi))
             else:
                 self.disk.add_gas(gas, abundance)
                 self.grid.add_number_density(self.disk.number_density( \
-                        self.grid.r, self.grid.theta, self.grid.phi, \
+                        self.grid.r, self.grid.theta, self.grid.field_phi, \
                         gas=0), gas)
                 self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                        self.grid.theta, self.grid.phi, \
+                        self.grid.theta, self.grid.field_phi, \
                         mstar=self.grid.stars[0].mass))
                 if aturb != None:
                     self.grid.add_microturbulence(self.disk.microturbulence(\
-                            self.grid.r, self.grid.theta, self.grid.phi))
+                            self.grid.r, self.grid.theta, self.grid.field_phi))
 
         if t0 != None:
             self.grid.add_temperature(self.disk.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
         if tmid0 != None:
             self.grid.add_gas_temperature(self.disk.gas_temperature( \
-                    self.grid.r, self.grid.theta, self.grid.phi))
+                    self.grid.r, self.grid.theta, self.grid.field_phi))
 
     def add_settled_disk(self, mass=1.0e-3, rmin=0.1, rmax=300, plrho=2.37, \
             h0=0.1, plh=58./45., dust=None,  t0=None, plt=None, gas=None, \
             abundance=None, tmid0=None, tatm0=None, zq0=None, pltgas=None, \
             delta=None, gap_rin=[], gap_rout=[], gap_delta=[], \
             gaussian_gaps=False, aturb=None, amin=0.05, amax=1000., pla=3.5, \
-            alpha_settle=1.0e-3, na=100):
+            alpha_settle=1.0e-3, na=100, nspecies=None):
         self.disk = SettledDisk(mass=mass, rmin=rmin, rmax=rmax, plrho=plrho, \
                 h0=h0, plh=plh, dust=dust, t0=t0, plt=plt, tmid0=tmid0, \
                 tatm0=tatm0, zq0=zq0, pltgas=pltgas, delta=delta, \
@@ -231,44 +231,44 @@ class YSOModel(Model):
 
         if (dust != None):
             a, rho = self.disk.density(self.grid.r, self.grid.theta, \
-                    self.grid.phi, na=na)
+                    self.grid.field_phi, na=na, nspecies=nspecies)
 
-            for i in range(len(a)):
-                self.grid.add_density(rho[:,:,:,i], self.disk.dust(a[i]/1e4, \
-                        pla))
+            for i, d in enumerate(self.disk.dust_species(na=na, \
+                    nspecies=nspecies)):
+                self.grid.add_density(rho[:,:,:,i], d)
 
         if (gas != None):
             if (type(gas) == list):
                 for i in range(len(gas)):
                     self.disk.add_gas(gas[i], abundance[i])
                     self.grid.add_number_density(self.disk.number_density(\
-                            self.grid.r, self.grid.theta, self.grid.phi, \
+                            self.grid.r, self.grid.theta, self.grid.field_phi, \
                             gas=i), gas[i])
                     self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                            self.grid.theta, self.grid.phi, \
+                            self.grid.theta, self.grid.field_phi, \
                             mstar=self.grid.stars[0].mass))
                     if aturb != None:
                         self.grid.add_microturbulence(self.disk.\
                                 microturbulence(self.grid.r, self.grid.theta, \
-                                self.grid.phi))
+                                self.grid.field_phi))
             else:
                 self.disk.add_gas(gas, abundance)
                 self.grid.add_number_density(self.disk.number_density( \
-                        self.grid.r, self.grid.theta, self.grid.phi, \
+                        self.grid.r, self.grid.theta, self.grid.field_phi, \
                         gas=0), gas)
                 self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                        self.grid.theta, self.grid.phi, \
+                        self.grid.theta, self.grid.field_phi, \
                         mstar=self.grid.stars[0].mass))
                 if aturb != None:
                     self.grid.add_microturbulence(self.disk.microturbulence(\
-                            self.grid.r, self.grid.theta, self.grid.phi))
+                            self.grid.r, self.grid.theta, self.grid.field_phi))
 
         if t0 != None:
             self.grid.add_temperature(self.disk.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
         if tmid0 != None:
             self.grid.add_gas_temperature(self.disk.gas_temperature( \
-                    self.grid.r, self.grid.theta, self.grid.phi))
+                    self.grid.r, self.grid.theta, self.grid.field_phi))
 
     def add_pringle_disk(self, mass=1.0e-3, rmin=0.1, rmax=300, plrho=2.37, \
             h0=0.1, plh=58./45., dust=None,  t0=None, plt=None, gas=None, \
@@ -285,14 +285,14 @@ class YSOModel(Model):
         if (dust != None):
             if self.grid.coordsystem == "spherical":
                 self.grid.add_density(self.disk.density(self.grid.r, \
-                        self.grid.theta, self.grid.phi),dust)
+                        self.grid.theta, self.grid.field_phi),dust)
             elif self.grid.coordsystem == "cartesian":
                 self.grid.add_density(self.disk.density(self.grid.x, \
                         self.grid.y, self.grid.z, \
                         coordsys=self.grid.coordsystem),dust)
             elif self.grid.coordsystem == "cylindrical":
                 self.grid.add_density(self.disk.density(self.grid.rho, \
-                        self.grid.phi, self.grid.z, \
+                        self.grid.field_phi, self.grid.z, \
                         coordsys=self.grid.coordsystem),dust)
 
         if (gas != None):
@@ -300,33 +300,33 @@ class YSOModel(Model):
                 for i in range(len(gas)):
                     self.disk.add_gas(gas[i], abundance[i])
                     self.grid.add_number_density(self.disk.number_density( \
-                            self.grid.r, self.grid.theta, self.grid.phi, \
+                            self.grid.r, self.grid.theta, self.grid.field_phi, \
                             gas=i), gas[i])
                     self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                            self.grid.theta, self.grid.phi, \
+                            self.grid.theta, self.grid.field_phi, \
                             mstar=self.grid.stars[0].mass))
                     if aturb != None:
                         self.grid.add_microturbulence(self.disk.\
                                 microturbulence(self.grid.r, self.grid.theta, \
-                                self.grid.phi))
+                                self.grid.field_phi))
             else:
                 self.disk.add_gas(gas, abundance)
                 self.grid.add_number_density(self.disk.number_density( \
-                        self.grid.r, self.grid.theta, self.grid.phi, \
+                        self.grid.r, self.grid.theta, self.grid.field_phi, \
                         gas=0), gas)
                 self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                        self.grid.theta, self.grid.phi, \
+                        self.grid.theta, self.grid.field_phi, \
                         mstar=self.grid.stars[0].mass))
                 if aturb != None:
                     self.grid.add_microturbulence(self.disk.microturbulence( \
-                            self.grid.r, self.grid.theta, self.grid.phi))
+                            self.grid.r, self.grid.theta, self.grid.field_phi))
 
         if t0 != None:
             self.grid.add_temperature(self.disk.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
         if tmid0 != None:
             self.grid.add_gas_temperature(self.disk.gas_temperature( \
-                    self.grid.r, self.grid.theta, self.grid.phi))
+                    self.grid.r, self.grid.theta, self.grid.field_phi))
 
     def add_dartois_pringle_disk(self, mass=1.0e-3, rmin=0.1, rmax=300, \
             plrho=2.37, h0=0.1, plh=58./45., dust=None,  t0=None, plt=None, \
@@ -343,14 +343,14 @@ class YSOModel(Model):
         if (dust != None):
             if self.grid.coordsystem == "spherical":
                 self.grid.add_density(self.disk.density(self.grid.r, \
-                        self.grid.theta, self.grid.phi),dust)
+                        self.grid.theta, self.grid.field_phi),dust)
             elif self.grid.coordsystem == "cartesian":
                 self.grid.add_density(self.disk.density(self.grid.x, \
                         self.grid.y, self.grid.z, \
                         coordsys=self.grid.coordsystem),dust)
             elif self.grid.coordsystem == "cylindrical":
                 self.grid.add_density(self.disk.density(self.grid.rho, \
-                        self.grid.phi, self.grid.z, \
+                        self.grid.field_phi, self.grid.z, \
                         coordsys=self.grid.coordsystem),dust)
 
         if (gas != None):
@@ -361,30 +361,30 @@ class YSOModel(Model):
                             self.grid.w1, self.grid.w2, self.grid.w3, \
                             gas=i, mstar=self.grid.stars[0].mass), gas[i])
                     self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                            self.grid.theta, self.grid.phi, \
+                            self.grid.theta, self.grid.field_phi, \
                             mstar=self.grid.stars[0].mass))
                     if aturb != None:
                         self.grid.add_microturbulence(self.disk.\
                                 microturbulence(self.grid.r, self.grid.theta, \
-                                self.grid.phi))
+                                self.grid.field_phi))
             else:
                 self.disk.add_gas(gas, abundance, freezeout)
                 self.grid.add_number_density(self.disk.number_density( \
                         self.grid.w1, self.grid.w2, self.grid.w3, \
                         gas=0, mstar=self.grid.stars[0].mass), gas)
                 self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                        self.grid.theta, self.grid.phi, \
+                        self.grid.theta, self.grid.field_phi, \
                         mstar=self.grid.stars[0].mass))
                 if aturb != None:
                     self.grid.add_microturbulence(self.disk.microturbulence( \
-                            self.grid.r, self.grid.theta, self.grid.phi))
+                            self.grid.r, self.grid.theta, self.grid.field_phi))
 
         if t0 != None:
             self.grid.add_temperature(self.disk.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
         if tmid0 != None:
             self.grid.add_temperature(self.disk.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
 
     def add_twolayer_pringle_disk(self, mass=1.0e-3, rmin=0.1, rmax=300, \
             plrho=2.37, h0=0.1, plh=58./45., dust=None,  t0=None, plt=None, \
@@ -401,7 +401,7 @@ class YSOModel(Model):
 
         if (dust != None):
             a, rho = self.disk.density(self.grid.r, self.grid.theta, \
-                    self.grid.phi)
+                    self.grid.field_phi)
 
             for i in range(len(a)):
                 self.grid.add_density(rho[:,:,:,i], self.disk.dust(a[i]/1e4, \
@@ -412,40 +412,40 @@ class YSOModel(Model):
                 for i in range(len(gas)):
                     self.disk.add_gas(gas[i], abundance[i])
                     self.grid.add_number_density(self.disk.number_density(\
-                            self.grid.r, self.grid.theta, self.grid.phi, \
+                            self.grid.r, self.grid.theta, self.grid.field_phi, \
                             gas=i), gas[i])
                     self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                            self.grid.theta, self.grid.phi, \
+                            self.grid.theta, self.grid.field_phi, \
                             mstar=self.grid.stars[0].mass))
                     if aturb != None:
                         self.grid.add_microturbulence(self.disk.\
                                 microturbulence(self.grid.r, self.grid.theta, \
-                                self.grid.phi))
+                                self.grid.field_phi))
             else:
                 self.disk.add_gas(gas, abundance)
                 self.grid.add_number_density(self.disk.number_density( \
-                        self.grid.r, self.grid.theta, self.grid.phi, \
+                        self.grid.r, self.grid.theta, self.grid.field_phi, \
                         gas=0), gas)
                 self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                        self.grid.theta, self.grid.phi, \
+                        self.grid.theta, self.grid.field_phi, \
                         mstar=self.grid.stars[0].mass))
                 if aturb != None:
                     self.grid.add_microturbulence(self.disk.microturbulence(\
-                            self.grid.r, self.grid.theta, self.grid.phi))
+                            self.grid.r, self.grid.theta, self.grid.field_phi))
 
         if t0 != None:
             self.grid.add_temperature(self.disk.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
         if tmid0 != None:
             self.grid.add_gas_temperature(self.disk.gas_temperature( \
-                    self.grid.r, self.grid.theta, self.grid.phi))
+                    self.grid.r, self.grid.theta, self.grid.field_phi))
 
     def add_settled_pringle_disk(self, mass=1.0e-3, rmin=0.1, rmax=300, \
             plrho=2.37, h0=0.1, plh=58./45., dust=None,  t0=None, plt=None, \
             gas=None, abundance=None, tmid0=None, tatm0=None, zq0=None, \
             pltgas=None, delta=None, gap_rin=[], gap_rout=[], gap_delta=[], \
             gaussian_gaps=False, aturb=None, amin=0.05, amax=1000., pla=3.5, \
-            alpha_settle=1.0e-3, na=100, gamma_taper=None):
+            alpha_settle=1.0e-3, na=100, nspecies=None, gamma_taper=None):
         self.disk = SettledPringleDisk(mass=mass, rmin=rmin, rmax=rmax, \
                 plrho=plrho, h0=h0, plh=plh, dust=dust, t0=t0, plt=plt, \
                 tmid0=tmid0, tatm0=tatm0, zq0=zq0, pltgas=pltgas, delta=delta, \
@@ -455,44 +455,44 @@ class YSOModel(Model):
 
         if (dust != None):
             a, rho = self.disk.density(self.grid.r, self.grid.theta, \
-                    self.grid.phi, na=na)
+                    self.grid.field_phi, na=na, nspecies=nspecies)
 
-            for i in range(len(a)):
-                self.grid.add_density(rho[:,:,:,i], self.disk.dust(a[i]/1e4, \
-                        pla))
+            for i, d in enumerate(self.disk.dust_species(na=na, \
+                    nspecies=nspecies)):
+                self.grid.add_density(rho[:,:,:,i], d)
 
         if (gas != None):
             if (type(gas) == list):
                 for i in range(len(gas)):
                     self.disk.add_gas(gas[i], abundance[i])
                     self.grid.add_number_density(self.disk.number_density(\
-                            self.grid.r, self.grid.theta, self.grid.phi, \
+                            self.grid.r, self.grid.theta, self.grid.field_phi, \
                             gas=i), gas[i])
                     self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                            self.grid.theta, self.grid.phi, \
+                            self.grid.theta, self.grid.field_phi, \
                             mstar=self.grid.stars[0].mass))
                     if aturb != None:
                         self.grid.add_microturbulence(self.disk.\
                                 microturbulence(self.grid.r, self.grid.theta, \
-                                self.grid.phi))
+                                self.grid.field_phi))
             else:
                 self.disk.add_gas(gas, abundance)
                 self.grid.add_number_density(self.disk.number_density( \
-                        self.grid.r, self.grid.theta, self.grid.phi, \
+                        self.grid.r, self.grid.theta, self.grid.field_phi, \
                         gas=0), gas)
                 self.grid.add_velocity(self.disk.velocity(self.grid.r, \
-                        self.grid.theta, self.grid.phi, \
+                        self.grid.theta, self.grid.field_phi, \
                         mstar=self.grid.stars[0].mass))
                 if aturb != None:
                     self.grid.add_microturbulence(self.disk.microturbulence( \
-                            self.grid.r, self.grid.theta, self.grid.phi))
+                            self.grid.r, self.grid.theta, self.grid.field_phi))
 
         if t0 != None:
             self.grid.add_temperature(self.disk.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
         if tmid0 != None:
             self.grid.add_gas_temperature(self.disk.gas_temperature( \
-                    self.grid.r, self.grid.theta, self.grid.phi))
+                    self.grid.r, self.grid.theta, self.grid.field_phi))
 
     def add_envelope(self, mass=1.0e-3, rmin=0.1, rmax=1000, pl=1.5, \
             cavpl=1.0, cavrfact=0.2, t0=None, tpl=None, dust=None, gas=None, \
@@ -503,40 +503,40 @@ class YSOModel(Model):
 
         if (dust != None):
             self.grid.add_density(self.envelope.density(self.grid.r, \
-                    self.grid.theta, self.grid.phi),dust)
+                    self.grid.theta, self.grid.field_phi),dust)
 
         if (gas != None):
             if (type(gas) == list):
                 for i in range(len(gas)):
                     self.envelope.add_gas(gas[i], abundance[i])
                     self.grid.add_number_density(self.envelope.number_density( \
-                            self.grid.r, self.grid.theta, self.grid.phi, \
+                            self.grid.r, self.grid.theta, self.grid.field_phi, \
                             gas=i), gas[i])
                     self.grid.add_velocity(self.envelope.velocity(self.grid.r, \
-                            self.grid.theta, self.grid.phi, \
+                            self.grid.theta, self.grid.field_phi, \
                             mstar=self.grid.stars[0].mass))
                     if aturb != None:
                         self.grid.add_microturbulence(self.disk.\
                                 microturbulence(self.grid.r, self.grid.theta, \
-                                self.grid.phi))
+                                self.grid.field_phi))
             else:
                 self.envelope.add_gas(gas, abundance)
                 self.grid.add_number_density(self.envelope.number_density( \
-                        self.grid.r, self.grid.theta, self.grid.phi, gas=0), \
-                        gas)
+                        self.grid.r, self.grid.theta, self.grid.field_phi, \
+                        gas=0), gas)
                 self.grid.add_velocity(self.envelope.velocity(self.grid.r, \
-                        self.grid.theta, self.grid.phi, \
+                        self.grid.theta, self.grid.field_phi, \
                         mstar=self.grid.stars[0].mass))
 
                 if aturb != None:
                     self.grid.add_microturbulence(self.disk.microturbulence( \
-                            self.grid.r, self.grid.theta, self.grid.phi))
+                            self.grid.r, self.grid.theta, self.grid.field_phi))
         if t0 != None:
             self.grid.add_temperature(self.envelope.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
         if tmid0 != None:
             self.grid.add_gas_temperature(self.envelope.gas_temperature( \
-                    self.grid.r, self.grid.theta, self.grid.phi))
+                    self.grid.r, self.grid.theta, self.grid.field_phi))
 
     def add_ulrich_envelope(self, mass=1.0e-3, rmin=0.1, rmax=1000, rcent=300, \
             cavpl=1.0, cavrfact=0.2, t0=None, tpl=None, dust=None, gas=None, \
@@ -556,41 +556,41 @@ class YSOModel(Model):
 
         if (dust != None):
             self.grid.add_density(self.envelope.density(self.grid.r, \
-                    self.grid.theta, self.grid.phi),dust)
+                    self.grid.theta, self.grid.field_phi),dust)
 
         if (gas != None):
             if (type(gas) == list):
                 for i in range(len(gas)):
                     self.envelope.add_gas(gas[i], abundance[i])
                     self.grid.add_number_density(self.envelope.number_density( \
-                            self.grid.r, self.grid.theta, self.grid.phi, \
+                            self.grid.r, self.grid.theta, self.grid.field_phi, \
                             gas=i), gas[i])
                     self.grid.add_velocity(self.envelope.velocity(self.grid.r, \
-                            self.grid.theta, self.grid.phi, \
+                            self.grid.theta, self.grid.field_phi, \
                             mstar=self.grid.stars[0].mass))
                     if aturb != None:
                         self.grid.add_microturbulence(self.envelope.\
                                 microturbulence(self.grid.r, self.grid.theta, \
-                                self.grid.phi))
+                                self.grid.field_phi))
             else:
                 self.envelope.add_gas(gas, abundance)
                 self.grid.add_number_density(self.envelope.number_density( \
-                        self.grid.r, self.grid.theta, self.grid.phi, gas=0), \
-                        gas)
+                        self.grid.r, self.grid.theta, self.grid.field_phi, \
+                        gas=0), gas)
                 self.grid.add_velocity(self.envelope.velocity(self.grid.r, \
-                        self.grid.theta, self.grid.phi, \
+                        self.grid.theta, self.grid.field_phi, \
                         mstar=self.grid.stars[0].mass))
                 if aturb != None:
                     self.grid.add_microturbulence(self.envelope.\
                             microturbulence(self.grid.r, self.grid.theta, \
-                            self.grid.phi))
+                            self.grid.field_phi))
 
         if t0 != None:
             self.grid.add_temperature(self.envelope.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
         if tmid0 != None:
             self.grid.add_gas_temperature(self.envelope.gas_temperature( \
-                    self.grid.r, self.grid.theta, self.grid.phi))
+                    self.grid.r, self.grid.theta, self.grid.field_phi))
 
     def add_ulrichextended_envelope(self, mass=1.0e-3, rmin=0.1, rmax=1000, \
             rcent=300, cavpl=1.0, cavrfact=0.2, theta_open=45., zoffset=1., \
@@ -614,41 +614,41 @@ class YSOModel(Model):
 
         if (dust != None):
             self.grid.add_density(self.envelope.density(self.grid.r, \
-                    self.grid.theta, self.grid.phi),dust)
+                    self.grid.theta, self.grid.field_phi),dust)
 
         if (gas != None):
             if (type(gas) == list):
                 for i in range(len(gas)):
                     self.envelope.add_gas(gas[i], abundance[i])
                     self.grid.add_number_density(self.envelope.number_density( \
-                            self.grid.r, self.grid.theta, self.grid.phi, \
+                            self.grid.r, self.grid.theta, self.grid.field_phi, \
                             gas=i), gas[i])
                     self.grid.add_velocity(self.envelope.velocity(self.grid.r, \
-                            self.grid.theta, self.grid.phi, \
+                            self.grid.theta, self.grid.field_phi, \
                             mstar=self.grid.stars[0].mass))
                     if aturb != None:
                         self.grid.add_microturbulence(self.envelope.\
                                 microturbulence(self.grid.r, self.grid.theta, \
-                                self.grid.phi))
+                                self.grid.field_phi))
             else:
                 self.envelope.add_gas(gas, abundance)
                 self.grid.add_number_density(self.envelope.number_density( \
-                        self.grid.r, self.grid.theta, self.grid.phi, gas=0), \
-                        gas)
+                        self.grid.r, self.grid.theta, self.grid.field_phi, \
+                        gas=0), gas)
                 self.grid.add_velocity(self.envelope.velocity(self.grid.r, \
-                        self.grid.theta, self.grid.phi, \
+                        self.grid.theta, self.grid.field_phi, \
                         mstar=self.grid.stars[0].mass))
                 if aturb != None:
                     self.grid.add_microturbulence(self.envelope.\
                             microturbulence(self.grid.r, self.grid.theta, \
-                            self.grid.phi))
+                            self.grid.field_phi))
 
         if t0 != None:
             self.grid.add_temperature(self.envelope.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
         if tmid0 != None:
             self.grid.add_gas_temperature(self.envelope.gas_temperature( \
-                    self.grid.r, self.grid.theta, self.grid.phi))
+                    self.grid.r, self.grid.theta, self.grid.field_phi))
 
     def add_tapered_ulrich_envelope(self, mass=1.0e-3, rmin=0.1, rmax=1000, \
             rcent=300, cavpl=1.0, cavrfact=0.2, gamma=1., t0=None, tpl=None, \
@@ -669,41 +669,41 @@ class YSOModel(Model):
 
         if (dust != None):
             self.grid.add_density(self.envelope.density(self.grid.r, \
-                    self.grid.theta, self.grid.phi),dust)
+                    self.grid.theta, self.grid.field_phi),dust)
 
         if (gas != None):
             if (type(gas) == list):
                 for i in range(len(gas)):
                     self.envelope.add_gas(gas[i], abundance[i])
                     self.grid.add_number_density(self.envelope.number_density( \
-                            self.grid.r, self.grid.theta, self.grid.phi, \
+                            self.grid.r, self.grid.theta, self.grid.field_phi, \
                             gas=i), gas[i])
                     self.grid.add_velocity(self.envelope.velocity(self.grid.r, \
-                            self.grid.theta, self.grid.phi, \
+                            self.grid.theta, self.grid.field_phi, \
                             mstar=self.grid.stars[0].mass))
                     if aturb != None:
                         self.grid.add_microturbulence(self.envelope.\
                                 microturbulence(self.grid.r, self.grid.theta, \
-                                self.grid.phi))
+                                self.grid.field_phi))
             else:
                 self.envelope.add_gas(gas, abundance)
                 self.grid.add_number_density(self.envelope.number_density( \
-                        self.grid.r, self.grid.theta, self.grid.phi, gas=0), \
-                        gas)
+                        self.grid.r, self.grid.theta, self.grid.field_phi, \
+                        gas=0), gas)
                 self.grid.add_velocity(self.envelope.velocity(self.grid.r, \
-                        self.grid.theta, self.grid.phi, \
+                        self.grid.theta, self.grid.field_phi, \
                         mstar=self.grid.stars[0].mass))
                 if aturb != None:
                     self.grid.add_microturbulence(self.envelope.\
                             microturbulence(self.grid.r, self.grid.theta, \
-                            self.grid.phi))
+                            self.grid.field_phi))
 
         if t0 != None:
             self.grid.add_temperature(self.envelope.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
         if tmid0 != None:
             self.grid.add_gas_temperature(self.envelope.gas_temperature( \
-                    self.grid.r, self.grid.theta, self.grid.phi))
+                    self.grid.r, self.grid.theta, self.grid.field_phi))
 
     def add_tapered_ulrichextended_envelope(self, mass=1.0e-3, rmin=0.1, \
             rmax=1000, rcent=300, cavpl=1.0, cavrfact=0.2, gamma=1., \
@@ -727,41 +727,41 @@ class YSOModel(Model):
 
         if (dust != None):
             self.grid.add_density(self.envelope.density(self.grid.r, \
-                    self.grid.theta, self.grid.phi),dust)
+                    self.grid.theta, self.grid.field_phi),dust)
 
         if (gas != None):
             if (type(gas) == list):
                 for i in range(len(gas)):
                     self.envelope.add_gas(gas[i], abundance[i])
                     self.grid.add_number_density(self.envelope.number_density( \
-                            self.grid.r, self.grid.theta, self.grid.phi, \
+                            self.grid.r, self.grid.theta, self.grid.field_phi, \
                             gas=i), gas[i])
                     self.grid.add_velocity(self.envelope.velocity(self.grid.r, \
-                            self.grid.theta, self.grid.phi, \
+                            self.grid.theta, self.grid.field_phi, \
                             mstar=self.grid.stars[0].mass))
                     if aturb != None:
                         self.grid.add_microturbulence(self.envelope.\
                                 microturbulence(self.grid.r, self.grid.theta, \
-                                self.grid.phi))
+                                self.grid.field_phi))
             else:
                 self.envelope.add_gas(gas, abundance)
                 self.grid.add_number_density(self.envelope.number_density( \
-                        self.grid.r, self.grid.theta, self.grid.phi, gas=0), \
-                        gas)
+                        self.grid.r, self.grid.theta, self.grid.field_phi, \
+                        gas=0), gas)
                 self.grid.add_velocity(self.envelope.velocity(self.grid.r, \
-                        self.grid.theta, self.grid.phi, \
+                        self.grid.theta, self.grid.field_phi, \
                         mstar=self.grid.stars[0].mass))
                 if aturb != None:
                     self.grid.add_microturbulence(self.envelope.\
                             microturbulence(self.grid.r, self.grid.theta, \
-                            self.grid.phi))
+                            self.grid.field_phi))
 
         if t0 != None:
             self.grid.add_temperature(self.envelope.temperature(self.grid.r, \
-                    self.grid.theta, self.grid.phi))
+                    self.grid.theta, self.grid.field_phi))
         if tmid0 != None:
             self.grid.add_gas_temperature(self.envelope.gas_temperature( \
-                    self.grid.r, self.grid.theta, self.grid.phi))
+                    self.grid.r, self.grid.theta, self.grid.field_phi))
 
     def run_simple_dust_image(self, name=None, i=0., pa=0., npix=256, dx=1., \
             nu=230., kappa0=0.1, beta0=1, delta_beta=1, r0beta=100., plbeta=1, \
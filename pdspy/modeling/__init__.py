@@ -1,21 +1,26 @@
-from .Disk import Disk
-from .DartoisDisk import DartoisDisk
-from .SettledDisk import SettledDisk
+from ..lazy_import import lazy_import
 
-from .PringleDisk import PringleDisk
-from .DartoisPringleDisk import DartoisPringleDisk
-from .SettledPringleDisk import SettledPringleDisk
+lazy_import(__name__, {
+        "Disk":"Disk",
+        "DartoisDisk":"DartoisDisk",
+        "SettledDisk":"SettledDisk",
 
-from .Grid import Grid
-from .Model import Model
-from .Star import Star
-from .UlrichEnvelope import UlrichEnvelope
-from .UlrichEnvelopeExtended import UlrichEnvelopeExtended
-from .TaperedUlrichEnvelope import TaperedUlrichEnvelope
-from .TaperedUlrichEnvelopeExtended import TaperedUlrichEnvelopeExtended
-from .YSOModel import YSOModel
+        "PringleDisk":"PringleDisk",
+        "DartoisPringleDisk":"DartoisPringleDisk",
+        "SettledPringleDisk":"SettledPringleDisk",
 
-from .run_disk_model import run_disk_model
-from .run_flared_model import run_flared_model
-from .check_parameters import check_parameters
-from .get_surrogate_model import get_surrogate_model
+        "Grid":"Grid",
+        "Model":"Model",
+        "Star":"Star",
+        "UlrichEnvelope":"UlrichEnvelope",
+        "UlrichEnvelopeExtended":"UlrichEnvelopeExtended",
+        "TaperedUlrichEnvelope":"TaperedUlrichEnvelope",
+        "TaperedUlrichEnvelopeExtended":"TaperedUlrichEnvelopeExtended",
+        "YSOModel":"YSOModel",
+        "ThermalCache":"ThermalCache",
+        "SurrogateModel":"SurrogateModel",
+
+        "run_disk_model":"run_disk_model",
+        "run_flared_model":"run_flared_model",
+        "check_parameters":"check_parameters",
+        "get_surrogate_model":"get_surrogate_model"})
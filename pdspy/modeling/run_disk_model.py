@@ -4,6 +4,7 @@ from ..constants.astronomy import arcsec
 from ..constants.physics import c
 from .YSOModel import YSOModel
 from .get_surrogate_model import get_surrogate_model
+from .ThermalCache import ThermalCache
 from .. import interferometry as uv
 from .. import spectroscopy as sp
 from .. import misc
@@ -32,9 +33,10 @@ def run_disk_model(visibilities, images, spectra, params, parameters, \
         plot=False, ncpus=1, ncpus_highmass=1, with_hyperion=False, \
         timelimit=3600, source="disk", nice=None, disk_vis=False, \
         no_radiative_transfer=False, nlam_SED=50, run_thermal=True, \
-        surrogate=[], verbose=False, ftcode="galario", \
-        percentile=99., absolute=2., relative=1.02, \
-        increase_photons_until_convergence=False):
+        surrogate=[], surrogate_nsamples=None, verbose=False, \
+        ftcode="galario", percentile=99., absolute=2., relative=1.02, \
+        increase_photons_until_convergence=False, thermal_cache=None, \
+        mmap=False):
 
     # Set the values of all of the parameters.
 
@@ -76,17 +78,26 @@ def run_disk_model(visibilities, images, spectra, params, parameters, \
     # Set up the dust.
 
     dustopac = p["dust_file"]
-    dust_gen = dust.DustGenerator(dust.__path__[0]+"/data/"+dustopac)
+    dust_gen = dust.get_dust_generator(dust.__path__[0]+"/data/"+dustopac, \
+            mmap=mmap)
     if not p["disk_type"] in ["settled","settledexptaper"]:
         ddust = dust_gen(p["a_max"] / 1e4, p["p"])
 
     dustopac_env = p["envelope_dust"]
-    env_dust_gen = dust.DustGenerator(dust.__path__[0]+"/data/"+dustopac_env)
+    env_dust_gen = dust.get_dust_generator(dust.__path__[0]+\
+            "/data/"+dustopac_env, mmap=mmap)
     edust = env_dust_gen(1.0e-4, 3.5)
 
     # Make sure we are in a temp directory to not overwrite anything.
 
     original_dir = os.environ["PWD"]
+
+    # The thermal cache has to outlive the temporary directory, so find it
+    # relative to where we started.
+
+    if thermal_cache != None:
+        thermal_cache = os.path.abspath(thermal_cache)
+
     temp_dir = tempfile.TemporaryDirectory()
     os.chdir(temp_dir.name)
 
@@ -115,6 +126,11 @@ def run_disk_model(visibilities, images, spectra, params, parameters, \
     m = YSOModel()
     m.add_star(mass=p["M_star"],luminosity=p["L_star"],temperature=p["T_star"])
 
+    # We're working in a temporary directory, so keep the RADMC-3D input files
+    # around between runs and only re-write the ones that change.
+
+    m.radmc3d_keep_inputs = True
+
     if p["envelope_type"] == "ulrich":
         p["R_grid"] = p["R_env"]
     else:
@@ -158,7 +174,7 @@ def run_disk_model(visibilities, images, spectra, params, parameters, \
                 p["R_out_gap2"],p["R_out_gap3"]], gap_delta=[p["delta_cav"],\
                 p["delta_gap1"],p["delta_gap2"],p["delta_gap3"]], \
                 amin=p["a_min"], amax=p["a_max"], pla=p["p"], na=p["na"], \
-                alpha_settle=p["alpha_settle"])
+                nspecies=p["nspecies"], alpha_settle=p["alpha_settle"])
     elif p["disk_type"] == "settledexptaper":
         m.add_settled_pringle_disk(mass=p["M_disk"], rmin=p["R_in"], \
                 rmax=p["R_disk"], plrho=p["alpha"], h0=p["h_0"], plh=p["beta"],\
@@ -167,7 +183,8 @@ def run_disk_model(visibilities, images, spectra, params, parameters, \
                 p["R_out_gap2"],p["R_out_gap3"]], gap_delta=[p["delta_cav"],\
                 p["delta_gap1"],p["delta_gap2"],p["delta_gap3"]], \
                 amin=p["a_min"], amax=p["a_max"], pla=p["p"], na=p["na"], \
-                alpha_settle=p["alpha_settle"], gamma_taper=p["gamma_taper"])
+                nspecies=p["nspecies"], alpha_settle=p["alpha_settle"], \
+                gamma_taper=p["gamma_taper"])
     else:
         m.add_disk(mass=p["M_disk"], rmin=p["R_in"], \
                 rmax=p["R_disk"], plrho=p["alpha"], \
@@ -216,16 +233,41 @@ def run_disk_model(visibilities, images, spectra, params, parameters, \
 
         return m
 
+    # If we are keeping a cache of thermal structures, check whether this
+    # model has already been run. If not, Hyperion can at least start from 
+    # the most similar model that has been.
+
+    cache, temperature, specific_energy = None, None, None
+
+    if thermal_cache != None and run_thermal and \
+            not "temperature" in surrogate:
+        cache = ThermalCache(thermal_cache, parameters=parameters)
+
+        temperature = cache.get(p, code=code)
+        if temperature == None and code == "hyperion":
+            specific_energy = cache.nearest(p, code=code)
+
     # Run the thermal simulation.
 
     if "temperature" in surrogate:
-        # Use the surrogate model to calculate the temperature.
+        # Use the surrogate model to calculate the temperature. Setting
+        # surrogate_nsamples conditions the Gaussian processes once for that
+        # many hyperparameter draws, rather than for every model.
 
-        temperature = get_surrogate_model(p, quantity="temperature")
+        temperature = get_surrogate_model(p, quantity="temperature", \
+                nsamples=surrogate_nsamples, verbose=verbose)
 
         m.grid.temperature = []
         for i in range(len(m.grid.density)):
             m.grid.add_temperature(temperature)
+    elif temperature != None:
+        # Use the cached temperature, which for Hyperion was stored after 
+        # converting to the RADMC-3D grid.
+
+        if code == "hyperion":
+            m.convert_hyperion_to_radmc3d()
+
+        m.grid.temperature = temperature
     else:
         if code == "hyperion" and run_thermal:
             try:
@@ -235,7 +277,8 @@ def run_disk_model(visibilities, images, spectra, params, parameters, \
                         timeout=timelimit, percentile=percentile, \
                         absolute=absolute, relative=relative, \
                         increase_photons_until_convergence=\
-                        increase_photons_until_convergence)
+                        increase_photons_until_convergence, \
+                        specific_energy=specific_energy)
 
                 # Convert model to radmc-3d format.
 
@@ -252,7 +295,7 @@ def run_disk_model(visibilities, images, spectra, params, parameters, \
                         modified_random_walk=True,\
                         mrw_gamma=2, mrw_tauthres=10, mrw_count_trigger=100, \
                         verbose=verbose, setthreads=nprocesses, \
-                        timelimit=timelimit, nice=nice)
+                        timelimit=timelimit, nice=nice, binary=True)
                 t2 = time.time()
                 f = open(original_dir + "/times.txt", "a")
                 f.write("{0:f}\n".format(t2-t1))
@@ -267,7 +310,7 @@ def run_disk_model(visibilities, images, spectra, params, parameters, \
                 os.system("mv params.txt {0:s}/params_timeout_{1:s}".format(\
                         original_dir, time.strftime("%Y-%m-%d-%H:%M:%S", \
                         time.gmtime())))
-                os.system("rm *.inp *.out *.dat *.uinp")
+                os.system("rm *.inp *.out *.dat *.uinp *.binp")
                 os.chdir(original_dir)
 
                 return 0.
@@ -279,232 +322,268 @@ def run_disk_model(visibilities, images, spectra, params, parameters, \
                         modified_random_walk=True,\
                         mrw_gamma=2, mrw_tauthres=10, mrw_count_trigger=100, \
                         verbose=verbose, setthreads=nprocesses, \
-                        timelimit=timelimit, nice=nice)
+                        timelimit=timelimit, nice=nice, binary=True)
                 t2 = time.time()
                 f = open(original_dir + "/times.txt", "a")
                 f.write("{0:f}\n".format(t2-t1))
                 f.close()
 
+        if cache != None:
+            cache.add(p, m.grid.temperature, \
+                    specific_energy=m.grid.specific_energy, code=code)
+
     # Run the images/visibilities/SEDs. If plot == "concat" then we are doing
     # a fit and we need less. Otherwise we are making a plot of the best fit 
     # model so we need to generate a few extra things.
 
-    # Run the visibilities.
-
-    for j in range(len(visibilities["file"])):
-        # Set the wavelengths for RADMC3D to use.
+    # When fitting, keep a single RADMC-3D process running with the model 
+    # loaded for all of the images and the SED, rather than having RADMC-3D
+    # re-read the model from disk for each one.
 
-        wave = c / visibilities["data"][j].freq / 1.0e-4
-        m.set_camera_wavelength(wave)
-
-        if ftcode == "galario":
-            m.run_image(name=visibilities["lam"][j], nphot=1e5, \
-                    npix=visibilities["npix"][j], \
-                    pixelsize=visibilities["pixelsize"][j], \
-                    lam=None, loadlambda=True, incl=p["i"], \
-                    pa=p["pa"], dpc=p["dpc"], code="radmc3d", \
-                    mc_scat_maxtauabs=5, verbose=verbose,setthreads=nprocesses,\
-                    writeimage_unformatted=True, nice=nice)
-        else:
-            m.run_image(name=visibilities["lam"][j], nphot=1e5, \
-                    lam=None, loadlambda=True, incl=p["i"], \
-                    pa=p["pa"], dpc=p["dpc"], code="radmc3d", \
-                    mc_scat_maxtauabs=5, verbose=verbose,setthreads=nprocesses,\
-                    writeimage_unformatted=True, nice=nice, unstructured=True,\
-                    camera_circ_nrphiinf=visibilities["nphi"][j], \
-                    camera_circ_dbdr=visibilities["nr"][j])
-
-        # Account for the flux calibration uncertainties.
-
-        m.images[visibilities["lam"][j]].image *= p["flux_unc{0:d}".format(j+1)]
-
-        m.visibilities[visibilities["lam"][j]] = uv.interpolate_model(\
-                visibilities["data"][j].u, visibilities["data"][j].v, \
-                visibilities["data"][j].freq, m.images[visibilities["lam"][j]],\
-                dRA=p["x0"], dDec=p["y0"], nthreads=nprocesses, code=ftcode, \
-                nxy=visibilities["npix"][j], dxy=visibilities["pixelsize"][j])
+    if not plot and ftcode in ["galario","native"]:
+        m.start_radmc3d_session(nphot=1e5, nphot_spec=1e4, \
+                camera_scatsrc_allfreq=True, mc_scat_maxtauabs=5, \
+                verbose=verbose, setthreads=nprocesses, nice=nice, \
+                binary=True)
 
-        # Add in free free emission.
+    try:
+        # Run the visibilities.
 
-        m.visibilities[visibilities["lam"][j]].real += uv.model(\
-                m.visibilities[visibilities["lam"][j]].u, \
-                m.visibilities[visibilities["lam"][j]].v, \
-                [p["x0"],p["y0"],sp.freefree(m.visibilities[visibilities[\
-                "lam"][j]].freq.mean(), p["F_nu_ff"], p["nu_turn"]*1e9, \
-                p["pl_turn"])], return_type="data", funct="point").real
+        for j in range(len(visibilities["file"])):
+            # Set the wavelengths for RADMC3D to use.
 
-        if plot:
-            # Make high resolution visibilities. 
+            wave = c / visibilities["data"][j].freq / 1.0e-4
+            m.set_camera_wavelength(wave)
 
-            if "galario" in ftcode:
-                u, v = numpy.meshgrid(numpy.linspace(-2.0e6, 2.0e6, 2000), \
-                        numpy.linspace(-2.0e6, 2.0e6, 2000))
+            if ftcode in ["galario","native"]:
+                m.run_image(name=visibilities["lam"][j], nphot=1e5, \
+                        npix=visibilities["npix"][j], \
+                        pixelsize=visibilities["pixelsize"][j], \
+                        lam=None, loadlambda=True, incl=p["i"], \
+                        pa=p["pa"], dpc=p["dpc"], code="radmc3d", \
+                        mc_scat_maxtauabs=5, verbose=verbose, \
+                        setthreads=nprocesses, writeimage_unformatted=True, \
+                        nice=nice)
             else:
-                u, v = numpy.meshgrid(numpy.hstack((\
-                        -numpy.logspace(3.,7.,50)[::-1],\
-                        numpy.logspace(3.,7.,50))),\
-                        numpy.hstack((-numpy.logspace(3.,7.,50)[::-1],\
-                        numpy.logspace(3.,7.,50))))
-
-            u, v = u.reshape((u.size,)), v.reshape((v.size,))
-
-            m.visibilities[visibilities["lam"][j]+"_high"] = \
-                    uv.interpolate_model(u, v, visibilities["data"][j].freq, \
+                m.run_image(name=visibilities["lam"][j], nphot=1e5, \
+                        lam=None, loadlambda=True, incl=p["i"], \
+                        pa=p["pa"], dpc=p["dpc"], code="radmc3d", \
+                        mc_scat_maxtauabs=5, verbose=verbose, \
+                        setthreads=nprocesses, writeimage_unformatted=True, \
+                        nice=nice, unstructured=True, \
+                        camera_circ_nrphiinf=visibilities["nphi"][j], \
+                        camera_circ_dbdr=visibilities["nr"][j])
+
+            # Account for the flux calibration uncertainties.
+
+            m.images[visibilities["lam"][j]].image *= \
+                    p["flux_unc{0:d}".format(j+1)]
+
+            m.visibilities[visibilities["lam"][j]] = uv.interpolate_model(\
+                    visibilities["data"][j].u, visibilities["data"][j].v, \
+                    visibilities["data"][j].freq, \
                     m.images[visibilities["lam"][j]], dRA=p["x0"], \
                     dDec=p["y0"], nthreads=nprocesses, code=ftcode, \
                     nxy=visibilities["npix"][j], \
-                    dxy=visibilities["pixelsize"][j])
+                    dxy=visibilities["pixelsize"][j], \
+                    hermitian=visibilities["data"][j].hermitian)
 
             # Add in free free emission.
 
-            m.visibilities[visibilities["lam"][j]+"_high"].real += uv.model(\
-                    m.visibilities[visibilities["lam"][j]+"_high"].u, \
-                    m.visibilities[visibilities["lam"][j]+"_high"].v, \
+            m.visibilities[visibilities["lam"][j]].real += uv.model(\
+                    m.visibilities[visibilities["lam"][j]].u, \
+                    m.visibilities[visibilities["lam"][j]].v, \
                     [p["x0"],p["y0"],sp.freefree(m.visibilities[visibilities[\
                     "lam"][j]].freq.mean(), p["F_nu_ff"], p["nu_turn"]*1e9, \
                     p["pl_turn"])], return_type="data", funct="point").real
 
-            # Run the 2D visibilities.
+            if plot:
+                # Make high resolution visibilities. 
 
-            m.visibilities[visibilities["lam"][j]+"_2d"] = \
-                    uv.interpolate_model(visibilities["data2d"][j].u, \
-                    visibilities["data2d"][j].v, \
-                    visibilities["data2d"][j].freq, \
-                    m.images[visibilities["lam"][j]], dRA=p["x0"], \
-                    dDec=p["y0"], nthreads=nprocesses, code=ftcode)
+                if "galario" in ftcode or ftcode == "native":
+                    u, v = numpy.meshgrid(numpy.linspace(-2.0e6, 2.0e6, 2000), \
+                            numpy.linspace(-2.0e6, 2.0e6, 2000))
+                else:
+                    u, v = numpy.meshgrid(numpy.hstack((\
+                            -numpy.logspace(3.,7.,50)[::-1],\
+                            numpy.logspace(3.,7.,50))),\
+                            numpy.hstack((-numpy.logspace(3.,7.,50)[::-1],\
+                            numpy.logspace(3.,7.,50))))
+
+                u, v = u.reshape((u.size,)), v.reshape((v.size,))
+
+                m.visibilities[visibilities["lam"][j]+"_high"] = \
+                        uv.interpolate_model(u, v, \
+                        visibilities["data"][j].freq, \
+                        m.images[visibilities["lam"][j]], dRA=p["x0"], \
+                        dDec=p["y0"], nthreads=nprocesses, code=ftcode, \
+                        nxy=visibilities["npix"][j], \
+                        dxy=visibilities["pixelsize"][j])
 
-            # Run a millimeter image.
+                # Add in free free emission.
 
-            wave = c / visibilities["image"][j].freq / 1.0e-4
-            m.set_camera_wavelength(wave)
+                m.visibilities[visibilities["lam"][j]+"_high"].real += \
+                        uv.model(\
+                        m.visibilities[visibilities["lam"][j]+"_high"].u, \
+                        m.visibilities[visibilities["lam"][j]+"_high"].v, \
+                        [p["x0"],p["y0"],sp.freefree(m.visibilities[\
+                        visibilities["lam"][j]].freq.mean(), p["F_nu_ff"], \
+                        p["nu_turn"]*1e9, p["pl_turn"])], return_type="data", \
+                        funct="point").real
+
+                # Run the 2D visibilities.
+
+                m.visibilities[visibilities["lam"][j]+"_2d"] = \
+                        uv.interpolate_model(visibilities["data2d"][j].u, \
+                        visibilities["data2d"][j].v, \
+                        visibilities["data2d"][j].freq, \
+                        m.images[visibilities["lam"][j]], dRA=p["x0"], \
+                        dDec=p["y0"], nthreads=nprocesses, code=ftcode)
+
+                # Run a millimeter image.
+
+                wave = c / visibilities["image"][j].freq / 1.0e-4
+                m.set_camera_wavelength(wave)
 
-            m.run_image(name=visibilities["lam"][j], nphot=1e5, \
-                    npix=visibilities["image_npix"][j], \
-                    pixelsize=visibilities["image_pixelsize"][j], \
-                    lam=None, loadlambda=True, incl=p["i"], \
+                m.run_image(name=visibilities["lam"][j], nphot=1e5, \
+                        npix=visibilities["image_npix"][j], \
+                        pixelsize=visibilities["image_pixelsize"][j], \
+                        lam=None, loadlambda=True, incl=p["i"], \
+                        pa=p["pa"], dpc=p["dpc"], code="radmc3d", \
+                        mc_scat_maxtauabs=5, verbose=verbose, \
+                        setthreads=nprocesses, nice=nice)
+
+                m.images[visibilities["lam"][j]].image[\
+                        int(visibilities["image_npix"][j]/2),
+                        int(visibilities["image_npix"][j]/2),0,0] += \
+                        sp.freefree(m.images[visibilities["lam"][j]].freq.\
+                        mean(), p["F_nu_ff"],p["nu_turn"]*1e9,p["pl_turn"])
+
+                x, y = numpy.meshgrid(numpy.linspace(-256,255,512), \
+                        numpy.linspace(-256,255,512))
+
+                beam = misc.gaussian2d(x, y, 0., 0., \
+                        visibilities["image"][j].header["BMAJ"]/2.355/\
+                        visibilities["image"][j].header["CDELT2"], \
+                        visibilities["image"][j].header["BMIN"]/2.355/\
+                        visibilities["image"][j].header["CDELT2"], \
+                        (90-visibilities["image"][j].header["BPA"])*\
+                        numpy.pi/180., 1.0)
+
+                m.images[visibilities["lam"][j]].image = \
+                        scipy.signal.fftconvolve(m.images[visibilities[\
+                        "lam"][j]].image[:,:,0,0], beam, mode="same").\
+                        reshape(m.images[visibilities["lam"][j]].image.shape)
+
+                # Run visibilities that include only the contribution of the 
+                # disk.
+
+                if disk_vis and parameters["envelope_type"]["value"] == \
+                        "ulrich":
+                    density_original = m.grid.density.copy()
+                    temperature_original = m.grid.temperature.copy()
+                    dust_original = m.grid.dust.copy()
+
+                    del m.grid.density[-1]
+                    del m.grid.temperature[-1]
+                    del m.grid.dust[-1]
+
+                    wave = c / visibilities["data"][j].freq / 1.0e-4
+                    m.set_camera_wavelength(wave)
+
+                    if ftcode in ["galario","native"]:
+                        m.run_image(name=visibilities["lam"][j]+"_disk", \
+                                nphot=1e5, npix=visibilities["npix"][j], \
+                                pixelsize=visibilities["pixelsize"][j], \
+                                lam=None, loadlambda=True, incl=p["i"], \
+                                pa=p["pa"], dpc=p["dpc"], code="radmc3d", \
+                                mc_scat_maxtauabs=5, verbose=verbose, \
+                                setthreads=nprocesses, \
+                                writeimage_unformatted=True, nice=nice)
+                    else:
+                        m.run_image(name=visibilities["lam"][j]+"_disk", \
+                                nphot=1e5, lam=None, loadlambda=True, \
+                                incl=p["i"], pa=p["pa"], dpc=p["dpc"], \
+                                code="radmc3d", mc_scat_maxtauabs=5, \
+                                verbose=verbose, setthreads=nprocesses, \
+                                writeimage_unformatted=True, nice=nice, \
+                                unstructured=True, \
+                                camera_circ_nrphiinf=visibilities["nphi"][j], \
+                                camera_circ_dbdr=visibilities["nr"][j])
+
+                    m.visibilities[visibilities["lam"][j]+"_disk"] = \
+                            uv.interpolate_model(u, v, \
+                            visibilities["data"][j].freq, \
+                            m.images[visibilities["lam"][j]+"_disk"], \
+                            dRA=p["x0"], dDec=p["y0"], nthreads=nprocesses, \
+                            code=ftcode, nxy=visibilities["npix"][j], \
+                            dxy=visibilities["pixelsize"][j])
+
+                    m.grid.density = density_original
+                    m.grid.temperature = temperature_original
+                    m.grid.dust = dust_original
+
+        # Run the images.
+
+        for j in range(len(images["file"])):
+            m.run_image(name=images["lam"][j], nphot=1e5, \
+                    npix=images["npix"][j], pixelsize=images["pixelsize"][j], \
+                    lam=images["lam"][j], incl=p["i"], \
                     pa=p["pa"], dpc=p["dpc"], code="radmc3d", \
                     mc_scat_maxtauabs=5, verbose=verbose, \
                     setthreads=nprocesses, nice=nice)
 
-            m.images[visibilities["lam"][j]].image[\
-                    int(visibilities["image_npix"][j]/2),
-                    int(visibilities["image_npix"][j]/2),0,0] += \
-                    sp.freefree(m.images[visibilities["lam"][j]].freq.mean(), \
-                    p["F_nu_ff"],p["nu_turn"]*1e9,p["pl_turn"])
+            # Convolve with the beam.
 
             x, y = numpy.meshgrid(numpy.linspace(-256,255,512), \
                     numpy.linspace(-256,255,512))
 
-            beam = misc.gaussian2d(x, y, 0., 0., \
-                    visibilities["image"][j].header["BMAJ"]/2.355/\
-                    visibilities["image"][j].header["CDELT2"], \
-                    visibilities["image"][j].header["BMIN"]/2.355/\
-                    visibilities["image"][j].header["CDELT2"], \
-                    (90-visibilities["image"][j].header["BPA"])*numpy.pi/180., \
+            beam = misc.gaussian2d(x, y, 0., 0., images["bmaj"][j]/2.355/\
+                    images["pixelsize"][j], images["bmin"][j]/2.355/\
+                    image["pixelsize"][j], (90-images["bpa"][j])*numpy.pi/180.,\
                     1.0)
 
-            m.images[visibilities["lam"][j]].image = scipy.signal.fftconvolve(\
-                    m.images[visibilities["lam"][j]].image[:,:,0,0], beam, \
-                    mode="same").reshape(m.images[visibilities["lam"][j]].\
-                    image.shape)
+            m.images[images["lam"][j]].image = scipy.signal.fftconvolve(\
+                    m.images[images["lam"][j]].image[:,:,0,0], beam, \
+                    mode="same").reshape(m.images[images["lam"][j]].image.shape)
 
-            # Run visibilities that include only the contribution of the disk.
+        # Run the SED.
 
-            if disk_vis and parameters["envelope_type"]["value"] == "ulrich":
-                density_original = m.grid.density.copy()
-                temperature_original = m.grid.temperature.copy()
-                dust_original = m.grid.dust.copy()
-
-                del m.grid.density[-1]
-                del m.grid.temperature[-1]
-                del m.grid.dust[-1]
-
-                wave = c / visibilities["data"][j].freq / 1.0e-4
-                m.set_camera_wavelength(wave)
-
-                if ftcode == "galario":
-                    m.run_image(name=visibilities["lam"][j]+"_disk", nphot=1e5,\
-                            npix=visibilities["npix"][j], \
-                            pixelsize=visibilities["pixelsize"][j], \
-                            lam=None, loadlambda=True, incl=p["i"], \
-                            pa=p["pa"], dpc=p["dpc"], code="radmc3d", \
-                            mc_scat_maxtauabs=5, verbose=verbose, \
-                            setthreads=nprocesses,writeimage_unformatted=True, \
-                            nice=nice)
-                else:
-                    m.run_image(name=visibilities["lam"][j]+"_disk", nphot=1e5,\
-                            lam=None, loadlambda=True, incl=p["i"], \
-                            pa=p["pa"], dpc=p["dpc"], code="radmc3d", \
-                            mc_scat_maxtauabs=5, verbose=verbose, \
-                            setthreads=nprocesses, writeimage_unformatted=True,\
-                            nice=nice, unstructured=True, \
-                            camera_circ_nrphiinf=visibilities["nphi"][j], \
-                            camera_circ_dbdr=visibilities["nr"][j])
-
-                m.visibilities[visibilities["lam"][j]+"_disk"] = \
-                        uv.interpolate_model(u,v,visibilities["data"][j].freq, \
-                        m.images[visibilities["lam"][j]+"_disk"], dRA=p["x0"], \
-                        dDec=p["y0"], nthreads=nprocesses, code=ftcode, \
-                        nxy=visibilities["npix"][j], \
-                        dxy=visibilities["pixelsize"][j])
-
-                m.grid.density = density_original
-                m.grid.temperature = temperature_original
-                m.grid.dust = dust_original
-
-    # Run the images.
-
-    for j in range(len(images["file"])):
-        m.run_image(name=images["lam"][j], nphot=1e5, \
-                npix=images["npix"][j], pixelsize=images["pixelsize"][j], \
-                lam=images["lam"][j], incl=p["i"], \
-                pa=p["pa"], dpc=p["dpc"], code="radmc3d", \
-                mc_scat_maxtauabs=5, verbose=verbose, setthreads=nprocesses, \
-                nice=nice)
-
-        # Convolve with the beam.
-
-        x, y = numpy.meshgrid(numpy.linspace(-256,255,512), \
-                numpy.linspace(-256,255,512))
-
-        beam = misc.gaussian2d(x, y, 0., 0., images["bmaj"][j]/2.355/\
-                images["pixelsize"][j], images["bmin"][j]/2.355/\
-                image["pixelsize"][j], (90-images["bpa"][j])*numpy.pi/180., 1.0)
-
-        m.images[images["lam"][j]].image = scipy.signal.fftconvolve(\
-                m.images[images["lam"][j]].image[:,:,0,0], beam, mode="same").\
-                reshape(m.images[images["lam"][j]].image.shape)
-
-    # Run the SED.
+        if "total" in spectra:
+            if plot:
+                m.set_camera_wavelength(numpy.logspace(-1,4,nlam_SED))
+            else:
+                m.set_camera_wavelength(spectra["total"].wave)
 
-    if "total" in spectra:
-        if plot:
-            m.set_camera_wavelength(numpy.logspace(-1,4,nlam_SED))
-        else:
-            m.set_camera_wavelength(spectra["total"].wave)
+            m.run_sed(name="SED", nphot=1e4, loadlambda=True, incl=p["i"],\
+                    pa=p["pa"], dpc=p["dpc"], code="radmc3d", \
+                    camera_scatsrc_allfreq=True, mc_scat_maxtauabs=5, \
+                    verbose=verbose, setthreads=nprocesses, nice=nice)
 
-        m.run_sed(name="SED", nphot=1e4, loadlambda=True, incl=p["i"],\
-                pa=p["pa"], dpc=p["dpc"], code="radmc3d", \
-                camera_scatsrc_allfreq=True, mc_scat_maxtauabs=5, \
-                verbose=verbose, setthreads=nprocesses, nice=nice)
+            # Add in a contribution from free-free emission.
 
-        # Add in a contribution from free-free emission.
+            m.spectra["SED"].flux += sp.freefree(m.spectra["SED"].freq, \
+                    p["F_nu_ff"], p["nu_turn"]*1e9, p["pl_turn"])
 
-        m.spectra["SED"].flux += sp.freefree(m.spectra["SED"].freq, \
-                p["F_nu_ff"], p["nu_turn"]*1e9, p["pl_turn"])
+            # Redden the SED based on the reddening.
 
-        # Redden the SED based on the reddening.
+            m.spectra["SED"].flux = dust.redden(m.spectra["SED"].wave, \
+                    m.spectra["SED"].flux, p["Ak"], law="mcclure")
 
-        m.spectra["SED"].flux = dust.redden(m.spectra["SED"].wave, \
-                m.spectra["SED"].flux, p["Ak"], law="mcclure")
+            # Now take the log of the SED.
 
-        # Now take the log of the SED.
+            if not plot:
+                m.spectra["SED"].flux = numpy.log10(m.spectra["SED"].flux)
+    finally:
+        # Make sure that the RADMC-3D process is shut down, even if something
+        # went wrong along the way.
 
-        if not plot:
-            m.spectra["SED"].flux = numpy.log10(m.spectra["SED"].flux)
+        m.stop_radmc3d_session()
 
     # Clean up everything and return.
 
+    m.clean_radmc3d(inputs=True)
+
     os.system("rm params.txt")
     os.chdir(original_dir)
 
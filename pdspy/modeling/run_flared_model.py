@@ -23,7 +23,7 @@ import os
 
 def run_flared_model(visibilities, params, parameters, plot=False, ncpus=1, \
         source="flared", plot_vis=False, nice=None, ftcode="galario", \
-        no_images=False):
+        no_images=False, mmap=False):
 
     # Set the values of all of the parameters.
 
@@ -61,7 +61,8 @@ def run_flared_model(visibilities, params, parameters, plot=False, ncpus=1, \
 
     dustopac = p["dust_file"]
 
-    dust_gen = dust.DustGenerator(dust.__path__[0]+"/data/"+dustopac)
+    dust_gen = dust.get_dust_generator(dust.__path__[0]+"/data/"+dustopac, \
+            mmap=mmap)
 
     ddust = dust_gen(p["a_max"] / 1e4, p["p"])
     edust = dust_gen(1.0e-4, 3.5)
@@ -214,7 +215,7 @@ def run_flared_model(visibilities, params, parameters, plot=False, ncpus=1, \
 
         m.set_camera_wavelength(wave)
 
-        if ftcode == "galario":
+        if ftcode in ["galario","native"]:
             if p["docontsub"]:
                 m.run_image(name=visibilities["lam"][j], nphot=1e5, \
                         npix=visibilities["npix"][j], lam=None, \
@@ -291,7 +292,7 @@ def run_flared_model(visibilities, params, parameters, plot=False, ncpus=1, \
 
         extinction = numpy.exp(-tau)
 
-        if ftcode == "galario":
+        if ftcode in ["galario","native"]:
             for i in range(len(m.images[visibilities["lam"][j]].freq)):
                 m.images[visibilities["lam"][j]].image[:,:,i,:] *= extinction[i]
         else:
@@ -308,7 +309,7 @@ def run_flared_model(visibilities, params, parameters, plot=False, ncpus=1, \
         if visibilities["subsample"][j] * visibilities["averaging"][j] > 1 or \
                 visibilities["hanning"][j]:
             # Using regular images.
-            if ftcode == "galario":
+            if ftcode in ["galario","native"]:
                 recombined = numpy.empty((visibilities["npix"][j], \
                         visibilities["npix"][j], visibilities["data"][j].freq.\
                         size*visibilities["averaging"][j],1))
@@ -372,7 +373,8 @@ def run_flared_model(visibilities, params, parameters, plot=False, ncpus=1, \
                 visibilities["data"][j].freq, \
                 m.images[visibilities["lam"][j]], dRA=p["x0"], dDec=p["y0"], \
                 nthreads=ncpus, code=ftcode, nxy=visibilities["npix"][j], \
-                dxy=visibilities["pixelsize"][j])
+                dxy=visibilities["pixelsize"][j], \
+                hermitian=visibilities["data"][j].hermitian)
 
         if plot:
             # If sub-velocity resolution is requested, adjust the frequencies.
@@ -0,0 +1,71 @@
+import hashlib
+import numpy
+
+# The streamline solutions that have already been calculated in this process,
+# keyed by a hash of the grid and the centrifugal radius. Only the most recent
+# few are kept, as a fit will try many different centrifugal radii.
+
+streamlines = {}
+max_streamlines = 16
+
+def streamline_mu0(r, theta, rcent):
+    # Calculate mu0 = cos(theta0), the polar angle that the streamline through
+    # each (r, theta) came from, by solving the cubic
+    #
+    #     mu0**3 - mu0*(1 - r/rcent) - mu*(r/rcent) = 0
+    #
+    # for the whole grid at once. r and rcent need to be in the same units,
+    # and the result has shape (r.size, theta.size, 1) so that it broadcasts
+    # against meshgrid(r, theta, phi, indexing='ij'). The array is shared
+    # between calls, so it is read-only.
+
+    r = numpy.asarray(r, dtype=float)
+    theta = numpy.asarray(theta, dtype=float)
+
+    key = (hashlib.sha1(numpy.array([r.size, theta.size]).tobytes() + \
+            r.tobytes() + theta.tobytes()).hexdigest(), float(rcent))
+
+    if not key in streamlines:
+        x = (r / rcent).reshape((r.size,1))
+        mu = numpy.cos(theta).reshape((1,theta.size))
+
+        # The physical root has the same sign as mu, and is the largest root
+        # of the cubic with |mu|, which has the depressed form
+        # mu0**3 + p*mu0 + q = 0.
+
+        p = x - 1.
+        q = -numpy.abs(mu) * x
+
+        disc = q**2/4 + p**3/27
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            # Outside of rcent there is only one real root (Cardano).
+
+            a = numpy.cbrt(-q/2 + numpy.sqrt(numpy.maximum(disc, 0.)))
+            one_root = numpy.where(a > 0, a - p / (3*a), 0.)
+
+            # Inside of rcent there can be three, and the largest is given by
+            # the trigonometric solution.
+
+            cos3 = numpy.clip(1.5 * q / p * numpy.sqrt(-3. / p), -1., 1.)
+            three_roots = 2*numpy.sqrt(-p/3) * numpy.cos(numpy.arccos(cos3)/3)
+
+        mu0 = numpy.where(disc > 0, one_root, three_roots)
+
+        # Polish with a Newton step, which matters where the roots are close
+        # together.
+
+        deriv = 3*mu0**2 + p
+        good = numpy.abs(deriv) > 1.0e-8
+        mu0[good] -= ((mu0**3 + p*mu0 + q) / numpy.where(good, deriv, 1.))[good]
+
+        mu0 = numpy.clip(mu0, 0., 1.) * numpy.where(mu < 0, -1., 1.)
+        mu0 = mu0.reshape((r.size,theta.size,1))
+        mu0.flags.writeable = False
+
+        if len(streamlines) >= max_streamlines:
+            streamlines.pop(next(iter(streamlines)))
+
+        streamlines[key] = mu0
+
+    return streamlines[key]
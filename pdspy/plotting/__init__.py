@@ -1,10 +1,12 @@
-from .plot_SED import plot_SED
-from .plot_continuum_image import plot_continuum_image
-from .plot_1D_visibilities import plot_1D_visibilities
-from .plot_2D_visibilities import plot_2D_visibilities
-from .plot_scattered_light import plot_scattered_light
-from .plot_channel_maps import plot_channel_maps
-from .plot_pvdiagram import plot_pvdiagram
-from . import colormaps
-from .Transform import Transform
-from .cubeshow import cubeshow
+from ..lazy_import import lazy_import
+
+lazy_import(__name__, {
+        "plot_SED":"plot_SED",
+        "plot_continuum_image":"plot_continuum_image",
+        "plot_1D_visibilities":"plot_1D_visibilities",
+        "plot_2D_visibilities":"plot_2D_visibilities",
+        "plot_scattered_light":"plot_scattered_light",
+        "plot_channel_maps":"plot_channel_maps",
+        "plot_pvdiagram":"plot_pvdiagram",
+        "Transform":"Transform",
+        "cubeshow":"cubeshow"}, submodules=["colormaps"])
@@ -204,7 +204,8 @@ def plot_channel_maps(visibilities, model, parameters, params, index=0, \
                         visibilities["data"][index].freq, \
                         visibilities["data"][index].real.copy(), \
                         visibilities["data"][index].imag.copy(),\
-                        visibilities["data"][index].weights)
+                        visibilities["data"][index].weights, \
+                        hermitian=visibilities["data"][index].hermitian)
 
                 residuals.real -= model.visibilities[visibilities["lam"]\
                         [index]].real
@@ -272,7 +273,8 @@ def plot_channel_maps(visibilities, model, parameters, params, index=0, \
                             visibilities["data"][index].freq, \
                             visibilities["data"][index].real.copy(), \
                             visibilities["data"][index].imag.copy(),\
-                            visibilities["data"][index].weights)
+                            visibilities["data"][index].weights, \
+                            hermitian=visibilities["data"][index].hermitian)
 
                     residuals.real -= model.visibilities[visibilities["lam"]\
                             [index]].real
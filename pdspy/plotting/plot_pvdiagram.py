@@ -193,7 +193,8 @@ def plot_pvdiagram(visibilities, model, parameters, params, index=0, \
                     visibilities["data"][index].freq, \
                     visibilities["data"][index].real.copy(), \
                     visibilities["data"][index].imag.copy(),\
-                    visibilities["data"][index].weights)
+                    visibilities["data"][index].weights, \
+                    hermitian=visibilities["data"][index].hermitian)
 
             residuals.real -= model.visibilities[visibilities["lam"]\
                     [index]].real
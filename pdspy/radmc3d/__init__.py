@@ -1,3 +1,4 @@
 from . import read
 from . import write
 from . import run
+from .session import Session
@@ -10,7 +10,8 @@ cimport cython
 cimport numpy
 
 from os.path import exists
-from numpy import array, empty, linspace, fromfile, loadtxt, intc, hstack
+from numpy import array, empty, linspace, fromfile, loadtxt, intc, hstack, \
+        int64, ascontiguousarray
 import sys
 
 #==========================================================================
@@ -27,6 +28,7 @@ def image(filename=None,ext=None,binary=False):
     cdef unsigned int nx=0
     cdef unsigned int ny=0
     cdef unsigned int nf=0
+    cdef unsigned int npol
     cdef unsigned int index
     cdef numpy.ndarray[ndim=1, dtype=double] data
     sizepix_x=0.e0
@@ -54,7 +56,6 @@ def image(filename=None,ext=None,binary=False):
         return
     else:
         if binary:
-            f = open(filename, "rb")
             data = fromfile(filename)
         else:
             f = open(filename, "r")
@@ -62,7 +63,7 @@ def image(filename=None,ext=None,binary=False):
     # Read the image.
 
     if binary:
-        iformat = int.from_bytes(f.read(8), byteorder="little")
+        iformat, nx, ny, nf = tuple(data[0:4].view(int64))
     else:
         iformat = int(f.readline())
 
@@ -81,9 +82,6 @@ def image(filename=None,ext=None,binary=False):
         stokes = (1 == 1)
 
     if binary:
-        nx = int.from_bytes(f.read(8), byteorder="little")
-        ny = int.from_bytes(f.read(8), byteorder="little")
-        nf = int.from_bytes(f.read(8), byteorder="little")
         sizepix_x, sizepix_y = tuple(data[4:6])
     else:
         nx, ny = tuple(array(f.readline().split(),dtype=int))
@@ -99,37 +97,26 @@ def image(filename=None,ext=None,binary=False):
     
         f.readline()
 
+    # The pixels are stored with x varying fastest, then y, then frequency, so
+    # the whole block can be reshaped at once and re-ordered to (y, x, freq,
+    # stokes).
+
     cdef numpy.ndarray[ndim=4, dtype=double] image
     if stokes:
-        image = empty((ny,nx,nf,4))
+        npol = 4
     else:
-        image = empty((ny,nx,nf,1))
+        npol = 1
 
     if binary:
         index = 6+nf
-        for i in range(nf):
-            for j in range(ny):
-                for k in range(nx):
-                    if stokes:
-                        image[j,k,i,:] = data[index:index+4]
-                        index += 4
-                    else:
-                        image[j,k,i,0] = data[index]
-                        index += 1
+        pixels = data[index:index+nf*ny*nx*npol]
     else:
-        for i in range(nf):
-            for j in range(ny):
-                for k in range(nx):
-                    if stokes:
-                        image[j,k,i,:] = array(f.readline().split(), \
-                                dtype=float)
-                    else:
-                        image[j,k,i,0] = float(f.readline())
+        pixels = loadtxt(f, ndmin=2)
 
-                    if (j == ny-1) and (k == nx-1):
-                        f.readline()
+        f.close()
 
-    f.close()
+    image = ascontiguousarray(pixels.reshape((nf,ny,nx,npol)).\
+            transpose((1,2,0,3)))
 
     # Compute the flux in this image as seen at 1 pc.
 
@@ -175,6 +162,7 @@ def circimage(filename=None,ext=None,binary=False):
     cdef unsigned int nx=0
     cdef unsigned int ny=0
     cdef unsigned int nf=0
+    cdef unsigned int npol
     cdef unsigned int index
     cdef numpy.ndarray[ndim=1, dtype=double] data
     sizepix_x=0.e0
@@ -202,7 +190,6 @@ def circimage(filename=None,ext=None,binary=False):
         return
     else:
         if binary:
-            f = open(filename, "rb")
             data = fromfile(filename)
         else:
             f = open(filename, "r")
@@ -286,36 +273,24 @@ def circimage(filename=None,ext=None,binary=False):
     
         f.readline()
 
+    # As for rectangular images, reshape the whole block of pixels at once,
+    # here into (phi, r, freq, stokes).
+
     cdef numpy.ndarray[ndim=4, dtype=double] image
     if stokes:
-        image = empty((nphi,nr+1,nf,4))
+        npol = 4
     else:
-        image = empty((nphi,nr+1,nf,1))
+        npol = 1
 
     if binary:
-        for i in range(nf):
-            for j in range(nphi):
-                for k in range(nr+1):
-                    if stokes:
-                        image[j,k,i,:] = data[index:index+4]
-                        index += 4
-                    else:
-                        image[j,k,i,0] = data[index]
-                        index += 1
+        pixels = data[index:index+nf*nphi*(nr+1)*npol]
     else:
-        for i in range(nf):
-            for j in range(nphi):
-                for k in range(nr+1):
-                    if stokes:
-                        image[j,k,i,:] = array(f.readline().split(), \
-                                dtype=float)
-                    else:
-                        image[j,k,i,0] = float(f.readline())
+        pixels = loadtxt(f, ndmin=2)
 
-                    if (j == nphi-1) and (k == nr+1-1):
-                        f.readline()
+        f.close()
 
-    f.close()
+    image = ascontiguousarray(pixels.reshape((nf,nphi,nr+1,npol)).\
+            transpose((1,2,0,3)))
 
     # Compute the flux in this image as seen at 1 pc.
 
@@ -415,18 +390,13 @@ def dust_density(filename=None, ext=None):
     ncells = int(f.readline())
     nspecies = int(f.readline())
 
-    temperature = []
-    for i in range(nspecies):
-        temp = empty((ncells,))
-
-        for j in range(ncells):
-            temp[j] = float(f.readline())
-
-        temperature.append(temp)
+    data = loadtxt(f, ndmin=1)
 
     f.close()
 
-    return temperature
+    density = [data[i*ncells:(i+1)*ncells] for i in range(nspecies)]
+
+    return density
 
 # Read in the dust temperature.
 
@@ -444,36 +414,23 @@ def dust_temperature(filename=None, ext=None, binary=False):
             else:
                 filename = "dust_temperature_"+str(ext)+".dat"
 
+    # The header is the format number, the precision, the number of cells 
+    # and the number of species, followed by the temperature of each cell for
+    # each species in turn.
+
     if binary:
-        f = open(filename, "rb")
         data = fromfile(filename)
+        ncells, nspecies = tuple(data[2:4].view(int64))
+        data = data[4:4+nspecies*ncells]
     else:
         f = open(filename,"r")
-
-    if binary:
-        int.from_bytes(f.read(8), byteorder="little")
-        int.from_bytes(f.read(8), byteorder="little")
-        ncells = int.from_bytes(f.read(8), byteorder="little")
-        nspecies = int.from_bytes(f.read(8), byteorder="little")
-    else:
         f.readline()
         ncells = int(f.readline())
         nspecies = int(f.readline())
+        data = loadtxt(f, ndmin=1)
+        f.close()
 
-    temperature = []
-    index = 3
-    for i in range(nspecies):
-        temp = empty((ncells,))
-
-        for j in range(ncells):
-            if binary:
-                temp[j] = data[index+j]
-            else:
-                temp[j] = float(f.readline())
-
-        temperature.append(temp)
-
-    f.close()
+    temperature = [data[i*ncells:(i+1)*ncells] for i in range(nspecies)]
 
     return temperature
 
@@ -499,15 +456,10 @@ def scattering_phase(filename=None, binary=False):
 
     freq = array(f.readline().split(), dtype=float)
 
-    scattering_phase = []
-    for i in range(nfreq):
-        temp = empty((ncells,))
-
-        for j in range(ncells):
-            temp[j] = float(f.readline())
-
-        scattering_phase.append(temp)
+    data = loadtxt(f, ndmin=1)
 
     f.close()
 
+    scattering_phase = [data[i*ncells:(i+1)*ncells] for i in range(nfreq)]
+
     return freq, scattering_phase
@@ -73,12 +73,9 @@ def sed(nrrefine=None, fluxcons=None, norefine=None, nofluxcons=None, \
         noapert=None, nphot_scat=None, inclstar=None, nostar=None, \
         inclline=None, noline=None, incldust=None, nodust=None, \
         inclfreefree=None, nofreefree=None, inclgascont=None, nogascont=None, \
-        loadlambda=None, verbose=True, nice=None):
+        loadlambda=None, verbose=True, nice=None, session=None):
 
-    if nice != None:
-        command="nice -{0:d} radmc3d spectrum ".format(nice)
-    else:
-        command="radmc3d spectrum "
+    command="spectrum "
 
     if (nrrefine != None):
         command += "nrrefine {0:i} ".format(nrrefine)
@@ -149,10 +146,7 @@ def sed(nrrefine=None, fluxcons=None, norefine=None, nofluxcons=None, \
     if (loadlambda == True):
         command += "loadlambda "
 
-    if not verbose:
-        command += " > radmc3d.out"
-
-    system(command)
+    _execute(command, verbose=verbose, nice=nice, session=session)
 
 def image(lam=None, npix=None, npixx=None, npixy=None, nrrefine=None, \
         fluxcons=None, norefine=None, nofluxcons=None, noscat=None, \
@@ -166,12 +160,9 @@ def image(lam=None, npix=None, npixx=None, npixy=None, nrrefine=None, \
         inclfreefree=None, nofreefree=None, inclgascont=None, nogascont=None, \
         widthkms=None, vkms=None, linenlam=None, iline=None, imolspec=None, \
         doppcatch=None, verbose=True, nice=None, unstructured=False, \
-        circ=False):
+        circ=False, session=None):
 
-    if nice != None:
-        command="nice -{0:d} radmc3d image ".format(nice)
-    else:
-        command="radmc3d image "
+    command="image "
 
     if (circ):
         command += "circ "
@@ -283,6 +274,22 @@ def image(lam=None, npix=None, npixx=None, npixy=None, nrrefine=None, \
     if unstructured:
         command += "diag_subpix "
 
+    _execute(command, verbose=verbose, nice=nice, session=session)
+
+def _execute(command, verbose=True, nice=None, session=None):
+
+    # If a RADMC-3D child process is running, hand the command to it rather
+    # than starting a new RADMC-3D that has to re-read the model from disk.
+
+    if session != None:
+        session.send(command)
+        return
+
+    if nice != None:
+        command = "nice -{0:d} radmc3d ".format(nice) + command
+    else:
+        command = "radmc3d " + command
+
     if not verbose:
         command += " > radmc3d.out"
 
@@ -0,0 +1,164 @@
+from numpy import array, linspace, loadtxt
+
+import sys
+if sys.version_info.major > 2:
+    from subprocess import Popen, PIPE, TimeoutExpired
+else:
+    from subprocess32 import Popen, PIPE, TimeoutExpired
+
+class Session:
+    r"""
+    A RADMC-3D process running in `child` mode. The model is read in from
+    disk once, the first time it is needed, and then kept in memory so that
+    successive images and spectra can be requested over pipes without
+    RADMC-3D having to reload the grid, densities, temperatures and
+    opacities for each one.
+
+    Args:
+        :attr:`nice` (`int`, optional):
+            If not `None`, run RADMC-3D with this niceness. Default: `None`
+        :attr:`verbose` (`bool`, optional):
+            Should RADMC-3D's error output be printed to the screen, or
+            written to radmc3d.out. Default: `True`
+    """
+
+    def __init__(self, nice=None, verbose=True):
+        if nice != None:
+            command = "nice -{0:d} radmc3d child".format(nice)
+        else:
+            command = "radmc3d child"
+
+        if verbose:
+            self.log = None
+        else:
+            self.log = open("radmc3d.out","w")
+
+        self.process = Popen(command.split(" "), stdin=PIPE, stdout=PIPE, \
+                stderr=self.log, universal_newlines=True, bufsize=1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def alive(self):
+        r"""
+        Whether the RADMC-3D child process is still running.
+        """
+        return self.process.poll() == None
+
+    def send(self, command):
+        r"""
+        Send a command to RADMC-3D. The command uses the same syntax as the
+        RADMC-3D command line, e.g. "image npix 256 incl 45", and RADMC-3D
+        will carry it out before accepting the next command.
+
+        Args:
+            :attr:`command` (`str`):
+                The command to send.
+        """
+        if not self.alive:
+            raise RuntimeError("The RADMC-3D child process is not running.")
+
+        # In child mode RADMC-3D reads one command line argument per line,
+        # and waits for "enter" before it starts working.
+
+        self.process.stdin.write("\n".join(command.split()+["enter"])+"\n")
+        self.process.stdin.flush()
+
+    def image(self):
+        r"""
+        Retrieve the most recently computed image from RADMC-3D.
+
+        Returns:
+            :attr:`image` (`numpy.ndarray`), :attr:`x` (`numpy.ndarray`),
+            :attr:`y` (`numpy.ndarray`), :attr:`lam` (`numpy.ndarray`), in the
+            same form as :code:`pdspy.radmc3d.read.image`.
+        """
+        self.process.stdin.write("writeimage\n")
+        self.process.stdin.flush()
+
+        stokes = self._read_format() in [3,4]
+
+        nx, ny = tuple(array(self._read_lines(1)[0].split(), dtype=int))
+        nf = int(self._read_lines(1)[0])
+        sizepix_x, sizepix_y = tuple(array(self._read_lines(1)[0].split(), \
+                dtype=float))
+
+        lam = loadtxt(self._read_lines(nf), ndmin=1)
+
+        npol = 4 if stokes else 1
+
+        data = loadtxt(self._read_lines(nf*ny*nx), ndmin=2)
+
+        image = data.reshape((nf,ny,nx,npol)).transpose((1,2,0,3)).copy()
+
+        x = linspace(-(nx-1)/2.,(nx-1)/2.,nx)*sizepix_x
+        y = linspace(-(ny-1)/2.,(ny-1)/2.,ny)*sizepix_y
+
+        return image, x, y, lam
+
+    def spectrum(self):
+        r"""
+        Retrieve the most recently computed spectrum from RADMC-3D.
+
+        Returns:
+            :attr:`spectrum` (`numpy.ndarray`), :attr:`lam`
+            (`numpy.ndarray`), in the same form as
+            :code:`pdspy.radmc3d.read.spectrum`.
+        """
+        self.process.stdin.write("writespectrum\n")
+        self.process.stdin.flush()
+
+        self._read_format()
+
+        nf = int(self._read_lines(1)[0])
+
+        data = loadtxt(self._read_lines(nf), ndmin=2)
+
+        return data[:,1].copy(), data[:,0].copy()
+
+    def close(self, timeout=60):
+        r"""
+        Tell RADMC-3D to quit, and wait for it to do so.
+
+        Args:
+            :attr:`timeout` (`float`, optional):
+                How long to wait, in seconds, before killing the process.
+                Default: `60`
+        """
+        if self.alive:
+            try:
+                self.process.stdin.write("quit\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=timeout)
+            except (OSError, TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+
+        if self.log != None:
+            self.log.close()
+            self.log = None
+
+    def _read_format(self):
+        # Skip over anything that isn't the format number that starts every
+        # RADMC-3D output file.
+
+        while True:
+            line = self._read_lines(1)[0].strip()
+            if line.isdigit():
+                return int(line)
+
+    def _read_lines(self, n):
+        lines = []
+        while len(lines) < n:
+            line = self.process.stdout.readline()
+            if line == "":
+                raise RuntimeError("The RADMC-3D child process exited "
+                        "unexpectedly.")
+            if line.strip() != "":
+                lines.append(line)
+
+        return lines
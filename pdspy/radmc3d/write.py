@@ -1,3 +1,5 @@
+import numpy
+
 def control(incl_dust=None, incl_lines=None, incl_freefree=None, \
         nphot_therm=None, nphot_scat=None, nphot_spec=None, iseed=None, \
         ifast=None, enthres=None, itempdecoup=None, istar_sphere=None, \
@@ -232,18 +234,15 @@ def amr_grid(x, y, z, gridstyle="regular", coordsystem="cartesian"):
     elif (gridstyle == "amr"):
         print("Layer-style AMR grids not yet implemented.")
 
-    for i in range(nx+1):
-        f.write("{0:12.9e}\n".format(x[i]))
-    for i in range(ny+1):
-        f.write("{0:12.9e}\n".format(y[i]))
-    for i in range(nz+1):
-        f.write("{0:12.9e}\n".format(z[i]))
+    _write_values(f, x, "%12.9e")
+    _write_values(f, y, "%12.9e")
+    _write_values(f, z, "%12.9e")
 
     # Insert extra info for octtree and amr grids here...
 
     f.close()
 
-def dust_density(density, gridstyle="normal"):
+def dust_density(density, gridstyle="normal", binary=False):
 
     nspecies = len(density)
 
@@ -251,21 +250,22 @@ def dust_density(density, gridstyle="normal"):
         nx, ny, nz = density[0].shape
         ncells = nx*ny*nz
 
-    f = open("dust_density.inp","w")
-    f.write("1\n")
-    f.write("{0:d}\n".format(ncells))
-    f.write("{0:d}\n".format(nspecies))
+    if binary:
+        f = open("dust_density.binp","wb")
+        _write_header(f, [ncells, nspecies])
+    else:
+        f = open("dust_density.inp","w")
+        f.write("1\n")
+        f.write("{0:d}\n".format(ncells))
+        f.write("{0:d}\n".format(nspecies))
 
     for ispec in range(nspecies):
         if (gridstyle == "normal"):
-            for iz in range(nz):
-                for iy in range(ny):
-                    for ix in range(nx):
-                        f.write("{0:e}\n".format(density[ispec][ix,iy,iz]))
+            _write_field(f, density[ispec], "%e", binary=binary)
 
     f.close()
 
-def dust_temperature(temperature, gridstyle="normal"):
+def dust_temperature(temperature, gridstyle="normal", binary=False):
 
     nspecies = len(temperature)
 
@@ -273,17 +273,18 @@ def dust_temperature(temperature, gridstyle="normal"):
         nx, ny, nz = temperature[0].shape
         ncells = nx*ny*nz
 
-    f = open("dust_temperature.dat","w")
-    f.write("1\n")
-    f.write("{0:d}\n".format(ncells))
-    f.write("{0:d}\n".format(nspecies))
+    if binary:
+        f = open("dust_temperature.bdat","wb")
+        _write_header(f, [ncells, nspecies])
+    else:
+        f = open("dust_temperature.dat","w")
+        f.write("1\n")
+        f.write("{0:d}\n".format(ncells))
+        f.write("{0:d}\n".format(nspecies))
 
     for ispec in range(nspecies):
         if (gridstyle == "normal"):
-            for iz in range(nz):
-                for iy in range(ny):
-                    for ix in range(nx):
-                        f.write("{0:f}\n".format(temperature[ispec][ix,iy,iz]))
+            _write_field(f, temperature[ispec], "%f", binary=binary)
 
     f.close()
 
@@ -410,76 +411,82 @@ def molecule(species, name):
 
     f.close()
 
-def numberdens(n, species, gridstyle="normal"):
+def numberdens(n, species, gridstyle="normal", binary=False):
 
     if (gridstyle == "normal"):
         nx, ny, nz = n.shape
         ncells = nx*ny*nz
 
-    f = open("numberdens_{0:s}.inp".format(species),"w")
-    f.write("1\n")
-    f.write("{0:d}\n".format(ncells))
+    if binary:
+        f = open("numberdens_{0:s}.binp".format(species),"wb")
+        _write_header(f, [ncells])
+    else:
+        f = open("numberdens_{0:s}.inp".format(species),"w")
+        f.write("1\n")
+        f.write("{0:d}\n".format(ncells))
 
     if (gridstyle == "normal"):
-        for iz in range(nz):
-            for iy in range(ny):
-                for ix in range(nx):
-                    f.write("{0:e}\n".format(n[ix,iy,iz]))
+        _write_field(f, n, "%e", binary=binary)
 
     f.close()
 
-def gas_temperature(T, gridstyle="normal"):
+def gas_temperature(T, gridstyle="normal", binary=False):
 
     if (gridstyle == "normal"):
         nx, ny, nz = T.shape
         ncells = nx*ny*nz
 
-    f = open("gas_temperature.inp","w")
-    f.write("1\n")
-    f.write("{0:d}\n".format(ncells))
+    if binary:
+        f = open("gas_temperature.binp","wb")
+        _write_header(f, [ncells])
+    else:
+        f = open("gas_temperature.inp","w")
+        f.write("1\n")
+        f.write("{0:d}\n".format(ncells))
 
     if (gridstyle == "normal"):
-        for iz in range(nz):
-            for iy in range(ny):
-                for ix in range(nx):
-                    f.write("{0:e}\n".format(T[ix,iy,iz]))
+        _write_field(f, T, "%e", binary=binary)
 
     f.close()
 
-def microturbulence(a_turb, gridstyle="normal"):
+def microturbulence(a_turb, gridstyle="normal", binary=False):
 
     if (gridstyle == "normal"):
         nx, ny, nz = a_turb.shape
         ncells = nx*ny*nz
 
-    f = open("microturbulence.inp","w")
-    f.write("1\n")
-    f.write("{0:d}\n".format(ncells))
+    if binary:
+        f = open("microturbulence.binp","wb")
+        _write_header(f, [ncells])
+    else:
+        f = open("microturbulence.inp","w")
+        f.write("1\n")
+        f.write("{0:d}\n".format(ncells))
 
     if (gridstyle == "normal"):
-        for iz in range(nz):
-            for iy in range(ny):
-                for ix in range(nx):
-                    f.write("{0:e}\n".format(a_turb[ix,iy,iz]))
+        _write_field(f, a_turb, "%e", binary=binary)
 
     f.close()
 
-def gas_velocity(v, gridstyle="normal"):
+def gas_velocity(v, gridstyle="normal", binary=False):
 
     if (gridstyle == "normal"):
         nx, ny, nz = v[0].shape
         ncells = nx*ny*nz
 
-    f = open("gas_velocity.inp", "w")
-    f.write("1\n")
-    f.write("{0:d}\n".format(ncells))
+    if binary:
+        f = open("gas_velocity.binp", "wb")
+        _write_header(f, [ncells])
+    else:
+        f = open("gas_velocity.inp", "w")
+        f.write("1\n")
+        f.write("{0:d}\n".format(ncells))
+
+    # Stacking the components first means that, in Fortran order, the three
+    # components of each cell end up next to each other.
 
     if (gridstyle == "normal"):
-        for iz in range(nz):
-            for iy in range(ny):
-                for ix in range(nx):
-                    f.write("{0:e} {1:e} {2:e}\n".format(v[0][ix,iy,iz], \
-                            v[1][ix,iy,iz], v[2][ix,iy,iz]))
+        _write_field(f, [v[0], v[1], v[2]], "%e %e %e", binary=binary)
 
     f.close()
 
@@ -506,3 +513,33 @@ def scattering_phase(scattering_phase, freq, gridstyle="normal"):
                         f.write("{0:e}\n".format(density[ifreq,ix,iy,iz]))
 
     f.close()
+
+def _write_header(f, header):
+
+    # RADMC-3D binary files start with the format number and the number of
+    # bytes per value, followed by the file specific header information, all
+    # as 8 byte integers.
+
+    numpy.array([1, 8]+list(header), dtype=numpy.int64).tofile(f)
+
+def _write_field(f, field, fmt, binary=False):
+
+    # RADMC-3D loops over x fastest and z slowest, which is Fortran order for
+    # our (nx, ny, nz) arrays, so the whole field can be written at once.
+
+    values = numpy.asarray(field, dtype=numpy.float64).ravel(order='F')
+
+    if binary:
+        values.tofile(f)
+    else:
+        _write_values(f, values, fmt)
+
+def _write_values(f, values, fmt):
+
+    # Format all of the values with a single string operation rather than
+    # calling f.write once per value.
+
+    values = numpy.asarray(values, dtype=numpy.float64).ravel()
+    nlines = values.size // fmt.count("%")
+
+    f.write((fmt+"\n")*nlines % tuple(values))
@@ -1,5 +1,6 @@
 from .load_config import load_config
 from .load_data import load_data
+from .likelihood import Likelihood
 from .load_results import load_results
 from .propose_point_emcee import propose_point_emcee
 
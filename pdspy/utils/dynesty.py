@@ -1,4 +1,5 @@
 import pdspy.modeling as modeling
+from .likelihood import Likelihood
 import dynesty.plotting as dyplot
 import matplotlib.pyplot as plt
 import scipy.stats
@@ -11,7 +12,7 @@ import numpy
 def lnlike(p, visibilities, images, spectra, parameters, plot, \
         model="flared", ncpus=1, ncpus_highmass=1, with_hyperion=False, \
         timelimit=3600, source="ObjName", nice=19, verbose=False, \
-        ftcode="galario"):
+        ftcode="galario", likelihood=None, thermal_cache=None, mmap=False):
 
     # Set up the params dictionary.
 
@@ -28,52 +29,25 @@ def lnlike(p, visibilities, images, spectra, parameters, plot, \
         m = modeling.run_disk_model(visibilities, images, spectra, params, \
                 parameters, plot, ncpus=ncpus, ncpus_highmass=ncpus_highmass, \
                 with_hyperion=with_hyperion, timelimit=timelimit, \
-                source=source, nice=nice, verbose=verbose, ftcode=ftcode)
+                source=source, nice=nice, verbose=verbose, ftcode=ftcode, \
+                thermal_cache=thermal_cache, mmap=mmap)
     else:
         m = modeling.run_flared_model(visibilities, params, parameters, plot, \
-                ncpus=ncpus, source=source, nice=nice, ftcode=ftcode)
+                ncpus=ncpus, source=source, nice=nice, ftcode=ftcode, \
+                mmap=mmap)
 
     # Catch whether the model timed out.
 
     if m == 0.:
         return -numpy.inf
 
-    # A list to put all of the chisq into.
+    # Calculate the log-likelihood. If a Likelihood wasn't made ahead of time,
+    # make one now.
 
-    chisq = []
+    if likelihood == None:
+        likelihood = Likelihood(visibilities, images, spectra)
 
-    # Calculate the chisq for the visibilities.
-
-    for j in range(len(visibilities["file"])):
-        good = visibilities["data"][j].weights > 0
-
-        chisq.append(-0.5*numpy.sum((visibilities["data"][j].real - \
-                m.visibilities[visibilities["lam"][j]].real)**2 * \
-                visibilities["data"][j].weights) - \
-                numpy.sum(numpy.log(visibilities["data"][j].weights[good]/ \
-                (2*numpy.pi))) + \
-                -0.5*numpy.sum((visibilities["data"][j].imag - \
-                m.visibilities[visibilities["lam"][j]].imag)**2 * \
-                visibilities["data"][j].weights) - \
-                numpy.sum(numpy.log(visibilities["data"][j].weights[good]/ \
-                (2*numpy.pi))))
-
-    # Calculate the chisq for all of the images.
-
-    for j in range(len(images["file"])):
-        chisq.append(-0.5 * (numpy.sum((images["data"][j].image - \
-                m.images[images["lam"][j]].image)**2 / \
-                images["data"][j].unc**2)))
-
-    # Calculate the chisq for the SED.
-
-    if "total" in spectra:
-        chisq.append(-0.5 * (numpy.sum((spectra["total"].flux - \
-                m.spectra["SED"].flux)**2 / spectra["total"].unc**2)))
-
-    # Return the sum of the chisq.
-
-    return numpy.array(chisq).sum()
+    return likelihood(m)
 
 # Define a prior function.
 
@@ -0,0 +1,94 @@
+from .. import interferometry as uv
+import numpy
+
+class Likelihood:
+    r"""
+    The log-likelihood of a model given the data, as read in by
+    :code:`utils.load_data`. The parts that depend only on the data, like the
+    normalization of the visibility likelihood, are calculated once when the
+    Likelihood is created, rather than each time a model is evaluated.
+
+    Args:
+        :attr:`visibilities` (`dict`):
+            The visibility data, as returned by :code:`utils.load_data`.
+        :attr:`images` (`dict`):
+            The image data, as returned by :code:`utils.load_data`.
+        :attr:`spectra` (`dict`):
+            The spectra, as returned by :code:`utils.load_data`.
+        :attr:`nthreads` (`int`, optional):
+            The number of threads to use when calculating chi-squared for the
+            visibilities. Default: `1`
+    """
+
+    def __init__(self, visibilities, images, spectra, nthreads=1):
+        self.nthreads = nthreads
+
+        # The visibilities, and the normalization of their likelihood.
+
+        self.visibilities = []
+        for j in range(len(visibilities["file"])):
+            data = visibilities["data"][j]
+
+            lnnorm = -2*numpy.sum(numpy.log(data.weights[data.weights > 0] / \
+                    (2*numpy.pi)))
+
+            # If only half of the uv-plane is stored, the complex conjugates
+            # contribute to the normalization too.
+
+            if data.hermitian:
+                lnnorm *= 2
+
+            self.visibilities.append((visibilities["lam"][j], data, lnnorm))
+
+        # The images, and their inverse variances.
+
+        self.images = []
+        for j in range(len(images["file"])):
+            self.images.append((images["lam"][j], images["data"][j].image, \
+                    1. / images["data"][j].unc**2))
+
+        # The SED, if there is one.
+
+        if "total" in spectra:
+            self.spectrum = (spectra["total"].flux, \
+                    1. / spectra["total"].unc**2)
+        else:
+            self.spectrum = None
+
+    def __call__(self, m):
+        r"""
+        Calculate the log-likelihood of a model.
+
+        Args:
+            :attr:`m` (:class:`pdspy.modeling.Model`):
+                The model, with the synthetic visibilities, images and SED
+                that correspond to the data.
+
+        Returns:
+            :attr:`lnlike` (`float`):
+                The log-likelihood.
+        """
+
+        lnlike = 0.
+
+        # Calculate the chisq for the visibilities.
+
+        for lam, data, lnnorm in self.visibilities:
+            lnlike += -0.5*uv.chisq(data, m.visibilities[lam], \
+                    nthreads=self.nthreads) + lnnorm
+
+        # Calculate the chisq for all of the images.
+
+        for lam, image, inverse_variance in self.images:
+            lnlike += -0.5 * numpy.sum((image - m.images[lam].image)**2 * \
+                    inverse_variance)
+
+        # Calculate the chisq for the SED.
+
+        if self.spectrum != None:
+            flux, inverse_variance = self.spectrum
+
+            lnlike += -0.5 * numpy.sum((flux - m.spectra["SED"].flux)**2 * \
+                    inverse_variance)
+
+        return lnlike
@@ -2,14 +2,23 @@ from setuptools import setup
 from setuptools.extension import Extension
 from Cython.Build import cythonize
 import numpy as np
+import sys
+
+# Use OpenMP for the gridding and Mie routines where the compiler is known to
+# support it; elsewhere the parallel loops simply run on one thread.
+
+if sys.platform.startswith("linux"):
+    openmp_args = ['-fopenmp']
+else:
+    openmp_args = []
 
 # Set up the extension modules.
 
 libinterferometry = cythonize([\
         Extension('pdspy.interferometry.libinterferometry',\
             ["pdspy/interferometry/libinterferometry.pyx"],\
-            libraries=["m"], extra_compile_args=['-ffast-math'], \
-            include_dirs=[np.get_include()], \
+            libraries=["m"], extra_compile_args=['-ffast-math']+openmp_args, \
+            extra_link_args=openmp_args, include_dirs=[np.get_include()], \
             define_macros=[('NPY_NO_DEPRECATED_API', 0)])])[0]
 
 libimaging = cythonize([Extension('pdspy.imaging.libimaging',\
@@ -22,6 +31,11 @@ bhcoat = Extension('pdspy.dust.bhcoat', sources=['pdspy/dust/bhcoat.f90'])
 
 dmilay = Extension('pdspy.dust.dmilay', sources=['pdspy/dust/DMiLay.f90'])
 
+libmie = cythonize([Extension('pdspy.dust.libmie', ["pdspy/dust/libmie.pyx"], \
+        libraries=["m"], extra_compile_args=openmp_args, \
+        extra_link_args=openmp_args, include_dirs=[np.get_include()], \
+        define_macros=[('NPY_NO_DEPRECATED_API', 0)])])[0]
+
 read = cythonize([Extension('pdspy.radmc3d.read', ["pdspy/radmc3d/read.pyx"], \
         libraries=[], extra_compile_args=[], \
         include_dirs=[np.get_include()])])[0]
@@ -59,7 +73,7 @@ setup(name="pdspy", \
         "pdspy.spectroscopy": 'pdspy/spectroscopy', \
         "pdspy.stars": 'pdspy/stars'}, \
         package_data={\
-        'pdspy.dust': ['data/*','reddening/*.dat'], \
+        'pdspy.dust': ['data/*','reddening/*.dat','*.pyx'], \
         'pdspy.imaging': ['*.pyx'], \
         'pdspy.interferometry': ['*.pyx'], \
         'pdspy.gas': ['data/*.dat'], \
@@ -67,11 +81,12 @@ setup(name="pdspy", \
         'pdspy.spectroscopy': ['btsettle_data/*.txt']}, \
         #ext_modules=[libinterferometry, libimaging, bhmie, \
         #bhcoat, dmilay, read], \
-        ext_modules=[libinterferometry, libimaging, read], \
+        ext_modules=[libinterferometry, libimaging, libmie, read], \
         scripts=[\
         'bin/config_template.py',\
         'bin/upgrade_to_pdspy2.py',\
         'bin/generate_surrogate_model.py',\
+        'bin/make_opacity_table.py',\
         'bin/disk_model_emcee3.py',\
         'bin/disk_model_nested.py',\
         'bin/disk_model_dynesty.py',\
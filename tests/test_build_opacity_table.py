@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import pdspy.dust as dust
+import importlib
+import tempfile
+import h5py
+import numpy
+import pytest
+
+Dust = importlib.import_module("pdspy.dust.Dust")
+build_opacity_table = importlib.import_module(\
+        "pdspy.dust.build_opacity_table")
+
+@pytest.mark.parametrize("amax", [None, 0.1])
+def test_build_opacity_table_chunksize(amax, monkeypatch):
+    # Stand in for the Mie calculations, and record the size of each chunk of
+    # grain sizes that is handed out.
+
+    chunks = []
+    def fake_size_opacities_task(args):
+        d, index, a, options = args
+        chunks.append(index.size)
+
+        return index, numpy.ones((a.size, d.lam.size)), \
+                numpy.ones((a.size, d.lam.size))
+
+    monkeypatch.setattr(Dust, "size_opacities_task", fake_size_opacities_task)
+
+    spec = {"species":[{"file":"amorphous_silicates.txt", "format":"henn", \
+            "rho":3.3}], "abundances":[1.]}
+    if amax != None:
+        spec["amax"] = amax
+
+    with tempfile.TemporaryDirectory() as directory:
+        dust.build_opacity_table(spec, directory+"/table.hdf5", chunksize=7)
+
+    assert len(chunks) > 1
+    assert max(chunks) == 7
+    assert chunks[-1] <= 7
+
+def test_checkpoint_composition(monkeypatch):
+    # A checkpoint can only be resumed with dust of the same composition.
+
+    def fake_size_opacities_task(args):
+        d, index, a, options = args
+
+        return index, numpy.ones((a.size, d.lam.size)), \
+                numpy.ones((a.size, d.lam.size))
+
+    monkeypatch.setattr(Dust, "size_opacities_task", fake_size_opacities_task)
+
+    species = [{"file":"amorphous_silicates_extrapolated.txt", \
+            "format":"henn", "rho":3.3}, \
+            {"file":"amorphous_carbon_zubko1996_extrapolated.txt", \
+            "format":"henn", "rho":1.8}]
+
+    lam = build_opacity_table.read_species(species[0]).lam
+    species = [build_opacity_table.read_species(s, lam) for s in species]
+
+    a = numpy.logspace(-5., -3., 20)
+
+    with tempfile.TemporaryDirectory() as directory:
+        checkpoint = directory+"/checkpoint.hdf5"
+
+        d = dust.mix_dust(species, [0.7, 0.3])
+        d.calculate_size_opacities(a, checkpoint=checkpoint)
+
+        # The same composition resumes, a different one doesn't.
+
+        d = dust.mix_dust(species, [0.7, 0.3])
+        d.calculate_size_opacities(a, checkpoint=checkpoint)
+
+        for abundances, rule in [([0.6, 0.4], "Bruggeman"), \
+                ([0.7, 0.3], "MaxGarn")]:
+            d = dust.mix_dust(species, abundances, rule=rule)
+
+            with pytest.raises(ValueError):
+                d.calculate_size_opacities(a, checkpoint=checkpoint)
+
+def test_resume(monkeypatch):
+    # Pre-fill part of a checkpoint, as though an earlier build had been
+    # interrupted, and check that only the missing sizes are calculated and
+    # that the result is the same as an uninterrupted build.
+
+    def fake_opacities(a, lam):
+        return numpy.outer(a, 1./lam), numpy.outer(a**2, 1./lam**2)
+
+    handed_out = []
+    def fake_size_opacities_task(args):
+        d, index, a, options = args
+        handed_out.append(index)
+
+        return (index,) + fake_opacities(a, d.lam)
+
+    def failing_size_opacities_task(args):
+        raise RuntimeError("Interrupted.")
+
+    spec = {"species":[{"file":"amorphous_silicates.txt", "format":"henn", \
+            "rho":3.3}], "abundances":[1.]}
+
+    with tempfile.TemporaryDirectory() as directory:
+        monkeypatch.setattr(Dust, "size_opacities_task", \
+                fake_size_opacities_task)
+
+        expected = dust.build_opacity_table(spec, directory+"/expected.hdf5", \
+                chunksize=7)
+
+        # Set up the checkpoint, without finishing any sizes.
+
+        filename = directory+"/table.hdf5"
+
+        monkeypatch.setattr(Dust, "size_opacities_task", \
+                failing_size_opacities_task)
+
+        with pytest.raises(RuntimeError):
+            dust.build_opacity_table(spec, filename, chunksize=7)
+
+        numpy.random.seed(4)
+
+        with h5py.File(filename, "a") as f:
+            group = f["size_opacities"]
+
+            a, lam = group["a"][...], group["lam"][...]
+            done = numpy.random.uniform(size=a.size) < 0.6
+            kabs, ksca = fake_opacities(a[done], lam)
+
+            group["done"][done] = True
+            group["kabs"][done,:] = kabs
+            group["ksca"][done,:] = ksca
+
+        monkeypatch.setattr(Dust, "size_opacities_task", \
+                fake_size_opacities_task)
+        handed_out.clear()
+
+        table = dust.build_opacity_table(spec, filename, chunksize=7)
+
+    assert numpy.array_equal(numpy.sort(numpy.concatenate(handed_out)), \
+            numpy.where(numpy.logical_not(done))[0])
+
+    assert numpy.array_equal(table.kabs, expected.kabs)
+    assert numpy.array_equal(table.ksca, expected.ksca)
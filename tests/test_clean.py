@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+from astropy.stats import mad_std
+from scipy.signal import fftconvolve
+import importlib
+import numpy
+import pytest
+
+clean = importlib.import_module("pdspy.interferometry.clean")
+
+def make_beams(n=32):
+    # A dirty beam, twice the size of the image as invert makes it, with a
+    # Gaussian main lobe and a ring of sidelobes, and the matching clean beam.
+
+    cy, cx = clean.beam_center(numpy.zeros((2*n, 2*n)))
+    y, x = numpy.meshgrid(numpy.arange(2*n) - cy, numpy.arange(2*n) - cx, \
+            indexing="ij")
+    r = numpy.sqrt(x**2 + y**2)
+
+    clean_beam = numpy.exp(-r**2 / (2*1.5**2))
+    dirty_beam = clean_beam + 0.1*numpy.cos(2*numpy.pi*r/6.) * \
+            numpy.exp(-r**2 / (2*10.**2))
+    dirty_beam /= dirty_beam[cy,cx]
+
+    return dirty_beam, clean_beam
+
+def shifted_beam(dirty_beam, y0, x0, n):
+    # The dirty beam, centered on pixel (y0, x0) of an n x n image.
+
+    cy, cx = clean.beam_center(dirty_beam)
+
+    return dirty_beam[cy-y0:cy-y0+n,cx-x0:cx-x0+n]
+
+def make_dirty(dirty_beam, n=32, sources=[(10,12,1.),(20,7,0.5),(16,25,0.3)]):
+    numpy.random.seed(0)
+
+    dirty = numpy.random.normal(0., 0.01, (n, n))
+    for y0, x0, flux in sources:
+        dirty += flux*shifted_beam(dirty_beam, y0, x0, n)
+
+    return dirty
+
+def reference_hogbom(dirty, dirty_beam, clean_beam, gain=0.1, maxiter=1000, \
+        nsigma=5.):
+    # The original Hogbom loop, with the noise re-estimated at every
+    # iteration, but with the beam subtracted by a convolution with the
+    # beam centered on its central pixel.
+
+    dirty = dirty.copy()
+    model = numpy.zeros(dirty.shape)
+    kernel = clean.centered_kernel(dirty_beam)
+
+    sidelobe = (dirty_beam - clean_beam).max()
+    threshold = max(sidelobe * dirty.max(), 5.*mad_std(dirty))
+    mask = dirty > threshold
+
+    n = 0
+    stop = False
+    while n < maxiter and not stop:
+        if (dirty*mask).max() < threshold:
+            threshold = max(sidelobe * dirty.max(), 5.*mad_std(dirty))
+            mask = numpy.logical_or(mask, dirty > threshold)
+
+        y0, x0 = numpy.unravel_index((dirty*mask).argmax(), dirty.shape)
+
+        subtract = numpy.zeros(dirty.shape)
+        subtract[y0,x0] = dirty[y0,x0]*gain
+        model[y0,x0] += dirty[y0,x0]*gain
+
+        dirty -= fftconvolve(subtract, kernel, mode='same')
+
+        stop = (dirty*mask).max() < nsigma * mad_std(dirty)
+
+        n = n + 1
+
+    return model, dirty
+
+def test_hogbom_matches_reference():
+    dirty_beam, clean_beam = make_beams()
+    dirty = make_dirty(dirty_beam)
+
+    ref_model, ref_dirty = reference_hogbom(dirty, dirty_beam, clean_beam)
+
+    model, residuals, mask = clean.clean_channel(dirty, dirty_beam, \
+            clean_beam, algorithm="hogbom", cycle_niter=1)
+
+    assert numpy.allclose(model, ref_model, rtol=0., atol=1.0e-11)
+    assert numpy.allclose(residuals, ref_dirty, rtol=0., atol=1.0e-11)
+
+    # Re-estimating the noise less often shouldn't change the result much.
+
+    model, residuals, mask = clean.clean_channel(dirty, dirty_beam, \
+            clean_beam, algorithm="hogbom")
+
+    assert numpy.isclose(model.sum(), ref_model.sum(), rtol=0.02)
+
+@pytest.mark.parametrize("algorithm", ["hogbom", "clark"])
+def test_component_position(algorithm):
+    # A single point source should be cleaned at its own pixel, not one pixel
+    # away from it.
+
+    dirty_beam, clean_beam = make_beams()
+    dirty = make_dirty(dirty_beam, sources=[(13,19,1.)])
+
+    model, residuals, mask = clean.clean_channel(dirty, dirty_beam, \
+            clean_beam, algorithm=algorithm)
+
+    assert numpy.unravel_index(model.argmax(), model.shape) == (13,19)
+    assert numpy.isclose(model.sum(), 1., rtol=0.1)
+
+@pytest.mark.parametrize("maxiter", [1, 50, 1000])
+def test_clark_residuals(maxiter):
+    # The residuals from the Clark major cycles should be the dirty image
+    # minus the model convolved with the full beam, with no wrap-around.
+
+    dirty_beam, clean_beam = make_beams()
+    dirty = make_dirty(dirty_beam)
+
+    model, residuals, mask = clean.clean_channel(dirty, dirty_beam, \
+            clean_beam, algorithm="clark", maxiter=maxiter, cycle_niter=20)
+
+    expected = dirty.copy()
+    for y0, x0 in zip(*numpy.nonzero(model)):
+        expected -= model[y0,x0]*shifted_beam(dirty_beam, y0, x0, \
+                dirty.shape[0])
+
+    assert numpy.count_nonzero(model) > 0
+    assert numpy.allclose(residuals, expected, rtol=0., atol=1.0e-10)
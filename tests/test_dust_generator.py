@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import pdspy.dust as dust
+import scipy.interpolate
+import numpy
+
+def test_get_dust_generator_mmap():
+    # A memory-mapped table is loaded separately from one that was read in,
+    # and is never copied in full.
+
+    dust_gen = dust.get_dust_generator("diana_wice.hdf5")
+    mmap_dust_gen = dust.get_dust_generator("diana_wice.hdf5", mmap=True)
+
+    assert mmap_dust_gen is not dust_gen
+    assert mmap_dust_gen is dust.get_dust_generator("diana_wice.hdf5", \
+            mmap=True)
+
+    assert isinstance(mmap_dust_gen.kabs, numpy.memmap)
+    assert isinstance(mmap_dust_gen.ksca, numpy.memmap)
+    assert not "kext" in vars(mmap_dust_gen)
+    assert not "albedo" in vars(mmap_dust_gen)
+
+    # Both give the same opacities.
+
+    amax = numpy.logspace(-3.5, 0.5, 20)
+    p = numpy.linspace(2.6, 4.4, 20)
+
+    kabs, ksca = dust_gen.opacities(amax, p)
+    mmap_kabs, mmap_ksca = mmap_dust_gen.opacities(amax, p)
+
+    assert numpy.all(kabs == mmap_kabs)
+    assert numpy.all(ksca == mmap_ksca)
+
+    d = mmap_dust_gen(1.0e-2, 3.5)
+    assert numpy.allclose(d.kext, d.kabs + d.ksca)
+
+def test_dust_generator_opacities():
+    # The opacities are interpolated linearly in the log of the table.
+
+    dust_gen = dust.get_dust_generator("diana_wice.hdf5")
+
+    amax = numpy.concatenate((numpy.logspace(-3.9, 0.9, 20), \
+            dust_gen.amax[[0,-1]]))
+    p = numpy.concatenate((numpy.linspace(2.5, 4.5, 20), dust_gen.p[[-1,0]]))
+
+    kabs, ksca = dust_gen.opacities(amax, p)
+
+    for table, k in [(dust_gen.kabs, kabs), (dust_gen.ksca, ksca)]:
+        f = scipy.interpolate.RegularGridInterpolator((dust_gen.p, \
+                dust_gen.amax), numpy.log10(table))
+
+        assert numpy.allclose(k, 10.**f(numpy.vstack((p, amax)).T), \
+                rtol=1.0e-12)
+
+def test_dust_generator_cache():
+    # Repeated calls come from the cache, but changing the Dust that is
+    # returned doesn't change the next one.
+
+    dust_gen = dust.get_dust_generator("diana_wice.hdf5")
+    dust_gen.cache.clear()
+
+    d1 = dust_gen(1.0e-2, 3.5)
+    kabs = d1.kabs.copy()
+
+    d1.kabs *= 2.
+    d1.set_density(10.)
+
+    d2 = dust_gen(1.0e-2, 3.5)
+
+    assert len(dust_gen.cache) == 1
+    assert d2 is not d1
+    assert numpy.array_equal(d2.kabs, kabs)
+    assert not hasattr(d2, "rho")
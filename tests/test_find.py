@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import pdspy.imaging as im
+import importlib
+import astropy.wcs
+import numpy
+import scipy.ndimage
+
+find = importlib.import_module("pdspy.imaging.find")
+
+def make_image(npix=128, nsources=10):
+    # A noisy field of point-like and extended sources. The extended ones
+    # have several noise peaks on top of them, which need to be merged.
+
+    numpy.random.seed(1)
+
+    y, x = numpy.mgrid[0:npix,0:npix]
+    image = numpy.random.normal(size=(npix, npix))
+
+    for x0, y0, f, sigma in zip(numpy.random.uniform(15, npix-15, nsources), \
+            numpy.random.uniform(15, npix-15, nsources), \
+            numpy.random.uniform(10, 40, nsources), \
+            numpy.random.choice([1.5, 4.], nsources)):
+        image += f*numpy.exp(-((x-x0)**2 + (y-y0)**2) / (2*sigma**2))
+
+    wcs = astropy.wcs.WCS(naxis=2)
+    wcs.wcs.ctype = ["RA---SIN","DEC--SIN"]
+    wcs.wcs.cdelt = [-0.1/3600, 0.1/3600]
+    wcs.wcs.crpix = [npix/2, npix/2]
+    wcs.wcs.crval = [70., 25.]
+
+    header = wcs.to_header()
+    header["BMAJ"], header["BMIN"], header["BPA"] = 0.35/3600, 0.35/3600, 0.
+
+    return im.Image(image.reshape((npix,npix,1,1)), \
+            unc=numpy.ones((npix,npix,1,1)), header=header, wcs=wcs)
+
+def merge_peaks(image, threshold=5, include_radius=20):
+    # The peaks that pass the threshold, merged with the original loop over
+    # every pair of peaks.
+
+    base_image = image.image[:,:,0,0]
+
+    neighborhood = scipy.ndimage.generate_binary_structure(2,2)
+
+    detected_peaks = numpy.logical_xor(scipy.ndimage.maximum_filter(\
+            base_image, footprint=neighborhood) == base_image, \
+            scipy.ndimage.binary_erosion(base_image == 0, \
+            structure=neighborhood, border_value=1))
+
+    detected_peaks[base_image < threshold * image.unc[:,:,0,0]] = False
+
+    potential_sources = numpy.column_stack(numpy.nonzero(detected_peaks))
+
+    good = numpy.repeat(True, len(potential_sources))
+    for i in range(len(potential_sources)):
+        for j in range(len(potential_sources)):
+            if (j != i) and good[i] and good[j]:
+                coords = potential_sources[i]
+                coords2 = potential_sources[j]
+
+                d = numpy.sqrt( (coords[0] - coords2[0])**2 + \
+                        (coords[1] - coords2[1])**2 )
+
+                if (d < include_radius) and (d > 0):
+                    inbetween = find.bresenham_line(coords[0],coords[1], \
+                            coords2[0], coords2[1])
+
+                    for k, coords3 in enumerate(inbetween):
+                        if image.image[coords3[0],coords3[1], 0, 0] < 2.0 * \
+                                image.unc[coords3[0], coords3[1], 0 ,0]:
+                            break
+
+                        if k == len(inbetween)-1:
+                            if image.image[coords[0], coords[1], 0, 0] > \
+                                    image.image[coords2[0], coords2[1], 0, 0]:
+                                detected_peaks[coords2[0], coords2[1]] = 0.
+                                good[j] = False
+                            else:
+                                detected_peaks[coords[0], coords[1]] = 0.
+                                good[i] = False
+
+    return potential_sources, numpy.column_stack(numpy.nonzero(\
+            detected_peaks))
+
+def test_merge_peaks():
+    image = make_image()
+
+    unmerged, expected = merge_peaks(image)
+
+    peaks = im.find(image, threshold=5, just_find=True)
+
+    # Make sure that there was something to merge.
+
+    assert len(unmerged) > len(expected) > 0
+    assert numpy.array_equal(peaks, expected)
+
+def test_nprocs():
+    image = make_image()
+
+    serial = im.find(image, threshold=5, bootstrap_unc=False, nprocs=1)
+    parallel = im.find(image, threshold=5, bootstrap_unc=False, nprocs=2)
+
+    assert len(serial) > 0
+    assert len(serial) == len(parallel)
+    for key in ["x", "x_unc", "y", "y_unc", "sigma_x", "sigma_y", "pa", "f", \
+            "Peak_Flux", "Flux", "Flux_unc", "ra", "dec"]:
+        assert numpy.array_equal(numpy.array(serial[key]), \
+                numpy.array(parallel[key])), key
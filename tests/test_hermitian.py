@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import pdspy.interferometry as uv
+import pdspy.utils as utils
+import importlib
+import types
+import numpy
+import pytest
+
+fit_model = importlib.import_module("pdspy.interferometry.fit_model")
+
+def make_data(nuv=2000, nchannels=3):
+    # A dataset that only stores one half of the uv-plane, and a model for it.
+
+    numpy.random.seed(0)
+
+    u = numpy.random.normal(0., 1e5, nuv)
+    v = numpy.random.normal(0., 1e5, nuv)
+    freq = numpy.linspace(230e9, 230.1e9, nchannels)
+
+    real = numpy.random.normal(1., 0.5, (nuv, nchannels))
+    imag = numpy.random.normal(0., 0.5, (nuv, nchannels))
+    weights = numpy.random.uniform(0.5, 2., (nuv, nchannels))
+
+    data = uv.Visibilities(u, v, freq, real, imag, weights, hermitian=True)
+    model = uv.Visibilities(u.copy(), v.copy(), freq.copy(), 0.9*real, \
+            0.8*imag, numpy.ones(weights.shape), hermitian=True)
+
+    return data, model
+
+def assert_same_visibilities(a, b):
+    for attr in ["u", "v", "real", "imag", "weights"]:
+        assert numpy.allclose(getattr(a, attr), getattr(b, attr), \
+                rtol=1.0e-10, atol=1.0e-12), attr
+
+@pytest.mark.parametrize("weighting", ["natural", "uniform", "robust"])
+def test_grid(weighting):
+    data, model = make_data()
+
+    half = uv.grid(data, gridsize=64, binsize=5000., weighting=weighting, \
+            robust=0.5)
+    full = uv.grid(data.add_conjugate(), gridsize=64, binsize=5000., \
+            weighting=weighting, robust=0.5)
+
+    assert_same_visibilities(half, full)
+
+@pytest.mark.parametrize("radial", [False, True])
+def test_average(radial):
+    data, model = make_data()
+
+    half = uv.average(data, gridsize=32, binsize=10000., radial=radial)
+    full = uv.average(data.add_conjugate(), gridsize=32, binsize=10000., \
+            radial=radial)
+
+    assert_same_visibilities(half, full)
+
+def test_chisq():
+    data, model = make_data()
+
+    assert numpy.isclose(uv.chisq(data, model), uv.chisq(\
+            data.add_conjugate(), model.add_conjugate()), rtol=1.0e-12)
+
+def test_likelihood():
+    data, model = make_data()
+
+    lnlike = []
+    for d, m in [(data, model), (data.add_conjugate(), \
+            model.add_conjugate())]:
+        likelihood = utils.Likelihood({"file":["data"], "data":[d], \
+                "lam":["1300"]}, {"file":[]}, {})
+
+        lnlike.append(likelihood(types.SimpleNamespace(visibilities=\
+                {"1300":m})))
+
+    assert numpy.isclose(lnlike[0], lnlike[1], rtol=1.0e-12)
+
+@pytest.mark.parametrize("image_rms", [None, 0.01])
+def test_fit_model(image_rms, monkeypatch):
+    # Record what fit_model hands to the sampler, rather than running it.
+
+    class Stop(Exception):
+        pass
+
+    calls = []
+    def fake_sampler(*args, **kwargs):
+        calls.append(kwargs)
+        raise Stop
+
+    monkeypatch.setattr(fit_model.dynesty, "NestedSampler", fake_sampler)
+
+    data, model = make_data(nchannels=1)
+
+    for d in [data, data.add_conjugate()]:
+        with pytest.raises(Stop):
+            fit_model.fit_model(d, funct="point", xmax=1., ymax=1., \
+                    step_size=0.5, image_rms=image_rms)
+
+    for half, full in zip(calls[0]["logl_args"][0:4], \
+            calls[1]["logl_args"][0:4]):
+        assert numpy.allclose(half, full, rtol=1.0e-12)
+
+    assert numpy.isclose(calls[0]["ptform_args"][-1], \
+            calls[1]["ptform_args"][-1], rtol=1.0e-12)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+from pdspy.constants.astronomy import arcsec
+import pdspy.imaging as im
+import importlib
+import numpy
+import pytest
+
+interpolate_model = importlib.import_module(\
+        "pdspy.interferometry.interpolate_model")
+
+def test_galario_unstructured_without_galario(monkeypatch):
+    # Without galario, code="galario-unstructured" should say what is missing
+    # rather than fail on the missing module.
+
+    monkeypatch.setattr(interpolate_model, "double", None)
+
+    u = numpy.zeros(10)
+    v = numpy.zeros(10)
+
+    with pytest.raises(ImportError, match="galario"):
+        interpolate_model.interpolate_model(u, v, numpy.array([1.0e11]), \
+                None, code="galario-unstructured")
+
+def test_galario_without_galario_uses_degrid(monkeypatch):
+    # Without galario, code="galario" should give the same visibilities as
+    # code="native".
+
+    monkeypatch.setattr(interpolate_model, "double", None)
+
+    numpy.random.seed(0)
+
+    x = (numpy.arange(64) - 32) * 0.05
+    image = numpy.random.uniform(0., 1., (64, 64, 2, 1))
+    model = im.Image(image, x=x, y=x.copy(), freq=numpy.array([2.3e11, \
+            2.3e11]))
+
+    u = numpy.random.uniform(-2.0e5, 2.0e5, 100)
+    v = numpy.random.uniform(-2.0e5, 2.0e5, 100)
+
+    vis = interpolate_model.interpolate_model(u, v, model.freq, model, \
+            code="galario")
+    native = interpolate_model.interpolate_model(u, v, model.freq, model, \
+            code="native")
+
+    assert numpy.all(vis.real == native.real)
+    assert numpy.all(vis.imag == native.imag)
+
+def test_degrid_direct_dft():
+    # degrid should agree with a direct Fourier transform of a small image.
+
+    numpy.random.seed(1)
+
+    nx, ny = 32, 24
+    x = (numpy.arange(nx) - nx//2) * 0.05
+    y = (numpy.arange(ny) - ny//2) * 0.05
+    image = numpy.random.uniform(0., 1., (ny, nx, 2))
+
+    u = numpy.random.uniform(-3.0e5, 3.0e5, 200)
+    v = numpy.random.uniform(-3.0e5, 3.0e5, 200)
+    dRA, dDec = 0.1, -0.05
+
+    vis = interpolate_model.degrid(im.Image(image.reshape((ny,nx,2,1)), \
+            x=x, y=y, freq=numpy.array([2.3e11, 2.3e11])), u, v, dRA=dRA, \
+            dDec=dDec)
+
+    xx, yy = numpy.meshgrid(x + dRA, y + dDec)
+    phase = numpy.exp(-2*numpy.pi*1j*(numpy.outer(u, xx.ravel()) + \
+            numpy.outer(v, yy.ravel()))*arcsec)
+    dft = numpy.dot(phase, image.reshape((nx*ny, 2)))
+
+    assert numpy.abs(vis - dft).max() <= 1.0e-5 * numpy.abs(dft).max()
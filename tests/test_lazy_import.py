@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+import pdspy.interferometry
+import pdspy.modeling
+
+def test_import_star():
+    # "from package import *" should get all of the lazily imported
+    # attributes that can be imported, e.g. not readms without casatools,
+    # and none of the machinery for importing them.
+
+    for package in [pdspy.interferometry, pdspy.modeling]:
+        namespace = {}
+        exec("from {0:s} import *".format(package.__name__), namespace)
+
+        for name in package.lazy_attributes:
+            if hasattr(package, name):
+                assert namespace[name] is getattr(package, name)
+            else:
+                assert not name in namespace
+
+        for name in ["lazy_attributes", "lazy_submodules", "lazy_import"]:
+            assert not name in namespace
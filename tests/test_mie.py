@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+from pdspy.dust.libmie import bhmie, bhcoat, dmilay
+import numpy
+
+def test_bhmie_bohren_huffman():
+    # The example in Appendix A of Bohren & Huffman (1983): a sphere with
+    # radius 0.525 micron and m = 1.55, at a wavelength of 0.6328 micron.
+
+    qext, qsca, gsca = bhmie(2*numpy.pi*0.525/0.6328, 1.55)
+
+    assert numpy.isclose(qext, 3.10543, atol=1.0e-5)
+    assert numpy.isclose(qsca, 3.10543, atol=1.0e-5)
+    assert numpy.isclose(gsca, 0.63314, atol=1.0e-5)
+
+def test_bhmie_rayleigh():
+    # For small spheres, Qabs = 4 x Im(a) and Qsca = 8/3 x^4 |a|^2, with
+    # a = (m^2 - 1) / (m^2 + 2).
+
+    x = numpy.array([1.0e-4, 1.0e-3])
+    m = 1.5 + 0.1j
+    a = (m**2 - 1) / (m**2 + 2)
+
+    qext, qsca, gsca = bhmie(x, m)
+
+    assert numpy.allclose(qext - qsca, 4*x*a.imag, rtol=1.0e-5)
+    assert numpy.allclose(qsca, 8./3*x**4*abs(a)**2, rtol=1.0e-5)
+    assert numpy.all(numpy.abs(gsca) < 1.0e-5)
+
+def test_bhcoat_equal_index():
+    # A coat with the same refractive index as the core is just a bigger
+    # homogeneous sphere.
+
+    x = numpy.array([0.5, 3., 20.])
+    m = 1.7 + 0.3j
+
+    qext, qsca, gsca = bhmie(x, m)
+
+    for core in [1.0e-6, 0.5]:
+        qext_coat, qsca_coat, qback_coat = bhcoat(core*x, x, m, m)
+
+        assert numpy.allclose(qext_coat, qext, rtol=1.0e-6)
+        assert numpy.allclose(qsca_coat, qsca, rtol=1.0e-6)
+
+def test_dmilay_vanishing_core():
+    # With a vanishing core, or a core with the same refractive index as the
+    # shell, DMiLay should agree with BHMIE for the shell. DMiLay uses a
+    # negative imaginary part for the refractive index.
+
+    x = numpy.array([0.5, 3., 20.])
+    m = 1.7 + 0.3j
+
+    qext, qsca, gsca = bhmie(x, m)
+
+    wvno = 2*numpy.pi
+    a = x / wvno
+
+    for rcore, rindco in [(1.0e-6*a, 1.2 - 0.01j), (0.5*a, numpy.conj(m))]:
+        qext_lay, qsca_lay, gqsc_lay = dmilay(rcore, a, wvno, numpy.conj(m), \
+                rindco)
+
+        assert numpy.allclose(qext_lay, qext, rtol=1.0e-6)
+        assert numpy.allclose(qsca_lay, qsca, rtol=1.0e-6)
+        assert numpy.allclose(gqsc_lay, gsca*qsca, rtol=1.0e-6)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import importlib
+import numpy
+
+mix_dust = importlib.import_module("pdspy.dust.mix_dust")
+
+def test_bruggeman_solve_lossless():
+    # For two lossless components the quadratic has two real roots, and the
+    # physical one is positive.
+
+    eps = numpy.array([[2.], [1.]], dtype=complex)
+    fraction = numpy.array([0.5, 0.5])
+
+    eps_eff = mix_dust.bruggeman_solve(eps, fraction)
+
+    assert numpy.allclose(eps_eff, (1.5 + numpy.sqrt(18.25)) / 4)
+    assert numpy.allclose(mix_dust.bruggeman_residual(numpy.sqrt(eps_eff), \
+            eps, fraction.reshape((-1,1))), 0.)
+
+def test_bruggeman_solve_two_components():
+    # The closed form for two components should agree with the iterative
+    # solution, which is used for three or more, for lossy and lossless
+    # components alike.
+
+    eps = numpy.array([[2., 3.+1j, 11.+2j, 1.5+1e-14j], \
+            [1., 1., 2.+0.5j, 1.]])
+    fraction = numpy.array([0.3, 0.7])
+
+    eps_eff = mix_dust.bruggeman_solve(eps, fraction)
+
+    eps_newton = mix_dust.bruggeman_solve(numpy.vstack((eps, eps[0:1])), \
+            numpy.array([0.2, 0.7, 0.1]))
+
+    assert numpy.allclose(eps_eff, eps_newton)
+    assert numpy.all(eps_eff.imag >= 0)
+    assert numpy.all(eps_eff.real > 0)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import pdspy.radmc3d as radmc3d
+import numpy
+import pytest
+
+def make_fields(nspecies=3, shape=(5,4,3)):
+    numpy.random.seed(3)
+
+    return [numpy.random.uniform(10., 300., shape) for i in range(nspecies)]
+
+@pytest.mark.parametrize("nspecies", [1, 3])
+@pytest.mark.parametrize("binary", [False, True])
+def test_dust_temperature(tmp_path, monkeypatch, nspecies, binary):
+    # The fields are written with x varying fastest, so each species should
+    # come back as the Fortran ordered ravel of the array that was written.
+
+    monkeypatch.chdir(tmp_path)
+
+    temperature = make_fields(nspecies)
+
+    radmc3d.write.dust_temperature(temperature, binary=binary)
+
+    data = radmc3d.read.dust_temperature(binary=binary)
+
+    assert len(data) == nspecies
+
+    for ispec in range(nspecies):
+        expected = temperature[ispec].ravel(order='F')
+
+        assert data[ispec].shape == expected.shape
+
+        # The text files only keep 6 decimal places.
+
+        if binary:
+            assert numpy.array_equal(data[ispec], expected)
+        else:
+            assert numpy.allclose(data[ispec], expected, rtol=0., atol=5.0e-7)
+
+def test_dust_temperature_ext(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    temperature = make_fields()
+
+    radmc3d.write.dust_temperature(temperature, binary=True)
+    (tmp_path / "dust_temperature.bdat").rename(tmp_path / \
+            "dust_temperature_1.bdat")
+
+    data = radmc3d.read.dust_temperature(ext=1, binary=True)
+
+    for ispec in range(len(temperature)):
+        assert numpy.array_equal(data[ispec], temperature[ispec].\
+                ravel(order='F'))
+
+@pytest.mark.parametrize("nspecies", [1, 3])
+def test_dust_density(tmp_path, monkeypatch, nspecies):
+    monkeypatch.chdir(tmp_path)
+
+    density = [1.0e-15*field for field in make_fields(nspecies)]
+
+    radmc3d.write.dust_density(density)
+
+    data = radmc3d.read.dust_density()
+
+    assert len(data) == nspecies
+
+    for ispec in range(nspecies):
+        assert numpy.allclose(data[ispec], density[ispec].ravel(order='F'), \
+                rtol=1.0e-6, atol=0.)
+
+def test_binary_header(tmp_path, monkeypatch):
+    # The binary files start with the format number, the number of bytes per
+    # value, the number of cells and the number of species.
+
+    monkeypatch.chdir(tmp_path)
+
+    temperature = make_fields(2)
+
+    radmc3d.write.dust_temperature(temperature, binary=True)
+
+    header = numpy.fromfile("dust_temperature.bdat", dtype=numpy.int64, \
+            count=4)
+
+    assert list(header) == [1, 8, temperature[0].size, 2]
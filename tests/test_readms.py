@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+
+import pdspy.interferometry as uv
+from pdspy.constants.physics import c
+import astropy.table
+import importlib
+import types
+import numpy
+import pytest
+import sys
+
+# An in-memory stand-in for the parts of casatools.table and casatools.ms
+# that readms uses. Each fake Measurement Set is a list of spectral windows,
+# one per DATA_DESC_ID, with the columns for the rows of that window.
+
+measurement_sets = {}
+
+class FakeTable:
+    def open(self, name):
+        self.name = name
+
+    def close(self):
+        pass
+
+    def windows(self):
+        return measurement_sets[self.name.split("/")[0]]
+
+    def getcol(self, column):
+        if column == "DATA_DESC_ID":
+            return numpy.concatenate([numpy.repeat(i, window["time"].size) \
+                    for i, window in enumerate(self.windows())])
+        elif column == "SPECTRAL_WINDOW_ID":
+            return numpy.arange(len(self.windows()))
+
+    def getcell(self, column, row):
+        return self.windows()[row][column.lower()]
+
+class FakeMS:
+    def open(self, name):
+        self.windows = measurement_sets[name]
+        self.reset()
+
+    def close(self):
+        pass
+
+    def reset(self):
+        self.window = None
+        self.maxrows = None
+
+    def selectinit(self, datadescid):
+        self.window = self.windows[datadescid]
+
+    def selectpolarization(self, corr):
+        pass
+
+    def iterinit(self, maxrows):
+        self.maxrows = maxrows
+
+    def iterorigin(self):
+        self.start = 0
+
+    def iternext(self):
+        self.start += self.maxrows
+
+        return self.start < self.window["time"].size
+
+    def iterend(self):
+        self.maxrows = None
+
+    def getdata(self, items):
+        if self.maxrows == None:
+            rows = slice(None)
+        else:
+            rows = slice(self.start, self.start + self.maxrows)
+
+        data = {}
+        for item in items:
+            if item == "axis_info":
+                data[item] = {"freq_axis":{\
+                        "chan_freq":self.window["chan_freq"][:,numpy.newaxis],\
+                        "resolution":self.window["resolution"]\
+                        [:,numpy.newaxis]}}
+            else:
+                data[item] = self.window[item][...,rows]
+
+        return data
+
+fake_casatools = types.ModuleType("casatools")
+fake_casatools.table = FakeTable
+fake_casatools.ms = FakeMS
+
+@pytest.fixture
+def readms(monkeypatch):
+    monkeypatch.setitem(sys.modules, "casatools", fake_casatools)
+
+    module = importlib.import_module("pdspy.interferometry.readms")
+    monkeypatch.setattr(module, "casatools", fake_casatools)
+
+    yield module.readms
+
+    measurement_sets.clear()
+
+def make_ms(name, nspw=2, jitter=0., gaps=False, nant=5, ntime=6, nchan=4):
+    # Each window sees every baseline, including the autocorrelations, at
+    # each integration, unless gaps is set, in which case rows are randomly
+    # missing from each window as though they were flagged. With jitter, the
+    # times of the integrations differ a little between windows.
+
+    numpy.random.seed(0)
+
+    a1, a2 = numpy.triu_indices(nant)
+
+    windows = []
+    for w in range(nspw):
+        times = 4.8e9 + 10.*numpy.arange(ntime) + \
+                jitter*numpy.random.uniform(-1., 1., ntime)
+
+        t = numpy.repeat(numpy.arange(ntime), a1.size)
+        antenna1 = numpy.tile(a1, ntime)
+        antenna2 = numpy.tile(a2, ntime)
+
+        if gaps:
+            keep = numpy.random.uniform(size=t.size) > 0.15
+            t, antenna1, antenna2 = t[keep], antenna1[keep], antenna2[keep]
+
+        nrows = t.size
+
+        u = (antenna2 - antenna1) * (10. + t)
+        v = (antenna2 - antenna1) * (3. + antenna1 - 0.5*t)
+
+        window = {"antenna1":antenna1, "antenna2":antenna2, "time":times[t], \
+                "u":u, "v":v, "uvdist":numpy.sqrt(u**2 + v**2), \
+                "chan_freq":230.0e9 + 2.0e9*w + 1.0e6*numpy.arange(nchan), \
+                "resolution":numpy.repeat(1.0e6, nchan), \
+                "weight":numpy.random.uniform(0.5, 2., (2, nrows)), \
+                "flag":numpy.random.uniform(size=(2, nchan, nrows)) < 0.05}
+
+        for prefix in ["", "corrected_"]:
+            for key in ["real", "imaginary"]:
+                window[prefix+key] = numpy.random.normal(size=(2,nchan,nrows))
+
+        windows.append(window)
+
+    measurement_sets[name] = windows
+
+def join_readms(filename, time_tolerance=0.):
+    # The original reader, which read each spectral window in one go and
+    # merged them with astropy.table.join. All of the windows in make_ms are
+    # distinct, and the data column is always the corrected one.
+
+    ms = FakeMS()
+    ms.open(filename)
+
+    data = []
+    for i in range(len(measurement_sets[filename])):
+        ms.selectinit(datadescid=i)
+        data.append(ms.getdata(items=["u","v","corrected_real",\
+                "corrected_imaginary","weight","flag","axis_info","uvdist",\
+                "antenna1","antenna2","time"]))
+        ms.reset()
+
+    for i in range(len(data)):
+        new_freq = data[i]["axis_info"]["freq_axis"]["chan_freq"]
+
+        new_weights = ((data[i]["flag"] == False) * data[i]["weight"].\
+                reshape((data[i]["weight"].shape[0],1,\
+                data[i]["weight"].shape[1])))
+
+        new_real = (data[i]["corrected_real"] * new_weights).sum(axis=0)
+        new_imag = (data[i]["corrected_imaginary"] * new_weights).sum(axis=0)
+        new_weights = new_weights.sum(axis=0)
+
+        new_real[new_weights != 0] /= new_weights[new_weights != 0]
+        new_imag[new_weights != 0] /= new_weights[new_weights != 0]
+
+        good = data[i]["uvdist"] != 0
+
+        columns = [data[i]["antenna1"][good], data[i]["antenna2"][good], \
+                data[i]["time"][good], data[i]["u"][good], \
+                data[i]["v"][good], new_real.T[good,:], new_imag.T[good,:], \
+                new_weights.T[good,:], data[i]["uvdist"][good]]
+        names = ["antenna1","antenna2","time"]+[string+"_"+str(i) for string \
+                in ['u','v','real','imag','weights','uvdist']]
+
+        if i == 0:
+            freq = new_freq
+            table = astropy.table.Table(columns, names=names)
+        else:
+            freq = numpy.concatenate((freq, new_freq))
+            new_table = astropy.table.Table(columns, names=names)
+
+            if time_tolerance == 0:
+                table = astropy.table.join(table, new_table, \
+                        join_type='outer', keys=["antenna1","antenna2",\
+                        "time"])
+            else:
+                table = astropy.table.join(table, new_table, \
+                        join_type='outer', keys=["antenna1","antenna2",\
+                        "time"], join_funcs={'time':astropy.table.\
+                        join_distance(time_tolerance)})
+
+                table["time"] = numpy.concatenate([\
+                        table['time_1'].data[:,numpy.newaxis], \
+                        table['time_2'].data[:,numpy.newaxis]], axis=1)
+
+                wt = numpy.where(table["time"].data == 0, 0, 1)
+
+                table["time"] = (table["time"].data*wt).sum(axis=1)/\
+                        wt.sum(axis=1)
+
+                table.remove_columns(['time_1','time_2','time_id'])
+
+    for colname in table.colnames:
+        table[colname].fill_value = 0.
+    table = table.filled()
+
+    spws = range(len(data))
+
+    u = numpy.concatenate([table['u_{0:d}'.format(i)].data[:,numpy.newaxis] \
+            for i in spws], axis=1)
+    v = numpy.concatenate([table['v_{0:d}'.format(i)].data[:,numpy.newaxis] \
+            for i in spws], axis=1)
+
+    freq = freq[:,0]
+
+    real = numpy.concatenate([table['real_{0:d}'.format(i)].data for i in \
+            spws], axis=1)
+    imag = numpy.concatenate([table['imag_{0:d}'.format(i)].data for i in \
+            spws], axis=1)
+    weights = numpy.concatenate([table['weights_{0:d}'.format(i)].data for i \
+            in spws], axis=1)
+
+    uwt = numpy.where(numpy.logical_and(u == 0, v == 0), 0, 1)
+    u = (u*uwt).sum(axis=1) / uwt.sum(axis=1)
+    v = (v*uwt).sum(axis=1) / uwt.sum(axis=1)
+
+    scale = 100 * freq.mean() / c
+
+    u = numpy.concatenate((u, -u))*scale
+    v = numpy.concatenate((v, -v))*scale
+    real = numpy.concatenate((real, real))
+    imag = -1*numpy.concatenate((imag, -imag))
+    weights = numpy.concatenate((weights, weights))
+
+    return uv.Visibilities(u, v, freq, real, imag, weights)
+
+def sort_rows(data):
+    # Put the rows in a well defined order, as the joins with a time tolerance
+    # don't necessarily sort the integrations by time.
+
+    order = numpy.lexsort((data.v, data.u))
+
+    return [data.u[order], data.v[order], data.real[order], \
+            data.imag[order], data.weights[order]]
+
+def assert_same_visibilities(a, b):
+    assert numpy.allclose(a.freq, b.freq, rtol=1.0e-14)
+
+    for x, y in zip(sort_rows(a), sort_rows(b)):
+        assert x.shape == y.shape
+        assert numpy.allclose(x, y, rtol=1.0e-12, atol=1.0e-14)
+
+# Without a time tolerance the windows have missing rows, which the merge has
+# to fill with zeros. With one, the times differ between windows instead; the
+# original reader only merged those correctly when no rows were missing.
+
+cases = [(2, 0., 0., True), (3, 0., 0., True), (2, 0.2, 1., False), \
+        (3, 0.2, 1., False)]
+
+@pytest.mark.parametrize("nspw,jitter,time_tolerance,gaps", cases)
+def test_matches_join(readms, nspw, jitter, time_tolerance, gaps):
+    make_ms("fake", nspw=nspw, jitter=jitter, gaps=gaps)
+
+    expected = join_readms("fake", time_tolerance=time_tolerance)
+
+    data = readms("fake", time_tolerance=time_tolerance, conjugate=True)
+
+    assert_same_visibilities(data, expected)
+
+@pytest.mark.parametrize("nspw,jitter,time_tolerance,gaps", cases)
+def test_chunksize(readms, nspw, jitter, time_tolerance, gaps):
+    make_ms("fake", nspw=nspw, jitter=jitter, gaps=gaps)
+
+    expected = readms("fake", time_tolerance=time_tolerance)
+
+    for chunksize in [1, 7, 40]:
+        data = readms("fake", time_tolerance=time_tolerance, \
+                chunksize=chunksize)
+
+        assert data.hermitian
+        for key in ["u", "v", "freq", "real", "imag", "weights"]:
+            assert numpy.array_equal(getattr(data, key), \
+                    getattr(expected, key)), key
+
+def test_output(readms, tmp_path):
+    make_ms("fake", nspw=3, gaps=True)
+
+    expected = readms("fake")
+
+    readms("fake", output=str(tmp_path / "fake.hdf5"))
+
+    data = uv.Visibilities()
+    data.read(str(tmp_path / "fake.hdf5"))
+
+    assert data.hermitian
+    for key in ["u", "v", "freq", "real", "imag", "weights"]:
+        assert numpy.array_equal(getattr(data, key), getattr(expected, key)), \
+                key
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import pdspy.interferometry as uv
+import importlib
+import warnings
+import numpy
+import pytest
+
+interpolate_model = importlib.import_module(\
+        "pdspy.interferometry.interpolate_model")
+rmlimage = importlib.import_module("pdspy.interferometry.rmlimage")
+
+def setup_problem(nuv=200, imsize=16, nfreq=2):
+    numpy.random.seed(0)
+
+    x = (numpy.arange(imsize) - imsize//2) * 0.1
+    u = numpy.random.uniform(-1.0e5, 1.0e5, nuv)
+    v = numpy.random.uniform(-1.0e5, 1.0e5, nuv)
+
+    plan = interpolate_model.degrid_plan(x, x.copy(), u, v)
+
+    image = numpy.random.uniform(0.1, 1., (imsize, imsize, nfreq))
+    vis = numpy.random.normal(size=(nuv, nfreq)) + \
+            1j*numpy.random.normal(size=(nuv, nfreq))
+
+    return plan, image, vis
+
+def test_degrid_adjoint():
+    # degrid_adjoint should be the adjoint of degrid_image for real images,
+    # i.e. <degrid_image(x), y> = <x, degrid_adjoint(y)>.
+
+    plan, image, vis = setup_problem()
+
+    lhs = numpy.sum(numpy.conj(vis) * interpolate_model.degrid_image(image, \
+            plan)).real
+    rhs = numpy.sum(image * interpolate_model.degrid_adjoint(vis, plan))
+
+    assert abs(lhs - rhs) <= 1.0e-12 * abs(lhs)
+
+@pytest.mark.parametrize("entropy,tsv,l1", [(1., 0., 0.), (0., 10., 0.), \
+        (0., 0., 5.), (0., 0., 0.)])
+def test_neg_ln_like_gradient(entropy, tsv, l1):
+    # The gradient should match central finite differences.
+
+    plan, image, vis = setup_problem()
+
+    weights = numpy.random.uniform(0.5, 2., vis.shape)
+    prior = numpy.full(image.shape, 0.5)
+
+    args = (vis, weights, plan, prior)
+    kwargs = {"entropy":entropy, "tsv":tsv, "l1":l1}
+
+    value, grad, chisq = rmlimage.neg_ln_like(image, *args, **kwargs)
+
+    h = 1.0e-6
+    for index in [(0,0,0), (3,7,1), (8,8,0), (15,2,1), (11,15,0)]:
+        step = numpy.zeros(image.shape)
+        step[index] = h
+
+        numerical = (rmlimage.neg_ln_like(image + step, *args, **kwargs)[0] - \
+                rmlimage.neg_ln_like(image - step, *args, **kwargs)[0]) / (2*h)
+
+        assert abs(numerical - grad[index]) <= 1.0e-6 * \
+                max(abs(grad[index]), 1.)
+
+def test_rmlimage_zero_flux():
+    # If the flux on the shortest baselines is zero, the default prior should
+    # still be positive, so that the entropy never divides by zero.
+
+    numpy.random.seed(0)
+
+    nuv = 500
+    u = numpy.random.uniform(-1.0e5, 1.0e5, nuv)
+    v = numpy.random.uniform(-1.0e5, 1.0e5, nuv)
+
+    data = uv.Visibilities(u, v, numpy.array([2.3e11]), \
+            numpy.zeros((nuv,1)), numpy.zeros((nuv,1)), numpy.ones((nuv,1)))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+
+        image = uv.rmlimage(data, imsize=16, pixelsize=0.1, maxiter=5)
+
+    assert numpy.all(numpy.isfinite(image.image))
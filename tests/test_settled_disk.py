@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+import pdspy.dust as dust
+import importlib
+import numpy
+import pytest
+
+SettledDisk = importlib.import_module("pdspy.modeling.SettledDisk")
+
+def settled_disk():
+    # The table doesn't store the grain density, which settling depends on.
+
+    dust_gen = dust.DustGenerator(dust.__path__[0]+"/data/diana_wice.hdf5")
+    dust_gen.rho = 1.675
+
+    return SettledDisk.SettledDisk(mass=1.0e-3, rmin=0.1, rmax=50., \
+            plrho=1., h0=0.1, plh=1.1, dust=dust_gen, amin=1., amax=1000., \
+            pla=3.5)
+
+@pytest.mark.parametrize("nspecies", [1, 3, 5, 7])
+def test_settled_disk_grouped_density(nspecies):
+    # The density of each species is the sum of the densities of the grain
+    # size bins that it is made up of, so the total density is the same
+    # however the bins are grouped.
+
+    disk = settled_disk()
+
+    r = numpy.logspace(-1., numpy.log10(50.), 20)
+    theta = numpy.linspace(0.1, numpy.pi/2, 15)
+    phi = numpy.array([0., numpy.pi])
+
+    na = 20
+
+    a, rho = disk.density(r, theta, phi, na=na)
+    group_a, group_rho = disk.density(r, theta, phi, na=na, \
+            nspecies=nspecies)
+
+    species = disk.species(na, nspecies=nspecies)
+
+    assert rho.shape[-1] == na
+    assert group_rho.shape[-1] == len(species) == nspecies
+    assert numpy.allclose(group_rho.sum(axis=-1), rho.sum(axis=-1), \
+            rtol=1.0e-12, atol=0.)
+
+    for j, bins in enumerate(species):
+        assert numpy.allclose(group_rho[:,:,:,j], rho[:,:,:,bins].sum(axis=-1),\
+                rtol=1.0e-12, atol=0.)
+
+    # Each species has the mass-weighted average grain size of its bins.
+
+    a, mass_frac = disk.size_bins(na)
+
+    assert numpy.allclose(group_a, [(mass_frac[bins]*a[bins]).sum() / \
+            mass_frac[bins].sum() for bins in species])
+
+@pytest.mark.parametrize("nspecies", [None, 1, 3, 7])
+def test_settled_disk_dust_species(nspecies):
+    # There is one Dust for each species, with the mass-weighted average
+    # opacities of its bins.
+
+    disk = settled_disk()
+
+    na = 20
+
+    a, mass_frac = disk.size_bins(na)
+    species = disk.species(na, nspecies=nspecies)
+
+    dust_species = disk.dust_species(na, nspecies=nspecies)
+
+    assert len(dust_species) == len(species)
+
+    for d, bins in zip(dust_species, species):
+        kabs = numpy.array([disk.dust(a[i]/1e4, disk.pla).kabs for i in bins])
+        ksca = numpy.array([disk.dust(a[i]/1e4, disk.pla).ksca for i in bins])
+
+        weights = mass_frac[bins].reshape((-1,1))
+
+        assert numpy.allclose(d.kabs, (weights*kabs).sum(axis=0) / \
+                weights.sum(), rtol=1.0e-12, atol=0.)
+        assert numpy.allclose(d.ksca, (weights*ksca).sum(axis=0) / \
+                weights.sum(), rtol=1.0e-12, atol=0.)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+from pdspy.modeling import SurrogateModel
+import pickle
+import numpy
+import copy
+import pytest
+
+george = pytest.importorskip("george")
+decomposition = pytest.importorskip("sklearn.decomposition")
+
+keys = ["logM_disk", "logM_env"]
+
+def make_surrogate(directory, ntrain=30, ncomponents=9, nposterior=5):
+    # A small surrogate model, with a PCA of random temperature structures
+    # and a Gaussian process for each component trained on random models.
+
+    numpy.random.seed(5)
+
+    params = numpy.random.uniform(-5., -2., (ntrain, len(keys)))
+    x = params.copy()
+    x[:,1] = (x[:,1] - -9.)**3
+
+    pca = decomposition.PCA(n_components=ncomponents+2)
+    y_grid = pca.fit_transform(numpy.random.normal(size=(ntrain, 99*100)))
+
+    gps, samples = [], []
+    for i in range(ncomponents):
+        kernel = numpy.var(y_grid[:,i]) * george.kernels.ExpSquaredKernel(\
+                metric=[1., 100.], ndim=len(keys))
+
+        gp = george.GP(kernel, white_noise=numpy.log(1.0e-2), \
+                fit_white_noise=True)
+        gp.compute(x)
+
+        vector = gp.get_parameter_vector()
+        samples.append(vector + numpy.random.normal(0., 0.1, (nposterior, \
+                vector.size)))
+
+        gps.append(gp)
+
+    numpy.savetxt(directory+"/keys.txt", keys, fmt="%s")
+    pickle.dump(pca, open(directory+"/pca.pkl", "wb"))
+    numpy.save(directory+"/transformed_data.npy", y_grid)
+    pickle.dump(gps, open(directory+"/gps.pkl", "wb"))
+    for i in range(ncomponents):
+        numpy.save(directory+"/gp_samples_component{0:d}.pkl.npy".format(i), \
+                samples[i])
+
+    return [{keys[0]:p[0], keys[1]:p[1]} for p in \
+            numpy.random.uniform(-5., -2., (4, len(keys)))]
+
+@pytest.mark.parametrize("nsamples", [1, 3])
+def test_conditioned_sample(tmp_path, monkeypatch, nsamples):
+    # Draws from the Gaussian processes conditioned ahead of time should
+    # have the mean and variance of a fresh Gaussian process with the same
+    # hyperparameters.
+
+    params = make_surrogate(str(tmp_path))
+
+    surrogate = SurrogateModel(directory=str(tmp_path), nsamples=nsamples)
+    original = pickle.load(open(str(tmp_path / "gps.pkl"), "rb"))
+
+    x = numpy.array([[(p[k] - -9.)**3 if k == "logM_env" else p[k] for k in \
+            keys] for p in params])
+
+    for i in range(surrogate.ncomponents):
+        assert len(surrogate.conditioned[i]) == nsamples
+
+        monkeypatch.setattr(numpy.random, "randint", lambda n: nsamples-1)
+
+        gp = copy.deepcopy(original[i])
+        gp.set_parameter_vector(surrogate.conditioned[i][nsamples-1].\
+                get_parameter_vector())
+        gp.recompute()
+        mu, var = gp.predict(surrogate.y_grid[:,i], x, return_var=True)
+
+        for draw, expected in [(0., mu), (1., mu + numpy.sqrt(var))]:
+            monkeypatch.setattr(numpy.random, "normal", lambda size: \
+                    numpy.repeat(draw, size))
+
+            assert numpy.allclose(surrogate.sample(i, x), expected, \
+                    rtol=1.0e-10, atol=1.0e-12)
+
+        monkeypatch.undo()
+
+    # And the whole prediction should have the right shape.
+
+    assert surrogate.predict(params).shape == (len(params), 99, 100, 1)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import pdspy.modeling as modeling
+import multiprocessing
+import tempfile
+import numpy
+import os
+
+def test_run_disk_model_thermal_cache():
+    # Stand in for the RADMC-3D thermal calculation, and count how many times
+    # it is actually run.
+
+    YSOModel = modeling.YSOModel
+    run_thermal_radmc3d = YSOModel.run_thermal_radmc3d
+
+    calls = []
+    def fake_run_thermal_radmc3d(self, **keywords):
+        calls.append(1)
+        self.grid.temperature = [numpy.full(density.shape, 20.) for \
+                density in self.grid.density]
+
+    parameters = modeling.check_parameters({})
+    parameters["i"] = dict(parameters["i"], fixed=False)
+
+    data = {"file":[]}
+
+    original_dir = os.getcwd()
+
+    # run_disk_model returns to the directory in $PWD when it is done.
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.environ["PWD"] = directory
+        YSOModel.run_thermal_radmc3d = fake_run_thermal_radmc3d
+
+        try:
+            # Run the same thermal structure twice, once with a different
+            # viewing geometry, and then a different one, with a relative
+            # path for the cache.
+
+            for i in [45., 60.]:
+                params = {"i":i}
+
+                m = modeling.run_disk_model(data, data, {}, params, \
+                        parameters, False, ftcode="trift", \
+                        thermal_cache="thermal_cache.hdf5")
+
+            assert len(calls) == 1
+            assert os.path.exists(directory+"/thermal_cache.hdf5")
+            assert numpy.all(m.grid.temperature[0] == 20.)
+
+            params["logM_disk"] = -3.5
+            parameters["logM_disk"] = dict(parameters["logM_disk"], \
+                    fixed=False)
+
+            m = modeling.run_disk_model(data, data, {}, params, parameters, \
+                    False, ftcode="trift", thermal_cache="thermal_cache.hdf5")
+
+            assert len(calls) == 2
+        finally:
+            YSOModel.run_thermal_radmc3d = run_thermal_radmc3d
+            os.chdir(original_dir)
+            os.environ["PWD"] = original_dir
+
+def add_models(args):
+    filename, rank = args
+
+    cache = modeling.ThermalCache(filename)
+    for i in range(5):
+        cache.add({"logM_disk":-4. + 0.1*rank + 0.01*i}, \
+                [numpy.full((20,20,2), float(rank))])
+
+def test_concurrent_writes():
+    # Several processes writing to the cache at once should wait for each
+    # other, rather than losing their models.
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = directory+"/thermal_cache.hdf5"
+
+        with multiprocessing.Pool(4) as pool:
+            pool.map(add_models, [(filename, rank) for rank in range(8)])
+
+        cache = modeling.ThermalCache(filename)
+        for rank in range(8):
+            for i in range(5):
+                temperature = cache.get({"logM_disk":-4. + 0.1*rank + 0.01*i})
+
+                assert temperature != None
+                assert numpy.all(temperature[0] == rank)
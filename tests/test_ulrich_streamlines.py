@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+from scipy.optimize import brenth
+import importlib
+import numpy
+
+ulrich_streamlines = importlib.import_module(\
+        "pdspy.modeling.ulrich_streamlines")
+
+def test_streamline_mu0():
+    # The closed form solution should match brenth, both inside and outside of
+    # the centrifugal radius, and above and below the midplane. The physical
+    # root is the only one between mu and sign(mu).
+
+    rcent = 30.
+    r = numpy.logspace(-1., 3., 13)
+    theta = numpy.linspace(0.01, numpy.pi - 0.01, 16)
+
+    mu0 = ulrich_streamlines.streamline_mu0(r, theta, rcent)
+
+    assert mu0.shape == (r.size, theta.size, 1)
+
+    func = lambda mu0, r, mu: mu0**3 - mu0*(1 - r/rcent) - mu*(r/rcent)
+
+    for i in range(r.size):
+        for j in range(theta.size):
+            mu = numpy.cos(theta[j])
+            if mu > 0:
+                expected = brenth(func, mu, 1., args=(r[i], mu))
+            else:
+                expected = brenth(func, -1., mu, args=(r[i], mu))
+
+            assert abs(mu0[i,j,0] - expected) < 1.0e-8, (r[i], theta[j])
+
+def test_streamline_mu0_shapes():
+    # Grids that split the same values differently between r and theta
+    # shouldn't share a cached solution.
+
+    values = numpy.array([1., 2., 0.5, 0.7])
+
+    mu0 = ulrich_streamlines.streamline_mu0(values[0:3], values[3:], 30.)
+    assert mu0.shape == (3, 1, 1)
+
+    mu0 = ulrich_streamlines.streamline_mu0(values[0:2], values[2:], 30.)
+    assert mu0.shape == (2, 2, 1)
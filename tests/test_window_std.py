@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import pdspy.imaging as im
+import importlib
+import warnings
+import numpy
+import pytest
+
+libimaging = importlib.import_module("pdspy.imaging.libimaging")
+
+def make_cube(ny=40, nx=36, nfreq=3, npol=2):
+    # Noise with a different level in each channel and polarization, and a
+    # gradient across the image, with a block of NaNs and some scattered
+    # NaN pixels.
+
+    numpy.random.seed(2)
+
+    y, x = numpy.mgrid[0:ny,0:nx]
+
+    cube = numpy.empty((ny, nx, nfreq, npol))
+    for k in range(nfreq):
+        for l in range(npol):
+            cube[:,:,k,l] = (1. + k + 0.5*l + x/nx) * \
+                    numpy.random.normal(size=(ny, nx)) + 100.*(k + 1)
+
+    cube[5:17,8:20,:,:] = numpy.nan
+    cube[numpy.random.uniform(size=cube.shape) < 0.05] = numpy.nan
+
+    # A whole plane of NaNs should give NaNs, rather than fail.
+
+    cube[:,:,nfreq-1,npol-1] = numpy.nan
+
+    return cube
+
+def brute_force_std(plane, halfbox):
+    ny, nx = plane.shape
+
+    std = numpy.full(plane.shape, numpy.nan)
+    for i in range(ny):
+        for j in range(nx):
+            window = plane[max(0,i-halfbox):i+halfbox,\
+                    max(0,j-halfbox):j+halfbox]
+            if numpy.isfinite(window).any():
+                std[i,j] = numpy.nanstd(window)
+
+    return std
+
+def brute_force_mad(plane, halfbox, i, j):
+    # Boxes entirely inside the NaN block give NaN.
+
+    window = plane[max(0,i-halfbox):i+halfbox,max(0,j-halfbox):j+halfbox]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+
+        return 1.4826 * numpy.nanmedian(numpy.abs(window - \
+                numpy.nanmedian(window)))
+
+@pytest.mark.parametrize("halfbox", [1, 3, 8, 50])
+def test_window_std(halfbox):
+    cube = make_cube()
+
+    for k in range(cube.shape[2]):
+        for l in range(cube.shape[3]):
+            expected = brute_force_std(cube[:,:,k,l], halfbox)
+            std = libimaging.window_std(cube[:,:,k,l], halfbox)
+
+            # Boxes with a single good pixel have zero variance, which the
+            # differenced sums only get to within rounding.
+
+            assert numpy.array_equal(numpy.isnan(std), numpy.isnan(expected))
+            assert numpy.allclose(std, expected, rtol=1.0e-8, atol=1.0e-6, \
+                    equal_nan=True)
+
+def test_window_mad():
+    # On the grid points the robust estimate isn't interpolated, so it should
+    # match the median absolute deviation of the box exactly.
+
+    plane = make_cube()[:,:,0,0]
+    halfbox, step = 4, 3
+
+    mad = libimaging.window_mad(plane, halfbox, step)
+
+    for i in range(0, plane.shape[0], step):
+        for j in range(0, plane.shape[1], step):
+            assert numpy.isclose(mad[i,j], brute_force_mad(plane, halfbox, \
+                    i, j), rtol=1.0e-12, equal_nan=True)
+
+@pytest.mark.parametrize("robust", [False, True])
+def test_set_uncertainty_from_image(robust):
+    # Every channel and polarization should be filled in, with the box size
+    # that was asked for.
+
+    cube = make_cube()
+    residuals = im.Image(cube)
+
+    image = im.Image(numpy.zeros(cube.shape))
+    image.set_uncertainty_from_image(residuals, box=12, robust=robust)
+
+    assert image.unc.shape == cube.shape
+
+    for k in range(cube.shape[2]):
+        for l in range(cube.shape[3]):
+            if robust:
+                expected = libimaging.window_mad(cube[:,:,k,l], 6, 3)
+            else:
+                expected = brute_force_std(cube[:,:,k,l], 6)
+
+            assert numpy.allclose(image.unc[:,:,k,l], expected, \
+                    rtol=1.0e-8, atol=1.0e-6, equal_nan=True)